@@ -0,0 +1,114 @@
+import numpy as np
+
+from geocodage import RAYON_TERRE_KM
+
+# --- Affectation par lots des commandes prêtes aux livreurs ---
+# En dispatch géographique, chaque commande prête est proposée à ses livreurs les plus
+# proches dès qu'elle arrive, et le premier livreur qui accepte l'emporte : quand
+# plusieurs commandes sont prêtes en même temps, un livreur peut prendre une commande
+# lointaine alors qu'une autre l'attendait au coin de la rue. Avec UBEREATS_DISPATCH=lots,
+# le manager regroupe les commandes prêtes pendant FENETRE_LOT_S, puis choisit ensemble
+# un livreur par commande en minimisant le coût total (algorithme hongrois sur une
+# matrice livreurs x commandes calculée avec NumPy). Chaque livreur ne reçoit que la
+# commande qui lui a été attribuée ; sans réponse, le dispatch géographique reprend.
+# Partagé par les deux POC (redis_manager.py, mongo_manager.py) ; NumPy n'est requis
+# qu'avec ce mode.
+FENETRE_LOT_S = 1.0       # Durée de regroupement des commandes prêtes
+NB_CANDIDATS_LOT = 10     # Livreurs disponibles les plus proches retenus par commande
+VITESSE_KMH = 15          # Vitesse moyenne d'un livreur en ville
+POIDS_ATTENTE = 1.0       # Minutes de trajet qu'une minute d'attente de la commande compense
+DISTANCE_MAX_KM = 25      # Au-delà, un livreur n'est pas affecté (dernier rayon du dispatch)
+COUT_INTERDIT = 1e9       # Coût d'un couple livreur/commande exclu
+
+
+def matrice_distances(positions_livreurs, positions_commandes):
+    """Distances (km, haversine) entre chaque livreur (lignes) et chaque commande (colonnes)."""
+    livreurs = np.radians(np.asarray(positions_livreurs, dtype=float).reshape(-1, 2))
+    commandes = np.radians(np.asarray(positions_commandes, dtype=float).reshape(-1, 2))
+    lon1, lat1 = livreurs[:, 0:1], livreurs[:, 1:2]
+    lon2, lat2 = commandes[:, 0], commandes[:, 1]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def matrice_couts(distances, attentes_s):
+    """
+    Coût (minutes) de l'affectation de chaque livreur à chaque commande : son trajet
+    jusqu'au restaurant, moins le temps que la commande a déjà passé à attendre. Quand
+    les livreurs manquent, les commandes les plus anciennes sont servies d'abord.
+    """
+    couts = distances / VITESSE_KMH * 60 - POIDS_ATTENTE * np.asarray(attentes_s, dtype=float) / 60
+    couts[distances > DISTANCE_MAX_KM] = COUT_INTERDIT
+    return couts
+
+
+def hongrois(couts):
+    """
+    Affectation de coût minimal d'une matrice n x m avec n <= m : chaque ligne reçoit
+    une colonne distincte. Renvoie la colonne de chaque ligne. Algorithme hongrois par
+    plus courts chemins augmentants (Jonker-Volgenant) : une ligne est ajoutée à chaque
+    étape, les opérations sur les colonnes sont vectorisées, en O(n^2 x m) au pire.
+    """
+    n, m = couts.shape
+    u, v = np.zeros(n), np.zeros(m)           # Potentiels (duaux) des lignes et colonnes
+    ligne_de = np.full(m, -1)                 # Ligne affectée à chaque colonne
+    colonne_de = np.full(n, -1)
+    precedent = np.full(m, -1)                # Ligne par laquelle on atteint chaque colonne
+    for ligne in range(n):
+        # Plus court chemin (coûts réduits) de la nouvelle ligne vers une colonne libre
+        plus_court = np.full(m, np.inf)
+        v_restant = v.copy()                  # -inf sur les colonnes déjà atteintes
+        colonnes_vues, distances_vues = [], []
+        i, minimum, puits = ligne, 0.0, -1
+        while puits < 0:
+            reduit = couts[i] - v_restant + (minimum - u[i])
+            mieux = reduit < plus_court
+            precedent[mieux] = i
+            plus_court[mieux] = reduit[mieux]
+            j = int(np.argmin(plus_court))
+            minimum = plus_court[j]
+            colonnes_vues.append(j)
+            distances_vues.append(minimum)
+            plus_court[j], v_restant[j] = np.inf, -np.inf
+            if ligne_de[j] < 0:
+                puits = j
+            else:
+                i = ligne_de[j]
+        # Mise à jour des potentiels le long de l'arbre exploré, puis augmentation
+        colonnes_vues, distances_vues = np.array(colonnes_vues), np.array(distances_vues)
+        u[ligne] += minimum
+        u[ligne_de[colonnes_vues[:-1]]] += minimum - distances_vues[:-1]
+        v[colonnes_vues] -= minimum - distances_vues
+        j = puits
+        while True:
+            i = precedent[j]
+            ligne_de[j] = i
+            colonne_de[i], j = j, colonne_de[i]
+            if i == ligne:
+                break
+    return colonne_de
+
+
+def resoudre_affectation(couts):
+    """Couples (ligne, colonne) d'une affectation de coût minimal, quelle que soit la forme de la matrice."""
+    if couts.size == 0:
+        return []
+    if couts.shape[0] <= couts.shape[1]:
+        return list(enumerate(hongrois(couts).tolist()))
+    return [(ligne, colonne) for colonne, ligne in enumerate(hongrois(couts.T).tolist())]
+
+
+def affecter_lot(positions_livreurs, positions_commandes, attentes_s):
+    """
+    Affecte au mieux des livreurs (positions) aux commandes d'un lot (positions des
+    restaurants, secondes d'attente depuis qu'elles sont prêtes). Renvoie les triplets
+    (indice du livreur, indice de la commande, distance en km) ; une commande sans
+    livreur à moins de DISTANCE_MAX_KM reste sans affectation.
+    """
+    if not len(positions_livreurs) or not len(positions_commandes):
+        return []
+    distances = matrice_distances(positions_livreurs, positions_commandes)
+    couts = matrice_couts(distances, attentes_s)
+    return [(livreur, commande, float(distances[livreur, commande]))
+            for livreur, commande in resoudre_affectation(couts)
+            if couts[livreur, commande] < COUT_INTERDIT]
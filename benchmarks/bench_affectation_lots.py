@@ -0,0 +1,72 @@
+"""
+Benchmark de l'affectation des commandes prêtes aux livreurs, par lots de N commandes
+prêtes en même temps et N livreurs disponibles répartis dans Paris :
+  - diffusion : chaque commande est prise par un livreur disponible quelconque (le
+                premier à répondre à une offre diffusée à tous) ;
+  - geo       : dans l'ordre d'arrivée, chaque commande est prise par le livreur
+                disponible le plus proche (le meilleur cas du dispatch géographique) ;
+  - lots      : affectation.affecter_lot (matrice de coûts NumPy, algorithme hongrois).
+Mesure la distance totale parcourue par les livreurs jusqu'aux restaurants (le trajet
+restaurant -> client ne dépend pas du livreur choisi), la distance au pire (p95) et
+le temps de calcul de l'affectation (matrice comprise).
+
+Usage : python benchmarks/bench_affectation_lots.py [taille_lot ...]
+(nécessite NumPy ; aucune base de données)
+"""
+import sys
+import math
+import time
+
+import numpy as np
+
+import outils_bench
+from geocodage import CENTRES_VILLES
+from affectation import FENETRE_LOT_S, affecter_lot, matrice_distances
+
+TAILLES = [int(t) for t in sys.argv[1:]] or [100, 500, 1000]
+RAYON_ZONE_KM = 12
+
+
+def positions_paris(aleatoire, nombre):
+    """'nombre' positions uniformes dans un disque autour du centre de Paris."""
+    longitude, latitude = CENTRES_VILLES["paris"]
+    distance = RAYON_ZONE_KM * np.sqrt(aleatoire.random(nombre))
+    angle = aleatoire.uniform(0, 2 * math.pi, nombre)
+    return np.column_stack((longitude + distance * np.cos(angle) / (111.32 * math.cos(math.radians(latitude))),
+                            latitude + distance * np.sin(angle) / 111.32))
+
+
+def glouton(distances, aleatoire=None):
+    """Commandes servies dans l'ordre : le livreur le plus proche encore libre (ou un livreur au hasard)."""
+    libres = np.ones(distances.shape[0], dtype=bool)
+    retenues = []
+    for commande in range(distances.shape[1]):
+        if aleatoire is None:
+            livreur = int(np.argmin(np.where(libres, distances[:, commande], np.inf)))
+        else:
+            livreur = int(aleatoire.choice(np.flatnonzero(libres)))
+        libres[livreur] = False
+        retenues.append(distances[livreur, commande])
+    return retenues
+
+
+def mesurer(mode, taille, aleatoire):
+    livreurs, commandes = positions_paris(aleatoire, taille), positions_paris(aleatoire, taille)
+    attentes = aleatoire.uniform(0, FENETRE_LOT_S, taille)
+    debut = time.perf_counter()
+    if mode == "lots":
+        retenues = [d for _, _, d in affecter_lot(livreurs, commandes, attentes)]
+    else:
+        retenues = glouton(matrice_distances(livreurs, commandes), aleatoire if mode == "diffusion" else None)
+    duree_ms = (time.perf_counter() - debut) * 1000
+    return [mode, f"{taille}x{taille}", len(retenues), round(sum(retenues)), round(sum(retenues) / len(retenues), 2),
+            round(outils_bench.percentile(retenues, 95), 2), round(duree_ms, 1)]
+
+
+if __name__ == "__main__":
+    print(f"🛵 Benchmark affectation par lots : lots de {', '.join(map(str, TAILLES))} commandes et livreurs\n")
+    lignes = [mesurer(mode, taille, np.random.default_rng(42))
+              for taille in TAILLES for mode in ("diffusion", "geo", "lots")]
+    outils_bench.afficher_tableau(
+        ["Mode", "Lot (livreurs x commandes)", "Affectées", "Distance totale (km)", "Moyenne (km)",
+         "p95 (km)", "Calcul (ms)"], lignes)
@@ -0,0 +1,81 @@
+"""
+Benchmark de l'autocomplétion côté serveur (redis_index.autocompleter) :
+latence d'un ZRANGEBYLEX seul et d'une recherche complète (ZRANGEBYLEX puis
+vérification des noms en pipeline) pour des préfixes de 1 à 5 caractères, sur un
+index de 100k puis 1M noms.
+
+Usage : python benchmarks/bench_autocompletion.py [tailles, ex: 100000,1000000]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import time
+import random
+
+import outils_bench
+import redis
+from redis_index import (AUTOCOMPLETION_RESTAURANTS, INDEX_RESTAURANTS, autocompleter,
+                         membre_autocompletion, normaliser_nom)
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "100000,1000000").split(",")]
+LIMITE = 10
+NB_REQUETES = 500
+TAILLE_LOT = 5000
+MOTS = ["Pizza", "Sushi", "Le", "La", "Bistrot", "Chez", "Café", "Burger", "Ramen", "Tacos", "Grill", "Maison"]
+
+r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def remplir(nb_noms, aleatoire):
+    """Restaurants 'rest_XXXXXXX' (Hash avec leur nom) et leur index d'autocomplétion."""
+    r.flushdb()
+    noms = []
+    pipe = r.pipeline(transaction=False)
+    membres = {}
+    for i in range(nb_noms):
+        rest_id = f"rest_{i:07d}"
+        nom = " ".join(aleatoire.choice(MOTS) for _ in range(3)) + f" {aleatoire.randrange(1_000_000)}"
+        noms.append(nom)
+        pipe.hset(f"restaurant:{rest_id}", "nom", nom)
+        membres[membre_autocompletion(nom, rest_id)] = 0
+        if len(membres) >= TAILLE_LOT:
+            pipe.sadd(INDEX_RESTAURANTS, *[membre.rpartition("\x00")[2] for membre in membres])
+            pipe.zadd(AUTOCOMPLETION_RESTAURANTS, membres)
+            pipe.execute()
+            membres = {}
+    if membres:
+        pipe.sadd(INDEX_RESTAURANTS, *[membre.rpartition("\x00")[2] for membre in membres])
+        pipe.zadd(AUTOCOMPLETION_RESTAURANTS, membres)
+    pipe.execute()
+    return noms
+
+
+def latences_ms(fonction, prefixes):
+    durees = []
+    for prefixe in prefixes:
+        debut = time.perf_counter()
+        fonction(prefixe)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(outils_bench.percentile(durees, 50), 3), round(outils_bench.percentile(durees, 99), 3)
+
+
+def zrangebylex_seul(prefixe):
+    borne = normaliser_nom(prefixe).encode()
+    return r.zrangebylex(AUTOCOMPLETION_RESTAURANTS, b"[" + borne, b"[" + borne + b"\xff", start=0, num=LIMITE)
+
+
+if __name__ == "__main__":
+    print(f"🔎 Benchmark autocomplétion Redis : {TAILLES} noms, {LIMITE} résultats par requête\n")
+    aleatoire = random.Random(42)
+    lignes = []
+    for taille in TAILLES:
+        noms = remplir(taille, aleatoire)
+        for longueur in range(1, 6):
+            prefixes = [aleatoire.choice(noms)[:longueur] for _ in range(NB_REQUETES)]
+            seul = latences_ms(zrangebylex_seul, prefixes)
+            complet = latences_ms(lambda prefixe: autocompleter(r, prefixe, LIMITE), prefixes)
+            lignes.append([taille, longueur, *seul, *complet])
+
+    outils_bench.afficher_tableau(
+        ["Noms", "Longueur du préfixe", "ZRANGEBYLEX p50 (ms)", "p99 (ms)", "autocompleter p50 (ms)", "p99 (ms)"],
+        lignes)
+    r.flushdb()
@@ -0,0 +1,83 @@
+"""
+Benchmark du routage Pub/Sub des commandes vers les restaurants :
+  - canaux globaux : tous les restaurants reçoivent toutes les commandes et filtrent ;
+  - canaux par entité : commandes_restaurants:{rest_id}.
+Mesure le débit (commandes/s) et le nombre de messages livrés/décodés.
+
+Usage : python benchmarks/bench_canaux.py [nb_restaurants] [nb_commandes]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est utilisée)
+"""
+import sys
+import json
+import time
+import threading
+import multiprocessing
+
+import outils_bench
+import redis
+import redis_canaux
+
+NB_RESTAURANTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+NB_COMMANDES = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+
+def mesurer(canaux_globaux, resultats):
+    redis_canaux.CANAUX_GLOBAUX = canaux_globaux
+    compteurs = {"recus": 0, "pour_moi": 0}
+    verrou = threading.Lock()
+    prets = threading.Barrier(NB_RESTAURANTS + 1)
+
+    def restaurant(rest_id):
+        """Reproduit la boucle d'écoute de redis_restaurant.py (sans la préparation)."""
+        r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+        pubsub = r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(redis_canaux.canal_restaurant(rest_id))
+        pubsub.get_message(timeout=1)  # Attendre la confirmation d'abonnement
+        prets.wait()
+        for message in pubsub.listen():
+            data = json.loads(message['data'])
+            with verrou:
+                compteurs["recus"] += 1
+                if data.get('restaurant_id') == rest_id:
+                    compteurs["pour_moi"] += 1
+
+    for i in range(NB_RESTAURANTS):
+        threading.Thread(target=restaurant, args=(f"rest_{i:05d}",), daemon=True).start()
+    prets.wait()
+
+    r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+    debut = time.perf_counter()
+    pipe = r.pipeline(transaction=False)
+    for i in range(NB_COMMANDES):
+        rest_id = f"rest_{i % NB_RESTAURANTS:05d}"
+        pipe.publish(redis_canaux.canal_restaurant(rest_id), json.dumps({
+            "commande_id": f"cmd_bench_{i}", "restaurant_id": rest_id,
+            "plats_details": [{"id_plat": "plat_001", "quantite": 1}]
+        }))
+        if len(pipe) >= 1000:
+            pipe.execute()
+    pipe.execute()
+    while compteurs["pour_moi"] < NB_COMMANDES:
+        time.sleep(0.01)
+    duree = time.perf_counter() - debut
+
+    mode = "globaux" if canaux_globaux else "par entité"
+    resultats.put((mode, compteurs["recus"], duree))
+
+
+if __name__ == "__main__":
+    print(f"📡 Benchmark du routage : {NB_RESTAURANTS} restaurants, {NB_COMMANDES} commandes\n")
+    lignes = []
+    for canaux_globaux in (True, False):
+        file_resultats = multiprocessing.Queue()
+        p = multiprocessing.Process(target=mesurer, args=(canaux_globaux, file_resultats))
+        p.start()
+        mode, recus, duree = file_resultats.get()
+        p.terminate()
+        p.join()
+        lignes.append([mode, NB_COMMANDES, recus, round(duree, 3), round(NB_COMMANDES / duree)])
+
+    outils_bench.afficher_tableau(
+        ["Canaux", "Commandes", "Messages livrés/décodés", "Durée (s)", "Commandes/s"],
+        lignes
+    )
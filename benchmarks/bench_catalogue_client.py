@@ -0,0 +1,64 @@
+"""
+Benchmark du démarrage à froid de redis_client.py (chargement du catalogue) :
+  - actuel   : un HGETALL par restaurant (pipeline) ;
+  - snapshot : lecture du blob versionné catalogue:snapshot (deux aller-retours).
+
+Usage : python benchmarks/bench_catalogue_client.py [tailles, ex: 1000,10000,100000]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import time
+import random
+
+import outils_bench
+import redis
+from redis_index import INDEX_RESTAURANTS, VERSION_CATALOGUE
+from redis_catalogue import (SNAPSHOT_CATALOGUE, construire_catalogue, charger_catalogue, connexion_binaire,
+                             lire_entete, cle_partie)
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "1000,10000,100000").split(",")]
+REPETITIONS = 5
+MOTS = ["Pizza", "Sushi", "Le", "La", "Bistrot", "Chez", "Café", "Burger", "Ramen", "Tacos", "Grill", "Maison"]
+
+r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+r_binaire = connexion_binaire(r)
+
+
+def remplir(nb_restaurants):
+    r.flushdb()
+    aleatoire = random.Random(42)
+    pipe = r.pipeline(transaction=False)
+    for i in range(nb_restaurants):
+        nom = " ".join(aleatoire.choice(MOTS) for _ in range(3)) + f" {aleatoire.randrange(1_000_000)}"
+        pipe.hset(f"restaurant:rest_{i:07d}", mapping={"nom": nom, "adresse": f"{i} rue du Test, 75011 Paris"})
+        pipe.sadd(INDEX_RESTAURANTS, f"rest_{i:07d}")
+        if len(pipe) >= 10_000:
+            pipe.execute()
+    pipe.incr(VERSION_CATALOGUE)
+    pipe.execute()
+
+
+def mesurer_ms(fonction, *args):
+    durees = []
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction(*args)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(outils_bench.percentile(durees, 50), 1)
+
+
+if __name__ == "__main__":
+    print(f"🚀 Benchmark démarrage du client : {TAILLES} restaurants\n")
+    lignes = []
+    for taille in TAILLES:
+        remplir(taille)
+        actuel = mesurer_ms(construire_catalogue, r)
+        charger_catalogue(r, r_binaire)  # Écrit le snapshot
+        snapshot = mesurer_ms(charger_catalogue, r, r_binaire)
+        version, nb_parties = lire_entete(r_binaire.get(SNAPSHOT_CATALOGUE))
+        taille_blob = sum(r_binaire.strlen(cle_partie(version, n)) for n in range(nb_parties)) / (1024 * 1024)
+        lignes.append([taille, actuel, snapshot, round(actuel / snapshot, 1), round(taille_blob, 2)])
+
+    outils_bench.afficher_tableau(
+        ["Restaurants", "Actuel (ms)", "Snapshot (ms)", "Gain", "Snapshot (Mo)"], lignes)
+    r.flushdb()
@@ -0,0 +1,83 @@
+"""
+Benchmark de la conversion en parallèle de nombreux fichiers partenaires :
+txt_to_csv.convertir_txt_en_csv puis csv_to_json.convertir_fichiers, avec
+1, 2, 4... processus jusqu'au nombre de cœurs. Vérifie aussi que les fichiers
+produits sont identiques à ceux de la conversion en série.
+
+Usage : python benchmarks/bench_conversion.py [nb_fichiers] [plats_par_fichier] [processus, ex: 1,2,4]
+"""
+import io
+import os
+import sys
+import time
+import filecmp
+import tempfile
+import contextlib
+
+import outils_bench
+import txt_to_csv
+import csv_to_json
+
+NB_FICHIERS = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+PLATS_PAR_FICHIER = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+NB_COEURS = os.cpu_count() or 1
+NIVEAUX = ([int(n) for n in sys.argv[3].split(",")] if len(sys.argv) > 3
+           else sorted({1, *[n for n in (2, 4, 8, 16, 32) if n < NB_COEURS], NB_COEURS}))
+
+
+def preparer_fichiers(dossier):
+    """Écrit NB_FICHIERS fichiers plats_XXX.txt (format de dataset_txt/plats.txt)."""
+    modele = os.path.join(dossier, "modele")
+    outils_bench.generer_dataset_txt(modele, PLATS_PAR_FICHIER, nb_livreurs=0)
+    with open(os.path.join(modele, "plats.txt"), encoding="utf-8") as f:
+        contenu = f.read()
+    os.makedirs(os.path.join(dossier, "dataset_txt"))
+    fichiers = []
+    for i in range(NB_FICHIERS):
+        fichiers.append(os.path.join("dataset_txt", f"plats_{i:03d}.txt"))
+        with open(os.path.join(dossier, fichiers[-1]), "w", encoding="utf-8") as f:
+            f.write(contenu)
+    return fichiers
+
+
+def convertir(fichiers, nb_workers, destination):
+    """Conversion TXT -> CSV -> JSON complète ; renvoie (durée TXT -> CSV, durée CSV -> JSON) en s."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        debut = time.perf_counter()
+        txt_to_csv.convertir_txt_en_csv(fichiers, destination, nb_workers)
+        milieu = time.perf_counter()
+        conversions = [(os.path.join(destination, os.path.basename(f)[:-4] + ".csv"), os.path.basename(f)[:-4] + ".json")
+                       for f in fichiers]
+        csv_to_json.convertir_fichiers(conversions, nb_workers)
+        fin = time.perf_counter()
+    return milieu - debut, fin - milieu
+
+
+if __name__ == "__main__":
+    print(f"⚙️  Benchmark conversion : {NB_FICHIERS} fichiers de {PLATS_PAR_FICHIER} plats, processus {NIVEAUX}\n")
+    lignes = []
+    with tempfile.TemporaryDirectory() as dossier:
+        os.chdir(dossier)  # csv_to_json écrit dans ./dataset_json
+        fichiers = preparer_fichiers(dossier)
+        reference = None
+        for nb_workers in NIVEAUX:
+            destination = f"csv_{nb_workers}"
+            duree_csv, duree_json = convertir(fichiers, nb_workers, destination)
+            os.rename("dataset_json", f"json_{nb_workers}")
+            if reference is None:
+                reference, duree_serie = nb_workers, duree_csv + duree_json
+                identiques = "référence"
+            else:
+                identiques = "oui"
+                for prefixe in ("csv", "json"):
+                    dossier_reference, dossier_essai = f"{prefixe}_{reference}", f"{prefixe}_{nb_workers}"
+                    _, differents, erreurs = filecmp.cmpfiles(dossier_reference, dossier_essai,
+                                                              os.listdir(dossier_reference), shallow=False)
+                    if differents or erreurs:
+                        identiques = "NON"
+            lignes.append([nb_workers, round(duree_csv, 2), round(duree_json, 2),
+                           round(duree_serie / (duree_csv + duree_json), 2), identiques])
+        os.chdir(outils_bench.RACINE)
+
+    outils_bench.afficher_tableau(["Processus", "TXT -> CSV (s)", "CSV -> JSON (s)", "Accélération", "Fichiers identiques"],
+                                  lignes)
@@ -0,0 +1,116 @@
+"""
+Benchmark du dispatch des offres de livraison avec 10k livreurs disponibles :
+  - diffusion : une offre publiée sur 'offres_livraisons', reçue et décodée par
+                chaque livreur ; le premier qui accepte l'emporte, où qu'il soit ;
+  - geo       : redis_geo.solliciter_livreurs (GEOSEARCH + PUBLISH sur le canal des
+                NB_LIVREURS_CIBLES plus proches, dans un script Lua), rayon élargi
+                tant qu'aucun livreur sollicité n'accepte.
+Mesure la latence du dispatch côté manager, le nombre de messages reçus par les
+livreurs et le temps CPU qu'ils passent à les décoder, et la distance entre le
+restaurant et le livreur retenu. L'acceptation d'une offre est tirée au hasard
+(PROBA_ACCEPTATION), le livreur retenu quitte l'index des disponibles.
+
+Usage : python benchmarks/bench_dispatch_geo.py [nb_livreurs] [nb_offres]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import json
+import math
+import time
+import random
+
+import outils_bench
+import redis
+from geocodage import CENTRES_VILLES, distance_km, geocoder
+from redis_geo import CLE_LIVREURS_DISPONIBLES, RAYONS_KM, solliciter_livreurs, retirer_livreur
+
+NB_LIVREURS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+NB_OFFRES = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+PROBA_ACCEPTATION = 0.8
+RAYON_ZONE_KM = 12      # Livreurs répartis dans un disque autour du centre de Paris
+NB_OFFRES_DECODEES = 20  # Offres dont on décode réellement les NB_LIVREURS copies
+TAILLE_LOT = 5000
+
+r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def placer_livreurs(aleatoire):
+    """NB_LIVREURS positions uniformes dans la zone, ajoutées à l'index des disponibles."""
+    r.flushdb()
+    longitude, latitude = CENTRES_VILLES["paris"]
+    positions = {}
+    for i in range(NB_LIVREURS):
+        distance, angle = RAYON_ZONE_KM * math.sqrt(aleatoire.random()), aleatoire.uniform(0, 2 * math.pi)
+        positions[f"livr_{i:05d}"] = (longitude + distance * math.cos(angle) / (111.32 * math.cos(math.radians(latitude))),
+                                      latitude + distance * math.sin(angle) / 111.32)
+    elements = [valeur for livreur_id, (lon, lat) in positions.items() for valeur in (lon, lat, livreur_id)]
+    for debut in range(0, len(elements), 3 * TAILLE_LOT):
+        r.geoadd(CLE_LIVREURS_DISPONIBLES, elements[debut:debut + 3 * TAILLE_LOT])
+    return positions
+
+
+def offres(aleatoire):
+    for i in range(NB_OFFRES):
+        adresse = f"{i} Rue du Benchmark, 750{aleatoire.randint(1, 20):02d} Paris"
+        yield {"commande_id": f"cmd_bench_{i:05d}", "restaurant_adresse": adresse, "client_adresse": "N/A",
+               "position_restaurant": geocoder(adresse), "retribution": "8€"}
+
+
+def cout_decodage_ms(message, nb_livreurs):
+    """Temps CPU total de nb_livreurs décodages du message (un par livreur qui le reçoit)."""
+    debut = time.process_time()
+    for _ in range(nb_livreurs):
+        json.loads(message)
+    return (time.process_time() - debut) * 1000
+
+
+def mesurer(mode, aleatoire):
+    positions = placer_livreurs(aleatoire)
+    disponibles = list(positions)
+    durees, messages, decodage, distances, premier_tour = [], 0, [], [], 0
+    for n, offre in enumerate(offres(aleatoire)):
+        if mode == "diffusion":
+            message = json.dumps(offre)
+            debut = time.perf_counter()
+            r.publish("offres_livraisons", message)
+            durees.append((time.perf_counter() - debut) * 1000)
+            messages += len(disponibles)
+            if n < NB_OFFRES_DECODEES:
+                decodage.append(cout_decodage_ms(message, len(disponibles)))
+            # Le premier livreur à accepter gagne la course, quelle que soit sa position
+            gagnant = disponibles.pop(aleatoire.randrange(len(disponibles)))
+            premier_tour += 1
+        else:
+            gagnant, duree, tour = None, 0.0, 0
+            while gagnant is None and tour < len(RAYONS_KM):
+                debut = time.perf_counter()
+                cibles, _ = solliciter_livreurs(r, offre["commande_id"], offre, offre["position_restaurant"], RAYONS_KM[tour])
+                duree += time.perf_counter() - debut
+                messages += len(cibles)
+                if n < NB_OFFRES_DECODEES:
+                    decodage.append(cout_decodage_ms(json.dumps(offre), len(cibles)))
+                acceptants = [livreur_id for livreur_id, _ in cibles if aleatoire.random() < PROBA_ACCEPTATION]
+                if acceptants:
+                    gagnant = aleatoire.choice(acceptants)
+                    premier_tour += tour == 0
+                tour += 1
+            durees.append(duree * 1000)
+            if gagnant is None:
+                continue
+            retirer_livreur(r, gagnant)
+            disponibles.remove(gagnant)
+        distances.append(distance_km(positions[gagnant], offre["position_restaurant"]))
+
+    return [mode, NB_LIVREURS, round(messages / NB_OFFRES, 1),
+            round(outils_bench.percentile(durees, 50), 3), round(outils_bench.percentile(durees, 99), 3),
+            round(sum(decodage) / len(decodage), 2), round(sum(distances) / len(distances), 2),
+            f"{premier_tour / NB_OFFRES:.0%}"]
+
+
+if __name__ == "__main__":
+    print(f"🛵 Benchmark dispatch : {NB_LIVREURS} livreurs disponibles, {NB_OFFRES} offres\n")
+    lignes = [mesurer(mode, random.Random(42)) for mode in ("diffusion", "geo")]
+    outils_bench.afficher_tableau(
+        ["Mode", "Livreurs", "Messages reçus / offre", "Dispatch p50 (ms)", "p99 (ms)",
+         "Décodage livreurs (ms CPU / offre)", "Distance au restaurant (km)", "Servies au 1er envoi"], lignes)
+    r.flushdb()
@@ -0,0 +1,169 @@
+"""
+Benchmark du cycle de vie d'une commande côté Redis :
+  - ancien : les appels faits par le manager et le livreur avant redis_etats.py
+             (EXISTS + MSETNX + EXPIRE du verrou, réponse au manager, puis annulation
+             de l'échéance, oubli des sollicités et notifications par le manager...) ;
+  - Lua    : une transition de redis_etats.py par étape, en un aller-retour.
+Mesure les allers-retours et la latence (p50, ms) de chaque étape, puis la course
+entre un livreur qui accepte et l'échéance qui expire au même moment : avec l'ancien
+enchaînement, les deux peuvent gagner (le livreur livre une commande annulée).
+
+Usage : python benchmarks/bench_etats_commandes.py [nb_commandes]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import json
+import sys
+import time
+import threading
+
+import outils_bench
+import redis
+from redis_canaux import canal_restaurant, publier_notification
+from redis_transport import publier
+from redis_planificateur import CLE_ECHEANCES
+from redis_geo import oublier_sollicites
+import redis_etats
+
+NB_COMMANDES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CLE_DONNEES_ANCIEN = "echeances:livraison:donnees"  # Copie des commandes à côté des échéances (ancien planificateur)
+COMMANDE = {"client_id": "client_bench", "restaurant_id": "rest_01", "adresse_client": "1 rue du Test, 75011 Paris",
+            "plats_details": [{"id_plat": "plat_01", "quantite": 1}], "total_euros": "12.50"}
+
+
+def connexion():
+    return redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+# Étapes de l'ancien enchaînement : (nom, allers-retours, fonction(r, commande_id))
+def ancien_moderer(r, commande_id):
+    publier(r, canal_restaurant("rest_01"), dict(COMMANDE, commande_id=commande_id))
+
+
+def ancien_offrir(r, commande_id):
+    pipe = r.pipeline()
+    pipe.zadd(CLE_ECHEANCES, {commande_id: time.time() + 60})
+    pipe.hset(CLE_DONNEES_ANCIEN, commande_id, json.dumps(dict(COMMANDE, commande_id=commande_id)))
+    pipe.execute()
+
+
+def ancien_reclamer(r, commande_id):
+    # Livreur : verrou puis réponse au manager
+    if r.exists(f"commande_verrou:{commande_id}"):
+        return False
+    if not r.msetnx({f"commande_verrou:{commande_id}": "livr_bench"}):
+        return False
+    pipe = r.pipeline(transaction=False)
+    pipe.expire(f"commande_verrou:{commande_id}", 60)
+    pipe.execute()
+    publier(r, "reponses_livreurs", {"commande_id": commande_id, "livreur_id": "livr_bench"})
+    # Manager : annulation de l'échéance et notification
+    pipe = r.pipeline()
+    pipe.zrem(CLE_ECHEANCES, commande_id)
+    pipe.hdel(CLE_DONNEES_ANCIEN, commande_id)
+    pipe.execute()
+    oublier_sollicites(r, commande_id)
+    publier_notification(r, {"type": "LIVREUR_ASSIGNE", "commande_id": commande_id, "livreur_id": "livr_bench",
+                             "message": "Livreur livr_bench assigné."})
+    return True
+
+
+def ancien_livrer(r, commande_id):
+    publier_notification(r, {"type": "COMMANDE_LIVREE", "commande_id": commande_id,
+                             "message": f"Votre commande {commande_id} a été livrée. Bon appétit !"})
+    r.delete(f"commande_verrou:{commande_id}")
+
+
+ETAPES_ANCIEN = [
+    ("recevoir", 0, lambda r, cid: None),
+    ("moderer", 1, ancien_moderer),
+    ("prete", 0, lambda r, cid: None),
+    ("offrir", 1, ancien_offrir),
+    ("reclamer", 7, ancien_reclamer),
+    ("livrer", 2, ancien_livrer),
+]
+ETAPES_LUA = [
+    ("recevoir", 1, lambda r, cid: redis_etats.recevoir(r, cid, dict(COMMANDE, commande_id=cid))),
+    ("moderer", 1, lambda r, cid: redis_etats.moderer(r, cid, True, dict(COMMANDE, commande_id=cid),
+                                                      canal_restaurant("rest_01"))),
+    ("prete", 1, lambda r, cid: redis_etats.marquer_prete(r, cid, dict(COMMANDE, commande_id=cid))),
+    ("offrir", 1, lambda r, cid: redis_etats.offrir(r, cid, 0, 60, dict(COMMANDE, commande_id=cid))),
+    ("reclamer", 1, lambda r, cid: redis_etats.reclamer(r, [cid], "livr_bench")),
+    ("livrer", 1, lambda r, cid: redis_etats.livrer(r, cid, "livr_bench")),
+]
+
+
+def mesurer_cycle(r, nom, etapes):
+    """Fait passer NB_COMMANDES commandes par toutes les étapes ; renvoie une ligne par étape."""
+    durees = {etape: [] for etape, _, _ in etapes}
+    for i in range(NB_COMMANDES):
+        commande_id = f"cmd_bench_{nom}_{i}"
+        for etape, _, fonction in etapes:
+            debut = time.perf_counter()
+            fonction(r, commande_id)
+            durees[etape].append((time.perf_counter() - debut) * 1000)
+    lignes = [[nom, etape, allers_retours, round(outils_bench.percentile(durees[etape], 50), 2)]
+              for etape, allers_retours, _ in etapes]
+    total = sum(sum(d) for d in durees.values()) / NB_COMMANDES
+    lignes.append([nom, "cycle complet", sum(a for _, a, _ in etapes), round(total, 2)])
+    return lignes
+
+
+def mesurer_course(nom, reclamer, expirer):
+    """
+    Pour chaque commande, un livreur accepte pendant que l'échéance expire (deux threads
+    démarrés ensemble). Renvoie le nombre de commandes assignées ET annulées.
+    """
+    conflits = 0
+    for i in range(NB_COMMANDES):
+        commande_id = f"cmd_course_{nom}_{i}"
+        preparation = connexion()
+        if nom == "Lua":
+            redis_etats.recevoir(preparation, commande_id, COMMANDE)
+            redis_etats.moderer(preparation, commande_id, True, COMMANDE, canal_restaurant("rest_01"))
+            redis_etats.marquer_prete(preparation, commande_id, COMMANDE)
+            redis_etats.offrir(preparation, commande_id, 0, 0, COMMANDE)
+        else:
+            preparation.zadd(CLE_ECHEANCES, {commande_id: time.time()})
+        depart, resultats = threading.Barrier(2), {}
+
+        def executer(cle, fonction):
+            r = connexion()
+            depart.wait()
+            resultats[cle] = fonction(r, commande_id)
+
+        fils = [threading.Thread(target=executer, args=("reclamee", reclamer)),
+                threading.Thread(target=executer, args=("annulee", expirer))]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+        conflits += bool(resultats["reclamee"] and resultats["annulee"])
+    return conflits
+
+
+def ancien_expirer(r, commande_id):
+    # Planificateur : ZREM (prise de l'échéance), puis le manager annule sans voir le verrou
+    if r.zrem(CLE_ECHEANCES, commande_id) != 1:
+        return False
+    oublier_sollicites(r, commande_id)
+    publier_notification(r, {"type": "AUCUN_LIVREUR", "commande_id": commande_id, "message": "Commande annulée."})
+    return True
+
+
+def lua_expirer(r, commande_id):
+    return r.zrem(CLE_ECHEANCES, commande_id) == 1 and redis_etats.expirer(r, [commande_id])
+
+
+if __name__ == "__main__":
+    r = connexion()
+    r.flushdb()
+    print(f"📦 Benchmark du cycle de vie de {NB_COMMANDES} commandes (ancien enchaînement vs transitions Lua)\n")
+    lignes = mesurer_cycle(r, "ancien", ETAPES_ANCIEN) + mesurer_cycle(r, "Lua", ETAPES_LUA)
+    outils_bench.afficher_tableau(["Version", "Étape", "Allers-retours", "Latence p50 (ms)"], lignes)
+
+    print(f"\nCourse acceptation / timeout sur {NB_COMMANDES} commandes :")
+    outils_bench.afficher_tableau(["Version", "Commandes assignées et annulées"], [
+        ["ancien", mesurer_course("ancien", ancien_reclamer, ancien_expirer)],
+        ["Lua", mesurer_course("Lua", lambda r, cid: redis_etats.reclamer(r, [cid], "livr_bench"), lua_expirer)],
+    ])
+    r.flushdb()
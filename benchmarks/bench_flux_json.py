@@ -0,0 +1,69 @@
+"""
+Benchmark de la lecture du catalogue JSON avant l'import MongoDB :
+  - json.load        : le fichier entier est chargé en mémoire (ancien json_to_mongo.py) ;
+  - flux_json        : lecture au fil de l'eau, un élément à la fois.
+Chaque mode tourne dans un processus séparé pour mesurer sa mémoire maximale (RSS).
+La mémoire de json.load croît avec le fichier, celle de flux_json reste plate.
+
+Usage : python benchmarks/bench_flux_json.py [tailles en plats, ex: 100000,1000000]
+"""
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import multiprocessing
+
+import outils_bench
+from flux_json import lire_elements
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "100000,1000000").split(",")]
+
+
+def lire_tout(chemin):
+    with open(chemin, "r", encoding="utf-8") as f:
+        donnees = json.load(f)
+    return sum(len(elements) for elements in donnees.values())
+
+
+def lire_en_flux(chemin):
+    return sum(1 for _ in lire_elements(chemin))
+
+
+def mesurer(fonction, chemin, file_resultats):
+    """Exécuté dans un processus fils : (éléments lus, durée en s, RSS max en Mo)."""
+    debut = time.perf_counter()
+    nb_elements = fonction(chemin)
+    duree = time.perf_counter() - debut
+    rss_max = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ko sous Linux
+    file_resultats.put((nb_elements, duree, rss_max))
+
+
+def executer(fonction, chemin):
+    contexte = multiprocessing.get_context("spawn")
+    file_resultats = contexte.Queue()
+    processus = contexte.Process(target=mesurer, args=(fonction, chemin, file_resultats))
+    processus.start()
+    resultat = file_resultats.get()
+    processus.join()
+    return resultat
+
+
+if __name__ == "__main__":
+    print(f"📄 Benchmark json.load / flux_json : catalogues de {TAILLES} plats\n")
+    lignes = []
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_plats in TAILLES:
+            chemin = os.path.join(dossier, f"catalogue_{nb_plats}.json")
+            outils_bench.generer_catalogue(chemin, nb_plats)
+            taille_mo = os.path.getsize(chemin) / (1024 * 1024)
+            for nom, fonction in (("json.load", lire_tout), ("flux_json", lire_en_flux)):
+                nb_elements, duree, rss_max = executer(fonction, chemin)
+                lignes.append([nb_plats, round(taille_mo, 1), nom, nb_elements, round(duree, 2), round(rss_max, 1)])
+            os.remove(chemin)
+
+    outils_bench.afficher_tableau(
+        ["Plats", "Fichier (Mo)", "Lecture", "Éléments", "Durée (s)", "RSS max (Mo)"],
+        lignes
+    )
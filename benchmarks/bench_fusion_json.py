@@ -0,0 +1,56 @@
+"""
+Benchmark de fusion_json.py sur des copies agrandies de dataset_json/ (restaurants,
+plats et livreurs dupliqués avec des IDs suffixés, x10, x100...) :
+  - en mémoire   : fusionner_fichiers_json (tout le catalogue en RAM) ;
+  - hors mémoire : partitions de hachage sur disque, traitées une à une.
+Chaque mode tourne dans un processus séparé : on mesure la durée et la mémoire
+maximale (RSS). Celle du mode hors mémoire dépend de la taille d'une partition.
+
+Usage : python benchmarks/bench_fusion_json.py [facteurs, ex: 10,100,1000] [partitions]
+"""
+import os
+import sys
+import json
+import tempfile
+
+import outils_bench
+
+FACTEURS = [int(f) for f in (sys.argv[1] if len(sys.argv) > 1 else "10,100").split(",")]
+NB_PARTITIONS = sys.argv[2] if len(sys.argv) > 2 else "64"
+MODES = {
+    "En mémoire": [["fusion_json.py"]],
+    f"Hors mémoire ({NB_PARTITIONS} partitions)": [["fusion_json.py", "--hors-memoire", "--partitions", NB_PARTITIONS]],
+}
+
+
+def agrandir_dataset(dossier, facteur):
+    """Écrit dans 'dossier'/dataset_json les fichiers sources de dataset_json/ dupliqués 'facteur' fois."""
+    os.makedirs(os.path.join(dossier, "dataset_json"), exist_ok=True)
+    cles = {"restaurants": ("id_restaurant",), "plats": ("id_plat", "id_restaurant"), "livreurs": ("id_livreur",)}
+    nb_plats = 0
+    for nom, champs in cles.items():
+        with open(os.path.join(outils_bench.RACINE, "dataset_json", f"{nom}.json"), encoding="utf-8") as f:
+            elements = json.load(f)
+        with open(os.path.join(dossier, "dataset_json", f"{nom}.json"), "w", encoding="utf-8") as f:
+            f.write("[")
+            for k in range(facteur):
+                for i, element in enumerate(elements):
+                    copie = dict(element, **{champ: f"{element[champ]}_{k}" for champ in champs})
+                    f.write((", " if k or i else "") + json.dumps(copie, ensure_ascii=False))
+            f.write("]")
+        if nom == "plats":
+            nb_plats = len(elements) * facteur
+    return nb_plats
+
+
+if __name__ == "__main__":
+    print(f"🔗 Benchmark fusion_json : dataset_json x {FACTEURS}\n")
+    lignes = []
+    for facteur in FACTEURS:
+        with tempfile.TemporaryDirectory() as dossier:
+            nb_plats = agrandir_dataset(dossier, facteur)
+            for nom, commandes in MODES.items():
+                duree, rss_max = outils_bench.lancer_scripts(commandes, dossier)
+                lignes.append([f"x{facteur}", nb_plats, nom, round(duree, 2), round(rss_max, 1)])
+
+    outils_bench.afficher_tableau(["Taille", "Plats", "Mode", "Durée (s)", "RSS max (Mo)"], lignes)
@@ -0,0 +1,116 @@
+"""
+Benchmark de l'affichage de l'historique des commandes du manager :
+  - avant : toutes les commandes (SMEMBERS + HGETALL), tri en Python par date,
+            puis un HGET plat:{id} par ligne de commande (N+1) ;
+  - ZSET  : historique_commandes (ZREVRANGEBYSCORE + HGETALL en pipeline,
+            noms des plats enregistrés avec la commande), page de 50.
+Mesure la latence et le nombre d'allers-retours Redis quand l'historique grossit.
+
+Usage : python benchmarks/bench_historique.py [tailles, ex: 1000,10000,100000]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import json
+import time
+
+import outils_bench
+import redis
+from redis_index import INDEX_COMMANDES, indexer_commande, historique_commandes
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "1000,10000,100000").split(",")]
+TAILLE_PAGE = 50
+REPETITIONS = 5
+TAILLE_LOT = 5_000
+
+
+class RedisCompteur(redis.Redis):
+    """Client Redis qui compte ses allers-retours (commande simple ou pipeline)."""
+    allers_retours = 0
+
+    def execute_command(self, *args, **options):
+        RedisCompteur.allers_retours += 1
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def execute_compte(*args, **kwargs):
+            RedisCompteur.allers_retours += 1
+            return execute(*args, **kwargs)
+        pipe.execute = execute_compte
+        return pipe
+
+
+r = RedisCompteur(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def remplir_jusqu_a(taille):
+    """Archive des commandes (hash + index) jusqu'à en avoir 'taille'."""
+    debut = r.scard(INDEX_COMMANDES)
+    pipe = r.pipeline(transaction=False)
+    for i in range(debut, taille):
+        cmd_id = f"cmd_{i:07d}"
+        commande = {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(1_700_000_000 + i)),
+            "id_client": f"client_{i % 1000}", "id_restaurant": f"rest_{i % 50:02d}",
+            "nom_restaurant": f"Restaurant {i % 50}", "statut_final": "livree" if i % 10 else "rejetee_manager",
+            "adresse_livraison": "1 rue du Test", "id_livreur": f"livr_{i % 50:02d}", "total_euros": "25.00",
+            "plats_details": json.dumps([{"id_plat": f"plat_{i % 60:03d}", "quantite": 1, "nom": f"Plat {i % 60}"},
+                                         {"id_plat": f"plat_{(i + 1) % 60:03d}", "quantite": 2, "nom": f"Plat {(i + 1) % 60}"}]),
+        }
+        pipe.hset(f"commande:{cmd_id}", mapping=commande)
+        indexer_commande(pipe, cmd_id, commande, 1_700_000_000 + i)
+        if len(pipe) >= TAILLE_LOT:
+            pipe.execute()
+    for i in range(60):
+        pipe.hset(f"plat:plat_{i:03d}", mapping={"nom": f"Plat {i}"})
+    pipe.execute()
+
+
+def historique_avant():
+    """Reproduit l'ancien afficher_historique (sans l'affichage)."""
+    commandes_ids = list(r.smembers(INDEX_COMMANDES))
+    pipe = r.pipeline(transaction=False)
+    for cmd_id in commandes_ids:
+        pipe.hgetall(f"commande:{cmd_id}")
+    commandes = sorted(pipe.execute(), key=lambda cmd: cmd.get('date', ''), reverse=True)
+    for details in commandes:
+        for item in json.loads(details.get('plats_details', '[]')):
+            r.hget(f"plat:{item['id_plat']}", "nom")
+
+
+def historique_zset():
+    commandes, _ = historique_commandes(r, limit=TAILLE_PAGE)
+    for details in commandes:
+        for item in json.loads(details.get('plats_details', '[]')):
+            item.get('nom')
+
+
+def mesurer(fonction):
+    """Renvoie (latence médiane en ms, allers-retours par appel)."""
+    durees = []
+    RedisCompteur.allers_retours = 0
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(outils_bench.percentile(durees, 50), 2), RedisCompteur.allers_retours // REPETITIONS
+
+
+if __name__ == "__main__":
+    print(f"📜 Benchmark de l'historique : tailles {TAILLES}, page de {TAILLE_PAGE}\n")
+    r.flushdb()
+    lignes = []
+    for taille in TAILLES:
+        remplir_jusqu_a(taille)
+        ms_avant, ar_avant = mesurer(historique_avant)
+        ms_zset, ar_zset = mesurer(historique_zset)
+        lignes.append([taille, ms_avant, ar_avant, ms_zset, ar_zset])
+
+    outils_bench.afficher_tableau(
+        ["Commandes archivées", "Avant (ms)", "Avant (allers-retours)",
+         f"ZSET, page de {TAILLE_PAGE} (ms)", "ZSET (allers-retours)"],
+        lignes
+    )
+    r.flushdb()
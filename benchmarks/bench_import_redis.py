@@ -0,0 +1,72 @@
+"""
+Benchmark de l'import JSON -> Redis sur un catalogue généré :
+  - ancien : un HSET / SADD par plat, chacun en un aller-retour (sur un échantillon) ;
+  - lots   : importer_donnees_depuis_json en pipeline, 1 puis plusieurs processus ;
+  - upsert : ré-import sur la base déjà remplie, sans FLUSHDB.
+Mesure le débit en lignes/s (restaurants + plats + livreurs).
+
+Usage : python benchmarks/bench_import_redis.py [nb_plats] [nb_workers]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import contextlib
+
+import outils_bench
+import redis
+import json_to_redis
+from flux_json import lire_elements
+
+NB_PLATS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+NB_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+NB_PLATS_ANCIEN = min(NB_PLATS, 20_000)  # L'ancienne méthode est mesurée sur un échantillon
+
+
+def import_ancien(chemin, nb_plats_max):
+    """Reproduit l'ancienne boucle : une commande Redis = un aller-retour."""
+    r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+    r.flushdb()
+    lignes, debut = 0, time.perf_counter()
+    for _, resto in lire_elements(chemin):
+        if lignes >= nb_plats_max:
+            break
+        resto_id = resto['id_restaurant']
+        r.hset(f"restaurant:{resto_id}", mapping={"nom": resto["nom"], "adresse": resto["adresse"]})
+        for plat in resto["menu"]:
+            r.hset(f"plat:{plat['id_plat']}", mapping={"nom": plat["nom"], "description": plat["description"],
+                                                      "prix": plat["prix"], "id_restaurant": resto_id})
+            r.sadd(f"restaurant:{resto_id}:plats", plat['id_plat'])
+        lignes += 1 + len(resto["menu"])
+    return lignes, time.perf_counter() - debut
+
+
+def import_par_lots(chemin, nb_workers, upsert=False):
+    debut = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        lignes = json_to_redis.importer_donnees_depuis_json(chemin, nb_workers=nb_workers, upsert=upsert,
+                                                            db=outils_bench.BENCH_REDIS_DB)
+    return lignes, time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    print(f"📦 Benchmark de l'import Redis : {NB_PLATS} plats, jusqu'à {NB_WORKERS} processus\n")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "catalogue.json")
+        outils_bench.generer_catalogue(chemin, NB_PLATS)
+
+        mesures = [("Ancien (1 aller-retour / commande)", *import_ancien(chemin, NB_PLATS_ANCIEN))]
+        mesures.append(("Pipeline, 1 processus", *import_par_lots(chemin, 1)))
+        mesures.append((f"Pipeline, {NB_WORKERS} processus", *import_par_lots(chemin, NB_WORKERS)))
+        nb_cles_avant = redis.Redis(db=outils_bench.BENCH_REDIS_DB).dbsize()
+        mesures.append((f"Upsert (ré-import), {NB_WORKERS} processus", *import_par_lots(chemin, NB_WORKERS, upsert=True)))
+        nb_cles_apres = redis.Redis(db=outils_bench.BENCH_REDIS_DB).dbsize()
+
+    outils_bench.afficher_tableau(
+        ["Méthode", "Lignes", "Durée (s)", "Lignes/s"],
+        [[nom, lignes, round(duree, 2), round(lignes / duree)] for nom, lignes, duree in mesures]
+    )
+    print(f"\nClés avant / après l'upsert (doivent être égales) : {nb_cles_avant} / {nb_cles_apres}")
+    redis.Redis(db=outils_bench.BENCH_REDIS_DB).flushdb()
@@ -0,0 +1,103 @@
+"""
+Benchmark de la lecture des listes d'entités quand la base grossit :
+  - ancien : KEYS restaurant:* / KEYS commande:cmd_* puis un HGETALL par clé ;
+  - index  : SMEMBERS restaurants:ids / commandes:ids puis HGETALL en pipeline ;
+  - SCAN   : repli sans index (parcours par lots, non bloquant mais en O(N)).
+Le nombre de restaurants et de commandes reste fixe ; seules des clés "bruit:*"
+sont ajoutées. La latence de l'index doit rester plate, celle de KEYS (qui
+bloque tout le serveur pendant l'appel) croît avec la taille de la base.
+
+Usage : python benchmarks/bench_index_cles.py [tailles, ex: 10000,100000,1000000]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import time
+
+import outils_bench
+import redis
+from redis_index import INDEX_RESTAURANTS, INDEX_COMMANDES, TAILLE_SCAN, lister_ids
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000,1000000").split(",")]
+NB_RESTAURANTS = 50
+NB_COMMANDES = 500
+REPETITIONS = 20
+TAILLE_LOT = 10_000
+
+r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def preparer_entites():
+    pipe = r.pipeline(transaction=False)
+    for i in range(NB_RESTAURANTS):
+        rest_id = f"rest_{i:03d}"
+        pipe.hset(f"restaurant:{rest_id}", mapping={"nom": f"Restaurant {i}", "adresse": f"{i} rue du Test"})
+        pipe.sadd(f"restaurant:{rest_id}:plats", f"plat_{i:03d}")
+        pipe.sadd(INDEX_RESTAURANTS, rest_id)
+    for i in range(NB_COMMANDES):
+        cmd_id = f"cmd_{i:06d}"
+        pipe.hset(f"commande:{cmd_id}", mapping={"date": f"2025-01-01T00:00:{i % 60:02d}", "statut_final": "livree",
+                                                  "id_restaurant": f"rest_{i % NB_RESTAURANTS:03d}"})
+        pipe.sadd(INDEX_COMMANDES, cmd_id)
+    pipe.execute()
+
+
+def remplir_jusqu_a(taille):
+    """Ajoute des clés 'bruit:*' jusqu'à ce que la base contienne 'taille' clés."""
+    debut = r.dbsize()
+    pipe = r.pipeline(transaction=False)
+    for i in range(debut, taille):
+        pipe.set(f"bruit:{i}", "x")
+        if len(pipe) >= TAILLE_LOT:
+            pipe.execute()
+    pipe.execute()
+
+
+def par_keys(motif):
+    """Ancienne méthode : KEYS puis un HGETALL par clé."""
+    return [r.hgetall(cle) for cle in r.keys(motif) if cle.count(":") == 1]
+
+
+def par_index(cle_index, prefixe):
+    ids = lister_ids(r, cle_index, prefixe)
+    pipe = r.pipeline(transaction=False)
+    for entite_id in ids:
+        pipe.hgetall(f"{prefixe}:{entite_id}")
+    return pipe.execute()
+
+
+def par_scan(prefixe):
+    return [cle for cle in r.scan_iter(f"{prefixe}:*", count=TAILLE_SCAN) if cle.count(":") == 1]
+
+
+def mesurer_ms(fonction, *args):
+    durees = []
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction(*args)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(outils_bench.percentile(durees, 50), 2)
+
+
+if __name__ == "__main__":
+    print(f"🔑 Benchmark KEYS / index / SCAN : {NB_RESTAURANTS} restaurants, {NB_COMMANDES} commandes, tailles {TAILLES}\n")
+    r.flushdb()
+    preparer_entites()
+
+    lignes = []
+    for taille in TAILLES:
+        remplir_jusqu_a(taille)
+        lignes.append([
+            r.dbsize(),
+            mesurer_ms(par_keys, "restaurant:*"),
+            mesurer_ms(par_index, INDEX_RESTAURANTS, "restaurant"),
+            mesurer_ms(par_keys, "commande:cmd_*"),
+            mesurer_ms(par_index, INDEX_COMMANDES, "commande"),
+            mesurer_ms(par_scan, "restaurant"),
+        ])
+
+    outils_bench.afficher_tableau(
+        ["Clés en base", "Restaurants KEYS (ms)", "Restaurants index (ms)",
+         "Historique KEYS (ms)", "Historique index (ms)", "SCAN sans index (ms)"],
+        lignes
+    )
+    r.flushdb()
@@ -0,0 +1,114 @@
+"""
+Benchmark du suivi des livraisons côté manager :
+  - ancien : un thread + une connexion pubsub par commande assignée ;
+  - nouveau : un seul écouteur (ecouteur_livraisons) et un dictionnaire.
+Mesure le nombre de connexions Redis et les décodages JSON par seconde.
+
+Usage : python benchmarks/bench_livraisons.py [nb_livraisons]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est utilisée)
+"""
+import sys
+import json
+import time
+import threading
+import multiprocessing
+
+import outils_bench
+import redis
+import redis_manager
+
+NB_LIVRAISONS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+
+def connexion():
+    return redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def publier_livraisons(r):
+    """Publie une notification COMMANDE_LIVREE par commande, dans un pipeline."""
+    pipe = r.pipeline(transaction=False)
+    for i in range(NB_LIVRAISONS):
+        pipe.publish("notifications", json.dumps({
+            "type": "COMMANDE_LIVREE", "commande_id": f"cmd_bench_{i}",
+            "message": "Votre commande a été livrée. Bon appétit !"
+        }))
+    pipe.execute()
+
+
+def attendre_abonnes(r, attendus):
+    while r.pubsub_numsub("notifications")[0][1] < attendus:
+        time.sleep(0.1)
+
+
+def mesurer_ancien(resultats):
+    """Reproduit attendre_livraison_et_sauvegarder : une connexion par commande."""
+    compteurs = {"decodages": 0, "archivees": 0}
+    verrou = threading.Lock()
+
+    def attendre_livraison(cmd_id):
+        r_thread = connexion()
+        ps = r_thread.pubsub(ignore_subscribe_messages=True)
+        ps.subscribe("notifications")
+        for msg in ps.listen():
+            notif_data = json.loads(msg['data'])
+            with verrou:
+                compteurs["decodages"] += 1
+            if notif_data.get("type") == "COMMANDE_LIVREE" and notif_data.get("commande_id") == cmd_id:
+                with verrou:
+                    compteurs["archivees"] += 1
+                ps.unsubscribe()
+                break
+
+    r = connexion()
+    for i in range(NB_LIVRAISONS):
+        threading.Thread(target=attendre_livraison, args=(f"cmd_bench_{i}",), daemon=True).start()
+    attendre_abonnes(r, NB_LIVRAISONS)
+    connexions = r.info("clients")["connected_clients"]
+
+    debut = time.perf_counter()
+    publier_livraisons(r)
+    while compteurs["archivees"] < NB_LIVRAISONS:
+        time.sleep(0.05)
+    duree = time.perf_counter() - debut
+    resultats.put(("1 pubsub / commande", connexions, compteurs["decodages"], duree))
+
+
+def mesurer_dispatcher(resultats):
+    """Utilise le vrai ecouteur_livraisons du manager avec un archivage factice."""
+    redis_manager.r = connexion()
+    redis_manager.enregistrer_commande_finale = lambda commande_id, statut_final, commande_data=None: None
+    redis_manager.commandes_en_attente.duree = float("inf") # Commandes factices : jamais relues dans Redis
+    for i in range(NB_LIVRAISONS):
+        redis_manager.commandes_en_attente.ecrire(f"cmd_bench_{i}", {"livreur_assigne": f"livr_{i % 50:02d}"})
+
+    r = connexion()
+    threading.Thread(target=redis_manager.ecouteur_livraisons, daemon=True).start()
+    attendre_abonnes(r, 1)
+    connexions = r.info("clients")["connected_clients"]
+
+    debut = time.perf_counter()
+    publier_livraisons(r)
+    stats = redis_manager.stats_notifications
+    while stats["livraisons_archivees"] < NB_LIVRAISONS:
+        time.sleep(0.05)
+    duree = time.perf_counter() - debut
+    resultats.put(("écouteur unique", connexions, stats["decodages"], duree))
+
+
+if __name__ == "__main__":
+    print(f"📦 Benchmark du suivi de {NB_LIVRAISONS} livraisons simultanées\n")
+    lignes = []
+    for mesure in (mesurer_ancien, mesurer_dispatcher):
+        file_resultats = multiprocessing.Queue()
+        p = multiprocessing.Process(target=mesure, args=(file_resultats,))
+        p.start()
+        approche, connexions, decodages, duree = file_resultats.get()
+        p.terminate()
+        p.join()
+        lignes.append([approche, connexions, decodages, round(duree, 3),
+                       round(decodages / duree) if duree else "-"])
+
+    outils_bench.afficher_tableau(
+        ["Approche", "Connexions Redis", "Décodages JSON", "Durée (s)", "Décodages/s"],
+        lignes
+    )
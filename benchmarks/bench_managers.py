@@ -0,0 +1,106 @@
+"""
+Benchmark de la montée en charge des managers (redis_partition.py) : la même
+simulation (simulate.py, Redis) est lancée avec 1, 2, ... processus manager. Chaque
+manager ne traite que les commandes que l'anneau lui attribue, leur état étant dans
+Redis (redis_etats.py). Mesure le débit de commandes terminées par les managers
+(jusqu'à leur archivage dans l'historique) et la part de chaque manager.
+
+Chaque manager tourne dans son propre processus, les restaurants et les livreurs dans
+un autre, les clients dans le processus principal.
+
+Usage : python benchmarks/bench_managers.py --managers 1,2,3,4
+        (toutes les options de simulate.py sont acceptées : --clients, --livreurs, ...)
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import os
+import sys
+import time
+import multiprocessing
+from collections import Counter
+
+import outils_bench
+import simulate
+
+CONTEXTE = multiprocessing.get_context("spawn")
+
+
+def processus_acteurs(roles, args, pret, arret):
+    """Fait tourner les acteurs des rôles demandés jusqu'à la fin de l'essai."""
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    acteurs = simulate.charger_backend(args)
+    restaurants, livreurs = simulate.preparer_donnees(args, acteurs)
+    simulate.demarrer_acteurs(acteurs, roles, restaurants, livreurs)
+    pret.set()
+    arret.wait()
+
+
+def mesurer(args, nb_managers):
+    """Un essai avec 'nb_managers' processus manager ; renvoie sa ligne du tableau."""
+    from redis_index import HISTORIQUE_COMMANDES
+    from redis_partition import CLE_MANAGERS, INTERVALLE_BATTEMENT
+    from redis_etats import cle_etat
+
+    acteurs = simulate.charger_backend(args)
+    r = acteurs["client"].r
+    r.flushdb()
+    restaurants, _ = simulate.preparer_donnees(args, acteurs)
+
+    arret = CONTEXTE.Event()
+    processus = []
+    for roles in [["manager"]] * nb_managers + [["restaurants", "livreurs"]]:
+        pret = CONTEXTE.Event()
+        p = CONTEXTE.Process(target=processus_acteurs, args=(roles, args, pret, arret), daemon=True)
+        p.start()
+        pret.wait()
+        processus.append(p)
+    while r.zcard(CLE_MANAGERS) < nb_managers:
+        time.sleep(0.1)
+    time.sleep(2 * INTERVALLE_BATTEMENT)  # Chaque manager voit l'anneau complet
+
+    sortie_standard, sys.stdout = sys.stdout, open(os.devnull, "w", encoding="utf-8")  # Clients bavards
+    debut = time.perf_counter()
+    try:
+        resultats = simulate.envoyer_commandes(args, acteurs, restaurants)
+    finally:
+        sys.stdout.close()
+        sys.stdout = sortie_standard
+    terminees = resultats["livrees"] + resultats["rejetees"] + resultats["sans_livreur"]
+    while r.zcard(HISTORIQUE_COMMANDES) < terminees and time.perf_counter() - debut < args.duree_max:
+        time.sleep(0.05)
+    duree = time.perf_counter() - debut
+    archivees = r.zcard(HISTORIQUE_COMMANDES)
+
+    pipe = r.pipeline(transaction=False)
+    for commande_id in r.zrange(HISTORIQUE_COMMANDES, 0, -1):
+        pipe.hget(cle_etat(commande_id), "manager")
+    parts = Counter(pipe.execute())
+    arret.set()
+    for p in processus:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()  # Threads des acteurs encore bloqués sur leurs abonnements
+    r.flushdb()
+
+    return [nb_managers, archivees, round(duree, 2), round(archivees / duree, 1) if duree else "-",
+            " / ".join(f"{100 * n / max(archivees, 1):.0f}%" for _, n in parts.most_common()),
+            resultats["latence_p50_s"]]
+
+
+if __name__ == "__main__":
+    parseur = simulate.creer_parseur()
+    parseur.add_argument("--managers", default="1,2,3,4", help="Nombres de processus manager à comparer")
+    parseur.set_defaults(clients=300, restaurants=10, livreurs=20, debit=100, preparation="fixe:0.2",
+                         recuperation="fixe:0", trajet="fixe:0.2", proba_livreur=1.0, timeout_livreur=30,
+                         echauffement=0.5, duree_max=300, redis_db=outils_bench.BENCH_REDIS_DB)
+    args = parseur.parse_args()
+    args.backend = "redis"
+
+    print(f"🤖 Benchmark managers : {args.clients} commandes ({args.debit}/s), {args.restaurants} restaurants, "
+          f"{args.livreurs} livreurs\n")
+    lignes = [mesurer(args, int(n)) for n in args.managers.split(",")]
+    reference = lignes[0][3]
+    for ligne in lignes:
+        ligne.insert(4, f"x{ligne[3] / reference:.2f}" if reference and ligne[3] != "-" else "-")
+    outils_bench.afficher_tableau(
+        ["Managers", "Archivées", "Durée (s)", "Commandes / s", "Accélération", "Part de chaque manager",
+         "Latence client p50 (s)"], lignes)
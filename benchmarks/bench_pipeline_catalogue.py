@@ -0,0 +1,36 @@
+"""
+Benchmark de la préparation du catalogue à partir de dataset_txt/ :
+  - ancien   : txt_to_csv.py, csv_to_json.py puis fusion_json.py (fichiers intermédiaires,
+               chaque fichier chargé en entier) ;
+  - pipeline : pipeline_catalogue.py en un seul passage, vers JSON Lines et JSON compact.
+Chaque étape est un processus séparé (lancé dans un dossier temporaire) : on
+mesure la durée totale et la mémoire maximale (RSS) du plus gros processus.
+Le temps du pipeline doit croître linéairement, sa mémoire rester plate.
+
+Usage : python benchmarks/bench_pipeline_catalogue.py [tailles en plats, ex: 60000,600000]
+"""
+import os
+import sys
+import tempfile
+
+import outils_bench
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "60000,600000").split(",")]
+ETAPES = {
+    "Ancien (txt -> csv -> json -> fusion)": [["txt_to_csv.py"], ["csv_to_json.py"], ["fusion_json.py"]],
+    "Pipeline -> JSON Lines": [["pipeline_catalogue.py", "--vers", "jsonl"]],
+    "Pipeline -> JSON compact": [["pipeline_catalogue.py", "--vers", "json"]],
+}
+
+
+if __name__ == "__main__":
+    print(f"🧩 Benchmark préparation du catalogue : {TAILLES} plats\n")
+    lignes = []
+    for nb_plats in TAILLES:
+        with tempfile.TemporaryDirectory() as dossier:
+            outils_bench.generer_dataset_txt(os.path.join(dossier, "dataset_txt"), nb_plats)
+            for nom, commandes in ETAPES.items():
+                duree, rss_max = outils_bench.lancer_scripts(commandes, dossier)
+                lignes.append([nb_plats, nom, round(duree, 2), round(nb_plats / duree), round(rss_max, 1)])
+
+    outils_bench.afficher_tableau(["Plats", "Méthode", "Durée (s)", "Plats/s", "RSS max (Mo)"], lignes)
@@ -0,0 +1,129 @@
+"""
+Benchmark de la recherche floue (recherche_floue.IndexRechercheFloue) partagée par
+les deux POC : construction de l'index, taille du fichier et rechargement, puis
+rappel (le restaurant visé, ou un homonyme, est-il dans les 10 résultats ?) et latence p50 / p99 pour
+des saisies altérées : une faute de frappe, deux fautes dans un mot long, sans accents
+ni majuscules, dernier mot incomplet. Le rappel est comparé à celui d'une recherche
+par préfixe du nom normalisé (autocomplétion Redis, index MongoDB).
+
+Usage : python benchmarks/bench_recherche_floue.py [tailles, ex: 100000,1000000]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+import outils_bench
+from normalisation import normaliser_nom
+from recherche_floue import IndexRechercheFloue, decouper_mots
+
+TAILLES = [int(t) for t in (sys.argv[1] if len(sys.argv) > 1 else "100000,1000000").split(",")]
+NB_REQUETES = 500
+LIMITE = 10
+TYPES = ["Pizzeria", "Crêperie", "Brasserie", "Bistrot", "Café", "Pâtisserie", "Trattoria", "Épicerie",
+         "Rôtisserie", "Cantine", "Comptoir", "Auberge", "Bouillon", "Sushi", "Burger", "Ramen", "Tacos",
+         "Boulangerie", "Grill", "Maison"]
+LIEUX = ["Opéra", "Marché", "Gare", "Port", "Pont", "Église", "Étoile", "Théâtre", "Château", "Canal",
+         "Horloge", "Quai", "Louvre", "Marais", "Montmartre", "Bastille", "Panthéon", "Sèvres", "Forêt", "Moulin"]
+SYLLABES = ["ber", "na", "ré", "mon", "tar", "ti", "gné", "lou", "vi", "cha", "rol", "mé", "dan", "fé", "li",
+            "zo", "ga", "bri", "el", "mar", "sé", "quin", "rou", "pa", "tho", "lè", "ve", "du", "ro", "ché"]
+LETTRES = "abcdefghijklmnopqrstuvwxyz"
+
+
+def generer_nom(aleatoire):
+    """Nom réaliste : types et lieux courants, patronymes rares, accents et apostrophes."""
+    patronyme = "".join(aleatoire.choice(SYLLABES) for _ in range(aleatoire.randint(2, 3))).capitalize()
+    modele = aleatoire.randrange(4)
+    if modele == 0:
+        return f"{aleatoire.choice(TYPES)} {patronyme}"
+    if modele == 1:
+        return f"Chez {patronyme} {aleatoire.choice(TYPES)}"
+    if modele == 2:
+        lieu = aleatoire.choice(LIEUX)
+        article = "de l'" if normaliser_nom(lieu)[0] in "aeiou" else "du "
+        return f"{aleatoire.choice(TYPES)} {patronyme} {article}{lieu}"
+    return f"Le {patronyme} {aleatoire.choice(LIEUX)}"
+
+
+def faute(mot, aleatoire):
+    """Une substitution, suppression ou insertion de lettre."""
+    i = aleatoire.randrange(len(mot))
+    operation = aleatoire.randrange(3)
+    if operation == 0:
+        return mot[:i] + aleatoire.choice(LETTRES.replace(mot[i], "")) + mot[i + 1:]
+    if operation == 1:
+        return mot[:i] + mot[i + 1:]
+    return mot[:i] + aleatoire.choice(LETTRES) + mot[i:]
+
+
+def alterer(nom, categorie, aleatoire):
+    """Saisie de l'utilisateur pour le restaurant 'nom', ou None si la catégorie ne s'applique pas."""
+    mots = decouper_mots(nom)
+    if categorie == "sans accents ni majuscules":
+        return normaliser_nom(nom).upper()
+    if categorie == "dernier mot incomplet":
+        return " ".join(mots[:-1] + [mots[-1][:max(1, len(mots[-1]) - 2)]])
+    longs = [i for i, mot in enumerate(mots) if len(mot) >= (7 if categorie == "2 fautes (mot long)" else 5)]
+    if not longs:
+        return None
+    i = aleatoire.choice(longs)
+    mots[i] = faute(mots[i], aleatoire)
+    if categorie == "2 fautes (mot long)":
+        mots[i] = faute(mots[i], aleatoire)
+    return " ".join(mots)
+
+
+def mesurer(index, noms, categorie, aleatoire):
+    """Rappel du préfixe normalisé et rappel@10 de la recherche floue, latences p50 / p99 (ms)."""
+    durees, trouves, trouves_prefixe, total = [], 0, 0, 0
+    while total < NB_REQUETES:
+        cible = aleatoire.randrange(len(noms))
+        saisie = alterer(noms[cible], categorie, aleatoire)
+        if saisie is None:
+            continue
+        total += 1
+        debut = time.perf_counter()
+        resultats = index.rechercher(saisie, LIMITE)
+        durees.append((time.perf_counter() - debut) * 1000)
+        nom_cible = normaliser_nom(noms[cible])  # Les homonymes sont indiscernables
+        trouves += any(normaliser_nom(r["nom"]) == nom_cible for r in resultats)
+        trouves_prefixe += nom_cible.startswith(normaliser_nom(saisie))
+    return (f"{trouves_prefixe / total:.0%}", f"{trouves / total:.0%}",
+            round(outils_bench.percentile(durees, 50), 2), round(outils_bench.percentile(durees, 99), 2))
+
+
+if __name__ == "__main__":
+    print(f"🔎 Benchmark recherche floue : {TAILLES} noms, top {LIMITE}, {NB_REQUETES} requêtes par catégorie\n")
+    lignes_index, lignes_requetes = [], []
+    for taille in TAILLES:
+        aleatoire = random.Random(42)
+        noms = [generer_nom(aleatoire) for _ in range(taille)]
+
+        debut = time.perf_counter()
+        index = IndexRechercheFloue.construire((f"rest_{i:07d}", nom) for i, nom in enumerate(noms))
+        construction = time.perf_counter() - debut
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "index.bin")
+            index.enregistrer(chemin)
+            taille_fichier = os.path.getsize(chemin)
+            debut = time.perf_counter()
+            index = IndexRechercheFloue.charger(chemin)
+            chargement = time.perf_counter() - debut
+        lignes_index.append([taille, len(index.vocabulaire), round(construction, 1),
+                             round(taille_fichier / 1e6, 1), round(chargement, 2)])
+
+        for categorie in ("1 faute de frappe", "2 fautes (mot long)", "sans accents ni majuscules",
+                          "dernier mot incomplet"):
+            lignes_requetes.append([taille, categorie, *mesurer(index, noms, categorie, aleatoire)])
+        # Saisies d'un seul mot courant : des milliers de restaurants correspondent
+        for saisie in ("bouillon", "piza", "creperi", "montmatre"):
+            debut = time.perf_counter()
+            index.rechercher(saisie, LIMITE)
+            lignes_requetes.append([taille, repr(saisie), "-", "-", round((time.perf_counter() - debut) * 1000, 2), "-"])
+
+    outils_bench.afficher_tableau(["Noms", "Mots distincts", "Construction (s)", "Fichier (Mo)", "Chargement (s)"],
+                                  lignes_index)
+    print()
+    outils_bench.afficher_tableau(["Noms", "Saisie", "Rappel préfixe normalisé", f"Rappel@{LIMITE} floue",
+                                   "p50 (ms)", "p99 (ms)"], lignes_requetes)
@@ -0,0 +1,98 @@
+"""
+Benchmark de la recherche de restaurants par nom dans MongoDB (mongo_client.py) :
+  - regex   : ancienne requête {"nom": {"$regex": "^...", "$options": "i"}} ;
+  - index   : mongo_recherche (égalité / intervalle sur 'nom_normalise' indexé, limite).
+Vérifie d'abord avec explain() que les nouvelles requêtes sont des parcours d'index
+(IXSCAN, ni COLLSCAN ni SORT) et compare les clés et documents examinés.
+
+Usage : python benchmarks/bench_recherche_mongo.py [nb_restaurants]
+(nécessite MongoDB en local ; la base BENCH_MONGO_BASE est modifiée)
+"""
+import re
+import sys
+import time
+import random
+
+import outils_bench
+from pymongo import MongoClient, ASCENDING
+import mongo_recherche
+
+NB_RESTAURANTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+TAILLE_LOT = 10_000
+NB_REQUETES = {"regex": 20, "index": 500}
+MOTS = ["Pizza", "Sushi", "Le", "La", "Bistrot", "Chez", "Café", "Burger", "Ramen", "Tacos", "Grill", "Crêperie"]
+
+
+def remplir(collection, aleatoire):
+    collection.drop()
+    noms, lot = [], []
+    for i in range(NB_RESTAURANTS):
+        nom = " ".join(aleatoire.choice(MOTS) for _ in range(3)) + f" {aleatoire.randrange(1_000_000)}"
+        noms.append(nom)
+        lot.append({"id_restaurant": f"rest_{i:07d}", "nom": nom, "nom_normalise": mongo_recherche.normaliser_nom(nom)})
+        if len(lot) >= TAILLE_LOT:
+            collection.insert_many(lot, ordered=False)
+            lot = []
+    if lot:
+        collection.insert_many(lot, ordered=False)
+    # Mêmes index que json_to_mongo.py
+    collection.create_index([("nom", ASCENDING)])
+    collection.create_index([(mongo_recherche.CHAMP_NORMALISE, ASCENDING)])
+    return noms
+
+
+def requete_regex(db, prefixe, exact=False):
+    motif = f"^{re.escape(prefixe)}{'$' if exact else ''}"
+    return db.restaurants.find({"nom": {"$regex": motif, "$options": "i"}}, {"nom": 1, "id_restaurant": 1, "_id": 0}).sort("nom", 1)
+
+
+def requete_index(db, prefixe, exact=False):
+    if exact:
+        return db.restaurants.find({mongo_recherche.CHAMP_NORMALISE: mongo_recherche.normaliser_nom(prefixe)}).limit(1)
+    return mongo_recherche.curseur_prefixe(db, prefixe)
+
+
+def verifier_plans(db, noms):
+    """Test explain() : les requêtes indexées n'ont ni COLLSCAN ni SORT, et passent par un IXSCAN."""
+    lignes = []
+    for prefixe, exact in [(noms[0], True), ("P", False), ("crêperie c", False), ("café (", False)]:
+        for methode, requete in (("regex", requete_regex), ("index", requete_index)):
+            curseur = requete(db, prefixe, exact)
+            etapes = mongo_recherche.etapes_plan(curseur.clone())
+            if methode == "index":
+                assert "IXSCAN" in etapes and "COLLSCAN" not in etapes and "SORT" not in etapes, (prefixe, etapes)
+            stats = curseur.explain().get("executionStats", {})
+            lignes.append([repr(prefixe), "exact" if exact else "préfixe", methode, " > ".join(etapes),
+                           stats.get("totalKeysExamined", "?"), stats.get("totalDocsExamined", "?")])
+    return lignes
+
+
+def latences_ms(db, requete, prefixes):
+    durees = []
+    for prefixe, exact in prefixes:
+        debut = time.perf_counter()
+        list(requete(db, prefixe, exact))
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(outils_bench.percentile(durees, 50), 2), round(outils_bench.percentile(durees, 99), 2)
+
+
+if __name__ == "__main__":
+    print(f"🍃 Benchmark recherche MongoDB : {NB_RESTAURANTS} restaurants\n")
+    aleatoire = random.Random(42)
+    with MongoClient("mongodb://localhost:27017/?replicaSet=rs0") as client:
+        db = client[outils_bench.BENCH_MONGO_BASE]
+        noms = remplir(db.restaurants, aleatoire)
+
+        outils_bench.afficher_tableau(["Saisie", "Recherche", "Méthode", "Plan", "Clés examinées", "Documents examinés"],
+                                      verifier_plans(db, noms))
+        print("\n✅ explain() : les requêtes indexées sont des IXSCAN (sans COLLSCAN ni SORT)\n")
+
+        lignes = []
+        for nom_recherche, exact, longueur in (("exacte", True, None), ("préfixe 1 car.", False, 1),
+                                               ("préfixe 3 car.", False, 3), ("préfixe 8 car.", False, 8)):
+            for methode, requete in (("regex", requete_regex), ("index", requete_index)):
+                prefixes = [(nom if exact else nom[:longueur], exact)
+                            for nom in aleatoire.sample(noms, NB_REQUETES[methode])]
+                lignes.append([nom_recherche, methode, *latences_ms(db, requete, prefixes)])
+        outils_bench.afficher_tableau(["Recherche", "Méthode", "p50 (ms)", "p99 (ms)"], lignes)
+        db.restaurants.drop()
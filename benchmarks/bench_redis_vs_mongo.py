@@ -0,0 +1,213 @@
+"""
+Benchmark comparatif Redis / MongoDB sur le parcours complet d'une commande
+(modération, préparation, offre, assignation, livraison), à concurrence croissante.
+
+Le parcours est celui de simulate.py, mais chaque rôle tourne dans son propre
+processus (manager, restaurants, livreurs, clients + observateur) pour mesurer
+le CPU et la mémoire de chacun. Les allers-retours serveur par commande sont lus
+dans INFO commandstats (Redis) et serverStatus.opcounters (MongoDB) ; ces compteurs
+sont globaux au serveur : éviter toute autre activité pendant la mesure.
+
+Les résultats sont écrits dans benchmarks/resultats/ (JSON détaillé + CSV d'une
+ligne par essai, avec le commit git) pour suivre les régressions d'un commit à l'autre.
+
+Usage : python benchmarks/bench_redis_vs_mongo.py --niveaux 10,50,200 --backends redis,mongo
+        (toutes les options de simulate.py sont acceptées : --restaurants, --trajet, ...)
+(nécessite Redis et MongoDB en local ; bases BENCH_REDIS_DB et BENCH_MONGO_BASE)
+"""
+import os
+import sys
+import csv
+import json
+import time
+import resource
+import argparse
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+import outils_bench
+import simulate
+
+DOSSIER_RESULTATS = os.path.join(outils_bench.RACINE, "benchmarks", "resultats")
+# Le mode "spawn" donne des processus neufs : la mémoire mesurée est bien celle de chaque rôle
+CONTEXTE = multiprocessing.get_context("spawn")
+
+
+def temps_cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def ressources(debut_cpu, debut):
+    """CPU consommé (s et % d'un cœur) et mémoire résidente depuis 'debut'."""
+    cpu = temps_cpu() - debut_cpu
+    duree = time.perf_counter() - debut
+    return {"cpu_s": round(cpu, 3), "cpu_pct": round(100 * cpu / duree, 1) if duree > 0 else 0.0,
+            "rss_mo": round(outils_bench.rss_mo(), 1)}
+
+
+def processus_acteurs(role, args, pret, arret, file_resultats):
+    """Fait tourner les acteurs d'un rôle jusqu'à la fin de l'essai, puis renvoie leur consommation."""
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    acteurs = simulate.charger_backend(args)
+    restaurants, livreurs = simulate.preparer_donnees(args, acteurs)
+    debut_cpu, debut = temps_cpu(), time.perf_counter()
+    simulate.demarrer_acteurs(acteurs, [role], restaurants, livreurs)
+    pret.set()
+    arret.wait()
+    file_resultats.put((role, ressources(debut_cpu, debut)))
+
+
+def processus_clients(args, file_resultats):
+    """Envoie les commandes, observe leurs étapes et renvoie les mesures."""
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    acteurs = simulate.charger_backend(args)
+    restaurants, _ = simulate.preparer_donnees(args, acteurs)
+    debut_cpu, debut = temps_cpu(), time.perf_counter()
+    resultats = simulate.envoyer_commandes(args, acteurs, restaurants)
+    file_resultats.put(("clients", ressources(debut_cpu, debut), resultats))
+
+
+def compter_operations(args):
+    """
+    Nombre total de commandes (Redis) ou d'opérations (MongoDB) traitées par
+    le serveur, ou None si le serveur ne publie pas ces statistiques.
+    """
+    if args.backend == "redis":
+        import redis
+        try:
+            stats = redis.Redis(db=args.redis_db).info("commandstats")
+        except redis.exceptions.ResponseError:
+            return None
+        return sum(valeurs["calls"] for valeurs in stats.values())
+    from pymongo import MongoClient
+    with MongoClient("mongodb://localhost:27017/?replicaSet=rs0") as client:
+        return sum(client.admin.command("serverStatus")["opcounters"].values())
+
+
+def reinitialiser_base(args):
+    if args.backend == "redis":
+        import redis
+        redis.Redis(db=args.redis_db).flushdb()
+    else:
+        from pymongo import MongoClient
+        with MongoClient("mongodb://localhost:27017/?replicaSet=rs0") as client:
+            client.drop_database(args.mongo_base)
+
+
+def executer_essai(args):
+    """Un essai : base vide, un processus par rôle, N clients. Renvoie le dict des mesures."""
+    reinitialiser_base(args)
+    # Création unique des restaurants et livreurs simulés avant le démarrage des rôles
+    simulate.preparer_donnees(args, simulate.charger_backend(args))
+
+    file_resultats = CONTEXTE.Queue()
+    arret = CONTEXTE.Event()
+    processus = []
+    for role in simulate.ROLES:
+        pret = CONTEXTE.Event()
+        p = CONTEXTE.Process(target=processus_acteurs, args=(role, args, pret, arret, file_resultats), daemon=True)
+        p.start()
+        pret.wait()
+        processus.append(p)
+
+    operations_avant = compter_operations(args)
+    p_clients = CONTEXTE.Process(target=processus_clients, args=(args, file_resultats), daemon=True)
+    p_clients.start()
+    _, ressources_clients, essai = file_resultats.get()
+    p_clients.join()
+    operations_apres = compter_operations(args)
+
+    arret.set()
+    essai["ressources"] = {"clients": ressources_clients}
+    for _ in processus:
+        role, usage = file_resultats.get()
+        essai["ressources"][role] = usage
+    for p in processus:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()
+
+    if operations_avant is None or operations_apres is None:
+        essai["operations_serveur"] = essai["allers_retours_par_commande"] = None
+    else:
+        essai["operations_serveur"] = operations_apres - operations_avant
+        essai["allers_retours_par_commande"] = round(essai["operations_serveur"] / max(essai["commandes_envoyees"], 1), 1)
+    return essai
+
+
+def version_code():
+    """Commit git courant (suffixé de '-modifie' si l'arbre a des changements non commités)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=outils_bench.RACINE,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        modifie = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=outils_bench.RACINE,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+    return f"{commit}-modifie" if modifie else commit
+
+
+def ligne_csv(essai):
+    """Aplatit un essai (étapes et ressources) en une ligne de CSV."""
+    ligne = {cle: valeur for cle, valeur in essai.items() if not isinstance(valeur, dict)}
+    for nom, valeurs in essai["etapes"].items():
+        for cle, valeur in valeurs.items():
+            ligne[f"{nom}_{cle}"] = valeur
+    for role, valeurs in essai["ressources"].items():
+        for cle, valeur in valeurs.items():
+            ligne[f"{role}_{cle}"] = valeur
+    return ligne
+
+
+def ecrire_resultats(rapport):
+    """Écrit le rapport en JSON et en CSV ; renvoie le chemin commun (sans extension)."""
+    os.makedirs(DOSSIER_RESULTATS, exist_ok=True)
+    base = os.path.join(DOSSIER_RESULTATS, f"redis_vs_mongo_{rapport['date'].replace(':', '-')}_{rapport['commit']}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(rapport, f, indent=4, ensure_ascii=False)
+
+    lignes = [dict(ligne_csv(essai), commit=rapport["commit"], date=rapport["date"]) for essai in rapport["essais"]]
+    colonnes = list(dict.fromkeys(cle for ligne in lignes for cle in ligne))
+    with open(base + ".csv", "w", encoding="utf-8", newline="") as f:
+        ecrivain = csv.DictWriter(f, fieldnames=colonnes)
+        ecrivain.writeheader()
+        ecrivain.writerows(lignes)
+    return base
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(parents=[simulate.creer_parseur()], conflict_handler="resolve",
+                                      description="Benchmark comparatif Redis / MongoDB du parcours d'une commande.")
+    parseur.add_argument("--niveaux", default="10,50,200", help="Nombres de clients simultanés à tester")
+    parseur.add_argument("--backends", default="redis,mongo", help="Backends à comparer")
+    parseur.set_defaults(redis_db=outils_bench.BENCH_REDIS_DB, mongo_base=outils_bench.BENCH_MONGO_BASE,
+                         duree_max=120)
+    args = parseur.parse_args()
+
+    rapport = {
+        "commit": version_code(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "parametres": vars(args),
+        "essais": [],
+    }
+    print(f"⚖️  Benchmark Redis / MongoDB (commit {rapport['commit']}) : niveaux {args.niveaux}\n")
+    for backend in args.backends.split(","):
+        for niveau in (int(n) for n in args.niveaux.split(",")):
+            args_essai = argparse.Namespace(**dict(vars(args), backend=backend, clients=niveau))
+            print(f"  - {backend} avec {niveau} clients...")
+            rapport["essais"].append(executer_essai(args_essai))
+
+    print(f"\n📁 Résultats : {ecrire_resultats(rapport)}.json / .csv\n")
+    outils_bench.afficher_tableau(
+        ["Backend", "Clients", "Livrées", "Cmd/s", "Msg/s", "p50 (s)", "p95 (s)",
+         "Modération p50 (ms)", "Préparation", "Offre", "Assignation", "Livraison",
+         "Allers-retours/cmd", "CPU manager (%)", "RSS manager (Mo)"],
+        [[e["backend"], e["clients"], e["livrees"], e["commandes_par_s"], e["messages_par_s"],
+          e["latence_p50_s"], e["latence_p95_s"],
+          *(e["etapes"][nom]["p50_ms"] for nom, _, _ in simulate.ETAPES),
+          e["allers_retours_par_commande"], e["ressources"]["manager"]["cpu_pct"],
+          e["ressources"]["manager"]["rss_mo"]]
+         for e in rapport["essais"]]
+    )
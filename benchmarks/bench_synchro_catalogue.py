@@ -0,0 +1,71 @@
+"""
+Benchmark du rafraîchissement quotidien du catalogue dans Redis, quand un seul
+prix change :
+  - import complet : json_to_redis (FLUSHDB puis réécriture de tout le catalogue) ;
+  - synchro        : synchro_catalogue (seuls les éléments modifiés sont écrits).
+Vérifie aussi qu'une clé de commande en cours survit à la synchronisation.
+
+Usage : python benchmarks/bench_synchro_catalogue.py [nb_plats]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import contextlib
+
+import outils_bench
+import redis
+import json_to_redis
+import synchro_catalogue
+
+NB_PLATS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+
+
+def modifier_un_prix(source, destination):
+    with open(source, encoding="utf-8") as f:
+        donnees = json.load(f)
+    donnees["restaurants"][0]["menu"][0]["prix"] = "99.90"
+    with open(destination, "w", encoding="utf-8") as f:
+        json.dump(donnees, f)
+
+
+def chronometrer(fonction, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        debut = time.perf_counter()
+        resultat = fonction(*args, **kwargs)
+    return time.perf_counter() - debut, resultat
+
+
+if __name__ == "__main__":
+    print(f"🔄 Benchmark import complet / synchro : catalogue de {NB_PLATS} plats, un prix modifié\n")
+    db = outils_bench.BENCH_REDIS_DB
+    with tempfile.TemporaryDirectory() as dossier:
+        initial, modifie = os.path.join(dossier, "initial.json"), os.path.join(dossier, "modifie.json")
+        outils_bench.generer_catalogue(initial, NB_PLATS)
+        modifier_un_prix(initial, modifie)
+
+        r.flushdb()
+        duree_premiere, _ = chronometrer(synchro_catalogue.synchroniser, initial, db=db)
+        r.set("commande:cmd_en_cours", "en_livraison")
+        duree_import, _ = chronometrer(json_to_redis.importer_donnees_depuis_json, modifie, db=db)
+        commande_apres_import = r.exists("commande:cmd_en_cours")
+
+        r.flushdb()
+        chronometrer(synchro_catalogue.synchroniser, initial, db=db)
+        r.set("commande:cmd_en_cours", "en_livraison")
+        duree_synchro, stats = chronometrer(synchro_catalogue.synchroniser, modifie, db=db)
+        commande_apres_synchro = r.exists("commande:cmd_en_cours")
+
+    outils_bench.afficher_tableau(
+        ["Méthode", "Durée (s)", "Éléments écrits", "Commande en cours conservée"],
+        [["Synchro initiale (base vide)", round(duree_premiere, 2), "tout", "-"],
+         ["Import complet (FLUSHDB)", round(duree_import, 2), "tout", "oui" if commande_apres_import else "non"],
+         ["Synchro incrémentale", round(duree_synchro, 2), stats["ajouts"] + stats["modifications"] + stats["suppressions"],
+          "oui" if commande_apres_synchro else "non"]]
+    )
+    r.flushdb()
@@ -0,0 +1,88 @@
+"""
+Benchmark : un thread endormi par offre (ancien demarrer_timer_livraison)
+contre le planificateur unique basé sur un ZSET Redis.
+
+Usage : python benchmarks/bench_timer_livraison.py [nb_offres]
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import sys
+import time
+import threading
+import multiprocessing
+
+import outils_bench
+import redis
+from redis_planificateur import demarrer_planificateur, CLE_ECHEANCES
+
+NB_OFFRES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+DELAI = 60  # Même délai que le manager
+
+
+def mesurer_threads(resultats):
+    """Ancienne approche : un threading.Thread qui dort DELAI secondes par offre."""
+    rss_depart = outils_bench.rss_mo()
+    debut = time.perf_counter()
+    lancees = 0
+    try:
+        for _ in range(NB_OFFRES):
+            threading.Thread(target=time.sleep, args=(DELAI,), daemon=True).start()
+            lancees += 1
+    except RuntimeError as e:
+        print(f"  ⚠️ Arrêt après {lancees} threads : {e}")
+    duree = time.perf_counter() - debut
+    resultats.put({
+        "approche": "1 thread / offre",
+        "offres": lancees,
+        "threads": threading.active_count(),
+        "rss_mo": round(outils_bench.rss_mo() - rss_depart, 1),
+        "programmation_s": round(duree, 3),
+    })
+
+
+def mesurer_zset(resultats):
+    """Nouvelle approche : ZADD de chaque échéance + un seul thread de drainage."""
+    r = redis.Redis(db=outils_bench.BENCH_REDIS_DB, decode_responses=True)
+    r.delete(CLE_ECHEANCES)
+    rss_depart = outils_bench.rss_mo()
+    arret = threading.Event()
+    demarrer_planificateur(r, lambda commande_id: None, arret)
+
+    debut = time.perf_counter()
+    for i in range(NB_OFFRES):
+        r.zadd(CLE_ECHEANCES, {f"cmd_bench_{i}": time.time() + DELAI})
+    duree = time.perf_counter() - debut
+
+    try:
+        memoire_redis = r.memory_usage(CLE_ECHEANCES) or 0
+    except redis.exceptions.ResponseError:
+        memoire_redis = 0
+    resultats.put({
+        "approche": "ZSET + 1 thread",
+        "offres": r.zcard(CLE_ECHEANCES),
+        "threads": threading.active_count(),
+        "rss_mo": round(outils_bench.rss_mo() - rss_depart, 1),
+        "programmation_s": round(duree, 3),
+        "redis_zset_ko": round(memoire_redis / 1024, 1),
+    })
+    arret.set()
+    r.delete(CLE_ECHEANCES)
+
+
+if __name__ == "__main__":
+    print(f"⏱️  Benchmark des minuteurs de livraison ({NB_OFFRES} offres en attente)\n")
+    lignes = []
+    for mesure in (mesurer_threads, mesurer_zset):
+        # Chaque approche dans son propre processus pour des mesures isolées
+        file_resultats = multiprocessing.Queue()
+        p = multiprocessing.Process(target=mesure, args=(file_resultats,))
+        p.start()
+        res = file_resultats.get()
+        p.terminate()
+        p.join()
+        lignes.append([res["approche"], res["offres"], res["threads"], res["rss_mo"],
+                       res["programmation_s"], res.get("redis_zset_ko", "-")])
+
+    outils_bench.afficher_tableau(
+        ["Approche", "Offres", "Threads", "RSS (Mo)", "Programmation (s)", "ZSET Redis (Ko)"],
+        lignes
+    )
@@ -0,0 +1,67 @@
+"""
+Benchmark des tournées groupées (tournees.py) : la même simulation (simulate.py, Redis)
+est lancée pour chaque capacité des livreurs, 1 (une commande par course) puis 2, 3...
+Les trajets durent SECONDES_PAR_KM par km : à 15 km/h, une seconde simulée vaut
+3600 / 15 / SECONDES_PAR_KM secondes réelles, ce qui donne le débit en commandes
+livrées par heure de livreur (livreurs x durée de la simulation).
+
+Chaque essai tourne dans un processus neuf (les acteurs et leurs threads ne survivent
+pas d'un essai à l'autre).
+
+Usage : python benchmarks/bench_tournees.py --capacites 1,2,3
+        (toutes les options de simulate.py sont acceptées : --clients, --livreurs, ...)
+(nécessite un serveur Redis local ; la base BENCH_REDIS_DB est vidée)
+"""
+import multiprocessing
+
+import outils_bench
+import simulate
+
+VITESSE_KMH = 15
+CONTEXTE = multiprocessing.get_context("spawn")
+
+
+def essai(args, file_resultats):
+    file_resultats.put(simulate.executer_simulation(args))
+
+
+def mesurer(args):
+    """Lance une simulation dans un processus neuf et renvoie ses résultats."""
+    import redis
+    redis.Redis(db=args.redis_db).flushdb()
+    file_resultats = CONTEXTE.Queue()
+    processus = CONTEXTE.Process(target=essai, args=(args, file_resultats))
+    processus.start()
+    resultats = file_resultats.get()
+    processus.join(timeout=5)
+    if processus.is_alive():
+        processus.terminate()  # Threads des acteurs encore bloqués sur leurs abonnements
+    return resultats
+
+
+if __name__ == "__main__":
+    parseur = simulate.creer_parseur()
+    parseur.add_argument("--capacites", default="1,2,3", help="Capacités des livreurs à comparer")
+    parseur.set_defaults(clients=150, restaurants=10, livreurs=10, debit=3, preparation="uniforme:1:4",
+                         recuperation="fixe:0.5", secondes_par_km=1.0, timeout_livreur=60, duree_max=300,
+                         redis_db=outils_bench.BENCH_REDIS_DB)
+    args = parseur.parse_args()
+    args.backend = "redis"
+    echelle = 3600 / VITESSE_KMH / args.secondes_par_km  # Secondes simulées par seconde réelle
+
+    print(f"🛵 Benchmark tournées : {args.clients} commandes ({args.debit}/s), {args.restaurants} restaurants, "
+          f"{args.livreurs} livreurs, 1 km = {args.secondes_par_km} s\n")
+    lignes = []
+    for capacite in [int(c) for c in args.capacites.split(",")]:
+        args.capacite = capacite
+        resultats = mesurer(args)
+        heures_livreurs = args.livreurs * resultats["duree_s"] * echelle / 3600
+        lignes.append([capacite, resultats["livrees"], resultats["sans_livreur"], resultats["duree_s"],
+                       round(resultats["livrees"] / heures_livreurs, 2) if heures_livreurs else "-",
+                       round(resultats["latence_p50_s"] * echelle / 60, 1),
+                       round(resultats["latence_p95_s"] * echelle / 60, 1)])
+    outils_bench.afficher_tableau(
+        ["Capacité", "Livrées", "Sans livreur", "Durée (s)", "Commandes / livreur-heure",
+         "Latence p50 (min simulées)", "p95 (min)"], lignes)
+    import redis
+    redis.Redis(db=args.redis_db).flushdb()
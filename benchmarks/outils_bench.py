@@ -0,0 +1,106 @@
+import os
+import sys
+import csv
+import json
+import time
+import resource
+import subprocess
+
+# Les acteurs sont des scripts "à plat" : on rend leurs dossiers importables
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for dossier in (RACINE, os.path.join(RACINE, "version_redis"), os.path.join(RACINE, "version_mongo")):
+    if dossier not in sys.path:
+        sys.path.insert(0, dossier)
+
+# Base Redis dédiée aux benchmarks pour ne pas écraser les données de la démo
+BENCH_REDIS_DB = int(os.environ.get("BENCH_REDIS_DB", "15"))
+BENCH_MONGO_BASE = os.environ.get("BENCH_MONGO_BASE", "ubereats_bench")
+
+import statistiques  # noqa: E402
+
+PLATS_PAR_RESTAURANT = 50
+percentile = statistiques.percentile  # Même calcul que la simulation (simulate.py)
+
+
+def rss_mo():
+    """Mémoire résidente actuelle du processus en Mo (VmRSS sous Linux, pic sinon)."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for ligne in f:
+                if ligne.startswith("VmRSS:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Ko ailleurs
+    return pic / (1024 * 1024) if sys.platform == "darwin" else pic / 1024
+
+
+def afficher_tableau(titres, lignes):
+    """Affiche un tableau texte aligné (une liste de lignes de valeurs)."""
+    lignes = [[str(v) for v in ligne] for ligne in lignes]
+    largeurs = [max(len(str(t)), *(len(l[i]) for l in lignes)) if lignes else len(str(t))
+                for i, t in enumerate(titres)]
+    print(" | ".join(str(t).ljust(largeurs[i]) for i, t in enumerate(titres)))
+    print("-+-".join("-" * l for l in largeurs))
+    for ligne in lignes:
+        print(" | ".join(v.ljust(largeurs[i]) for i, v in enumerate(ligne)))
+
+
+def generer_catalogue(chemin, nb_plats, nb_livreurs=1000):
+    """
+    Écrit un catalogue généré au format de donnees_completes.json, restaurant par
+    restaurant (la mémoire ne dépend pas de la taille du fichier produit).
+    """
+    nb_restaurants = max(1, nb_plats // PLATS_PAR_RESTAURANT)
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write('{"restaurants": [')
+        for i in range(nb_restaurants):
+            rest_id = f"rest_{i:06d}"
+            resto = {
+                "id_restaurant": rest_id, "nom": f"Restaurant {i}", "adresse": f"{i} rue du Test, 75011 Paris",
+                "menu": [{"id_plat": f"plat_{i:06d}_{j:02d}", "nom": f"Plat {j}", "description": "Plat généré",
+                          "prix": f"{10 + j % 15}.50", "id_restaurant": rest_id}
+                         for j in range(PLATS_PAR_RESTAURANT)]
+            }
+            f.write((", " if i else "") + json.dumps(resto, ensure_ascii=False))
+        f.write('], "livreurs": ')
+        json.dump([{"id_livreur": f"livr_{i:05d}", "nom": f"Livreur {i}"} for i in range(nb_livreurs)], f,
+                  ensure_ascii=False)
+        f.write("}")
+
+
+def generer_dataset_txt(dossier, nb_plats, nb_livreurs=1000):
+    """Écrit restaurants.txt, plats.txt et livreurs.txt (format de dataset_txt/) triés par id_restaurant."""
+    os.makedirs(dossier, exist_ok=True)
+    nb_restaurants = max(1, nb_plats // PLATS_PAR_RESTAURANT)
+    with open(os.path.join(dossier, "restaurants.txt"), "w", encoding="utf-8", newline="") as f_restos, \
+         open(os.path.join(dossier, "plats.txt"), "w", encoding="utf-8", newline="") as f_plats:
+        restos, plats = csv.writer(f_restos), csv.writer(f_plats)
+        restos.writerow(["id_restaurant", "nom", "adresse"])
+        plats.writerow(["id_plat", "nom", "description", "prix", "id_restaurant"])
+        for i in range(nb_restaurants):
+            rest_id = f"rest_{i:06d}"
+            restos.writerow([rest_id, f"Restaurant {i}", f"{i} rue du Test, 75011 Paris"])
+            plats.writerows([f"plat_{i:06d}_{j:02d}", f"Plat {j}", "Plat généré, sauce maison", f"{10 + j % 15}.50", rest_id]
+                            for j in range(PLATS_PAR_RESTAURANT))
+    with open(os.path.join(dossier, "livreurs.txt"), "w", encoding="utf-8", newline="") as f:
+        ecrivain = csv.writer(f)
+        ecrivain.writerow(["id_livreur", "nom"])
+        ecrivain.writerows([f"livr_{i:05d}", f"Livreur {i}"] for i in range(nb_livreurs))
+
+
+def lancer_scripts(commandes, dossier):
+    """Lance les scripts l'un après l'autre dans 'dossier' ; renvoie (durée en s, RSS max en Mo)."""
+    duree, rss_max = 0.0, 0.0
+    for commande in commandes:
+        debut = time.perf_counter()
+        processus = subprocess.Popen([sys.executable, os.path.join(RACINE, commande[0]), *commande[1:]],
+                                     cwd=dossier, stdout=subprocess.DEVNULL)
+        _, statut, usage = os.wait4(processus.pid, 0)
+        processus.returncode = os.waitstatus_to_exitcode(statut)
+        if processus.returncode:
+            raise RuntimeError(f"{commande[0]} a échoué (code {processus.returncode})")
+        duree += time.perf_counter() - debut
+        rss_max = max(rss_max, usage.ru_maxrss / 1024)  # ko sous Linux
+    return duree, rss_max
@@ -1,6 +1,8 @@
 import csv
 import json
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 def csv_to_json(csv_filepath, json_filename):
     # Création du dossier dataset_json s'il n'existe pas
@@ -15,8 +17,44 @@ def csv_to_json(csv_filepath, json_filename):
     json_filepath = os.path.join('dataset_json', json_filename)
     with open(json_filepath, 'w', encoding='utf-8') as json_file:
         json.dump(data, json_file, indent=4, ensure_ascii=False)
+    return json_filepath
 
-# Appels de conversion avec enregistrement dans dataset_json
-csv_to_json('dataset_csv/restaurants.csv', 'restaurants.json')
-csv_to_json('dataset_csv/plats.csv', 'plats.json')
-csv_to_json('dataset_csv/livreurs.csv', 'livreurs.json')
\ No newline at end of file
+def _convertir(csv_filepath, json_filename):
+    """csv_to_json pour un processus du pool : l'erreur éventuelle est renvoyée, pas levée."""
+    try:
+        return csv_to_json(csv_filepath, json_filename), None
+    except Exception as e:
+        return None, str(e)
+
+def convertir_fichiers(conversions, nb_workers=1):
+    """
+    Convertit chaque couple (fichier CSV, nom du JSON) ; avec nb_workers > 1 les fichiers
+    sont répartis entre plusieurs processus. Renvoie le nombre de fichiers en erreur.
+    """
+    sources = [csv_filepath for csv_filepath, _ in conversions]
+    noms = [json_filename for _, json_filename in conversions]
+    if nb_workers > 1:
+        with ProcessPoolExecutor(nb_workers) as executeur:
+            resultats = list(executeur.map(_convertir, sources, noms))
+    else:
+        resultats = map(_convertir, sources, noms)
+
+    erreurs = 0
+    for csv_filepath, (json_filepath, erreur) in zip(sources, resultats):
+        if erreur:
+            print(f"-> ❌ ERREUR lors de la conversion de '{csv_filepath}' : {erreur}")
+            erreurs += 1
+        else:
+            print(f"-> ✅ SUCCÈS : '{csv_filepath}' converti en '{json_filepath}'.")
+    return erreurs
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Conversion de fichiers CSV en JSON (dans dataset_json/).")
+    parseur.add_argument("fichiers", nargs="*", default=['dataset_csv/restaurants.csv', 'dataset_csv/plats.csv',
+                                                         'dataset_csv/livreurs.csv'])
+    parseur.add_argument("--workers", type=int, default=1, help="Processus de conversion en parallèle")
+    args = parseur.parse_args()
+
+    # Appels de conversion avec enregistrement dans dataset_json (restaurants.csv -> restaurants.json)
+    conversions = [(f, os.path.splitext(os.path.basename(f))[0] + '.json') for f in args.fichiers]
+    convertir_fichiers(conversions, args.workers)
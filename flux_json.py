@@ -0,0 +1,119 @@
+import json
+
+TAILLE_BLOC = 1 << 20  # Caractères lus à la fois (1 Mio)
+ESPACES = " \t\n\r"
+DELIMITEURS = ",]}" + ESPACES  # Caractères qui peuvent suivre un nombre complet
+
+_decodeur = json.JSONDecoder()
+
+
+def lire_elements(chemin, taille_bloc=TAILLE_BLOC):
+    """
+    Lit un fichier JSON de la forme {"restaurants": [...], "livreurs": [...], ...}
+    sans le charger en entier : génère un tuple (nom_du_tableau, element) pour
+    chaque élément des tableaux de premier niveau, au fur et à mesure de la lecture.
+    La mémoire utilisée ne dépend que de la taille du plus gros élément.
+    (Une valeur de premier niveau qui n'est pas un tableau est renvoyée telle quelle.)
+    Un fichier qui est lui-même un tableau, comme dataset_json/plats.json, génère
+    (None, element). Les fichiers ".jsonl" sont lus avec lire_lignes.
+    """
+    if chemin.endswith(".jsonl"):
+        yield from lire_lignes(chemin)
+        return
+    with open(chemin, "r", encoding="utf-8") as f:
+        etat = {"tampon": "", "pos": 0, "fin": False}
+
+        def lire_bloc():
+            bloc = f.read(taille_bloc)
+            if not bloc:
+                etat["fin"] = True
+                return False
+            # On oublie la partie déjà décodée avant d'ajouter le nouveau bloc
+            etat["tampon"] = etat["tampon"][etat["pos"]:] + bloc
+            etat["pos"] = 0
+            return True
+
+        def caractere():
+            """Premier caractère non blanc à partir de la position courante ('' en fin de fichier)."""
+            while True:
+                tampon, pos = etat["tampon"], etat["pos"]
+                while pos < len(tampon) and tampon[pos] in ESPACES:
+                    pos += 1
+                etat["pos"] = pos
+                if pos < len(tampon):
+                    return tampon[pos]
+                if not lire_bloc():
+                    return ""
+
+        def attendre(attendus):
+            c = caractere()
+            if c not in attendus:
+                raise ValueError(f"JSON invalide dans '{chemin}' : '{c}' trouvé, {' ou '.join(attendus)} attendu")
+            etat["pos"] += 1
+            return c
+
+        def valeur():
+            """Décode la valeur JSON suivante, en lisant d'autres blocs si elle est coupée."""
+            caractere()
+            while True:
+                try:
+                    objet, fin = _decodeur.raw_decode(etat["tampon"], etat["pos"])
+                    # Un nombre coupé par la fin du bloc ("12." puis "5") est décodé sans sa
+                    # suite : il n'est complet qu'une fois suivi d'un délimiteur
+                    complet = fin < len(etat["tampon"]) and (etat["tampon"][fin] in DELIMITEURS
+                                                             or not isinstance(objet, (int, float)))
+                    if complet or etat["fin"]:
+                        etat["pos"] = fin
+                        return objet
+                except json.JSONDecodeError:
+                    if etat["fin"]:
+                        raise
+                if not lire_bloc() and not etat["tampon"][etat["pos"]:].strip():
+                    raise ValueError(f"JSON invalide dans '{chemin}' : fin de fichier inattendue")
+
+        if attendre("{[") == "[":
+            if caractere() == "]":
+                return
+            while True:
+                yield None, valeur()
+                if attendre(",]") == "]":
+                    return
+        if caractere() == "}":
+            return
+        while True:
+            cle = valeur()
+            attendre(":")
+            if caractere() == "[":
+                etat["pos"] += 1
+                if caractere() == "]":
+                    etat["pos"] += 1
+                else:
+                    while True:
+                        yield cle, valeur()
+                        if attendre(",]") == "]":
+                            break
+            else:
+                yield cle, valeur()
+            if attendre(",}") == "}":
+                return
+
+
+def lire_lignes(chemin):
+    """
+    Lit un fichier JSON Lines dont chaque ligne est ["nom_du_tableau", element]
+    (format écrit par pipeline_catalogue.py) et génère les mêmes tuples que lire_elements.
+    """
+    with open(chemin, "r", encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, 1):
+            if not ligne.strip():
+                continue
+            try:
+                nom, element = json.loads(ligne)
+            except (json.JSONDecodeError, ValueError, TypeError) as e:
+                raise ValueError(f"JSON invalide dans '{chemin}', ligne {numero} : {e}") from e
+            yield nom, element
+
+
+def ecrire_ligne(f, nom, element):
+    """Écrit un élément au format lu par lire_lignes (JSON compact, une ligne)."""
+    f.write(json.dumps([nom, element], ensure_ascii=False, separators=(",", ":")) + "\n")
@@ -1,5 +1,21 @@
 import json
 import os
+import heapq
+import zlib
+import argparse
+import tempfile
+from contextlib import ExitStack
+
+from flux_json import lire_elements, lire_lignes, ecrire_ligne
+from pipeline_catalogue import ecrire_fichier
+
+FICHIERS_SOURCES = {
+    "restaurants": "dataset_json/restaurants.json",
+    "plats": "dataset_json/plats.json",
+    "livreurs": "dataset_json/livreurs.json"
+}
+FICHIER_DESTINATION = "dataset_json/donnees_completes.json"
+NB_PARTITIONS = 64  # Chaque partition doit tenir en mémoire (~ 1/64e du catalogue)
 
 def fusionner_fichiers_json():
     """
@@ -7,12 +23,8 @@ def fusionner_fichiers_json():
     les fusionne en une structure unique et cohérente, puis sauvegarde
     le résultat dans un nouveau fichier.
     """
-    fichiers_sources = {
-        "restaurants": "dataset_json/restaurants.json",
-        "plats": "dataset_json/plats.json",
-        "livreurs": "dataset_json/livreurs.json"
-    }
-    
+    fichiers_sources = FICHIERS_SOURCES
+
     donnees_brutes = {}
     
     # --- 1. Lecture de tous les fichiers sources ---
@@ -56,7 +68,7 @@ def fusionner_fichiers_json():
     print("-> Fusion terminée.")
 
     # --- 3. Sauvegarde du fichier JSON fusionné ---
-    fichier_destination = "dataset_json/donnees_completes.json"
+    fichier_destination = FICHIER_DESTINATION
     try:
         with open(fichier_destination, 'w', encoding='utf-8') as f:
             # indent=4 pour une belle mise en forme, ensure_ascii=False pour bien gérer les accents
@@ -65,5 +77,88 @@ def fusionner_fichiers_json():
     except Exception as e:
         print(f"\n❌ ERREUR lors de la sauvegarde du fichier : {e}")
 
+def numero_partition(id_restaurant, nb_partitions):
+    # crc32 plutôt que hash() : stable d'un processus à l'autre
+    return zlib.crc32(id_restaurant.encode("utf-8")) % nb_partitions
+
+def partitionner(dossier, nb_partitions):
+    """
+    Répartit restaurants et plats dans des fichiers JSON Lines par partition
+    (selon id_restaurant) : un restaurant et ses plats tombent dans la même
+    partition. Chaque restaurant garde son rang pour restituer l'ordre d'origine.
+    """
+    with ExitStack() as pile:
+        fichiers = {(nom, p): pile.enter_context(open(os.path.join(dossier, f"{nom}_{p}.jsonl"), "w", encoding="utf-8"))
+                    for nom in ("restaurants", "plats") for p in range(nb_partitions)}
+        for rang, (_, resto) in enumerate(lire_elements(FICHIERS_SOURCES["restaurants"])):
+            ecrire_ligne(fichiers["restaurants", numero_partition(resto["id_restaurant"], nb_partitions)], rang, resto)
+        for _, plat in lire_elements(FICHIERS_SOURCES["plats"]):
+            p = numero_partition(str(plat.get("id_restaurant")), nb_partitions)
+            ecrire_ligne(fichiers["plats", p], None, plat)
+
+def joindre_partition(dossier, p):
+    """Joint une partition en mémoire ; écrit ses restaurants (avec menu) dans l'ordre de leur rang."""
+    restaurants_map = {}
+    for rang, resto in lire_lignes(os.path.join(dossier, f"restaurants_{p}.jsonl")):
+        resto['menu'] = []
+        restaurants_map[resto['id_restaurant']] = (rang, resto)
+    for _, plat in lire_lignes(os.path.join(dossier, f"plats_{p}.jsonl")):
+        id_resto_associe = plat.get("id_restaurant")
+        if id_resto_associe in restaurants_map:
+            restaurants_map[id_resto_associe][1]['menu'].append(plat)
+        else:
+            print(f"  - ⚠️ AVERTISSEMENT: Le plat '{plat.get('id_plat')}' a un id_restaurant '{id_resto_associe}' qui ne correspond à aucun restaurant connu.")
+    with open(os.path.join(dossier, f"jointure_{p}.jsonl"), "w", encoding="utf-8") as f:
+        # Les restaurants ont été écrits dans la partition par rang croissant
+        for rang, resto in restaurants_map.values():
+            ecrire_ligne(f, rang, resto)
+    for nom in ("restaurants", "plats"):
+        os.remove(os.path.join(dossier, f"{nom}_{p}.jsonl"))
+
+def fusionner_hors_memoire(nb_partitions=NB_PARTITIONS, format_sortie="json", fichier_destination=FICHIER_DESTINATION,
+                           dossier_temp=None):
+    """
+    Variante de fusionner_fichiers_json pour les catalogues plus gros que la RAM :
+    jointure par partitions de hachage écrites sur disque puis traitées une à une,
+    et fusion finale des partitions dans l'ordre d'origine des restaurants.
+    Produit la même structure (JSON compact) ou son équivalent JSON Lines.
+    """
+    for nom_fichier in FICHIERS_SOURCES.values():
+        if not os.path.exists(nom_fichier):
+            print(f"❌ ERREUR: Le fichier '{nom_fichier}' est introuvable. Arrêt du script.")
+            return
+
+    with tempfile.TemporaryDirectory(dir=dossier_temp) as dossier:
+        try:
+            print(f"Partitionnement des restaurants et des plats ({nb_partitions} partitions)...")
+            partitionner(dossier, nb_partitions)
+            print("Jointure des partitions...")
+            for p in range(nb_partitions):
+                joindre_partition(dossier, p)
+
+            print("Fusion des partitions et sauvegarde...")
+            with ExitStack() as pile:
+                partitions = [pile.enter_context(open(os.path.join(dossier, f"jointure_{p}.jsonl"), encoding="utf-8"))
+                              for p in range(nb_partitions)]
+                restaurants = heapq.merge(*[(json.loads(ligne) for ligne in f) for f in partitions],
+                                          key=lambda rang_resto: rang_resto[0])
+                elements = [(("restaurants", resto) for _, resto in restaurants),
+                            (("livreurs", livreur) for _, livreur in lire_elements(FICHIERS_SOURCES["livreurs"]))]
+                ecrire_fichier((element for flux in elements for element in flux), fichier_destination, format_sortie)
+        except ValueError as e:
+            print(f"❌ ERREUR: Un fichier source contient un JSON invalide : {e}")
+            return
+    print(f"\n🎉 SUCCÈS ! Les données ont été fusionnées dans '{fichier_destination}'.")
+
 if __name__ == "__main__":
-    fusionner_fichiers_json()
\ No newline at end of file
+    parseur = argparse.ArgumentParser(description="Fusion des JSON restaurants, plats et livreurs en un catalogue complet.")
+    parseur.add_argument("--hors-memoire", action="store_true", help="Jointure par partitions sur disque (catalogues plus gros que la RAM)")
+    parseur.add_argument("--partitions", type=int, default=NB_PARTITIONS, help="Nombre de partitions (mode hors mémoire)")
+    parseur.add_argument("--format", choices=["json", "jsonl"], default="json", help="Format de sortie (mode hors mémoire)")
+    parseur.add_argument("--sortie", help="Fichier produit (mode hors mémoire)")
+    args = parseur.parse_args()
+    if args.hors_memoire:
+        sortie = args.sortie or (FICHIER_DESTINATION if args.format == "json" else "dataset_json/catalogue.jsonl")
+        fusionner_hors_memoire(args.partitions, args.format, sortie)
+    else:
+        fusionner_fichiers_json()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import re
+import math
+import zlib
+
+from normalisation import normaliser_nom
+
+# --- Géocodage hors ligne des adresses ---
+# Le dispatch des livraisons (redis_manager.py, mongo_manager.py) a besoin des
+# coordonnées des restaurants et des clients. Sans service externe, une adresse est
+# placée au centre de son code postal (table ci-dessous, à défaut au centre de sa
+# ville), décalé d'au plus quelques centaines de mètres selon la rue : deux adresses
+# différentes ne tombent pas au même point, et une adresse donne toujours le même.
+# Les positions sont des tuples (longitude, latitude), dans l'ordre de GEOADD et GeoJSON.
+CENTRES_CODES_POSTAUX = {
+    # Paris
+    "75001": (2.3364, 48.8625), "75002": (2.3428, 48.8683), "75003": (2.3600, 48.8630),
+    "75004": (2.3575, 48.8543), "75005": (2.3507, 48.8445), "75006": (2.3327, 48.8491),
+    "75007": (2.3125, 48.8562), "75008": (2.3125, 48.8727), "75009": (2.3375, 48.8770),
+    "75010": (2.3608, 48.8762), "75011": (2.3800, 48.8590), "75012": (2.3950, 48.8350),
+    "75013": (2.3620, 48.8283), "75014": (2.3265, 48.8292), "75015": (2.2920, 48.8400),
+    "75016": (2.2620, 48.8604), "75017": (2.3067, 48.8873), "75018": (2.3482, 48.8925),
+    "75019": (2.3848, 48.8871), "75020": (2.4011, 48.8634),
+    # Lyon
+    "69001": (4.8320, 45.7700), "69002": (4.8270, 45.7500), "69003": (4.8600, 45.7600),
+    "69004": (4.8270, 45.7780), "69005": (4.8100, 45.7580), "69006": (4.8520, 45.7700),
+    "69007": (4.8420, 45.7360), "69008": (4.8700, 45.7350), "69009": (4.8050, 45.7750),
+    # Marseille
+    "13001": (5.3840, 43.2990), "13002": (5.3650, 43.3100), "13003": (5.3800, 43.3120),
+    "13004": (5.4000, 43.3070), "13005": (5.3970, 43.2930), "13006": (5.3800, 43.2870),
+    "13007": (5.3600, 43.2820), "13008": (5.3800, 43.2450), "13009": (5.4400, 43.2500),
+    "13010": (5.4250, 43.2750), "13012": (5.4400, 43.3050), "13013": (5.4300, 43.3500),
+    # Autres villes du catalogue
+    "06000": (7.2620, 43.7000), "06100": (7.2550, 43.7200), "06200": (7.2200, 43.6800),
+    "06300": (7.2850, 43.7000), "31000": (1.4440, 43.6045), "33000": (-0.5792, 44.8378),
+    "44000": (-1.5536, 47.2184), "51100": (4.0317, 49.2583), "59000": (3.0573, 50.6292),
+    "59800": (3.0700, 50.6350), "67000": (7.7521, 48.5734), "68000": (7.3585, 48.0794),
+}
+CENTRES_VILLES = {
+    "paris": (2.3470, 48.8590), "lyon": (4.8357, 45.7640), "marseille": (5.3698, 43.2965),
+    "nice": (7.2620, 43.7102), "toulouse": (1.4442, 43.6047), "bordeaux": (-0.5792, 44.8378),
+    "nantes": (-1.5536, 47.2184), "reims": (4.0317, 49.2583), "lille": (3.0573, 50.6292),
+    "strasbourg": (7.7521, 48.5734), "colmar": (7.3585, 48.0794),
+}
+DISPERSION_CODE_POSTAL_M = 500  # Écart max au centre d'un code postal
+DISPERSION_VILLE_M = 3000       # Écart max au centre d'une ville (adresse sans code postal connu)
+METRES_PAR_DEGRE = 111_320
+RAYON_TERRE_KM = 6371.0
+
+CODE_POSTAL = re.compile(r"\b(\d{5})\b")
+
+
+def decaler(centre, graine, dispersion_m):
+    """Point à au plus 'dispersion_m' mètres de 'centre', toujours le même pour une même graine."""
+    empreinte = zlib.crc32(graine.encode())
+    angle = (empreinte & 0xFFFF) / 0x10000 * 2 * math.pi
+    distance = math.sqrt((empreinte >> 16) / 0x10000) * dispersion_m  # Uniforme dans le disque
+    longitude, latitude = centre
+    return (longitude + distance * math.cos(angle) / (METRES_PAR_DEGRE * math.cos(math.radians(latitude))),
+            latitude + distance * math.sin(angle) / METRES_PAR_DEGRE)
+
+
+def geocoder(adresse):
+    """
+    Position (longitude, latitude) d'une adresse, ou None si ni son code postal ni
+    sa ville ne sont connus : "31 Rue Marbeuf, 75008 Paris" -> (2.31..., 48.87...).
+    """
+    if not adresse:
+        return None
+    normalisee = normaliser_nom(adresse)
+    code = CODE_POSTAL.search(normalisee)
+    if code and code.group(1) in CENTRES_CODES_POSTAUX:
+        return decaler(CENTRES_CODES_POSTAUX[code.group(1)], normalisee, DISPERSION_CODE_POSTAL_M)
+    for ville, centre in CENTRES_VILLES.items():
+        if re.search(rf"\b{ville}\b", normalisee):
+            return decaler(centre, normalisee, DISPERSION_VILLE_M)
+    return None
+
+
+def distance_km(a, b):
+    """Distance à vol d'oiseau (haversine) entre deux positions (longitude, latitude)."""
+    lon1, lat1, lon2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(h))
@@ -1,6 +1,12 @@
-import json
 import os
-from pymongo import MongoClient
+import time
+import argparse
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from flux_json import lire_elements
+from normalisation import normaliser_nom
+from synchro_catalogue import EMPREINTES_MONGO
 
 # Connexion à MongoDB (assurez-vous qu'il tourne avec le Replica Set !)
 try:
@@ -15,47 +21,127 @@ except Exception as e:
     exit()
 
 FICHIER_JSON = "dataset_json/donnees_completes.json"
+TAILLE_LOT = 1000 # Documents envoyés par insert_many
+COLLECTIONS = ("restaurants", "clients", "livreurs") # Tableaux du fichier JSON importés
+SUFFIXE_CHARGEMENT = "_chargement" # Collections remplies par l'import, renommées une fois le fichier lu
+
+# Index utilisés par les acteurs, créés APRÈS le chargement (plus rapide qu'au fil des insertions)
+INDEX = {
+    "restaurants": [("id_restaurant", {"unique": True}), ("nom", {}), ("nom_normalise", {}), ("menu.id_plat", {})],
+    "livreurs": [("id_livreur", {})],
+    "commandes": [("commande_id", {}), ("statut", {}), ("date_creation", {})],
+}
+
+def inserer_lot(collection, lot, stats):
+    """Insère un lot sans s'arrêter à la première erreur (ordered=False) ; compte les rejets."""
+    nom = collection.name.removesuffix(SUFFIXE_CHARGEMENT)
+    try:
+        resultat = collection.insert_many(lot, ordered=False)
+        stats[nom] = stats.get(nom, 0) + len(resultat.inserted_ids)
+    except BulkWriteError as e:
+        stats[nom] = stats.get(nom, 0) + e.details.get("nInserted", 0)
+        stats["erreurs"] += len(e.details.get("writeErrors", []))
+
+def creer_index(collections=INDEX, suffixe=""):
+    """Crée les index des collections 'collections' (noms suivis de 'suffixe')."""
+    for nom_collection in collections:
+        for champ, options in INDEX[nom_collection]:
+            try:
+                db[nom_collection + suffixe].create_index([(champ, ASCENDING)], **options)
+                print(f"   (Index créé sur '{nom_collection}.{champ}'{' unique' if options.get('unique') else ''})")
+            except OperationFailure as e:
+                # Ex: doublons d'id_restaurant dans le fichier source
+                print(f"❌ ERREUR: Index '{nom_collection}.{champ}' impossible à créer : {e}")
 
-def importer_donnees():
-    # 1. Charger le fichier JSON
-    if not os.path.exists(FICHIER_JSON):
-        print(f"❌ ERREUR: Le fichier '{FICHIER_JSON}' est introuvable.")
+def importer_donnees(fichier_json=FICHIER_JSON, taille_lot=TAILLE_LOT):
+    """
+    Importe le fichier JSON en le lisant au fil de l'eau (flux_json) et en
+    insérant des lots bornés : la mémoire reste stable quelle que soit la
+    taille du catalogue. Les index sont construits une fois les données chargées.
+    """
+    # 1. Vérifier le fichier JSON
+    if not os.path.exists(fichier_json):
+        print(f"❌ ERREUR: Le fichier '{fichier_json}' est introuvable.")
         return
-    
-    with open(FICHIER_JSON, 'r', encoding='utf-8') as f:
-        donnees = json.load(f)
-    print(f"✅ Fichier '{FICHIER_JSON}' chargé.")
-
-    # 2. Nettoyer les collections existantes
-    print("\nNettoyage des collections existantes...")
-    db.restaurants.drop()
-    db.livreurs.drop()
-    db.commandes.drop() # Vider aussi les commandes précédentes
 
-    # 3. Insérer les données
+    # 2 et 3. Insérer les données au fil de la lecture, puis remplacer les collections
     try:
-        # Insérer les restaurants (avec leur menu imbriqué)
-        if "restaurants" in donnees:
-            db.restaurants.insert_many(donnees["restaurants"])
-            print(f"-> {len(donnees['restaurants'])} restaurants importés.")
-            # Créer un index de recherche sur le nom
-            db.restaurants.create_index("nom")
-            print("   (Index de recherche créé sur 'nom')")
-
-        # Insérer les clients
-        if "clients" in donnees:
-            db.clients.insert_many(donnees["clients"])
-            print(f"-> {len(donnees['clients'])} clients importés.")
-
-        # Insérer les livreurs
-        if "livreurs" in donnees:
-            db.livreurs.insert_many(donnees["livreurs"])
-            print(f"-> {len(donnees['livreurs'])} livreurs importés.")
-            
-        print("\n🎉 SUCCÈS ! Toutes les données ont été importées dans MongoDB.")
-    
+        importer_elements(lire_elements(fichier_json), taille_lot)
+    except ValueError as e:
+        print(f"❌ ERREUR: Le contenu de '{fichier_json}' n'est pas un JSON valide : {e}")
     except Exception as e:
         print(f"❌ ERREUR lors de l'importation : {e}")
 
+def importer_elements(elements, taille_lot=TAILLE_LOT):
+    """
+    Remplace les collections par un flux d'éléments (nom_du_tableau, document),
+    insérés par lots bornés dans des collections de chargement, puis construit les index.
+    Les collections existantes ne sont remplacées (renameCollection) qu'une fois tout
+    le flux lu : une erreur au milieu du fichier laisse la base intacte.
+    """
+    for nom_collection in COLLECTIONS:
+        db[nom_collection + SUFFIXE_CHARGEMENT].drop() # Reste d'un import interrompu
+    print(f"Importation par lots de {taille_lot} documents...")
+    try:
+        stats, duree = charger_elements(elements, taille_lot)
+    except BaseException:
+        for nom_collection in COLLECTIONS:
+            db[nom_collection + SUFFIXE_CHARGEMENT].drop()
+        raise
+
+    total = sum(v for k, v in stats.items() if k != "erreurs")
+    for nom_collection in COLLECTIONS:
+        if nom_collection in stats:
+            print(f"-> {stats[nom_collection]} {nom_collection} importés.")
+    if stats["erreurs"]:
+        print(f"⚠️  {stats['erreurs']} documents rejetés (voir les erreurs d'écriture).")
+    print(f"   {total} documents en {duree:.1f} s ({total / duree if duree else 0:.0f} documents/s)")
+
+    # Construire les index une fois les données chargées, avant de remplacer les collections
+    print("\nCréation des index...")
+    creer_index([nom for nom in INDEX if nom in COLLECTIONS], SUFFIXE_CHARGEMENT)
+    print("\nRemplacement des collections existantes...")
+    collections_chargees = db.list_collection_names()
+    for nom_collection in COLLECTIONS:
+        if nom_collection + SUFFIXE_CHARGEMENT in collections_chargees:
+            db[nom_collection + SUFFIXE_CHARGEMENT].rename(nom_collection, dropTarget=True)
+        else:
+            db[nom_collection].drop() # Tableau absent du fichier
+    db.commandes.drop() # Vider aussi les commandes précédentes
+    # Empreintes de la synchronisation précédente (synchro_catalogue.py) : elles ne décrivent plus
+    # la base, la prochaine synchronisation réécrira tout le catalogue
+    db[EMPREINTES_MONGO].drop()
+    creer_index([nom for nom in INDEX if nom not in COLLECTIONS])
+    print("\n🎉 SUCCÈS ! Toutes les données ont été importées dans MongoDB.")
+    return total
+
+def charger_elements(elements, taille_lot):
+    """Insère le flux dans les collections de chargement ; renvoie (statistiques, durée en s)."""
+    lots = {nom: [] for nom in COLLECTIONS}
+    stats = {"erreurs": 0}
+    debut = dernier_affichage = time.perf_counter()
+    for nom_collection, document in elements:
+        if nom_collection not in lots:
+            continue
+        if nom_collection == "restaurants":
+            # Recherche par nom insensible à la casse et aux accents (voir version_mongo/mongo_recherche.py)
+            document["nom_normalise"] = normaliser_nom(document.get("nom", ""))
+        lots[nom_collection].append(document)
+        if len(lots[nom_collection]) >= taille_lot:
+            inserer_lot(db[nom_collection + SUFFIXE_CHARGEMENT], lots[nom_collection], stats)
+            lots[nom_collection] = []
+            if time.perf_counter() - dernier_affichage >= 1:
+                dernier_affichage = time.perf_counter()
+                total = sum(v for k, v in stats.items() if k != "erreurs")
+                print(f"  ... {total} documents ({total / (dernier_affichage - debut):.0f} documents/s)", flush=True)
+    for nom_collection, lot in lots.items():
+        if lot:
+            inserer_lot(db[nom_collection + SUFFIXE_CHARGEMENT], lot, stats)
+    return stats, time.perf_counter() - debut
+
 if __name__ == "__main__":
-    importer_donnees()
\ No newline at end of file
+    parseur = argparse.ArgumentParser(description="Import du fichier JSON complet dans MongoDB.")
+    parseur.add_argument("fichier", nargs="?", default=FICHIER_JSON)
+    parseur.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="Documents envoyés par insert_many")
+    args = parseur.parse_args()
+    importer_donnees(args.fichier, args.taille_lot)
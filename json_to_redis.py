@@ -1,75 +1,200 @@
 import redis
-import json
 import os
+import sys
+import time
+import argparse
+import multiprocessing
 
-def importer_donnees_depuis_json(fichier_json="dataset_json/donnees_completes.json"):
+from flux_json import lire_elements
+from synchro_catalogue import EMPREINTES_REDIS, empreinte
+
+# Les clés des index et de la version du catalogue sont celles lues par les clients
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "version_redis"))
+from redis_index import INDEX_RESTAURANTS, VERSION_CATALOGUE, indexer_nom_restaurant  # noqa: E402
+
+TAILLE_LOT = 1000  # Lignes (restaurant, plat ou livreur) envoyées par pipeline
+
+def ecrire_fiche_restaurant(pipe, resto):
+    """Ajoute au pipeline le Hash d'un restaurant (sans son menu) et ses entrées dans les index."""
+    resto_id = resto['id_restaurant']
+    # Créer un Hash pour le restaurant
+    pipe.hset(f"restaurant:{resto_id}", mapping={
+        "nom": resto.get("nom", "N/A"),
+        "adresse": resto.get("adresse", "N/A")
+    })
+    # Index des restaurants (lu par le client à la place de KEYS)
+    pipe.sadd(INDEX_RESTAURANTS, resto_id)
+    # Index d'autocomplétion des noms (ZRANGEBYLEX côté client)
+    indexer_nom_restaurant(pipe, resto_id, resto.get("nom", "N/A"))
+
+def ecrire_plat(pipe, resto_id, plat):
+    plat_id = plat['id_plat']
+    # Créer un Hash pour le plat
+    pipe.hset(f"plat:{plat_id}", mapping={
+        "nom": plat.get("nom", "N/A"),
+        "description": plat.get("description", ""),
+        "prix": plat.get("prix", "0.00"),
+        "id_restaurant": resto_id
+    })
+    # Ajouter l'ID du plat au Set du menu du restaurant
+    pipe.sadd(f"restaurant:{resto_id}:plats", plat_id)
+
+def ecrire_restaurant(pipe, resto):
+    """Ajoute au pipeline les commandes d'un restaurant et de son menu ; renvoie le nombre de lignes."""
+    ecrire_fiche_restaurant(pipe, resto)
+    # Le menu du fichier remplace l'ancien (mode upsert) : un plat retiré ne doit plus être commandable
+    pipe.delete(f"restaurant:{resto['id_restaurant']}:plats")
+    # Gérer le menu associé
+    for plat in resto.get("menu", []):
+        ecrire_plat(pipe, resto['id_restaurant'], plat)
+    return 1 + len(resto.get("menu", []))
+
+def ecrire_livreur(pipe, livreur):
+    pipe.hset(f"livreur:{livreur['id_livreur']}", mapping=livreur)
+    return 1
+
+def ecrire_empreintes(pipe, type_element, element):
+    """
+    Ajoute au pipeline les empreintes d'un restaurant (et de ses plats) ou d'un livreur
+    importé : la synchronisation suivante (synchro_catalogue.py) compare le catalogue
+    à ce qui est réellement en base, même après un import en mode upsert.
+    """
+    if type_element == "livreurs":
+        pipe.hset(f"{EMPREINTES_REDIS}:livreurs", element["id_livreur"], empreinte("livreurs", element))
+        return
+    resto_id = element["id_restaurant"]
+    pipe.hset(f"{EMPREINTES_REDIS}:restaurants", resto_id, empreinte("restaurants", element))
+    empreintes_plats = {plat["id_plat"]: empreinte("plats", dict(plat, id_restaurant=resto_id))
+                        for plat in element.get("menu", [])}
+    if empreintes_plats:
+        pipe.hset(f"{EMPREINTES_REDIS}:plats", mapping=empreintes_plats)
+
+def decouper_en_lots(elements, taille_lot):
+    """
+    Regroupe les éléments (nom_du_tableau, element) - restaurants et livreurs,
+    les autres tableaux sont ignorés - en lots d'environ 'taille_lot' lignes.
+    """
+    lot, lignes = [], 0
+    for type_element, element in elements:
+        if type_element not in ("restaurants", "livreurs"):
+            continue
+        lot.append((type_element, element))
+        lignes += 1 + len(element.get("menu", [])) if type_element == "restaurants" else 1
+        if lignes >= taille_lot:
+            yield lot
+            lot, lignes = [], 0
+    if lot:
+        yield lot
+
+# Connexion propre à chaque processus d'import (les connexions ne se partagent pas entre processus)
+_connexion_worker = None
+
+def _initialiser_worker(db):
+    global _connexion_worker
+    _connexion_worker = redis.Redis(db=db, decode_responses=True)
+
+def ecrire_lot(lot, r=None):
+    """Envoie un lot en un seul aller-retour (pipeline non transactionnel) ; renvoie le nombre de lignes."""
+    pipe = (r or _connexion_worker).pipeline(transaction=False)
+    lignes = 0
+    for type_element, element in lot:
+        if type_element == "restaurants":
+            lignes += ecrire_restaurant(pipe, element)
+        else:
+            lignes += ecrire_livreur(pipe, element)
+        ecrire_empreintes(pipe, type_element, element)
+    pipe.execute()
+    return lignes
+
+def importer_donnees_depuis_json(fichier_json="dataset_json/donnees_completes.json", taille_lot=TAILLE_LOT,
+                                 nb_workers=1, upsert=False, db=0):
     """
-    Vide la base de données Redis et la peuple avec les données
-    contenues dans le fichier JSON complet.
+    Peuple la base Redis avec les données du fichier JSON complet, par lots
+    envoyés en pipeline (éventuellement répartis entre 'nb_workers' processus).
+    Par défaut la base est vidée avant l'import ; avec 'upsert', les entrées
+    existantes sont mises à jour sur place et un nouvel import ne change rien.
+    Renvoie le nombre de lignes importées (ou None en cas d'erreur).
     """
     # 1. Connexion à Redis
     try:
-        r = redis.Redis(decode_responses=True)
+        r = redis.Redis(db=db, decode_responses=True)
         r.ping() # Vérifie que la connexion est active
     except redis.exceptions.ConnectionError as e:
         print(f"❌ ERREUR: Impossible de se connecter à Redis.")
         print("   Veuillez vous assurer que votre conteneur Docker 'UberEatsRedis' est bien en cours d'exécution.")
         print(f"   Détail de l'erreur : {e}")
-        return
+        return None
 
-    # 2. Charger les données depuis le fichier JSON
+    # 2. Vérifier le fichier JSON, lu au fil de l'eau (flux_json) sans le charger en entier :
+    # une première lecture complète évite de vider la base pour un fichier invalide
     if not os.path.exists(fichier_json):
         print(f"❌ ERREUR: Le fichier '{fichier_json}' est introuvable. Assurez-vous qu'il est dans le même dossier que ce script.")
-        return
+        return None
     try:
-        with open(fichier_json, 'r', encoding='utf-8') as f:
-            donnees = json.load(f)
-        print(f"✅ Fichier '{fichier_json}' chargé avec succès.")
-    except json.JSONDecodeError:
-        print(f"❌ ERREUR: Le contenu de '{fichier_json}' n'est pas un JSON valide.")
-        return
+        for _ in lire_elements(fichier_json):
+            pass
+        print(f"✅ Fichier '{fichier_json}' valide.")
+    except ValueError as e:
+        print(f"❌ ERREUR: Le contenu de '{fichier_json}' n'est pas un JSON valide : {e}")
+        return None
 
-    # 3. Nettoyer la base de données Redis avant l'importation
-    print("\nNettoyage de la base de données Redis (FLUSHDB)...")
-    r.flushdb()
+    # 3. Nettoyer la base de données Redis avant l'importation (sauf en mode upsert)
+    if upsert:
+        print("\nMode upsert : les données existantes sont mises à jour, sans FLUSHDB.")
+    else:
+        print("\nNettoyage de la base de données Redis (FLUSHDB)...")
+        r.flushdb()
 
-    # 4. Importer les données en utilisant les structures Redis appropriées
+    # 4. Importer les données par lots, en pipeline
+    print(f"Importation des restaurants, menus et livreurs (lots de {taille_lot} lignes, {nb_workers} processus)...")
     try:
-        # Importer les restaurants et leurs plats
-        print("Importation des restaurants et de leurs menus...")
-        for resto in donnees.get("restaurants", []):
-            resto_id = resto['id_restaurant']
-            # Créer un Hash pour le restaurant
-            r.hset(f"restaurant:{resto_id}", mapping={
-                "nom": resto.get("nom", "N/A"),
-                "adresse": resto.get("adresse", "N/A")
-            })
-            # Gérer le menu associé
-            for plat in resto.get("menu", []):
-                plat_id = plat['id_plat']
-                # Créer un Hash pour le plat
-                r.hset(f"plat:{plat_id}", mapping={
-                    "nom": plat.get("nom", "N/A"),
-                    "description": plat.get("description", ""),
-                    "prix": plat.get("prix", "0.00"),
-                    "id_restaurant": resto_id
-                })
-                # Ajouter l'ID du plat au Set du menu du restaurant
-                r.sadd(f"restaurant:{resto_id}:plats", plat_id)
-
-
-        # Importer les livreurs
-        print("Importation des livreurs...")
-        for livreur in donnees.get("livreurs", []):
-            r.hset(f"livreur:{livreur['id_livreur']}", mapping=livreur)
-            
+        total = importer_elements(r, lire_elements(fichier_json), taille_lot, nb_workers, db)
         print("\n🎉 SUCCÈS ! Toutes les données ont été importées dans Redis.")
-
+        return total
     except KeyError as e:
         print(f"❌ ERREUR: Une clé attendue est manquante dans le fichier JSON : {e}")
     except Exception as e:
         print(f"❌ ERREUR inattendue lors de l'importation : {e}")
+    return None
+
+def importer_elements(r, elements, taille_lot=TAILLE_LOT, nb_workers=1, db=0):
+    """
+    Écrit un flux d'éléments (nom_du_tableau, element) par lots en pipeline,
+    sans vider la base ; renvoie le nombre de lignes importées.
+    """
+    lots = decouper_en_lots(elements, taille_lot)
+    total, debut, dernier_affichage = 0, time.perf_counter(), 0.0
+    if nb_workers > 1:
+        with multiprocessing.Pool(nb_workers, initializer=_initialiser_worker, initargs=(db,)) as pool:
+            resultats = pool.imap_unordered(ecrire_lot, lots)
+            for lignes in resultats:
+                total += lignes
+                dernier_affichage = afficher_progression(total, debut, dernier_affichage)
+    else:
+        for lot in lots:
+            total += ecrire_lot(lot, r)
+            dernier_affichage = afficher_progression(total, debut, dernier_affichage)
+
+    r.incr(VERSION_CATALOGUE)
+    duree = time.perf_counter() - debut
+    print(f"  {total} lignes importées en {duree:.1f} s ({total / duree if duree else 0:.0f} lignes/s)")
+    return total
+
+def afficher_progression(total, debut, dernier_affichage):
+    """Affiche (au plus une fois par seconde) le nombre de lignes importées et le débit."""
+    maintenant = time.perf_counter()
+    if maintenant - dernier_affichage < 1:
+        return dernier_affichage
+    print(f"  ... {total} lignes ({total / (maintenant - debut):.0f} lignes/s)", flush=True)
+    return maintenant
 
 
 if __name__ == "__main__":
-    importer_donnees_depuis_json()
\ No newline at end of file
+    parseur = argparse.ArgumentParser(description="Import du fichier JSON complet dans Redis.")
+    parseur.add_argument("fichier", nargs="?", default="dataset_json/donnees_completes.json")
+    parseur.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="Lignes envoyées par pipeline")
+    parseur.add_argument("--workers", type=int, default=1, help="Processus d'import en parallèle")
+    parseur.add_argument("--upsert", action="store_true", help="Mettre à jour sans vider la base (pas de FLUSHDB)")
+    parseur.add_argument("--db", type=int, default=0, help="Numéro de base Redis")
+    args = parseur.parse_args()
+    importer_donnees_depuis_json(args.fichier, args.taille_lot, args.workers, args.upsert, args.db)
@@ -0,0 +1,12 @@
+import unicodedata
+
+# Normalisation des noms de restaurants pour la recherche insensible à la casse et
+# aux accents : clé de l'index d'autocomplétion Redis (restaurants:autocompletion)
+# et champ 'nom_normalise' des restaurants MongoDB. Importé par les scripts d'import,
+# version_redis/redis_index.py et version_mongo/mongo_recherche.py.
+
+
+def normaliser_nom(nom):
+    """Minuscules, sans accents ni espaces superflus : "  Café  de Flore" -> "cafe de flore"."""
+    decompose = unicodedata.normalize("NFKD", nom)
+    return " ".join("".join(c for c in decompose if not unicodedata.combining(c)).casefold().split())
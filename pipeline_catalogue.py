@@ -0,0 +1,214 @@
+import os
+import csv
+import json
+import time
+import argparse
+from decimal import Decimal, InvalidOperation
+
+from flux_json import ecrire_ligne
+
+DOSSIER_TXT = "dataset_txt"
+SORTIES = {"jsonl": "dataset_json/catalogue.jsonl", "json": "dataset_json/donnees_completes.json"}
+TAILLE_LOT = 1000
+
+# Colonnes obligatoires (non vides) de chaque fichier source
+COLONNES = {
+    "restaurants": ("id_restaurant", "nom"),
+    "plats": ("id_plat", "nom", "prix", "id_restaurant"),
+    "livreurs": ("id_livreur", "nom"),
+}
+MAX_AVERTISSEMENTS = 10  # Au-delà, les rejets sont seulement comptés
+
+
+def avertir(stats, message):
+    stats["avertissements"] += 1
+    if stats["avertissements"] <= MAX_AVERTISSEMENTS:
+        print(f"  - ⚠️ AVERTISSEMENT: {message}")
+
+
+def lire_lignes_valides(chemin, nom, stats):
+    """
+    Lit un fichier TXT (format CSV avec en-tête) ligne par ligne et génère
+    les lignes valides sous forme de dict ; les autres sont comptées et signalées.
+    """
+    with open(chemin, mode='r', encoding='utf-8', newline='') as f:
+        lecteur = csv.DictReader(f)
+        manquantes = [c for c in COLONNES[nom] if c not in (lecteur.fieldnames or [])]
+        if manquantes:
+            raise ValueError(f"Colonnes manquantes dans '{chemin}' : {', '.join(manquantes)}")
+        for ligne in lecteur:
+            # Trop de champs (clé None) ou pas assez (valeurs None)
+            if None in ligne or None in ligne.values():
+                avertir(stats, f"'{chemin}' ligne {lecteur.line_num} : nombre de champs incorrect, ignorée.")
+                stats["rejets"] += 1
+                continue
+            vides = [c for c in COLONNES[nom] if not ligne[c].strip()]
+            if vides:
+                avertir(stats, f"'{chemin}' ligne {lecteur.line_num} : {', '.join(vides)} vide(s), ignorée.")
+                stats["rejets"] += 1
+                continue
+            if nom == "plats":
+                try:
+                    if Decimal(ligne["prix"]) < 0:
+                        raise InvalidOperation
+                except InvalidOperation:
+                    avertir(stats, f"'{chemin}' ligne {lecteur.line_num} : prix '{ligne['prix']}' invalide, ignorée.")
+                    stats["rejets"] += 1
+                    continue
+            yield ligne
+
+
+def verifier_ordre(lignes, chemin, strict):
+    """Vérifie au passage que les lignes sont triées par id_restaurant (condition de la jointure)."""
+    precedent = None
+    for ligne in lignes:
+        id_restaurant = ligne["id_restaurant"]
+        if precedent is not None and (id_restaurant < precedent or (strict and id_restaurant == precedent)):
+            raise ValueError(f"'{chemin}' n'est pas trié par id_restaurant ('{id_restaurant}' après '{precedent}'). "
+                             "Triez les fichiers ou utilisez fusion_json.py.")
+        precedent = id_restaurant
+        yield ligne
+
+
+def joindre(restaurants, plats, stats):
+    """
+    Jointure par fusion des deux flux triés par id_restaurant : chaque restaurant
+    est généré avec son menu, seul le menu en cours est gardé en mémoire.
+    """
+    plat = next(plats, None)
+    for resto in restaurants:
+        resto["menu"] = []
+        while plat is not None and plat["id_restaurant"] <= resto["id_restaurant"]:
+            if plat["id_restaurant"] == resto["id_restaurant"]:
+                resto["menu"].append(plat)
+                stats["plats"] += 1
+            else:
+                avertir(stats, f"Le plat '{plat['id_plat']}' a un id_restaurant '{plat['id_restaurant']}' "
+                               "qui ne correspond à aucun restaurant connu.")
+                stats["orphelins"] += 1
+            plat = next(plats, None)
+        stats["restaurants"] += 1
+        yield resto
+    while plat is not None:
+        avertir(stats, f"Le plat '{plat['id_plat']}' a un id_restaurant '{plat['id_restaurant']}' "
+                       "qui ne correspond à aucun restaurant connu.")
+        stats["orphelins"] += 1
+        plat = next(plats, None)
+
+
+def flux_catalogue(dossier, stats):
+    """Génère le catalogue fusionné : ("restaurants", resto avec menu) puis ("livreurs", livreur)."""
+    chemins = {nom: os.path.join(dossier, f"{nom}.txt") for nom in COLONNES}
+    for chemin in chemins.values():
+        if not os.path.exists(chemin):
+            raise FileNotFoundError(f"Le fichier '{chemin}' est introuvable.")
+
+    restaurants = verifier_ordre(lire_lignes_valides(chemins["restaurants"], "restaurants", stats),
+                                 chemins["restaurants"], strict=True)
+    plats = verifier_ordre(lire_lignes_valides(chemins["plats"], "plats", stats), chemins["plats"], strict=False)
+    for resto in joindre(restaurants, plats, stats):
+        yield "restaurants", resto
+    for livreur in lire_lignes_valides(chemins["livreurs"], "livreurs", stats):
+        stats["livreurs"] += 1
+        yield "livreurs", livreur
+
+
+def ecrire_fichier(elements, chemin, format_sortie):
+    """
+    Écrit le catalogue en JSON Lines (une ligne ["tableau", element]) ou en JSON
+    compact de même structure que donnees_completes.json. Le fichier n'est
+    remplacé qu'une fois entièrement écrit.
+    """
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    temporaire = chemin + ".tmp"
+    try:
+        ecrire_elements(elements, temporaire, format_sortie)
+    except BaseException:
+        os.remove(temporaire)
+        raise
+    os.replace(temporaire, chemin)
+
+
+def ecrire_elements(elements, chemin, format_sortie):
+    with open(chemin, "w", encoding="utf-8") as f:
+        if format_sortie == "jsonl":
+            for nom, element in elements:
+                ecrire_ligne(f, nom, element)
+        else:
+            tableaux = {"restaurants": False, "livreurs": False}  # Tableau déjà ouvert ?
+            f.write("{")
+            courant = None
+            for nom, element in elements:
+                if nom != courant:
+                    f.write(("], " if courant else "") + json.dumps(nom) + ": [")
+                    courant, tableaux[nom] = nom, True
+                else:
+                    f.write(", ")
+                f.write(json.dumps(element, ensure_ascii=False, separators=(",", ":")))
+            if courant:
+                f.write("]")
+            # Tableaux vides : même structure que fusion_json.py
+            for nom in [nom for nom, ouvert in tableaux.items() if not ouvert]:
+                f.write((", " if courant else "") + json.dumps(nom) + ": []")
+                courant = nom
+            f.write("}")
+
+
+def executer_pipeline(dossier=DOSSIER_TXT, vers="jsonl", sortie=None, taille_lot=TAILLE_LOT,
+                      nb_workers=1, upsert=False, db=0):
+    """
+    Lit dataset_txt/*.txt en un seul passage (lecture, validation, jointure
+    restaurants/plats) et écrit le catalogue fusionné dans un fichier ou
+    directement dans Redis ou MongoDB. Une erreur de validation laisse le fichier ou la
+    base inchangés : le fichier n'est remplacé qu'une fois écrit, Redis n'est vidé
+    qu'après une première lecture complète, MongoDB charge des collections à part.
+    Renvoie les statistiques (ou None en cas d'erreur).
+    """
+    stats = {"restaurants": 0, "plats": 0, "livreurs": 0, "rejets": 0, "orphelins": 0, "avertissements": 0}
+    elements = flux_catalogue(dossier, stats)
+    debut = time.perf_counter()
+    print(f"Pipeline '{dossier}' -> {vers}...")
+    try:
+        if vers == "redis":
+            import redis
+            import json_to_redis
+            r = redis.Redis(db=db, decode_responses=True)
+            # Les fichiers sont d'abord validés jusqu'au bout (sans rien écrire) : une erreur au
+            # milieu (fichier non trié...) ne laisse pas la base vidée ou à moitié chargée
+            print("Validation des fichiers avant l'import...")
+            for _ in flux_catalogue(dossier, dict(stats)):
+                pass
+            if not upsert:
+                r.flushdb()
+            json_to_redis.importer_elements(r, elements, taille_lot, nb_workers, db)
+        elif vers == "mongo":
+            import json_to_mongo  # Se connecte à l'import
+            json_to_mongo.importer_elements(elements, taille_lot)
+        else:
+            sortie = sortie or SORTIES[vers]
+            ecrire_fichier(elements, sortie, vers)
+            print(f"-> Catalogue écrit dans '{sortie}'.")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ ERREUR: {e}")
+        return None
+
+    duree = time.perf_counter() - debut
+    lignes = stats["restaurants"] + stats["plats"] + stats["livreurs"]
+    print(f"-> {stats['restaurants']} restaurants, {stats['plats']} plats, {stats['livreurs']} livreurs "
+          f"en {duree:.1f} s ({lignes / duree if duree else 0:.0f} lignes/s)")
+    if stats["rejets"] or stats["orphelins"]:
+        print(f"⚠️  {stats['rejets']} lignes invalides et {stats['orphelins']} plats sans restaurant ignorés.")
+    return stats
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Pipeline dataset_txt -> catalogue fusionné (fichier, Redis ou MongoDB).")
+    parseur.add_argument("dossier", nargs="?", default=DOSSIER_TXT, help="Dossier contenant restaurants.txt, plats.txt et livreurs.txt")
+    parseur.add_argument("--vers", choices=["jsonl", "json", "redis", "mongo"], default="jsonl")
+    parseur.add_argument("--sortie", help="Fichier produit (formats jsonl et json)")
+    parseur.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="Lignes envoyées par lot (Redis, MongoDB)")
+    parseur.add_argument("--workers", type=int, default=1, help="Processus d'import Redis en parallèle")
+    parseur.add_argument("--upsert", action="store_true", help="Redis : mettre à jour sans vider la base")
+    parseur.add_argument("--db", type=int, default=0, help="Numéro de base Redis")
+    args = parseur.parse_args()
+    executer_pipeline(args.dossier, args.vers, args.sortie, args.taille_lot, args.workers, args.upsert, args.db)
@@ -0,0 +1,255 @@
+import os
+import re
+import time
+import marshal
+import argparse
+from array import array
+from bisect import bisect_left
+from heapq import merge, nlargest, heappush, heappushpop
+from collections import Counter
+
+from flux_json import lire_elements
+from normalisation import normaliser_nom
+
+# --- Recherche floue des restaurants (tolérante aux fautes et aux accents) ---
+# Index construit une fois à partir du catalogue et enregistré dans un fichier, que les
+# clients des deux POC (redis_client.py, mongo_client.py) chargent tel quel :
+#   - chaque nom est découpé en mots normalisés ("Avenue de l'Opéra" -> avenue, de, l, opera) ;
+#   - un index inversé mot -> restaurants (indices triés) ;
+#   - un index des trigrammes du vocabulaire ("$piz", ...) -> mots, pour retrouver les mots
+#     proches d'un mot mal orthographié : les candidats partageant assez de trigrammes
+#     sont départagés par la distance d'édition.
+# Un restaurant est classé par la somme des coûts de ses mots : 0 (mot exact), 0.5 (mot
+# complété, pour le dernier mot saisi), 1 ou 2 (fautes de frappe), PENALITE_ABSENT si
+# aucun de ses mots ne correspond.
+FICHIER_JSON = "dataset_json/donnees_completes.json"
+FICHIER_INDEX = "dataset_json/index_recherche_floue.bin"
+RACINE = os.path.dirname(os.path.abspath(__file__))
+FORMAT_INDEX = 1
+LIMITE_RESULTATS = 10
+MAX_VARIANTES = 20  # Mots du vocabulaire retenus par mot saisi
+CANDIDATS_VERIFIES = 30  # Mots proches dont la distance d'édition est calculée
+COUT_COMPLETION = 0.5
+PENALITE_ABSENT = 3
+
+SEPARATEURS = re.compile(r"[^0-9a-z]+")
+
+
+def decouper_mots(nom):
+    """Mots normalisés d'un nom (apostrophes, tirets et ponctuation séparent les mots)."""
+    return SEPARATEURS.sub(" ", normaliser_nom(nom)).split()
+
+
+def trigrammes(mot):
+    mot = f"${mot}$"
+    return {mot[i:i + 3] for i in range(len(mot) - 2)}
+
+
+def tolerance(mot):
+    """Fautes acceptées selon la longueur du mot saisi."""
+    return 0 if len(mot) <= 2 else 1 if len(mot) <= 5 else 2
+
+
+def distance_edition(a, b, maximum):
+    """
+    Distance de Levenshtein entre a et b, ou maximum + 1 dès qu'elle le dépasse. Seule la
+    bande de la matrice à au plus 'maximum' cases de la diagonale est calculée.
+    """
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    hors_bande = maximum + 1
+    precedente = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        debut, fin = max(1, i - maximum), min(len(b), i + maximum)
+        courante = [hors_bande] * (len(b) + 1)
+        courante[0] = i if i <= maximum else hors_bande
+        meilleure = courante[0]
+        for j in range(debut, fin + 1):
+            cout = min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + (ca != b[j - 1]))
+            courante[j] = cout
+            if cout < meilleure:
+                meilleure = cout
+        if meilleure > maximum:
+            return hors_bande
+        precedente = courante
+    return min(precedente[-1], hors_bande)
+
+
+class IndexRechercheFloue:
+    def __init__(self, ids, noms, vocabulaire, postings, index_trigrammes):
+        self.ids = ids                  # id_restaurant par indice
+        self.noms = noms                # Nom affiché par indice
+        self.vocabulaire = vocabulaire  # Mots triés
+        self.postings = postings        # Par mot : array des indices des restaurants (triés)
+        self.index_trigrammes = index_trigrammes  # Trigramme -> array des indices de mots
+
+    @classmethod
+    def construire(cls, restaurants):
+        """Construit l'index à partir d'un itérable de (id_restaurant, nom)."""
+        ids, noms, par_mot = [], [], {}
+        for rest_id, nom in restaurants:
+            indice = len(ids)
+            ids.append(rest_id)
+            noms.append(nom)
+            for mot in set(decouper_mots(nom)):
+                par_mot.setdefault(mot, array("I")).append(indice)
+        vocabulaire = sorted(par_mot)
+        postings = [par_mot.pop(mot) for mot in vocabulaire]
+        index_trigrammes = {}
+        for indice, mot in enumerate(vocabulaire):
+            for trigramme in trigrammes(mot):
+                index_trigrammes.setdefault(trigramme, array("I")).append(indice)
+        return cls(ids, noms, vocabulaire, postings, index_trigrammes)
+
+    # --- Fichier partagé par les deux POC ---
+
+    def enregistrer(self, chemin):
+        """Écrit l'index (marshal, tableaux en octets) de façon atomique."""
+        contenu = {
+            "format": FORMAT_INDEX, "ids": self.ids, "noms": self.noms, "vocabulaire": self.vocabulaire,
+            "postings": [p.tobytes() for p in self.postings],
+            "trigrammes": {t: p.tobytes() for t, p in self.index_trigrammes.items()},
+        }
+        os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+        with open(chemin + ".tmp", "wb") as f:
+            marshal.dump(contenu, f)
+        os.replace(chemin + ".tmp", chemin)
+
+    @classmethod
+    def charger(cls, chemin):
+        """Relit un index enregistré ; None si le fichier est absent ou d'un autre format."""
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin, "rb") as f:
+            contenu = marshal.load(f)
+        if contenu.get("format") != FORMAT_INDEX:
+            return None
+
+        def tableau(octets):
+            a = array("I")
+            a.frombytes(octets)
+            return a
+
+        return cls(contenu["ids"], contenu["noms"], contenu["vocabulaire"],
+                   [tableau(p) for p in contenu["postings"]],
+                   {t: tableau(p) for t, p in contenu["trigrammes"].items()})
+
+    # --- Recherche ---
+
+    def variantes(self, mot, dernier):
+        """
+        Mots du vocabulaire proches de 'mot' : [(coût, indice du mot)], au plus MAX_VARIANTES.
+        Les candidats viennent de l'index des trigrammes : une faute modifie au plus 3
+        trigrammes, et seuls les CANDIDATS_VERIFIES partageant le plus de trigrammes avec
+        'mot' sont départagés par la distance d'édition.
+        """
+        couts = {}
+        i = bisect_left(self.vocabulaire, mot)
+        connu = i < len(self.vocabulaire) and self.vocabulaire[i] == mot
+        if connu:
+            couts[i] = 0
+        if dernier:  # Mot en cours de saisie : ses complétions, les plus fréquentes d'abord
+            fin = bisect_left(self.vocabulaire, mot + "{", i)  # "{" suit "z" et les chiffres
+            completions = sorted(range(i, fin), key=lambda j: -len(self.postings[j]))[:MAX_VARIANTES]
+            for j in completions:
+                couts.setdefault(j, COUT_COMPLETION)
+
+        maximum = tolerance(mot)
+        if maximum and not connu:  # Un mot du vocabulaire n'est pas corrigé
+            trigrammes_mot = trigrammes(mot)
+            communs = Counter()
+            for trigramme in trigrammes_mot:
+                communs.update(self.index_trigrammes.get(trigramme, ()))
+            minimum = len(trigrammes_mot) - 3 * maximum
+            candidats = nlargest(CANDIDATS_VERIFIES, (
+                (nb_communs, j) for j, nb_communs in communs.items()
+                if nb_communs >= minimum and j not in couts and abs(len(self.vocabulaire[j]) - len(mot)) <= maximum))
+            for _, j in candidats:
+                distance = distance_edition(mot, self.vocabulaire[j], maximum)
+                if distance <= maximum:
+                    couts[j] = distance
+        return sorted((cout, j) for j, cout in couts.items())[:MAX_VARIANTES]
+
+    def cout_mot(self, variantes, indice):
+        """Coût d'un mot saisi pour un restaurant : sa meilleure variante présente dans le nom."""
+        for cout, j in variantes:
+            postings = self.postings[j]
+            k = bisect_left(postings, indice)
+            if k < len(postings) and postings[k] == indice:
+                return cout
+        return PENALITE_ABSENT
+
+    def rechercher(self, requete, limite=LIMITE_RESULTATS):
+        """
+        Renvoie au plus 'limite' résultats [{id_restaurant, nom, cout}] par coût croissant.
+        Les restaurants candidats sont ceux qui contiennent le mot reconnu le plus rare
+        (le « pilote ») ; les autres mots sont vérifiés par dichotomie. Les variantes du
+        pilote étant parcourues par coût croissant, on s'arrête dès que les résultats
+        retenus ne peuvent plus être battus (coût du pilote + coût minimal des autres mots).
+        """
+        mots = decouper_mots(requete)
+        variantes = [self.variantes(mot, i == len(mots) - 1) for i, mot in enumerate(mots)]
+        reconnus = [v for v in variantes if v]
+        if not reconnus:
+            return []
+        pilote = min(reconnus, key=lambda v: sum(len(self.postings[j]) for _, j in v))
+        autres = [v for v in variantes if v is not pilote]
+        absents = PENALITE_ABSENT * (len(variantes) - len(reconnus))
+        plancher = absents + sum(v[0][0] for v in autres if v)  # Coût minimal des autres mots
+
+        meilleurs = []  # Tas des 'limite' meilleurs : (-coût, -indice)
+        vus = set()
+        groupes = sorted({cout for cout, _ in pilote})
+        for cout_pilote in groupes:
+            borne = cout_pilote + plancher
+            if len(meilleurs) == limite and -meilleurs[0][0] < borne:
+                break  # Tout restaurant restant coûte au moins borne
+            postings = [self.postings[j] for cout, j in pilote if cout == cout_pilote]
+            for indice in merge(*postings):  # Ordre croissant des indices
+                if indice in vus:
+                    continue
+                vus.add(indice)
+                cout = cout_pilote + absents + sum(self.cout_mot(v, indice) for v in autres if v)
+                entree = (-cout, -indice)
+                if len(meilleurs) < limite:
+                    heappush(meilleurs, entree)
+                elif entree > meilleurs[0]:
+                    heappushpop(meilleurs, entree)
+                if len(meilleurs) == limite and -meilleurs[0][0] <= borne:
+                    break  # Les indices suivants de ce groupe ne feront pas mieux
+        return [{"id_restaurant": self.ids[-i], "nom": self.noms[-i], "cout": -c} for c, i in sorted(meilleurs, reverse=True)]
+
+
+def charger_index(chemin=os.path.join(RACINE, FICHIER_INDEX)):
+    """Index enregistré pour les clients (lancés depuis leur dossier), ou None s'il reste à construire."""
+    index = IndexRechercheFloue.charger(chemin)
+    if index is None:
+        print(f"⚠️ Index de recherche floue absent ('{chemin}') : lancez 'python recherche_floue.py'.")
+    return index
+
+
+def construire_depuis_catalogue(fichier_json=FICHIER_JSON, fichier_index=FICHIER_INDEX):
+    """Construit l'index depuis le catalogue (JSON ou JSON Lines) et l'enregistre."""
+    if not os.path.exists(fichier_json):
+        print(f"❌ ERREUR: Le fichier '{fichier_json}' est introuvable.")
+        return None
+    debut = time.perf_counter()
+    restaurants = ((el["id_restaurant"], el.get("nom", "")) for nom, el in lire_elements(fichier_json)
+                   if nom == "restaurants")
+    index = IndexRechercheFloue.construire(restaurants)
+    index.enregistrer(fichier_index)
+    print(f"✅ Index de recherche floue : {len(index.ids)} restaurants, {len(index.vocabulaire)} mots, "
+          f"construit en {time.perf_counter() - debut:.1f} s -> '{fichier_index}'")
+    return index
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Construit l'index de recherche floue partagé par les clients.")
+    parseur.add_argument("fichier", nargs="?", default=FICHIER_JSON)
+    parseur.add_argument("--sortie", default=FICHIER_INDEX)
+    parseur.add_argument("--rechercher", help="Recherche de test une fois l'index construit")
+    args = parseur.parse_args()
+    index = construire_depuis_catalogue(args.fichier, args.sortie)
+    if index and args.rechercher:
+        for resultat in index.rechercher(args.rechercher):
+            print(f"   - {resultat['nom']} ({resultat['id_restaurant']}, coût {resultat['cout']})")
@@ -0,0 +1,474 @@
+"""
+Simulation "headless" de la plateforme : lance dans un seul processus le manager,
+R restaurants, L livreurs et N clients, en remplaçant les saisies clavier
+(input) par des politiques automatiques, puis mesure le débit et la latence
+de bout en bout (de l'envoi de la commande jusqu'à COMMANDE_LIVREE).
+
+Exemples :
+    python simulate.py --backend redis --clients 1000 --restaurants 50 --livreurs 50
+    python simulate.py --backend mongo --clients 200 --preparation uniforme:1:3 --trajet fixe:2
+"""
+import os
+import sys
+import time
+import uuid
+import json
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from statistiques import percentile
+
+RACINE = os.path.dirname(os.path.abspath(__file__))
+TYPES_FINAUX = ("COMMANDE_LIVREE", "COMMANDE_REJETEE", "AUCUN_LIVREUR")
+ROLES = ("manager", "restaurants", "livreurs")
+
+# Étapes du parcours d'une commande : (nom, étape de départ, étape d'arrivée)
+ETAPES = (
+    ("moderation", "envoyee", "validee"),
+    ("preparation", "validee", "prete"),
+    ("offre", "prete", "offre"),
+    ("assignation", "offre", "assignee"),
+    ("livraison", "assignee", "livree"),
+)
+# Statuts MongoDB et types de notification correspondant à chaque étape
+ETAPE_PAR_STATUT = {"accepted_en_preparation": "validee", "ready_awaiting_livreur": "prete",
+                    "offre_disponible": "offre"}
+ETAPE_PAR_NOTIFICATION = {"LIVREUR_ASSIGNE": "assignee", "COMMANDE_LIVREE": "livree"}
+
+
+# --- Outils ---
+
+def loi_aleatoire(spec):
+    """
+    Construit un tirage aléatoire (en secondes) à partir d'une description :
+    'fixe:2', 'uniforme:1:3', 'expo:2' (moyenne) ou 'normale:5:1' (moyenne:écart-type).
+    """
+    nom, *params = spec.split(":")
+    params = [float(p) for p in params]
+    if nom == "fixe":
+        return lambda: params[0]
+    if nom == "uniforme":
+        return lambda: random.uniform(params[0], params[1])
+    if nom == "expo":
+        return lambda: random.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    if nom == "normale":
+        return lambda: max(0.0, random.gauss(params[0], params[1]))
+    raise ValueError(f"Loi inconnue : '{spec}' (fixe, uniforme, expo ou normale)")
+
+
+def code_postal_simule(rest_id):
+    """
+    Arrondissement d'un restaurant simulé : ils sont répartis dans Paris, et leurs
+    clients habitent le même arrondissement (75011 pour les restaurants du catalogue).
+    """
+    if rest_id.startswith("rest_sim_"):
+        return f"750{int(rest_id.rsplit('_', 1)[1]) % 20 + 1:02d}"
+    return "75011"
+
+
+class Suivi:
+    """
+    Horodate chaque étape des commandes de la simulation (envoi, validation,
+    préparation, offre, assignation) et leur fin (livrée, rejetée, sans livreur).
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.etapes = {}   # commande_id -> {étape: instant}
+        self.fins = {}     # commande_id -> (type final, instant)
+        self.nb_messages = 0
+        self.termine = threading.Event()
+        self.nb_attendu = None
+
+    def commande_envoyee(self, commande_id):
+        with self.verrou:
+            self.etapes[commande_id] = {"envoyee": time.perf_counter()}
+
+    def etape(self, commande_id, etape):
+        """Enregistre la première occurrence d'une étape pour une commande de la simulation."""
+        instant = time.perf_counter()
+        with self.verrou:
+            self.nb_messages += 1
+            etapes = self.etapes.get(commande_id)
+            if etapes is not None:
+                etapes.setdefault(etape, instant)
+
+    def notification(self, data):
+        commande_id = data.get("commande_id")
+        if data.get("type") in ETAPE_PAR_NOTIFICATION:
+            self.etape(commande_id, ETAPE_PAR_NOTIFICATION[data["type"]])
+        else:
+            with self.verrou:
+                self.nb_messages += 1
+        if data.get("type") not in TYPES_FINAUX:
+            return
+        with self.verrou:
+            if commande_id not in self.etapes or commande_id in self.fins:
+                return  # Commande d'une autre simulation, ou notification en double
+            self.fins[commande_id] = (data["type"], time.perf_counter())
+            if self.nb_attendu is not None and len(self.fins) >= self.nb_attendu:
+                self.termine.set()
+
+    def resultats(self):
+        with self.verrou:
+            livrees = [self.etapes[cmd] for cmd, (type_fin, _) in self.fins.items()
+                       if type_fin == "COMMANDE_LIVREE"]
+            comptes = {t: sum(1 for type_fin, _ in self.fins.values() if type_fin == t) for t in TYPES_FINAUX}
+            debut = min((e["envoyee"] for e in self.etapes.values()), default=0.0)
+            fin = max((f for _, f in self.fins.values()), default=debut)
+            nb_messages = self.nb_messages
+            nb_envoyees = len(self.etapes)
+
+        latences = [e["livree"] - e["envoyee"] for e in livrees if "livree" in e]
+        duree = fin - debut
+        resultats = {
+            "commandes_envoyees": nb_envoyees,
+            "commandes_terminees": sum(comptes.values()),
+            "livrees": comptes["COMMANDE_LIVREE"],
+            "rejetees": comptes["COMMANDE_REJETEE"],
+            "sans_livreur": comptes["AUCUN_LIVREUR"],
+            "duree_s": round(duree, 3),
+            "commandes_par_s": round(comptes["COMMANDE_LIVREE"] / duree, 2) if duree > 0 else 0.0,
+            "messages_par_s": round(nb_messages / duree, 2) if duree > 0 else 0.0,
+            "latence_p50_s": round(percentile(latences, 50), 3),
+            "latence_p95_s": round(percentile(latences, 95), 3),
+            "latence_p99_s": round(percentile(latences, 99), 3),
+            "etapes": {},
+        }
+        # Durée de chaque étape (en ms), sur les commandes livrées
+        for nom, depart, arrivee in ETAPES:
+            durees = [(e[arrivee] - e[depart]) * 1000 for e in livrees if depart in e and arrivee in e]
+            resultats["etapes"][nom] = {
+                "p50_ms": round(percentile(durees, 50), 1),
+                "p95_ms": round(percentile(durees, 95), 1),
+                "p99_ms": round(percentile(durees, 99), 1),
+            }
+        return resultats
+
+
+def demarrer_threads(cible, identifiants):
+    for identifiant in identifiants:
+        threading.Thread(target=cible, args=(identifiant,), daemon=True).start()
+
+
+# --- Chargement des acteurs ---
+
+def charger_backend(args):
+    """
+    Importe les modules des acteurs du backend choisi, les connecte à la base
+    demandée et remplace leurs saisies clavier et leurs temps par les politiques
+    automatiques. Renvoie {"manager", "restaurant", "livreur", "client": module}.
+    """
+    if args.backend == "redis":
+        sys.path.insert(0, os.path.join(RACINE, "version_redis"))
+        import redis
+        import redis_manager as manager
+        import redis_restaurant as restaurant
+        import redis_livreur as livreur
+        import redis_client as client
+    else:
+        sys.path.insert(0, os.path.join(RACINE, "version_mongo"))
+        import mongo_manager as manager
+        import mongo_restaurant as restaurant
+        import mongo_livreur as livreur
+        import mongo_client as client
+    import tournees
+    acteurs = {"manager": manager, "restaurant": restaurant, "livreur": livreur, "client": client}
+
+    for module in acteurs.values():
+        if args.backend == "redis" and args.redis_db:
+            module.r = redis.Redis(db=args.redis_db, decode_responses=True)
+        elif args.backend == "mongo" and args.mongo_base != module.db.name:
+            module.db = module.client[args.mongo_base]
+
+    manager.demander_decision = lambda commande_id: "oui" if random.random() < args.taux_acceptation else "non"
+    manager.DELAI_TIMEOUT_LIVREUR = args.timeout_livreur
+    restaurant.duree_preparation = loi_aleatoire(args.preparation)
+    livreur.accepter_offre = lambda offre: random.random() < args.proba_livreur
+    livreur.duree_recuperation = loi_aleatoire(args.recuperation)
+    livreur.duree_trajet = loi_aleatoire(args.trajet)
+    livreur.SECONDES_PAR_KM = args.secondes_par_km
+    tournees.CAPACITE_LIVREUR = args.capacite
+    return acteurs
+
+
+def demarrer_acteurs(acteurs, roles, restaurants, livreurs):
+    """Démarre les acteurs des rôles demandés (manager, restaurants, livreurs) dans des threads."""
+    if "manager" in roles:
+        acteurs["manager"].demarrer_manager()
+    if "restaurants" in roles:
+        demarrer_threads(acteurs["restaurant"].ecouteur_restaurant, restaurants)
+    if "livreurs" in roles:
+        demarrer_threads(acteurs["livreur"].ecouteur_livreur, livreurs)
+
+
+def preparer_donnees(args, acteurs):
+    """Renvoie les restaurants ({id: plats}) et livreurs de la simulation, créés si besoin."""
+    if args.backend == "redis":
+        return preparer_redis(acteurs["client"].r, args.restaurants, args.livreurs)
+    return preparer_mongo(acteurs["client"].db, args.restaurants, args.livreurs)
+
+
+def observer(args, acteurs, restaurants, suivi):
+    """Démarre l'observation des étapes des commandes ; renvoie la fonction d'envoi d'une commande."""
+    if args.backend == "redis":
+        observer_redis(acteurs["client"].r, restaurants, suivi)
+        return fabrique_commande_redis(acteurs, restaurants, suivi)
+    observer_mongo(acteurs["client"].db, suivi)
+    return fabrique_commande_mongo(acteurs, restaurants, suivi)
+
+
+# --- Backend Redis ---
+
+def preparer_redis(r, nb_restaurants, nb_livreurs):
+    """Renvoie {rest_id: [plat_ids]} et la liste des livreurs, en complétant avec des entités simulées."""
+    from redis_index import INDEX_RESTAURANTS, VERSION_CATALOGUE, lister_ids, indexer_nom_restaurant
+    from redis_geo import CLE_LIVREURS_DISPONIBLES
+    restaurants = dict.fromkeys(sorted(lister_ids(r, INDEX_RESTAURANTS, "restaurant"))[:nb_restaurants])
+
+    pipe = r.pipeline(transaction=False)
+    for i in range(len(restaurants), nb_restaurants):
+        rest_id = f"rest_sim_{i:05d}"
+        restaurants[rest_id] = None
+        pipe.hset(f"restaurant:{rest_id}", mapping={"nom": f"Restaurant Simulé {i}", "adresse": f"{i} Rue de la Simulation, {code_postal_simule(rest_id)} Paris"})
+        pipe.sadd(INDEX_RESTAURANTS, rest_id)
+        indexer_nom_restaurant(pipe, rest_id, f"Restaurant Simulé {i}")
+        for j in range(3):
+            plat_id = f"plat_sim_{i:05d}_{j}"
+            pipe.hset(f"plat:{plat_id}", mapping={"nom": f"Plat {j}", "description": "", "prix": f"{10 + j}.00", "id_restaurant": rest_id})
+            pipe.sadd(f"restaurant:{rest_id}:plats", plat_id)
+    if len(pipe):
+        pipe.incr(VERSION_CATALOGUE)
+    pipe.execute()
+
+    pipe = r.pipeline(transaction=False)
+    for rest_id in restaurants:
+        pipe.smembers(f"restaurant:{rest_id}:plats")
+    for rest_id, plats in zip(list(restaurants), pipe.execute()):
+        restaurants[rest_id] = sorted(plats)
+    restaurants = {rest_id: plats for rest_id, plats in restaurants.items() if plats}
+
+    livreurs = sorted(cle.split(":")[1] for cle in r.scan_iter("livreur:*", count=1000) if cle.count(":") == 1)[:nb_livreurs]
+    pipe = r.pipeline(transaction=False)
+    for i in range(len(livreurs), nb_livreurs):
+        livreur_id = f"livr_sim_{i:05d}"
+        livreurs.append(livreur_id)
+        pipe.hset(f"livreur:{livreur_id}", mapping={"id_livreur": livreur_id, "nom": f"Livreur Simulé {i}"})
+    # Seuls les livreurs de cette simulation seront disponibles (ils se positionnent à leur démarrage)
+    pipe.delete(CLE_LIVREURS_DISPONIBLES)
+    pipe.execute()
+    return restaurants, livreurs
+
+
+def observer_redis(r, restaurants, suivi):
+    """Écoute les passages de relais (Pub/Sub ou flux) et toutes les notifications."""
+    from redis_canaux import canal_restaurant
+    from redis_transport import Ecoute
+
+    etape_par_canal = {canal_restaurant(rest_id): "validee" for rest_id in restaurants}
+    etape_par_canal.update({"commandes_pretes": "prete", "offres_livraisons": "offre"})
+    # Sans groupe : l'observateur voit tous les messages sans en priver les acteurs
+    ecoute = Ecoute(r, list(etape_par_canal))
+
+    def ecouter_relais():
+        for canal, data in ecoute:
+            suivi.etape(data.get("commande_id"), etape_par_canal[canal])
+
+    # Toutes les notifications (canaux globaux ou par entité) passent par ce motif
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    pubsub.psubscribe("notifications*")
+
+    def ecouter_notifications():
+        for message in pubsub.listen():
+            if message["type"] == "pmessage":
+                suivi.notification(json.loads(message["data"]))
+
+    threading.Thread(target=ecouter_relais, daemon=True).start()
+    threading.Thread(target=ecouter_notifications, daemon=True).start()
+
+
+def fabrique_commande_redis(acteurs, restaurants, suivi):
+    from redis_transport import publier
+    r = acteurs["client"].r
+
+    def passer_commande(numero_client):
+        rest_id = random.choice(list(restaurants))
+        plats = [{"id_plat": plat_id, "quantite": random.randint(1, 3)}
+                 for plat_id in random.sample(restaurants[rest_id], k=min(2, len(restaurants[rest_id])))]
+        commande = {
+            "client_id": f"client_sim_{numero_client}", "commande_id": f"cmd_sim_{uuid.uuid4().hex[:10]}",
+            "plats_details": plats, "adresse_client": f"{numero_client} Avenue du Test, {code_postal_simule(rest_id)} Paris",
+            "restaurant_id": rest_id,
+            "total_euros": f"{acteurs['client'].calculer_total(plats):.2f}"
+        }
+        suivi.commande_envoyee(commande["commande_id"])
+        publier(r, 'commandes_clients', commande)
+
+    return passer_commande
+
+
+# --- Backend MongoDB ---
+
+def preparer_mongo(db, nb_restaurants, nb_livreurs):
+    """Renvoie {rest_id: menu} et la liste des livreurs, en complétant avec des entités simulées."""
+    restaurants = {doc["id_restaurant"]: doc.get("menu", [])
+                   for doc in db.restaurants.find({}, {"id_restaurant": 1, "menu": 1, "_id": 0}).sort("id_restaurant", 1).limit(nb_restaurants)}
+    nouveaux = []
+    for i in range(len(restaurants), nb_restaurants):
+        rest_id = f"rest_sim_{i:05d}"
+        menu = [{"id_plat": f"plat_sim_{i:05d}_{j}", "nom": f"Plat {j}", "description": "", "prix": f"{10 + j}.00", "id_restaurant": rest_id}
+                for j in range(3)]
+        nouveaux.append({"id_restaurant": rest_id, "nom": f"Restaurant Simulé {i}",
+                         "adresse": f"{i} Rue de la Simulation, {code_postal_simule(rest_id)} Paris", "menu": menu})
+        restaurants[rest_id] = menu
+    if nouveaux:
+        db.restaurants.insert_many(nouveaux, ordered=False)
+    restaurants = {rest_id: menu for rest_id, menu in restaurants.items() if menu}
+
+    livreurs = [doc["id_livreur"] for doc in db.livreurs.find({}, {"id_livreur": 1, "_id": 0}).sort("id_livreur", 1).limit(nb_livreurs)]
+    nouveaux = []
+    for i in range(len(livreurs), nb_livreurs):
+        livreurs.append(f"livr_sim_{i:05d}")
+        nouveaux.append({"id_livreur": livreurs[-1], "nom": f"Livreur Simulé {i}"})
+    if nouveaux:
+        db.livreurs.insert_many(nouveaux, ordered=False)
+    # Seuls les livreurs de cette simulation seront disponibles (ils se positionnent à leur démarrage)
+    db.livreurs.update_many({"disponible": True}, {"$set": {"disponible": False}})
+    return restaurants, livreurs
+
+
+def observer_mongo(db, suivi):
+    """Un seul Change Stream sur la base : changements de statut des commandes et notifications."""
+    # Le flux est ouvert ici (et non dans le thread) pour ne manquer aucun événement
+    flux = db.watch([{'$match': {'ns.coll': {'$in': ['commandes', 'notifications']}}}])
+    commande_par_document = {}
+
+    def ecouter():
+        for change in flux:
+            if change['ns']['coll'] == 'notifications':
+                if change['operationType'] == 'insert':
+                    suivi.notification(change['fullDocument'])
+            elif change['operationType'] == 'insert':
+                commande_par_document[change['documentKey']['_id']] = change['fullDocument']['commande_id']
+            elif change['operationType'] == 'update':
+                statut = change['updateDescription']['updatedFields'].get('statut')
+                if statut in ETAPE_PAR_STATUT:
+                    suivi.etape(commande_par_document.get(change['documentKey']['_id']), ETAPE_PAR_STATUT[statut])
+
+    threading.Thread(target=ecouter, daemon=True).start()
+
+
+def fabrique_commande_mongo(acteurs, restaurants, suivi):
+    from datetime import datetime
+    db = acteurs["client"].db
+
+    def passer_commande(numero_client):
+        rest_id = random.choice(list(restaurants))
+        menu = restaurants[rest_id]
+        plats = [{"id_plat": plat["id_plat"], "quantite": random.randint(1, 3), "nom": plat["nom"], "prix_unitaire": plat["prix"]}
+                 for plat in random.sample(menu, k=min(2, len(menu)))]
+        commande_doc = {
+            "commande_id": f"cmd_sim_{uuid.uuid4().hex[:10]}",
+            "client_id": f"client_sim_{numero_client}",
+            "restaurant_id": rest_id,
+            "adresse_client": f"{numero_client} Avenue du Test, {code_postal_simule(rest_id)} Paris",
+            "plats_details": plats,
+            "total_euros": f"{acteurs['client'].calculer_total(plats):.2f}",
+            "statut": "pending_moderation",
+            "date_creation": datetime.now().isoformat()
+        }
+        suivi.commande_envoyee(commande_doc["commande_id"])
+        db.commandes.insert_one(commande_doc)
+
+    return passer_commande
+
+
+# --- Programme principal ---
+
+def envoyer_commandes(args, acteurs, restaurants):
+    """
+    Observe les commandes, les envoie (un client = une commande) et attend leur fin.
+    Les acteurs peuvent tourner dans ce processus ou ailleurs
+    (ex: un processus par rôle dans benchmarks/bench_redis_vs_mongo.py).
+    """
+    suivi = Suivi()
+    suivi.nb_attendu = args.clients
+    passer_commande = observer(args, acteurs, restaurants, suivi)
+    time.sleep(args.echauffement)  # Laisser les acteurs s'abonner avant les premières commandes
+
+    intervalle = 1 / args.debit if args.debit > 0 else 0
+    with ThreadPoolExecutor(max_workers=args.threads_clients) as pool:
+        for numero_client in range(args.clients):
+            pool.submit(passer_commande, numero_client)
+            if intervalle:
+                time.sleep(random.expovariate(1 / intervalle))
+    suivi.termine.wait(timeout=args.duree_max)
+
+    resultats = suivi.resultats()
+    resultats.update({"backend": args.backend, "clients": args.clients,
+                      "restaurants": args.restaurants, "livreurs": args.livreurs})
+    return resultats
+
+
+def executer_simulation(args):
+    """Lance une simulation complète dans ce processus et renvoie ses résultats (dict)."""
+    sortie_standard = sys.stdout
+    if not args.verbeux:
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")  # Les acteurs sont très bavards
+    try:
+        acteurs = charger_backend(args)
+        restaurants, livreurs = preparer_donnees(args, acteurs)
+        demarrer_acteurs(acteurs, ROLES, restaurants, livreurs)
+        return envoyer_commandes(args, acteurs, restaurants)
+    finally:
+        if sys.stdout is not sortie_standard:
+            sys.stdout.close()
+            sys.stdout = sortie_standard
+
+
+def creer_parseur():
+    parseur = argparse.ArgumentParser(description="Simulation automatique de la plateforme (Redis ou MongoDB).")
+    parseur.add_argument("--backend", choices=["redis", "mongo"], default="redis")
+    parseur.add_argument("--clients", type=int, default=100, help="Nombre de clients (une commande chacun)")
+    parseur.add_argument("--restaurants", type=int, default=10)
+    parseur.add_argument("--livreurs", type=int, default=20)
+    parseur.add_argument("--taux-acceptation", type=float, default=1.0, help="Probabilité que le manager valide une commande")
+    parseur.add_argument("--proba-livreur", type=float, default=0.8, help="Probabilité qu'un livreur accepte une offre")
+    parseur.add_argument("--preparation", default="uniforme:0.5:2", help="Loi du temps de préparation (s)")
+    parseur.add_argument("--recuperation", default="uniforme:0.2:0.5", help="Loi du temps de récupération (s)")
+    parseur.add_argument("--trajet", default="uniforme:0.5:1.5", help="Loi du temps de trajet (s)")
+    parseur.add_argument("--secondes-par-km", type=float, default=None,
+                         help="Durée (s) d'un km de trajet des livreurs (défaut : lois --recuperation et --trajet)")
+    parseur.add_argument("--capacite", type=int, default=1, help="Commandes transportées à la fois par un livreur")
+    parseur.add_argument("--timeout-livreur", type=float, default=10, help="Délai (s) avant AUCUN_LIVREUR")
+    parseur.add_argument("--debit", type=float, default=0, help="Commandes/s envoyées (0 = toutes d'un coup)")
+    parseur.add_argument("--threads-clients", type=int, default=32, help="Taille du pool de threads des clients")
+    parseur.add_argument("--echauffement", type=float, default=1.0, help="Attente (s) avant la première commande")
+    parseur.add_argument("--duree-max", type=float, default=600, help="Durée max (s) d'attente des commandes")
+    parseur.add_argument("--redis-db", type=int, default=0, help="Numéro de base Redis")
+    parseur.add_argument("--mongo-base", default="ubereats_db", help="Nom de la base MongoDB")
+    parseur.add_argument("--verbeux", action="store_true", help="Afficher la sortie des acteurs")
+    return parseur
+
+
+if __name__ == "__main__":
+    args = creer_parseur().parse_args()
+    print(f"🚀 Simulation {args.backend} : {args.clients} clients, {args.restaurants} restaurants, {args.livreurs} livreurs...")
+    resultats = executer_simulation(args)
+
+    print("\n" + "=" * 50)
+    print(f"📊 RÉSULTATS ({resultats['backend']})")
+    print("=" * 50)
+    print(f"  Commandes envoyées   : {resultats['commandes_envoyees']}")
+    print(f"  Livrées              : {resultats['livrees']}")
+    print(f"  Rejetées (manager)   : {resultats['rejetees']}")
+    print(f"  Sans livreur         : {resultats['sans_livreur']}")
+    print(f"  Durée                : {resultats['duree_s']} s")
+    print(f"  Débit                : {resultats['commandes_par_s']} commandes livrées/s")
+    print(f"  Latence p50/p95/p99  : {resultats['latence_p50_s']} / {resultats['latence_p95_s']} / {resultats['latence_p99_s']} s")
+    print("  Étapes (p50 / p95, ms) :")
+    for nom, valeurs in resultats["etapes"].items():
+        print(f"    - {nom:<12} : {valeurs['p50_ms']} / {valeurs['p95_ms']}")
+    print("=" * 50)
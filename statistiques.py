@@ -0,0 +1,13 @@
+# Statistiques partagées par la simulation (simulate.py) et les benchmarks
+# (benchmarks/outils_bench.py) : les latences y sont résumées de la même façon.
+
+
+def percentile(valeurs, p):
+    """Percentile 'p' (0-100) d'une liste de valeurs, par interpolation linéaire."""
+    if not valeurs:
+        return float("nan")
+    triees = sorted(valeurs)
+    position = (len(triees) - 1) * p / 100
+    bas = int(position)
+    haut = min(bas + 1, len(triees) - 1)
+    return triees[bas] + (triees[haut] - triees[bas]) * (position - bas)
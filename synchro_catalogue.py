@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+
+from flux_json import lire_elements
+from normalisation import normaliser_nom
+
+FICHIER_JSON = "dataset_json/donnees_completes.json"
+TAILLE_LOT = 1000  # Écritures envoyées par pipeline / bulk_write
+TYPES = ("restaurants", "plats", "livreurs")
+IDENTIFIANTS = {"restaurants": "id_restaurant", "plats": "id_plat", "livreurs": "id_livreur"}
+
+# Empreintes du dernier catalogue synchronisé
+EMPREINTES_REDIS = "catalogue:empreintes"  # Un Hash par type : catalogue:empreintes:plats -> {id: empreinte}
+EMPREINTES_MONGO = "empreintes_catalogue"  # Documents {_id: "plats:plat_001", empreinte}
+
+
+def empreinte(type_element, element):
+    """
+    Hash du contenu d'un élément (hors menu). Pour un plat, l'empreinte est préfixée
+    par son restaurant ("rest_01:<sha1>") : on sait ainsi de quel menu le retirer.
+    """
+    contenu = {cle: valeur for cle, valeur in element.items() if cle not in ("menu", "_id")}
+    valeur = hashlib.sha1(json.dumps(contenu, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{element['id_restaurant']}:{valeur}" if type_element == "plats" else valeur
+
+
+def restaurant_de(empreinte_plat):
+    return empreinte_plat.rsplit(":", 1)[0]
+
+
+def calculer_differences(elements, empreintes, stats):
+    """
+    Compare le nouveau catalogue (flux de (nom_du_tableau, element)) aux empreintes
+    enregistrées {type: {id: empreinte}}, qui sont consommées au passage.
+    Génère ("maj", type, id, element, nouvelle, ancienne) pour chaque élément ajouté ou
+    modifié, puis ("suppression", type, id, None, None, ancienne) pour les disparus.
+    """
+    def comparer(type_element, element):
+        ident = element[IDENTIFIANTS[type_element]]
+        nouvelle = empreinte(type_element, element)
+        ancienne = empreintes[type_element].pop(ident, None)
+        if ancienne == nouvelle:
+            stats["inchanges"] += 1
+            return None
+        stats["ajouts" if ancienne is None else "modifications"] += 1
+        return "maj", type_element, ident, element, nouvelle, ancienne
+
+    for nom, element in elements:
+        if nom == "restaurants":
+            difference = comparer("restaurants", element)
+            if difference:
+                yield difference
+            for plat in element.get("menu", []):
+                plat = dict(plat, id_restaurant=element["id_restaurant"])
+                difference = comparer("plats", plat)
+                if difference:
+                    yield difference
+        elif nom == "livreurs":
+            difference = comparer("livreurs", element)
+            if difference:
+                yield difference
+
+    for type_element in TYPES:
+        for ident, ancienne in empreintes[type_element].items():
+            stats["suppressions"] += 1
+            yield "suppression", type_element, ident, None, None, ancienne
+
+
+# --- Redis ---
+
+def synchroniser_redis(r, elements, taille_lot=TAILLE_LOT):
+    """
+    Applique les différences dans Redis par pipelines de 'taille_lot' opérations, sans
+    FLUSHDB : les commandes en cours et les autres clés ne sont pas touchées.
+    """
+    import json_to_redis  # Mêmes écritures que l'import complet
+
+    stats = {"ajouts": 0, "modifications": 0, "suppressions": 0, "inchanges": 0}
+    empreintes = {type_element: r.hgetall(f"{EMPREINTES_REDIS}:{type_element}") for type_element in TYPES}
+    pipe = r.pipeline(transaction=False)
+    for action, type_element, ident, element, nouvelle, ancienne in calculer_differences(elements, empreintes, stats):
+        cle_empreintes = f"{EMPREINTES_REDIS}:{type_element}"
+        if action == "maj":
+            if type_element == "restaurants":
+                json_to_redis.ecrire_fiche_restaurant(pipe, element)
+            elif type_element == "plats":
+                if ancienne and restaurant_de(ancienne) != element["id_restaurant"]:
+                    pipe.srem(f"restaurant:{restaurant_de(ancienne)}:plats", ident)  # Plat changé de restaurant
+                json_to_redis.ecrire_plat(pipe, element["id_restaurant"], element)
+            else:
+                json_to_redis.ecrire_livreur(pipe, element)
+            pipe.hset(cle_empreintes, ident, nouvelle)
+        else:
+            if type_element == "restaurants":
+                pipe.delete(f"restaurant:{ident}", f"restaurant:{ident}:plats")
+                pipe.srem(json_to_redis.INDEX_RESTAURANTS, ident)  # L'autocomplétion l'écarte à la lecture
+            elif type_element == "plats":
+                pipe.delete(f"plat:{ident}")
+                pipe.srem(f"restaurant:{restaurant_de(ancienne)}:plats", ident)
+            else:
+                pipe.delete(f"livreur:{ident}")
+            pipe.hdel(cle_empreintes, ident)
+        if len(pipe) >= taille_lot:
+            pipe.execute()
+    if stats["ajouts"] or stats["modifications"] or stats["suppressions"]:
+        pipe.incr(json_to_redis.VERSION_CATALOGUE)
+    pipe.execute()
+    return stats
+
+
+# --- MongoDB ---
+
+def synchroniser_mongo(db, elements, taille_lot=TAILLE_LOT):
+    """
+    Applique les différences dans MongoDB par bulk_write de 'taille_lot' opérations.
+    Les plats sont modifiés dans le tableau 'menu' de leur restaurant ; la collection
+    'commandes' n'est pas touchée.
+    """
+    from pymongo import UpdateOne, DeleteOne
+
+    stats = {"ajouts": 0, "modifications": 0, "suppressions": 0, "inchanges": 0}
+    empreintes = {type_element: {} for type_element in TYPES}
+    for doc in db[EMPREINTES_MONGO].find():
+        type_element, ident = doc["_id"].split(":", 1)
+        empreintes[type_element][ident] = doc["empreinte"]
+
+    # Les opérations d'une collection restent dans l'ordre (restaurant créé avant ses plats).
+    # Dès qu'un lot est plein, tous sont envoyés, les empreintes en dernier : une synchro
+    # interrompue n'enregistre jamais l'empreinte d'un élément qui n'a pas été écrit.
+    operations = {"restaurants": [], "livreurs": [], EMPREINTES_MONGO: []}
+
+    def envoyer(forcer=False):
+        if not forcer and all(len(lot) < taille_lot for lot in operations.values()):
+            return
+        for nom_collection, lot in operations.items():
+            if lot:
+                db[nom_collection].bulk_write(lot, ordered=(nom_collection == "restaurants"))
+                lot.clear()
+
+    for action, type_element, ident, element, nouvelle, ancienne in calculer_differences(elements, empreintes, stats):
+        cle = f"{type_element}:{ident}"
+        if action == "maj":
+            if type_element == "restaurants":
+                fiche = {k: v for k, v in element.items() if k not in ("menu", "_id")}
+                fiche["nom_normalise"] = normaliser_nom(fiche.get("nom", ""))  # Champ de recherche indexé
+                operations["restaurants"].append(
+                    UpdateOne({"id_restaurant": ident}, {"$set": fiche, "$setOnInsert": {"menu": []}}, upsert=True))
+            elif type_element == "plats":
+                resto_id = element["id_restaurant"]
+                if ancienne and restaurant_de(ancienne) != resto_id:
+                    operations["restaurants"].append(
+                        UpdateOne({"id_restaurant": restaurant_de(ancienne)}, {"$pull": {"menu": {"id_plat": ident}}}))
+                # Remplacer le plat s'il est déjà au menu, sinon l'ajouter
+                operations["restaurants"].append(
+                    UpdateOne({"id_restaurant": resto_id, "menu.id_plat": ident}, {"$set": {"menu.$": element}}))
+                operations["restaurants"].append(
+                    UpdateOne({"id_restaurant": resto_id, "menu.id_plat": {"$ne": ident}}, {"$push": {"menu": element}}))
+            else:
+                operations["livreurs"].append(UpdateOne({"id_livreur": ident}, {"$set": element}, upsert=True))
+            operations[EMPREINTES_MONGO].append(UpdateOne({"_id": cle}, {"$set": {"empreinte": nouvelle}}, upsert=True))
+        else:
+            if type_element == "restaurants":
+                operations["restaurants"].append(DeleteOne({"id_restaurant": ident}))
+            elif type_element == "plats":
+                operations["restaurants"].append(
+                    UpdateOne({"id_restaurant": restaurant_de(ancienne)}, {"$pull": {"menu": {"id_plat": ident}}}))
+            else:
+                operations["livreurs"].append(DeleteOne({"id_livreur": ident}))
+            operations[EMPREINTES_MONGO].append(DeleteOne({"_id": cle}))
+        envoyer()
+    envoyer(forcer=True)
+    return stats
+
+
+def synchroniser(fichier_json=FICHIER_JSON, vers="redis", taille_lot=TAILLE_LOT, db=0):
+    """
+    Synchronise la base avec le catalogue 'fichier_json' (JSON ou JSON Lines) en
+    n'écrivant que les restaurants, plats et livreurs ajoutés, modifiés ou supprimés
+    depuis la synchronisation précédente. Renvoie les statistiques (ou None en cas d'erreur).
+    """
+    if not os.path.exists(fichier_json):
+        print(f"❌ ERREUR: Le fichier '{fichier_json}' est introuvable.")
+        return None
+
+    print(f"Synchronisation de '{fichier_json}' vers {vers}...")
+    debut = time.perf_counter()
+    try:
+        if vers == "redis":
+            import redis
+            r = redis.Redis(db=db, decode_responses=True)
+            r.ping()
+            stats = synchroniser_redis(r, lire_elements(fichier_json), taille_lot)
+        else:
+            import json_to_mongo  # Se connecte à l'import
+            stats = synchroniser_mongo(json_to_mongo.db, lire_elements(fichier_json), taille_lot)
+    except ValueError as e:
+        print(f"❌ ERREUR: Le contenu de '{fichier_json}' n'est pas un JSON valide : {e}")
+        return None
+    except Exception as e:
+        print(f"❌ ERREUR lors de la synchronisation : {e}")
+        return None
+
+    print(f"-> {stats['ajouts']} ajouts, {stats['modifications']} modifications, {stats['suppressions']} suppressions "
+          f"({stats['inchanges']} éléments inchangés) en {time.perf_counter() - debut:.1f} s")
+    return stats
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Synchronisation incrémentale du catalogue (sans vider la base).")
+    parseur.add_argument("fichier", nargs="?", default=FICHIER_JSON)
+    parseur.add_argument("--vers", choices=["redis", "mongo"], default="redis")
+    parseur.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="Écritures envoyées par lot")
+    parseur.add_argument("--db", type=int, default=0, help="Numéro de base Redis")
+    args = parseur.parse_args()
+    synchroniser(args.fichier, args.vers, args.taille_lot, args.db)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+import redis
+
+# Les modules des deux versions s'importent par leur nom, comme quand on les lance
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for dossier in ("", "version_redis", "version_mongo", "benchmarks"):
+    sys.path.insert(0, os.path.join(RACINE, dossier))
+
+TEST_REDIS_DB = 13  # Base vidée avant et après chaque test
+TEST_MONGO_BASE = "ubereats_test"  # Idem pour MongoDB
+
+
+@pytest.fixture
+def r():
+    """Connexion à la base de test d'un serveur Redis local (test ignoré sans serveur)."""
+    connexion = redis.Redis(db=TEST_REDIS_DB, decode_responses=True)
+    try:
+        connexion.ping()
+    except redis.ConnectionError:
+        pytest.skip("serveur Redis local indisponible")
+    connexion.flushdb()
+    yield connexion
+    connexion.flushdb()
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """
+    Module json_to_mongo branché sur la base de test (test ignoré sans serveur MongoDB
+    en Replica Set) : ses fonctions d'import y écrivent à la place de 'ubereats_db'.
+    """
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    try:
+        MongoClient(serverSelectionTimeoutMS=500).server_info()
+    except PyMongoError:
+        pytest.skip("serveur MongoDB local indisponible")
+    try:
+        import json_to_mongo
+    except SystemExit:  # json_to_mongo quitte s'il ne peut pas se connecter
+        pytest.skip("serveur MongoDB local indisponible")
+    base = json_to_mongo.client[TEST_MONGO_BASE]
+    json_to_mongo.client.drop_database(TEST_MONGO_BASE)
+    monkeypatch.setattr(json_to_mongo, "db", base)
+    yield json_to_mongo
+    json_to_mongo.client.drop_database(TEST_MONGO_BASE)
@@ -0,0 +1,117 @@
+import pytest
+
+import mongo_manager
+import redis_manager
+from redis_etats import ASSIGNEE, OFFERTE, CacheCommandes, cle_etat, offrir, reclamer, statut_commande
+from redis_planificateur import CLE_ECHEANCES
+
+POSITION = (2.35, 48.85)
+
+
+def solveur_en_panne(*args):
+    raise ValueError("matrice de coûts invalide")
+
+
+def commande_prete(r, commande_id):
+    r.hset(cle_etat(commande_id), "statut", "prete")
+    return commande_id, {"commande_id": commande_id, "offre_livraison": {"commande_id": commande_id,
+                                                                          "position_restaurant": POSITION}}
+
+
+@pytest.mark.parametrize("capacite", [1, 3])
+def test_lot_redis_en_echec_chaque_commande_recoit_offre_et_echeance(r, monkeypatch, capacite):
+    monkeypatch.setattr(redis_manager, "r", r)
+    monkeypatch.setattr(redis_manager, "DISPATCH_LOTS", True)
+    monkeypatch.setattr(redis_manager, "NB_CANDIDATS_LOT", 5, raising=False)
+    monkeypatch.setattr(redis_manager, "affecter_lot", solveur_en_panne, raising=False)
+    monkeypatch.setattr(redis_manager.tournees, "CAPACITE_LIVREUR", capacite)
+    lot = [commande_prete(r, f"cmd_{i}") for i in range(3)]
+
+    redis_manager.traiter_lot(lot)
+    for commande_id, commande in lot:
+        assert statut_commande(r, commande_id) == OFFERTE
+        assert r.zscore(CLE_ECHEANCES, commande_id) is not None
+        assert "commandes" not in commande["offre_livraison"]  # Le lot garde l'offre de chaque commande
+    assert redis_manager.lot_commandes == []
+
+
+def test_lot_mongo_en_echec_chaque_commande_a_son_minuteur(monkeypatch):
+    demarrees = []
+    monkeypatch.setattr(mongo_manager.mongo_geo, "DISPATCH_LOTS", True)
+    monkeypatch.setattr(mongo_manager.mongo_geo, "livreurs_candidats", lambda *args: {})
+    monkeypatch.setattr(mongo_manager, "NB_CANDIDATS_LOT", 5, raising=False)
+    monkeypatch.setattr(mongo_manager, "affecter_lot", solveur_en_panne, raising=False)
+    monkeypatch.setattr(mongo_manager.tournees, "CAPACITE_LIVREUR", 1)
+    monkeypatch.setattr(mongo_manager, "demarrer_timer_livraison",
+                        lambda commande_id, offre, livreur_choisi=None: demarrees.append(commande_id))
+    lot = [(f"cmd_{i}", {"commande_id": f"cmd_{i}", "position_restaurant": POSITION}, 0.0) for i in range(3)]
+
+    mongo_manager.traiter_lot(lot)
+    assert demarrees == ["cmd_0", "cmd_1", "cmd_2"]
+    assert mongo_manager.lot_commandes == []
+
+
+@pytest.mark.parametrize("prise", [False, True])
+def test_echeance_d_une_offre_prise_ne_sollicite_personne(r, monkeypatch, prise):
+    sollicitees = []
+    monkeypatch.setattr(redis_manager, "r", r)
+    monkeypatch.setattr(redis_manager, "DISPATCH_GEO", True)
+    monkeypatch.setattr(redis_manager, "commandes_en_attente", CacheCommandes())
+    monkeypatch.setattr(redis_manager, "solliciter_livreurs",
+                        lambda r, commande_id, *args: sollicitees.append(commande_id) or ([("livr_2", 1.0)], 1))
+    commande_id, commande = commande_prete(r, "cmd_0")
+    commande["tour_dispatch"] = 0
+    assert offrir(r, commande_id, 0, 60, commande)
+    r.zrem(CLE_ECHEANCES, commande_id)  # Prise par le planificateur
+    if prise:  # Un livreur prend l'offre avant que le planificateur n'appelle le manager
+        assert reclamer(r, [commande_id], "livr_1")
+
+    redis_manager.traiter_timeout_livraison(commande_id)
+    assert sollicitees == ([] if prise else [commande_id])
+    assert statut_commande(r, commande_id) == (ASSIGNEE if prise else OFFERTE)
+    assert (r.zscore(CLE_ECHEANCES, commande_id) is None) == prise
+
+
+def en_panne_une_fois(fonction, commande_en_panne, appels):
+    """Enveloppe 'fonction' : note chaque appel et échoue au premier pour 'commande_en_panne'."""
+    def enveloppe(commande_id, *args, **kwargs):
+        appels.append(commande_id)
+        if appels.count(commande_en_panne) == 1 and commande_id == commande_en_panne:
+            raise ConnectionError("connexion perdue")
+        return fonction(commande_id, *args, **kwargs)
+    return enveloppe
+
+
+@pytest.mark.parametrize("dispatch_lots", [False, True])
+def test_lot_redis_en_echec_partiel_ne_repropose_que_les_restantes(r, monkeypatch, dispatch_lots):
+    appels = []
+    monkeypatch.setattr(redis_manager, "r", r)
+    monkeypatch.setattr(redis_manager, "DISPATCH_LOTS", dispatch_lots)
+    monkeypatch.setattr(redis_manager, "NB_CANDIDATS_LOT", 5, raising=False)
+    monkeypatch.setattr(redis_manager, "livreurs_candidats", lambda *args: {"livr_1": POSITION})
+    monkeypatch.setattr(redis_manager, "affecter_lot", lambda *args: [(0, 0, 0.0)], raising=False)  # cmd_0 -> livr_1
+    monkeypatch.setattr(redis_manager.tournees, "CAPACITE_LIVREUR", 1)
+    monkeypatch.setattr(redis_manager, "proposer_offre", en_panne_une_fois(redis_manager.proposer_offre, "cmd_1", appels))
+    lot = [commande_prete(r, f"cmd_{i}") for i in range(3)]
+
+    redis_manager.traiter_lot(lot)
+    assert appels == (["cmd_1", "cmd_1", "cmd_2"] if dispatch_lots else ["cmd_0", "cmd_1", "cmd_1", "cmd_2"])
+    for commande_id, _ in lot:
+        assert statut_commande(r, commande_id) == OFFERTE
+    assert redis_manager.lot_commandes == []
+
+
+def test_lot_mongo_en_echec_partiel_un_seul_minuteur_par_commande(monkeypatch):
+    demarrees = []
+    monkeypatch.setattr(mongo_manager.mongo_geo, "DISPATCH_LOTS", True)
+    monkeypatch.setattr(mongo_manager.mongo_geo, "livreurs_candidats", lambda *args: {})
+    monkeypatch.setattr(mongo_manager, "NB_CANDIDATS_LOT", 5, raising=False)
+    monkeypatch.setattr(mongo_manager, "affecter_lot", lambda *args: [], raising=False)
+    monkeypatch.setattr(mongo_manager.tournees, "CAPACITE_LIVREUR", 1)
+    monkeypatch.setattr(mongo_manager, "demarrer_timer_livraison",
+                        en_panne_une_fois(lambda *args: None, "cmd_1", demarrees))
+    lot = [(f"cmd_{i}", {"commande_id": f"cmd_{i}", "position_restaurant": POSITION}, 0.0) for i in range(3)]
+
+    mongo_manager.traiter_lot(lot)
+    assert demarrees == ["cmd_0", "cmd_1", "cmd_1", "cmd_2"]
+    assert mongo_manager.lot_commandes == []
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import flux_json
+
+DOCUMENT = {"restaurants": [{"id_restaurant": "rest_01", "note": 4.75, "position": [2.3522, -48.8566],
+                             "menu": [{"prix": 12.5, "calories": 2.5e3, "remise": -1E-2, "stock": 10}]}],
+            "livreurs": [{"id_livreur": "livr_01", "capacite": 3, "actif": True, "zone": None}],
+            "version": 1.5}
+
+
+def ecrire(chemin, texte):
+    chemin.write_text(texte, encoding="utf-8")
+    return str(chemin)
+
+
+@pytest.mark.parametrize("taille_bloc", range(1, 17))
+def test_nombres_coupes_par_un_bloc(tmp_path, taille_bloc):
+    texte = json.dumps(DOCUMENT).replace("2500.0", "2.5e3").replace("-0.01", "-1E-2")
+    chemin = ecrire(tmp_path / "catalogue.json", texte)
+    attendu = [(nom, element) for nom, valeur in DOCUMENT.items()
+               for element in (valeur if isinstance(valeur, list) else [valeur])]
+    assert list(flux_json.lire_elements(chemin, taille_bloc)) == attendu
+
+
+@pytest.mark.parametrize("taille_bloc", range(1, 9))
+def test_tableau_de_nombres(tmp_path, taille_bloc):
+    chemin = ecrire(tmp_path / "nombres.json", "[12.5, 2.5e3,-7,0.125E+2 ,1e-1]")
+    assert [element for _, element in flux_json.lire_elements(chemin, taille_bloc)] == [12.5, 2500.0, -7, 12.5, 0.1]
+
+
+@pytest.mark.parametrize("taille_bloc", [1, 4, 1024])
+def test_nombre_incomplet_en_fin_de_fichier(tmp_path, taille_bloc):
+    chemin = ecrire(tmp_path / "tronque.json", '{"a": [12.')
+    with pytest.raises(ValueError):
+        list(flux_json.lire_elements(chemin, taille_bloc))
@@ -0,0 +1,31 @@
+import json
+
+import json_to_redis
+from redis_index import VERSION_CATALOGUE, autocompleter
+
+
+def restaurant(plats):
+    return ("restaurants", {"id_restaurant": "rest_01", "nom": "Chez Test", "adresse": "1 rue du Test, 75011 Paris",
+                            "menu": [{"id_plat": plat_id, "nom": plat_id, "prix": "10.00"} for plat_id in plats]})
+
+
+def test_upsert_retire_les_plats_absents_du_fichier(r):
+    json_to_redis.importer_elements(r, [restaurant(["plat_01", "plat_02"])])
+    json_to_redis.importer_elements(r, [restaurant(["plat_01"])])
+    assert r.smembers("restaurant:rest_01:plats") == {"plat_01"}
+
+
+def test_import_du_fichier_en_flux(r, tmp_path):
+    db = r.connection_pool.connection_kwargs["db"]
+    chemin = tmp_path / "catalogue.json"
+    _, resto = restaurant(["plat_01"])
+    chemin.write_text(json.dumps({"restaurants": [resto], "livreurs": [{"id_livreur": "livr_01", "note": 4.5}]}),
+                      encoding="utf-8")
+    assert json_to_redis.importer_donnees_depuis_json(str(chemin), db=db) == 3
+    assert r.hget("livreur:livr_01", "note") == "4.5"
+    assert autocompleter(r, "chez") == [{"id_restaurant": "rest_01", "nom": "Chez Test"}]
+    assert r.get(VERSION_CATALOGUE) == "1"
+
+    chemin.write_text('{"restaurants": [{"id_restaurant": "rest_02"', encoding="utf-8")  # Fichier tronqué
+    assert json_to_redis.importer_donnees_depuis_json(str(chemin), db=db) is None
+    assert r.exists("restaurant:rest_01")  # La base n'a pas été vidée
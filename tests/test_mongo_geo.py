@@ -0,0 +1,17 @@
+from datetime import datetime
+
+import mongo_geo
+
+
+def test_offres_datees_expirent_et_sont_supprimees(mongo):
+    db = mongo.db
+    mongo_geo.preparer_dispatch(db)
+    index_ttl = [index for index in db.offres.list_indexes() if "expireAfterSeconds" in index]
+    assert [(list(index["key"]), index["expireAfterSeconds"]) for index in index_ttl] == \
+        [(["date"], mongo_geo.DUREE_VIE_OFFRE_S)]
+
+    mongo_geo.envoyer_offres(db, {"commande_id": "cmd_01"}, ["livr_01", "livr_02"])
+    mongo_geo.envoyer_offres(db, {"commande_id": "cmd_02"}, [None])
+    assert isinstance(db.offres.find_one({"commande_id": "cmd_01"})["date"], datetime)
+    mongo_geo.supprimer_offres(db, "cmd_01")
+    assert [offre["commande_id"] for offre in db.offres.find()] == ["cmd_02"]
@@ -0,0 +1,63 @@
+from pymongo import ASCENDING
+
+import mongo_recherche
+
+
+class CollectionEnregistree:
+    """Collection factice qui note les index créés et la requête construite (sans serveur)."""
+
+    def __init__(self):
+        self.index, self.requete = [], {}
+
+    def create_index(self, cles):
+        self.index.append(cles)
+
+    def find(self, filtre, projection=None):
+        self.requete.update(filtre=filtre, projection=projection)
+        return self
+
+    def __iter__(self):
+        return iter([])
+
+    def sort(self, champ, sens):
+        self.requete["tri"] = (champ, sens)
+        return self
+
+    def limit(self, limite):
+        self.requete["limite"] = limite
+        return self
+
+
+class BaseEnregistree:
+    def __init__(self):
+        self.restaurants = CollectionEnregistree()
+
+
+def test_filtre_prefixe_est_un_intervalle_sur_le_nom_normalise():
+    assert mongo_recherche.filtre_prefixe("Piz") == {"nom_normalise": {"$gte": "piz", "$lt": "pi{"}}
+    assert mongo_recherche.filtre_prefixe("Crêpe") == {"nom_normalise": {"$gte": "crepe", "$lt": "crepf"}}
+    assert mongo_recherche.filtre_prefixe("pizza ") == {"nom_normalise": {"$gte": "pizza ", "$lt": "pizza!"}}
+    assert mongo_recherche.filtre_prefixe("café (") == {"nom_normalise": {"$gte": "cafe (", "$lt": "cafe )"}}
+    assert mongo_recherche.filtre_prefixe("") == {}
+
+
+def test_requete_prefixe_et_index_portent_sur_le_meme_champ():
+    db = BaseEnregistree()
+    assert mongo_recherche.preparer_recherche(db) == 0
+    mongo_recherche.curseur_prefixe(db, "Piz", limite=5)
+    assert db.restaurants.index == [[("nom_normalise", ASCENDING)]]
+    requete = db.restaurants.requete
+    assert list(requete["filtre"]) == ["nom_normalise"]
+    assert requete["tri"] == ("nom_normalise", ASCENDING) and requete["limite"] == 5
+
+
+def test_plan_de_la_requete_prefixe_est_un_parcours_d_index(mongo):
+    db = mongo.db
+    noms = ["Pizza Roma", "Pizzeria Napoli", "Sushi Bar", "Crêperie du Port"]
+    db.restaurants.insert_many([{"id_restaurant": f"rest_{i}", "nom": nom} for i, nom in enumerate(noms)])
+    assert mongo_recherche.preparer_recherche(db) == len(noms)
+    for prefixe in ("P", "pizza ", "crêperie", "café ("):
+        etapes = mongo_recherche.etapes_plan(mongo_recherche.curseur_prefixe(db, prefixe))
+        assert "IXSCAN" in etapes and "COLLSCAN" not in etapes and "SORT" not in etapes, (prefixe, etapes)
+    assert [resto["nom"] for resto in mongo_recherche.rechercher_par_prefixe(db, "pizz")] == noms[:2]
+    assert mongo_recherche.rechercher_nom_exact(db, "SUSHI bar")["id_restaurant"] == "rest_2"
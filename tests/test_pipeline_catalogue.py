@@ -0,0 +1,19 @@
+import os
+
+import pipeline_catalogue
+from outils_bench import generer_dataset_txt
+
+
+def test_un_fichier_non_trie_laisse_la_base_intacte(r, tmp_path):
+    dossier = str(tmp_path)
+    generer_dataset_txt(dossier, 100, nb_livreurs=2)
+    chemin = os.path.join(dossier, "plats.txt")
+    with open(chemin, encoding="utf-8") as f:
+        lignes = f.readlines()
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.writelines(lignes[:1] + lignes[1:][::-1])  # Plats triés à l'envers
+    r.set("commande:cmd_1", "en cours")
+
+    assert pipeline_catalogue.executer_pipeline(dossier, "redis", db=r.connection_pool.connection_kwargs["db"]) is None
+    assert r.get("commande:cmd_1") == "en cours"
+    assert not r.exists("restaurants:ids")
@@ -0,0 +1,96 @@
+import builtins
+import random
+
+import pytest
+
+import redis_index
+from redis_catalogue import charger_catalogue
+from redis_index import INDEX_RESTAURANTS, indexer_nom_restaurant, retirer_nom_restaurant, suggerer_restaurants
+
+
+def creer(pipe, rest_id, nom, popularite=0):
+    pipe.hset(f"restaurant:{rest_id}", mapping={"nom": nom, "adresse": "1 rue du Test"})
+    pipe.sadd(INDEX_RESTAURANTS, rest_id)
+    pipe.set(f"restaurant:{rest_id}:popularite", popularite)
+    indexer_nom_restaurant(pipe, rest_id, nom)
+
+
+def test_la_popularite_reclasse_les_suggestions_sans_invalider_le_snapshot(r, monkeypatch):
+    import redis_admin
+    pipe = r.pipeline()
+    creer(pipe, "rest_01", "Chez Test", 0)
+    creer(pipe, "rest_02", "Chez Moi", 0)
+    pipe.execute()
+    charger_catalogue(r)  # Écrit le snapshot
+    assert [resto["id_restaurant"] for resto in suggerer_restaurants(r, "chez")] == ["rest_02", "rest_01"]
+
+    monkeypatch.setattr(redis_admin, "r", r)
+    monkeypatch.setattr(builtins, "input", lambda message: "rest_01")
+    redis_admin.incrementer_popularite()
+    assert charger_catalogue(r)[-1]  # Le snapshot ne contient pas la popularité
+    assert [resto["id_restaurant"] for resto in suggerer_restaurants(r, "chez")] == ["rest_01", "rest_02"]
+
+
+def test_les_suggestions_sont_classees_par_popularite(r):
+    pipe = r.pipeline()
+    for rest_id, nom, popularite in [("rest_01", "Pizza Roma", 1), ("rest_02", "Pizza Napoli", 5),
+                                     ("rest_03", "Pizzeria Bella", 1), ("rest_04", "Sushi Bar", 9)]:
+        creer(pipe, rest_id, nom, popularite)
+    pipe.execute()
+    r.hset("restaurant:rest_05", mapping={"nom": "Pizza Express"})
+    indexer_nom_restaurant(r, "rest_05", "Pizza Express")
+
+    suggestions = suggerer_restaurants(r, "piz")
+    assert [resto["id_restaurant"] for resto in suggestions] == ["rest_02", "rest_01", "rest_03", "rest_05"]
+
+
+def attendu(r, prefixe, limite):
+    """Classement de référence : tout le préfixe, popularité décroissante puis nom normalisé."""
+    normalise = redis_index.normaliser_nom(prefixe)
+    restos = []
+    for rest_id in r.smembers(INDEX_RESTAURANTS):
+        nom = r.hget(f"restaurant:{rest_id}", "nom")
+        membre = redis_index.membre_autocompletion(nom, rest_id)
+        if membre.startswith(normalise):
+            restos.append((-int(r.get(f"restaurant:{rest_id}:popularite") or 0), membre.encode(), rest_id))
+    return [rest_id for *_, rest_id in sorted(restos)[:limite]]
+
+
+@pytest.mark.parametrize("graine", range(3))
+def test_suggestions_exactes_sur_tout_le_prefixe(r, monkeypatch, graine):
+    # Petits seuils : les classements gardés dans Redis sont créés, mis à jour et supprimés
+    monkeypatch.setattr(redis_index, "SEUIL_SUGGESTIONS", 4)
+    monkeypatch.setattr(redis_index, "TOP_K_SUGGESTIONS", 6)
+    aleatoire = random.Random(graine)
+    noms = {}
+    pipe = r.pipeline()
+    for i in range(60):
+        noms[f"rest_{i:02d}"] = aleatoire.choice(["Pizza", "Pizzeria", "Pita", "Poké", "Le Bistrot"]) + f" {i:02d}"
+        creer(pipe, f"rest_{i:02d}", noms[f"rest_{i:02d}"], aleatoire.randrange(5))
+    pipe.execute()
+    prefixes = ["", "p", "pi", "piz", "pizzeria", "pok", "le ", "Le B", "x"]
+
+    for etape in range(80):
+        rest_id = aleatoire.choice(sorted(noms))
+        action = aleatoire.random()
+        if action < 0.5:  # Popularité (ne fait que croître)
+            pipe = r.pipeline()
+            pipe.incrby(f"restaurant:{rest_id}:popularite", aleatoire.randrange(1, 4))
+            indexer_nom_restaurant(pipe, rest_id, noms[rest_id])
+            pipe.execute()
+        elif action < 0.7:  # Suppression
+            retirer_nom_restaurant(r, rest_id, noms.pop(rest_id))
+            r.delete(f"restaurant:{rest_id}")
+            r.srem(INDEX_RESTAURANTS, rest_id)
+        elif action < 0.85:  # Renommage sans mise à jour de l'index : entrée périmée, retirée à la lecture
+            noms[rest_id] = "Pizza Renommée " + rest_id
+            r.hset(f"restaurant:{rest_id}", "nom", noms[rest_id])
+            indexer_nom_restaurant(r, rest_id, noms[rest_id])
+        else:  # Ajout
+            rest_id = f"rest_n{etape:02d}"
+            noms[rest_id] = aleatoire.choice(["Pizza", "Pita"]) + f" {etape:02d}"
+            creer(r, rest_id, noms[rest_id], aleatoire.randrange(5))
+        prefixe = aleatoire.choice(prefixes)
+        limite = aleatoire.choice([1, 3, 6])
+        obtenu = [resto["id_restaurant"] for resto in suggerer_restaurants(r, prefixe, limite)]
+        assert obtenu == attendu(r, prefixe, limite), (etape, prefixe)
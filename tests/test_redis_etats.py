@@ -0,0 +1,23 @@
+import pytest
+
+import redis_etats
+from redis_planificateur import CLE_ECHEANCES
+
+
+def interdire_register_script(r, monkeypatch):
+    def register_script(script):
+        pytest.fail("script Lua recréé à chaque appel")
+    monkeypatch.setattr(r, "register_script", register_script)
+
+
+def test_transitions_sans_recreer_le_script(r, monkeypatch):
+    interdire_register_script(r, monkeypatch)
+    commande = {"commande_id": "cmd_01", "restaurant_id": "rest_01"}
+    assert redis_etats.recevoir(r, "cmd_01", commande)
+    r.script_flush()  # Serveur redémarré : le script est rechargé au premier EVALSHA refusé
+    assert redis_etats.moderer(r, "cmd_01", True, commande, "restaurant:rest_01")
+    assert redis_etats.marquer_prete(r, "cmd_01", commande)
+    assert redis_etats.offrir(r, "cmd_01", 0, 60, commande)
+    assert not redis_etats.marquer_prete(r, "cmd_01", commande)  # Transition refusée
+    assert redis_etats.statut_commande(r, "cmd_01") == redis_etats.OFFERTE
+    assert r.zscore(CLE_ECHEANCES, "cmd_01") is not None
@@ -0,0 +1,46 @@
+from redis_index import cle_historique, historique_commandes, indexer_commande
+
+
+def archiver(r, commande_id, horodatage, statut="livree", restaurant="rest_01"):
+    commande = {"statut_final": statut, "id_restaurant": restaurant, "id_livreur": "N/A"}
+    pipe = r.pipeline()
+    pipe.hset(f"commande:{commande_id}", mapping=commande)
+    indexer_commande(pipe, commande_id, commande, horodatage)
+    pipe.execute()
+
+
+def lire_tout(r, limit, **filtres):
+    ids, curseur = [], None
+    while True:
+        commandes, curseur = historique_commandes(r, limit=limit, before=curseur, **filtres)
+        ids += [commande["id"] for commande in commandes]
+        if curseur is None:
+            return ids
+
+
+def test_les_scores_egaux_ne_sont_pas_sautes_entre_deux_pages(r):
+    # Dates illisibles (reconstruire_historique) : horodatage 0 pour toutes
+    for i in range(7):
+        archiver(r, f"cmd_{i}", 0.0)
+    archiver(r, "cmd_recente", 100.0)
+    ids = lire_tout(r, limit=3)
+    assert ids[0] == "cmd_recente"
+    assert sorted(ids[1:]) == [f"cmd_{i}" for i in range(7)]
+    assert len(ids) == 8
+
+
+def test_les_scores_egaux_avec_plusieurs_filtres(r):
+    for i in range(5):
+        archiver(r, f"cmd_{i}", 10.0)
+    archiver(r, "cmd_autre", 10.0, restaurant="rest_02")
+    assert sorted(lire_tout(r, limit=2, statut="livree", restaurant="rest_01")) == [f"cmd_{i}" for i in range(5)]
+
+
+def test_la_derniere_commande_lue_supprimee(r):
+    for i in range(6):
+        archiver(r, f"cmd_{i}", 5.0)
+    commandes, curseur = historique_commandes(r, limit=3)
+    premiere_page = [commande["id"] for commande in commandes]
+    r.zrem(cle_historique(), curseur[1])
+    commandes, _ = historique_commandes(r, limit=3, before=curseur)
+    assert sorted(premiere_page + [commande["id"] for commande in commandes]) == [f"cmd_{i}" for i in range(6)]
@@ -0,0 +1,46 @@
+import threading
+import time
+
+import redis
+
+from redis_planificateur import CLE_ECHEANCES, boucle_planificateur, traiter_echeances
+
+
+class RedisInstable(redis.Redis):
+    """Client dont les 'pannes' premiers ZRANGEBYSCORE échouent (connexion perdue)."""
+
+    def __init__(self, pannes, **kwargs):
+        super().__init__(**kwargs)
+        self.pannes = pannes
+
+    def zrangebyscore(self, *args, **kwargs):
+        if self.pannes:
+            self.pannes -= 1
+            raise redis.ConnectionError("connexion perdue")
+        return super().zrangebyscore(*args, **kwargs)
+
+
+def test_le_planificateur_survit_a_une_erreur_redis(r):
+    instable = RedisInstable(2, connection_pool=r.connection_pool)
+    instable.zadd(CLE_ECHEANCES, {"cmd_1": time.time()})
+    traitees, arret = [], threading.Event()
+
+    def traiter(commande_id):
+        traitees.append(commande_id)
+        arret.set()
+
+    fil = threading.Thread(target=boucle_planificateur, args=(instable, traiter, arret, 0.01), daemon=True)
+    fil.start()
+    fil.join(timeout=5)
+    assert traitees == ["cmd_1"]
+    assert instable.pannes == 0
+
+
+def test_une_echeance_en_erreur_est_reprogrammee(r):
+    r.zadd(CLE_ECHEANCES, {"cmd_1": time.time()})
+
+    def traiter(commande_id):
+        raise redis.ConnectionError("connexion perdue")
+
+    traiter_echeances(r, traiter)
+    assert r.zscore(CLE_ECHEANCES, "cmd_1") is not None
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+import json_to_redis
+import synchro_catalogue
+
+
+def catalogue(prix):
+    return {"restaurants": [{"id_restaurant": "rest_01", "nom": "Chez Test", "adresse": "1 rue du Test, 75011 Paris",
+                             "menu": [{"id_plat": "plat_01", "nom": "Burger", "description": "", "prix": prix,
+                                       "id_restaurant": "rest_01"}]}],
+            "livreurs": [{"id_livreur": "livr_01", "nom": "Livreur 1"}]}
+
+
+def elements(donnees):
+    return [(nom, json.loads(json.dumps(element))) for nom, liste in donnees.items() for element in liste]
+
+
+def ecrire(chemin, donnees):
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(donnees, f)
+    return str(chemin)
+
+
+def test_import_complet_puis_modification_puis_synchro(r, tmp_path):
+    db = r.connection_pool.connection_kwargs["db"]
+    json_to_redis.importer_donnees_depuis_json(ecrire(tmp_path / "v1.json", catalogue("10.00")), db=db)
+    stats = synchro_catalogue.synchroniser_redis(r, elements(catalogue("12.00")))
+    assert stats["modifications"] == 1 and stats["ajouts"] == 0
+    assert r.hget("plat:plat_01", "prix") == "12.00"
+
+
+def test_upsert_puis_synchro_du_catalogue_precedent(r):
+    synchro_catalogue.synchroniser_redis(r, elements(catalogue("10.00")))
+    json_to_redis.importer_elements(r, elements(catalogue("12.00")))  # --upsert
+    stats = synchro_catalogue.synchroniser_redis(r, elements(catalogue("10.00")))
+    assert stats["modifications"] == 1
+    assert r.hget("plat:plat_01", "prix") == "10.00"
+
+
+def test_import_mongo_puis_modification_puis_synchro(mongo):
+    synchro_catalogue.synchroniser_mongo(mongo.db, elements(catalogue("10.00")))
+    mongo.importer_elements(elements(catalogue("12.00")))
+    synchro_catalogue.synchroniser_mongo(mongo.db, elements(catalogue("10.00")))
+    assert mongo.db.restaurants.find_one({"id_restaurant": "rest_01"})["menu"][0]["prix"] == "10.00"
+
+
+
+def cle_operation(nom_collection, operation):
+    """Élément du catalogue visé par une opération de synchroniser_mongo ("plats:plat_01"...)."""
+    filtre = operation._filter
+    if nom_collection == synchro_catalogue.EMPREINTES_MONGO:
+        return filtre["_id"]
+    if nom_collection == "livreurs":
+        return f"livreurs:{filtre['id_livreur']}"
+    if "menu.id_plat" in filtre:
+        plat = filtre["menu.id_plat"]
+        return f"plats:{plat.get('$ne') if isinstance(plat, dict) else plat}"
+    return f"restaurants:{filtre['id_restaurant']}"
+
+
+class BaseEnregistree(dict):
+    """Base MongoDB factice qui note, dans l'ordre, les éléments écrits par bulk_write (sans serveur)."""
+
+    def __init__(self, en_panne=()):
+        super().__init__()
+        self.donnees, self.empreintes, self.en_panne = set(), [], en_panne
+
+    def __missing__(self, nom):
+        return self.setdefault(nom, CollectionEnregistree(self, nom))
+
+
+class CollectionEnregistree:
+    def __init__(self, db, nom):
+        self.db, self.nom = db, nom
+
+    def find(self):
+        return iter([])
+
+    def bulk_write(self, operations, ordered):
+        if self.nom in self.db.en_panne:
+            raise RuntimeError(f"bulk_write de '{self.nom}' refusé")
+        cles = [cle_operation(self.nom, operation) for operation in operations]
+        if self.nom == synchro_catalogue.EMPREINTES_MONGO:
+            assert set(cles) <= self.db.donnees, "empreinte enregistrée avant son élément"
+            self.db.empreintes.extend(cles)
+        else:
+            self.db.donnees.update(cles)
+
+
+def catalogue_mixte(nb):
+    return [("livreurs", {"id_livreur": f"livr_{i}", "nom": f"Livreur {i}"}) for i in range(nb)] + \
+        [("restaurants", {"id_restaurant": f"rest_{i}", "nom": f"Resto {i}",
+                          "menu": [{"id_plat": f"plat_{i}", "nom": "Burger", "prix": "10.00"}]}) for i in range(nb)]
+
+
+def test_synchro_mongo_ecrit_les_empreintes_apres_les_donnees():
+    db = BaseEnregistree()
+    synchro_catalogue.synchroniser_mongo(db, catalogue_mixte(6), taille_lot=4)
+    assert len(db.empreintes) == 6 * 3
+
+
+def test_synchro_mongo_en_echec_n_enregistre_aucune_empreinte():
+    db = BaseEnregistree(en_panne={"restaurants"})
+    with pytest.raises(RuntimeError):
+        synchro_catalogue.synchroniser_mongo(db, catalogue_mixte(6), taille_lot=4)
+    assert all(cle.startswith("livreurs:") for cle in db.empreintes)
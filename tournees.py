@@ -0,0 +1,118 @@
+import os
+
+from geocodage import distance_km, geocoder
+
+# --- Tournées groupées : plusieurs commandes par livreur ---
+# Un livreur ne transportait qu'une commande à la fois. Il a désormais une capacité
+# (CAPACITE_LIVREUR commandes, ou le champ 'capacite' du livreur) et une file d'arrêts
+# (récupérations au restaurant, livraisons chez les clients) qu'il parcourt dans l'ordre.
+# Le manager regroupe les commandes prêtes pendant FENETRE_REGROUPEMENT_S : chaque
+# tournée part de la plus ancienne commande, puis reçoit les commandes des restaurants
+# voisins, de la plus proche à la plus lointaine, chacune insérée à l'endroit qui
+# allonge le moins le trajet (la récupération toujours avant la livraison). Une tournée
+# est proposée comme une seule offre, portée par sa première commande. Un livreur
+# qui a encore de la place reçoit aussi des offres en cours de route : leurs arrêts
+# sont insérés dans sa file de la même façon. Partagé par les deux POC.
+CAPACITE_LIVREUR = int(os.environ.get("UBEREATS_CAPACITE_LIVREUR", "1"))  # 1 : pas de regroupement
+FENETRE_REGROUPEMENT_S = 1.0    # Durée de regroupement des commandes prêtes
+DISTANCE_REGROUPEMENT_KM = 1.0  # Écart max entre les restaurants d'une même tournée
+DETOUR_MAX_KM = 3.0             # Allongement max de la tournée par commande ajoutée
+
+
+def arrets_commande(offre):
+    """Arrêts d'une offre d'une seule commande : récupération au restaurant, puis livraison."""
+    return [
+        {"type": "recuperation", "commande_id": offre["commande_id"],
+         "adresse": offre.get("restaurant_adresse"), "position": offre.get("position_restaurant")},
+        {"type": "livraison", "commande_id": offre["commande_id"], "adresse": offre.get("client_adresse"),
+         "position": offre.get("position_client") or geocoder(offre.get("client_adresse"))},
+    ]
+
+
+def arrets_offre(offre):
+    """Arrêts d'une offre : ceux de sa tournée, sinon ceux de son unique commande."""
+    return offre.get("arrets") or arrets_commande(offre)
+
+
+def commandes_offre(offre):
+    """Identifiants des commandes d'une offre (la première porte l'offre)."""
+    return offre.get("commandes") or [offre["commande_id"]]
+
+
+def longueur(arrets, depart=None):
+    """Longueur (km) du parcours des arrêts depuis 'depart' ; les positions inconnues ne comptent pas."""
+    positions = [p for p in [depart] + [arret["position"] for arret in arrets] if p is not None]
+    return sum(distance_km(a, b) for a, b in zip(positions, positions[1:]))
+
+
+def inserer(arrets, recuperation, livraison, depart=None):
+    """
+    Insère la récupération et la livraison d'une commande dans une tournée, là où elles
+    l'allongent le moins, la récupération avant la livraison ; à égalité, en fin de
+    tournée. Renvoie les nouveaux arrêts et l'allongement (km).
+    """
+    base = longueur(arrets, depart)
+    meilleurs = arrets + [recuperation, livraison]
+    meilleure_longueur = longueur(meilleurs, depart)
+    for i in range(len(arrets) + 1):
+        avec_recuperation = arrets[:i] + [recuperation] + arrets[i:]
+        for j in range(i + 1, len(avec_recuperation) + 1):
+            essai = avec_recuperation[:j] + [livraison] + avec_recuperation[j:]
+            longueur_essai = longueur(essai, depart)
+            if longueur_essai < meilleure_longueur - 1e-9:
+                meilleurs, meilleure_longueur = essai, longueur_essai
+    return meilleurs, meilleure_longueur - base
+
+
+def ajouter_arrets(arrets, nouveaux, depart=None):
+    """Ajoute à une file d'arrêts ceux d'une nouvelle offre, commande par commande (voir inserer)."""
+    if not arrets:
+        return list(nouveaux)
+    for commande_id in dict.fromkeys(arret["commande_id"] for arret in nouveaux):
+        recuperation, livraison = [arret for arret in nouveaux if arret["commande_id"] == commande_id]
+        arrets, _ = inserer(arrets, recuperation, livraison, depart)
+    return arrets
+
+
+def grouper(offres, capacite=None):
+    """
+    Regroupe des offres d'une commande (dans l'ordre où les commandes sont devenues
+    prêtes) en tournées d'au plus 'capacite' commandes. Une commande rejoint une
+    tournée si son restaurant est à moins de DISTANCE_REGROUPEMENT_KM de celui de la
+    première, et si elle l'allonge de moins de DETOUR_MAX_KM et de moins qu'une course
+    séparée. Renvoie la liste des tournées : (offres regroupées, arrêts).
+    """
+    capacite = capacite or CAPACITE_LIVREUR
+    restantes = list(offres)
+    tournees = []
+    while restantes:
+        premiere = restantes.pop(0)
+        groupe, arrets = [premiere], arrets_commande(premiere)
+        origine = premiere.get("position_restaurant")
+        if capacite > 1 and origine is not None and arrets[1]["position"] is not None:
+            voisines = sorted((distance_km(origine, offre["position_restaurant"]), n, offre)
+                              for n, offre in enumerate(restantes)
+                              if offre.get("position_restaurant") is not None)
+            for ecart, _, offre in voisines:
+                if ecart > DISTANCE_REGROUPEMENT_KM or len(groupe) >= capacite:
+                    break
+                recuperation, livraison = arrets_commande(offre)
+                if livraison["position"] is None:
+                    continue
+                essai, allongement = inserer(arrets, recuperation, livraison)
+                if allongement <= min(DETOUR_MAX_KM, distance_km(recuperation["position"], livraison["position"])):
+                    groupe.append(offre)
+                    arrets = essai
+                    restantes.remove(offre)
+        tournees.append((groupe, arrets))
+    return tournees
+
+
+def offre_tournee(groupe, arrets):
+    """Offre d'une tournée : celle de sa première commande, avec toutes ses commandes et ses arrêts."""
+    premiere = groupe[0]
+    if len(groupe) == 1:
+        return premiere
+    return dict(premiere, commandes=[offre["commande_id"] for offre in groupe], arrets=arrets,
+                restaurant_adresse=arrets[0]["adresse"], position_restaurant=arrets[0]["position"],
+                retribution=f"{len(groupe)} x {premiere.get('retribution', '')}")
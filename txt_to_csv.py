@@ -1,63 +1,93 @@
 import csv
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def convertir_txt_en_csv(fichiers_txt, dossier_destination="dataset_csv"):
+def convertir_fichier(fichier_txt, dossier_destination):
+    """
+    Convertit un seul fichier .txt en .csv dans 'dossier_destination'.
+    Renvoie (fichier_txt, fichier_csv, message d'erreur ou None) : les erreurs
+    sont rapportées fichier par fichier, sans interrompre les autres conversions.
+    """
+    # Vérifier si le fichier source existe avant de continuer
+    if not os.path.exists(fichier_txt):
+        return fichier_txt, None, "introuvable"
+
+    # Construire le chemin de destination
+    # 1. Obtenir le nom de base du fichier (ex: "restaurants")
+    nom_fichier_sans_ext = os.path.splitext(os.path.basename(fichier_txt))[0]
+    # 2. Créer le nouveau nom de fichier .csv (ex: "restaurants.csv")
+    nom_csv = f"{nom_fichier_sans_ext}.csv"
+    # 3. Créer le chemin complet de destination (ex: "dataset_csv/restaurants.csv")
+    fichier_csv = os.path.join(dossier_destination, nom_csv)
+
+    try:
+        # Ouvrir le fichier source en lecture ('r') et le fichier de destination en écriture ('w')
+        # newline='' est une option importante pour éviter les lignes vides supplémentaires dans le CSV
+        with open(fichier_txt, mode='r', encoding='utf-8') as fin, \
+             open(fichier_csv, mode='w', encoding='utf-8', newline='') as fout:
+
+            # Utiliser le module CSV pour lire le fichier source, même si c'est un .txt
+            # Cela gère correctement les délimiteurs et les éventuelles guillemets
+            lecteur_csv = csv.reader(fin)
+
+            # Utiliser le module CSV pour écrire dans le fichier de destination
+            ecrivain_csv = csv.writer(fout)
+
+            # Copier chaque ligne du fichier source vers le fichier de destination
+            ecrivain_csv.writerows(lecteur_csv)
+        return fichier_txt, fichier_csv, None
+
+    except Exception as e:
+        return fichier_txt, fichier_csv, str(e)
+
+def convertir_txt_en_csv(fichiers_txt, dossier_destination="dataset_csv", nb_workers=1):
     """
     Prend une liste de noms de fichiers .txt et les convertit en fichiers .csv.
     Le contenu est lu et réécrit pour garantir un format CSV propre.
+    Avec nb_workers > 1, les fichiers sont répartis entre plusieurs processus
+    (ProcessPoolExecutor) ; les fichiers produits sont identiques.
+    Renvoie le nombre de fichiers en erreur.
     """
     print("Démarrage de la conversion...")
 
     # Créer le dossier de destination (ex: "dataset_csv") s'il n'existe pas
     os.makedirs(dossier_destination, exist_ok=True)
     print(f"Vérification/Création du dossier de destination : {dossier_destination}")
-    
-    # On boucle sur chaque nom de fichier fourni dans la liste
-    for fichier_txt in fichiers_txt:
-        # Vérifier si le fichier source existe avant de continuer
-        if not os.path.exists(fichier_txt):
+
+    if nb_workers > 1:
+        with ProcessPoolExecutor(nb_workers) as executeur:
+            # map conserve l'ordre des fichiers : les messages sont les mêmes qu'en série
+            resultats = list(executeur.map(convertir_fichier, fichiers_txt,
+                                           [dossier_destination] * len(fichiers_txt)))
+    else:
+        resultats = (convertir_fichier(fichier_txt, dossier_destination) for fichier_txt in fichiers_txt)
+
+    erreurs = 0
+    for fichier_txt, fichier_csv, erreur in resultats:
+        if erreur == "introuvable":
             print(f"-> ❌ ERREUR : Le fichier '{fichier_txt}' est introuvable. Il est ignoré.")
-            continue
-
-        # Construire le chemin de destination
-        # 1. Obtenir le nom de base du fichier (ex: "restaurants")
-        nom_fichier_sans_ext = os.path.splitext(os.path.basename(fichier_txt))[0]
-        # 2. Créer le nouveau nom de fichier .csv (ex: "restaurants.csv")
-        nom_csv = f"{nom_fichier_sans_ext}.csv"
-        # 3. Créer le chemin complet de destination (ex: "dataset_csv/restaurants.csv")
-        fichier_csv = os.path.join(dossier_destination, nom_csv)
-        
-        try:
-            # Ouvrir le fichier source en lecture ('r') et le fichier de destination en écriture ('w')
-            # newline='' est une option importante pour éviter les lignes vides supplémentaires dans le CSV
-            with open(fichier_txt, mode='r', encoding='utf-8') as fin, \
-                 open(fichier_csv, mode='w', encoding='utf-8', newline='') as fout:
-                
-                # Utiliser le module CSV pour lire le fichier source, même si c'est un .txt
-                # Cela gère correctement les délimiteurs et les éventuelles guillemets
-                lecteur_csv = csv.reader(fin)
-                
-                # Utiliser le module CSV pour écrire dans le fichier de destination
-                ecrivain_csv = csv.writer(fout)
-                
-                # Copier chaque ligne du fichier source vers le fichier de destination
-                for ligne in lecteur_csv:
-                    ecrivain_csv.writerow(ligne)
-            
+        elif erreur:
+            print(f"-> ❌ ERREUR lors de la conversion de '{fichier_txt}' : {erreur}")
+        else:
             print(f"-> ✅ SUCCÈS : Le fichier '{fichier_txt}' a été converti en '{fichier_csv}'.")
-
-        except Exception as e:
-            print(f"-> ❌ ERREUR lors de la conversion de '{fichier_txt}' : {e}")
+        erreurs += erreur is not None
 
     print("\nConversion terminée.")
+    return erreurs
 
 if __name__ == "__main__":
     # Liste des fichiers que vous souhaitez convertir.
-    # Vous pouvez ajouter ou supprimer des noms de fichiers ici.
+    # Vous pouvez ajouter ou supprimer des noms de fichiers ici (ou les passer en arguments).
     fichiers_a_convertir = [
         "dataset_txt/restaurants.txt",
         "dataset_txt/plats.txt",
         "dataset_txt/livreurs.txt"
     ]
-    
-    convertir_txt_en_csv(fichiers_a_convertir)
\ No newline at end of file
+
+    parseur = argparse.ArgumentParser(description="Conversion de fichiers TXT en CSV.")
+    parseur.add_argument("fichiers", nargs="*", default=fichiers_a_convertir)
+    parseur.add_argument("--destination", default="dataset_csv", help="Dossier des fichiers CSV produits")
+    parseur.add_argument("--workers", type=int, default=1, help="Processus de conversion en parallèle")
+    args = parseur.parse_args()
+    convertir_txt_en_csv(args.fichiers, args.destination, args.workers)
@@ -1,9 +1,17 @@
+import os
+import sys
 import uuid
 import threading
 import time
 from datetime import datetime
 from pymongo import MongoClient
 
+import mongo_recherche
+
+# recherche_floue.py (à la racine) est partagé avec le client Redis
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from recherche_floue import charger_index  # noqa: E402
+
 # Connexion
 try:
     client = MongoClient("mongodb://localhost:27017/?replicaSet=rs0")
@@ -96,51 +104,81 @@ def afficher_menu_restaurant(rest_id):
     return resto["menu"]
 
 def rechercher_par_nom_exact(nom):
-    """Remplace l'ABR."""
+    """Remplace l'ABR : égalité sur 'nom_normalise', servie par son index (casse et accents ignorés)."""
     print(f"\nRecherche exacte pour '{nom}':")
-    resultat = db.restaurants.find_one({"nom": {"$regex": f"^{nom}$", "$options": "i"}})
+    resultat = mongo_recherche.rechercher_nom_exact(db, nom)
     if resultat:
         print(f"  ✅ Restaurant trouvé : {resultat['nom']} (ID: {resultat['id_restaurant']})")
     else:
         print("  ❌ Restaurant non trouvé.")
 
 def rechercher_par_prefixe(prefixe):
-    """Remplace le Trie."""
+    """Remplace le Trie : intervalle sur l'index de 'nom_normalise', limité à LIMITE_RESULTATS."""
     print(f"\nRecherche avancée pour '{prefixe}':")
-    resultats = list(db.restaurants.find(
-        {"nom": {"$regex": f"^{prefixe}", "$options": "i"}},
-        {"nom": 1, "id_restaurant": 1, "_id": 0}
-    ).sort("nom", 1))
+    resultats = mongo_recherche.rechercher_par_prefixe(db, prefixe)
     
     if not resultats:
         print(f"  ❌ Aucun restaurant trouvé commençant par '{prefixe}'.")
     else:
-        print(f"\n✅ Restaurants trouvés pour '{prefixe}' :")
+        print(f"\n✅ Restaurants trouvés pour '{prefixe}' (par ordre alphabétique, {mongo_recherche.LIMITE_RESULTATS} au plus) :")
+        for resto in resultats:
+            print(f"   - {resto['nom']} (ID: {resto['id_restaurant']})")
+
+def rechercher_floue(index, saisie, restaurants):
+    """Fautes de frappe et accents tolérés : index de trigrammes construit depuis le catalogue."""
+    print(f"\nRecherche floue pour '{saisie}':")
+    # L'index date de sa construction : on écarte les restaurants supprimés depuis
+    resultats = [resto for resto in index.rechercher(saisie) if resto['id_restaurant'] in restaurants]
+    if not resultats:
+        print(f"  ❌ Aucun restaurant ne ressemble à '{saisie}'.")
+    else:
+        print(f"\n✅ Restaurants les plus proches de '{saisie}' :")
         for resto in resultats:
             print(f"   - {resto['nom']} (ID: {resto['id_restaurant']})")
 
 
+def calculer_total(plats_commande):
+    """Affiche le récapitulatif du panier et renvoie son total en euros."""
+    total_commande = 0.0
+    print("\n--- Récapitulatif de votre commande ---")
+    for item in plats_commande:
+        prix_unitaire = float(item.get('prix_unitaire', 0))
+        total_item = prix_unitaire * item['quantite']
+        total_commande += total_item
+        print(f"  - {item['quantite']}x {item['nom']} ({prix_unitaire:.2f}€/unité) = {total_item:.2f}€")
+    print("-" * 40)
+    print(f"💰 TOTAL DE LA COMMANDE : {total_commande:.2f} €")
+    print("-" * 40)
+    return total_commande
+
+
 if __name__ == "__main__":
     print(f"👤 Bienvenue Client {CLIENT_ID}")
     
     restaurants = charger_et_afficher_restaurants()
     if not restaurants:
         exit()
+    mongo_recherche.preparer_recherche(db)  # Index de 'nom_normalise' (et champ manquant d'une ancienne base)
+    index_floue = charger_index()
         
     main_loop_active = True
     try:
         while main_loop_active:
-            action = input("\nQue souhaitez-vous faire ? ('commander', 'rechercher' [nom exact], 'prefixe' [recherche avancée], 'quitter'): ").lower()
+            action = input("\nQue souhaitez-vous faire ? ('commander', 'rechercher' [nom exact], 'prefixe' [recherche avancée], 'floue' [fautes et accents tolérés], 'quitter'): ").lower()
 
             if action == 'rechercher':
-                nom_recherche = input("Entrez le nom EXACT du restaurant : ").lower()
+                nom_recherche = input("Entrez le nom EXACT du restaurant : ")
                 rechercher_par_nom_exact(nom_recherche)
                 continue
             elif action == 'prefixe':
-                prefixe = input("Entrez le DÉBUT du nom du restaurant : ").lower()
-                if prefixe: rechercher_par_prefixe(prefixe)
+                prefixe = input("Entrez le DÉBUT du nom du restaurant : ")
+                if prefixe.strip(): rechercher_par_prefixe(prefixe)
                 else: print("Veuillez entrer au moins un caractère.")
                 continue
+            elif action == 'floue':
+                saisie = input("Entrez tout ou partie du nom (les fautes sont tolérées) : ")
+                if index_floue is not None and saisie.strip(): rechercher_floue(index_floue, saisie, restaurants)
+                continue
             elif action == 'quitter':
                 main_loop_active = False
                 break
@@ -178,16 +216,7 @@ if __name__ == "__main__":
                     else:
                         print("❌ Erreur: ID de plat invalide.")
 
-                total_commande = 0.0
-                print("\n--- Récapitulatif de votre commande ---")
-                for item in plats_commande:
-                    prix_unitaire = float(item.get('prix_unitaire', 0))
-                    total_item = prix_unitaire * item['quantite']
-                    total_commande += total_item
-                    print(f"  - {item['quantite']}x {item['nom']} ({prix_unitaire:.2f}€/unité) = {total_item:.2f}€")
-                print("-" * 40)
-                print(f"💰 TOTAL DE LA COMMANDE : {total_commande:.2f} €")
-                print("-" * 40)
+                total_commande = calculer_total(plats_commande)
 
                 adresse_livraison = input("Votre adresse de livraison ? : ")
                 
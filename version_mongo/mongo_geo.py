@@ -0,0 +1,81 @@
+import os
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, GEOSPHERE
+
+# --- Dispatch géographique des offres de livraison ---
+# Chaque livreur surveillait toutes les commandes passant en 'offre_disponible' : tous
+# les livreurs recevaient toutes les offres. Les offres sont désormais des documents de
+# la collection 'offres', adressés à un livreur ('livreur_id') ou à tous (None), et
+# chaque livreur ne surveille que les siennes (filtre $match du Change Stream, appliqué
+# par le serveur). Le manager les adresse aux NB_LIVREURS_CIBLES livreurs disponibles
+# les plus proches du restaurant ($nearSphere sur l'index 2dsphere de 'livreurs.position'),
+# en élargissant le rayon à chaque tour sans preneur. Mêmes réglages que
+# version_redis/redis_geo.py ; UBEREATS_DISPATCH=diffusion rétablit la diffusion à tous,
+# UBEREATS_DISPATCH=lots affecte d'abord les commandes prêtes par lots (affectation.py).
+DISPATCH = os.environ.get("UBEREATS_DISPATCH", "geo")
+DISPATCH_GEO = DISPATCH in ("geo", "lots")
+DISPATCH_LOTS = DISPATCH == "lots"
+RAYONS_KM = [2, 5, 10, 25]   # Rayon de recherche de chaque tour du dispatch
+NB_LIVREURS_CIBLES = 5       # Nouveaux livreurs sollicités par tour
+DUREE_VIE_OFFRE_S = 300      # Les offres oubliées (manager arrêté) sont supprimées par l'index TTL sur 'date'
+
+
+def point(position):
+    """Point GeoJSON d'une position (longitude, latitude)."""
+    return {"type": "Point", "coordinates": [position[0], position[1]]}
+
+
+def preparer_dispatch(db):
+    """Index 2dsphere des positions des livreurs, index des offres par commande et expiration (TTL) des offres."""
+    db.livreurs.create_index([("position", GEOSPHERE), ("disponible", ASCENDING)])
+    db.offres.create_index([("commande_id", ASCENDING)])
+    db.offres.create_index([("date", ASCENDING)], expireAfterSeconds=DUREE_VIE_OFFRE_S)
+
+
+def positionner_livreur(db, livreur_id, position):
+    """Marque un livreur disponible à 'position' (prise de service, fin de livraison)."""
+    if position is not None:
+        db.livreurs.update_one({"id_livreur": livreur_id},
+                               {"$set": {"position": point(position), "disponible": True}})
+
+
+def retirer_livreur(db, livreur_id):
+    """Le livreur n'est plus sollicité (course acceptée, fin de service)."""
+    db.livreurs.update_one({"id_livreur": livreur_id}, {"$set": {"disponible": False}})
+
+
+def livreurs_proches(db, position, rayon_km, nombre=NB_LIVREURS_CIBLES, exclus=()):
+    """Identifiants des 'nombre' livreurs disponibles les plus proches de 'position' (du plus proche au plus loin)."""
+    filtre = {
+        "position": {"$nearSphere": {"$geometry": point(position), "$maxDistance": rayon_km * 1000}},
+        "disponible": True,
+    }
+    if exclus:
+        filtre["id_livreur"] = {"$nin": list(exclus)}
+    return [doc["id_livreur"] for doc in db.livreurs.find(filtre, {"id_livreur": 1, "_id": 0}).limit(nombre)]
+
+
+def livreurs_candidats(db, positions, rayon_km, nombre):
+    """Les 'nombre' livreurs disponibles les plus proches de chaque position : {livreur_id: (longitude, latitude)}."""
+    candidats = {}
+    for position in positions:
+        filtre = {
+            "position": {"$nearSphere": {"$geometry": point(position), "$maxDistance": rayon_km * 1000}},
+            "disponible": True,
+        }
+        for doc in db.livreurs.find(filtre, {"id_livreur": 1, "position": 1, "_id": 0}).limit(nombre):
+            candidats[doc["id_livreur"]] = tuple(doc["position"]["coordinates"])
+    return candidats
+
+
+def envoyer_offres(db, offre, livreur_ids):
+    """Une offre par destinataire ; [None] l'adresse à tous les livreurs."""
+    date = datetime.now(timezone.utc)  # Date BSON : l'index TTL ignore les chaînes
+    db.offres.insert_many([{"commande_id": offre["commande_id"], "livreur_id": livreur_id, "offre": offre,
+                            "date": date} for livreur_id in livreur_ids], ordered=False)
+
+
+def supprimer_offres(db, commande_id):
+    """Retire les offres d'une commande prise ou annulée (les livreurs ne suivent que les insertions)."""
+    db.offres.delete_many({"commande_id": commande_id})
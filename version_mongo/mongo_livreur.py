@@ -1,8 +1,17 @@
+import os
+import sys
 import threading
 import time
 import random
 from pymongo import MongoClient, ReturnDocument
 
+import mongo_geo
+
+# geocodage.py (à la racine) est partagé avec la version Redis
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geocodage import distance_km, geocoder  # noqa: E402
+import tournees  # noqa: E402
+
 # Connexion
 try:
     client = MongoClient("mongodb://localhost:27017/?replicaSet=rs0")
@@ -12,27 +21,69 @@ except Exception:
     exit()
 
 LIVREUR_ID = None
-mission_en_cours = False
-bid_en_attente = None # ID de la commande sur laquelle on mise
+SECONDES_PAR_KM = None # Durée simulée d'un km de trajet (None : durées fixes ci-dessous)
 
-def accepter_mission(commande_doc):
-    """Logique d'acceptation de la mission."""
-    global mission_en_cours, bid_en_attente
-    
+def accepter_offre(offre):
+    """Demande au livreur s'il accepte l'offre (remplaçable, ex: par le simulateur)."""
+    return input("Accepter cette mission ? (oui/non): ").lower() == 'oui'
+
+def duree_recuperation():
+    """Temps simulé (s) pour récupérer la commande au restaurant."""
+    return random.randint(3, 6)
+
+def duree_trajet():
+    """Temps simulé (s) du trajet jusqu'au client."""
+    return random.randint(8, 15)
+
+def position_initiale(livreur_id):
+    """Dernière position connue du livreur, sinon un point de Paris propre à chaque livreur."""
+    livreur = db.livreurs.find_one({"id_livreur": livreur_id}, {"position": 1}) or {}
+    if "position" in livreur:
+        return tuple(livreur["position"]["coordinates"])
+    return geocoder(f"{livreur_id}, Paris")
+
+def duree_arret(arret, depuis):
+    """
+    Temps simulé (s) pour rejoindre un arrêt de la tournée depuis la position 'depuis'.
+    Sans SECONDES_PAR_KM (ou sans positions), une récupération prend duree_recuperation()
+    et une livraison duree_trajet() ; sinon le trajet dépend de la distance, et une
+    récupération y ajoute duree_recuperation() (passage au comptoir).
+    """
+    if SECONDES_PAR_KM is None or depuis is None or arret.get("position") is None:
+        return duree_recuperation() if arret["type"] == "recuperation" else duree_trajet()
+    deplacement = distance_km(depuis, arret["position"]) * SECONDES_PAR_KM
+    return deplacement + (duree_recuperation() if arret["type"] == "recuperation" else 0)
+
+def mettre_a_jour_disponibilite(livreur_id, etat):
+    """Le livreur est sollicité tant qu'il lui reste de la place et qu'aucune enchère n'est en cours."""
+    with etat["condition"]:
+        if etat["bid_en_attente"] is None and etat["charge"] < etat["capacite"]:
+            mongo_geo.positionner_livreur(db, livreur_id, etat["position"])
+        else:
+            mongo_geo.retirer_livreur(db, livreur_id)
+
+def accepter_mission(commande_doc, livreur_id, etat):
+    """
+    Logique d'acceptation de la mission. 'etat' contient la capacité du livreur, sa
+    charge (commandes prises, non livrées), sa file d'arrêts et 'bid_en_attente' (ID
+    de la commande sur laquelle on mise). Une tournée se prend d'un bloc : sa première
+    commande est réclamée, les autres suivent.
+    """
     commande_id = commande_doc['commande_id']
     offre = commande_doc['offre_livraison']
+    commandes = tournees.commandes_offre(offre)
     
     print("\n" + "="*30)
     print(f"[LIVREUR] Nouvelle offre de livraison !")
     print(f"  ID Commande: {commande_id}")
+    if len(commandes) > 1:
+        print(f"  Tournée: {len(commandes)} commandes ({', '.join(commandes)})")
     print(f"  De: {offre.get('restaurant_adresse', 'N/A')}")
     print(f"  À: {offre.get('client_adresse', 'N/A')}")
     print(f"  Rétribution: {offre.get('retribution', 'N/A')}")
     
-    reponse = input("Accepter cette mission ? (oui/non): ").lower()
-    
-    if reponse == 'oui':
-        bid_en_attente = commande_id
+    if accepter_offre(offre):
+        etat["bid_en_attente"] = commande_id
         
         # --- Remplacement de SETNX ---
         try:
@@ -44,7 +95,7 @@ def accepter_mission(commande_doc):
                 {
                     "$set": {
                         "statut": "assigned_delivering",
-                        "id_livreur": LIVREUR_ID
+                        "id_livreur": livreur_id
                     }
                 },
                 return_document=ReturnDocument.AFTER 
@@ -52,78 +103,121 @@ def accepter_mission(commande_doc):
             
             if resultat:
                 # --- SUCCÈS ! ON A EU LA COURSE ---
-                mission_en_cours = True
-                bid_en_attente = None
+                if len(commandes) > 1: # Le reste de la tournée n'est proposé qu'avec sa première commande
+                    db.commandes.update_many(
+                        {"commande_id": {"$in": commandes[1:]}, "statut": "offre_disponible"},
+                        {"$set": {"statut": "assigned_delivering", "id_livreur": livreur_id}}
+                    )
                 print(f"\n[LIVREUR] Mission {commande_id} confirmée pour moi !")
                 
                 # --- NOUVEAU SUIVI ÉTAPE 1 : ASSIGNÉ ---
-                db.notifications.insert_one({
-                    "type": "LIVREUR_ASSIGNE", "commande_id": commande_id,
-                    "livreur_id": LIVREUR_ID, "message": f"Le livreur {LIVREUR_ID} a accepté votre commande."
-                })
+                db.notifications.insert_many([{
+                    "type": "LIVREUR_ASSIGNE", "commande_id": cid,
+                    "livreur_id": livreur_id, "message": f"Le livreur {livreur_id} a accepté votre commande."
+                } for cid in commandes])
                 
-                # Simuler la récupération
-                print("[LIVREUR] Récupération de la commande...")
-                time.sleep(random.randint(3, 6))
-                
-                # --- NOUVEAU SUIVI ÉTAPE 2 : RÉCUPÉRÉ ---
-                print("[LIVREUR] Commande récupérée au restaurant.")
-                db.notifications.insert_one({
-                    "type": "COMMANDE_RECUPEREE", "commande_id": commande_id,
-                    "message": "Votre commande a été récupérée au restaurant."
-                })
-
-                # Simuler la livraison
-                print("[LIVREUR] En route vers l'adresse du client...")
-                time.sleep(random.randint(8, 15))
-                
-                # Mettre à jour le statut final
-                db.commandes.update_one(
-                    {"commande_id": commande_id},
-                    {"$set": {"statut": "livree"}}
-                )
-                print(f"✅ [LIVREUR] Commande {commande_id} livrée !")
-                
-                # --- NOUVEAU SUIVI ÉTAPE 3 : LIVRÉ ---
-                db.notifications.insert_one({
-                    "type": "COMMANDE_LIVREE",
-                    "commande_id": commande_id,
-                    "message": f"Votre commande {commande_id} a été livrée. Bon appétit !"
-                })
-                
-                mission_en_cours = False
-                print(f"\n🚲 Livreur {LIVREUR_ID} de nouveau disponible.")
+                # Les arrêts de l'offre rejoignent la file de la tournée en cours
+                with etat["condition"]:
+                    etat["arrets"] = tournees.ajouter_arrets(etat["arrets"], tournees.arrets_offre(offre), etat["position"])
+                    etat["charge"] += len(commandes)
+                    etat["bid_en_attente"] = None
+                    etat["condition"].notify()
                 
             else:
                 # --- ECHEC ! TROP TARD ---
                 print("[LIVREUR] Trop tard ! Un autre livreur a déjà pris cette mission.")
-                bid_en_attente = None
+                etat["bid_en_attente"] = None
         
         except Exception as e:
             print(f"Erreur lors de l'acceptation : {e}")
-            bid_en_attente = None
+            etat["bid_en_attente"] = None
+        mettre_a_jour_disponibilite(livreur_id, etat)
     else:
         print("[LIVREUR] Offre refusée.")
 
+def effectuer_tournee(livreur_id, etat):
+    """Thread de la tournée : parcourt la file d'arrêts (récupérations au restaurant, livraisons aux clients)."""
+    precedent = None
+    while True:
+        with etat["condition"]:
+            while not etat["arrets"]:
+                etat["condition"].wait()
+            arret = etat["arrets"].pop(0)
+        commande_id = arret["commande_id"]
+        if arret["type"] == "recuperation":
+            # Simuler la récupération (commandes du même restaurant : récupérées ensemble)
+            print(f"[LIVREUR] Récupération de la commande {commande_id}...")
+            meme_restaurant = (precedent is not None and precedent["type"] == "recuperation"
+                               and arret.get("position") is not None
+                               and precedent.get("position") == arret.get("position"))
+            if not meme_restaurant:
+                time.sleep(duree_arret(arret, etat["position"]))
+            
+            # --- NOUVEAU SUIVI ÉTAPE 2 : RÉCUPÉRÉ ---
+            print("[LIVREUR] Commande récupérée au restaurant.")
+            db.notifications.insert_one({
+                "type": "COMMANDE_RECUPEREE", "commande_id": commande_id,
+                "message": "Votre commande a été récupérée au restaurant."
+            })
+        else:
+            # Simuler la livraison
+            print(f"[LIVREUR] En route vers le client de {commande_id}...")
+            time.sleep(duree_arret(arret, etat["position"]))
+            
+            # Mettre à jour le statut final
+            db.commandes.update_one(
+                {"commande_id": commande_id},
+                {"$set": {"statut": "livree"}}
+            )
+            print(f"✅ [LIVREUR] Commande {commande_id} livrée !")
+            
+            # --- NOUVEAU SUIVI ÉTAPE 3 : LIVRÉ ---
+            db.notifications.insert_one({
+                "type": "COMMANDE_LIVREE",
+                "commande_id": commande_id,
+                "message": f"Votre commande {commande_id} a été livrée. Bon appétit !"
+            })
+        precedent = arret
+        with etat["condition"]:
+            etat["position"] = arret.get("position") or etat["position"] # Au restaurant ou chez le client
+            if arret["type"] == "livraison":
+                etat["charge"] -= 1
+        if arret["type"] == "livraison":
+            mettre_a_jour_disponibilite(livreur_id, etat) # Une place de plus : de nouveau sollicité ici
+            if not etat["charge"]:
+                print(f"\n🚲 Livreur {livreur_id} de nouveau disponible.")
+
 
-def ecouteur_livreur():
-    """Surveille les nouvelles offres de livraison."""
-    global mission_en_cours, bid_en_attente
+def ecouteur_livreur(livreur_id=None):
+    """
+    Surveille les offres de livraison qui lui sont adressées (dispatch géographique)
+    ou adressées à tous. Tant qu'il lui reste de la place (voir tournees.py), il est
+    trouvé par sa position (voir mongo_geo.py) ; un second thread parcourt sa tournée.
+    """
+    livreur_id = livreur_id or LIVREUR_ID
+    # État propre à chaque livreur (plusieurs livreurs peuvent tourner dans un même processus)
+    livreur = db.livreurs.find_one({"id_livreur": livreur_id}, {"capacite": 1}) or {}
+    etat = {"capacite": int(livreur.get("capacite") or tournees.CAPACITE_LIVREUR), "charge": 0, "arrets": [],
+            "bid_en_attente": None, "position": position_initiale(livreur_id), "condition": threading.Condition()}
+    mongo_geo.positionner_livreur(db, livreur_id, etat["position"])
+    threading.Thread(target=effectuer_tournee, args=(livreur_id, etat), daemon=True).start()
     
-    # On surveille les mises à jour qui changent le statut en 'offre_disponible'
+    # Le serveur ne transmet que les offres de ce livreur (ou pour tous : livreur_id null)
     pipeline = [{
         '$match': {
-            'operationType': 'update',
-            'updateDescription.updatedFields.statut': 'offre_disponible'
+            'operationType': 'insert',
+            'fullDocument.livreur_id': {'$in': [livreur_id, None]}
         }
     }]
     
     try:
-        with db.commandes.watch(pipeline, full_document='updateLookup') as stream:
+        with db.offres.watch(pipeline) as stream:
             for change in stream:
-                if not mission_en_cours and not bid_en_attente:
-                    commande = change['fullDocument']
-                    threading.Thread(target=accepter_mission, args=(commande,)).start()
+                offre = change['fullDocument']
+                place = etat["capacite"] - etat["charge"]
+                if not etat["bid_en_attente"] and len(tournees.commandes_offre(offre["offre"])) <= place:
+                    commande = {"commande_id": offre["commande_id"], "offre_livraison": offre["offre"]}
+                    threading.Thread(target=accepter_mission, args=(commande, livreur_id, etat)).start()
                 else:
                     print("[LIVREUR] Nouvelle offre reçue, mais je suis occupé. On ignore.")
                     
@@ -149,6 +243,7 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        mongo_geo.retirer_livreur(db, LIVREUR_ID) # Plus d'offres pour un livreur hors service
         print(f"\n👋 Fin de service pour le livreur {LIVREUR_ID}.")
     finally:
         client.close()
\ No newline at end of file
@@ -1,8 +1,19 @@
+import os
+import sys
 import threading
 import time
 from datetime import datetime
 from pymongo import MongoClient
 
+import mongo_geo
+
+# geocodage.py (à la racine) est partagé avec la version Redis
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geocodage import geocoder  # noqa: E402
+import tournees  # noqa: E402
+if mongo_geo.DISPATCH_LOTS: # NumPy n'est requis que pour le dispatch par lots
+    from affectation import FENETRE_LOT_S, NB_CANDIDATS_LOT, affecter_lot  # noqa: E402
+
 # Connexion
 try:
     client = MongoClient("mongodb://localhost:27017/?replicaSet=rs0")
@@ -11,27 +22,163 @@ except Exception:
     print("❌ ERREUR: Connexion à MongoDB échouée.")
     exit()
 
-def demarrer_timer_livraison(commande_id):
-    """Démarre un minuteur de 60s pour trouver un livreur."""
+DELAI_TIMEOUT_LIVREUR = 60 # Délai (s) laissé aux livreurs pour accepter une offre (réparti entre les tours du dispatch)
+lot_commandes = [] # (commande_id, offre, prête depuis) en attente du prochain lot (dispatch par lots, tournées groupées)
+verrou_lot = threading.Lock()
+
+def offre_toujours_disponible(commande_id):
+    return db.commandes.count_documents({"commande_id": commande_id, "statut": "offre_disponible"}, limit=1) > 0
+
+def proposer_offre(commande_id, offre, livreur_choisi=None):
+    """
+    Propose l'offre (voir mongo_geo.py) aux livreurs disponibles les plus proches du
+    restaurant, en élargissant le rayon à chaque tour sans preneur (tout de suite tant
+    que personne n'a reçu l'offre), sinon à tous les livreurs. Renvoie le temps (s)
+    laissé aux livreurs après le dernier envoi, avant l'annulation de la commande.
+    'livreur_choisi' (dispatch par lots) reçoit seul l'offre au premier tour.
+    """
+    position = offre.get("position_restaurant")
+    if mongo_geo.DISPATCH_GEO and position is not None:
+        delai_tour = DELAI_TIMEOUT_LIVREUR / len(mongo_geo.RAYONS_KM)
+        sollicites, rayons = [], mongo_geo.RAYONS_KM
+        if livreur_choisi is not None:
+            mongo_geo.envoyer_offres(db, offre, [livreur_choisi])
+            sollicites, rayons = [livreur_choisi], rayons[1:]
+            time.sleep(delai_tour)
+            if not offre_toujours_disponible(commande_id):
+                return 0
+        for rayon in rayons:
+            cibles = mongo_geo.livreurs_proches(db, position, rayon, exclus=sollicites)
+            if cibles:
+                mongo_geo.envoyer_offres(db, offre, cibles)
+                sollicites.extend(cibles)
+                print(f"[MANAGER] {commande_id} proposée à {len(cibles)} livreur(s) à moins de {rayon} km.")
+            if sollicites and rayon != mongo_geo.RAYONS_KM[-1]:
+                time.sleep(delai_tour) # On laisse aux livreurs sollicités le temps de répondre
+                if not offre_toujours_disponible(commande_id):
+                    return 0 # Prise par un livreur (ou annulée)
+        if sollicites:
+            return delai_tour
+        print(f"[MANAGER] Aucun livreur disponible à moins de {mongo_geo.RAYONS_KM[-1]} km : offre diffusée à tous.")
+    mongo_geo.envoyer_offres(db, offre, [None])
+    return DELAI_TIMEOUT_LIVREUR
+
+def demarrer_timer_livraison(commande_id, offre, livreur_choisi=None):
+    """Envoie l'offre par tours puis, sans preneur, annule la commande."""
     def verifier_timeout():
-        time.sleep(60)
+        time.sleep(proposer_offre(commande_id, offre, livreur_choisi))
         
         # Utiliser find_one_and_update pour être atomique
         commande_annulee = db.commandes.find_one_and_update(
             {"commande_id": commande_id, "statut": "offre_disponible"}, # Ne s'applique que si elle est tjs en offre
             {"$set": {"statut": "annulee_timeout"}}
         )
+        mongo_geo.supprimer_offres(db, commande_id) # Prise ou annulée : l'offre n'a plus de destinataire
         
         if commande_annulee: # Si on a bien annulé la commande
             print(f"\n[MANAGER] TIMEOUT: Aucun livreur n'a accepté {commande_id} à temps.")
-            db.notifications.insert_one({
+            # Les autres commandes de la tournée sont annulées avec la première
+            autres = tournees.commandes_offre(offre)[1:]
+            if autres:
+                db.commandes.update_many({"commande_id": {"$in": autres}, "statut": "offre_disponible"},
+                                         {"$set": {"statut": "annulee_timeout"}})
+            db.notifications.insert_many([{
                 "type": "AUCUN_LIVREUR", 
-                "commande_id": commande_id, 
+                "commande_id": cid, 
                 "message": "Désolé, aucun livreur n'est disponible. Commande annulée."
-            })
+            } for cid in [commande_id] + autres])
             
     threading.Thread(target=verifier_timeout, daemon=True).start()
 
+def affecter_commandes_pretes(lot, traitees):
+    """
+    Dispatch par lots (voir affectation.py) : attribue ensemble les commandes prêtes
+    [(commande_id, offre, prête depuis)] aux livreurs disponibles proches de leurs
+    restaurants. Chaque livreur retenu reçoit seul l'offre de sa commande pendant un
+    tour ; les commandes sans livreur attribué passent par le dispatch géographique.
+    Les commandes dont le minuteur est démarré (avec celles de leur tournée) sont
+    ajoutées à 'traitees' au fur et à mesure.
+    """
+    positions = [offre["position_restaurant"] for _, offre, _ in lot]
+    candidats = mongo_geo.livreurs_candidats(db, positions, mongo_geo.RAYONS_KM[-1], NB_CANDIDATS_LOT)
+    livreur_ids = list(candidats)
+
+    debut, maintenant = time.perf_counter(), time.time()
+    affectations = affecter_lot([candidats[livreur_id] for livreur_id in livreur_ids], positions,
+                                [maintenant - prete_depuis for _, _, prete_depuis in lot])
+    duree_ms = (time.perf_counter() - debut) * 1000
+    print(f"[MANAGER] Lot de {len(lot)} commande(s) et {len(livreur_ids)} livreur(s) : {len(affectations)} affectée(s) "
+          f"en {duree_ms:.1f} ms, {sum(d for _, _, d in affectations):.1f} km au total.")
+
+    livreur_de = {j: livreur_ids[i] for i, j, _ in affectations}
+    for j, (commande_id, offre, _) in enumerate(lot):
+        demarrer_timer_livraison(commande_id, offre, livreur_de.get(j))
+        traitees.update(tournees.commandes_offre(offre))
+
+def regrouper_lot(lot):
+    """
+    Tournées groupées (voir tournees.py) : regroupe les commandes prêtes du lot. La
+    première commande de chaque tournée porte l'offre de toute la tournée ; les autres
+    restent 'offre_disponible' sans être proposées seules.
+    """
+    prete_depuis = {offre["commande_id"]: depuis for _, offre, depuis in lot}
+    regroupe = []
+    for groupe, arrets in tournees.grouper([offre for _, offre, _ in lot]):
+        offre = tournees.offre_tournee(groupe, arrets)
+        if len(groupe) > 1:
+            db.commandes.update_one({"commande_id": offre["commande_id"]}, {"$set": {"offre_livraison": offre}})
+            print(f"[MANAGER] Tournée de {len(groupe)} commandes ({tournees.longueur(arrets):.1f} km) : "
+                  f"{', '.join(tournees.commandes_offre(offre))}.")
+        regroupe.append((offre["commande_id"], offre, prete_depuis[offre["commande_id"]]))
+    return regroupe
+
+def collecte_par_lots():
+    """Les commandes prêtes attendent-elles le prochain lot (dispatch par lots ou tournées groupées) ?"""
+    return mongo_geo.DISPATCH_LOTS or tournees.CAPACITE_LIVREUR > 1
+
+def traiter_lot(lot):
+    """
+    Regroupe en tournées les commandes prêtes du lot, puis les attribue ensemble ou les
+    propose une à une. Si le lot échoue (solveur, MongoDB...), chaque commande qui n'a
+    pas encore son minuteur (seule ou dans sa tournée) est proposée seule ; celles qui
+    échouent encore reviennent dans le lot suivant.
+    """
+    traitees = set()
+    try:
+        a_proposer = regrouper_lot(lot) if tournees.CAPACITE_LIVREUR > 1 else lot
+        if mongo_geo.DISPATCH_LOTS:
+            affecter_commandes_pretes(a_proposer, traitees)
+        else:
+            for commande_id, offre, _ in a_proposer:
+                demarrer_timer_livraison(commande_id, offre)
+                traitees.update(tournees.commandes_offre(offre))
+        return
+    except Exception as e:
+        print(f"[MANAGER] Erreur du dispatch par lots : {e}. Commandes restantes proposées une à une.")
+    for commande_id, offre, prete_depuis in lot:
+        if commande_id in traitees:
+            continue # Son minuteur tourne déjà : un second enverrait l'offre deux fois
+        try:
+            demarrer_timer_livraison(commande_id, offre)
+        except Exception as e:
+            print(f"[MANAGER] Offre de {commande_id} impossible ({e}) : reportée au lot suivant.")
+            with verrou_lot:
+                lot_commandes.append((commande_id, offre, prete_depuis))
+
+def dispatcher_lots():
+    """Thread des lots : à chaque fenêtre, traite les commandes prêtes entre-temps."""
+    while True:
+        time.sleep(FENETRE_LOT_S if mongo_geo.DISPATCH_LOTS else tournees.FENETRE_REGROUPEMENT_S)
+        with verrou_lot:
+            lot = lot_commandes[:]
+            lot_commandes.clear()
+        if lot:
+            traiter_lot(lot)
+
+def demander_decision(commande_id):
+    """Demande au manager s'il accepte la commande (remplaçable, ex: par le simulateur)."""
+    return input(f"Accepter la commande {commande_id} ? (oui/non): ").lower()
+
 def moderer_commande(commande_doc):
     """Affiche la commande et demande la modération."""
     commande_id = commande_doc['commande_id']
@@ -46,7 +193,7 @@ def moderer_commande(commande_doc):
         print(f"    - {item.get('quantite')}x {item.get('nom')} ({item.get('id_plat')})")
     print("="*30)
     
-    decision = input(f"Accepter la commande {commande_id} ? (oui/non): ").lower()
+    decision = demander_decision(commande_id)
     
     if decision == 'oui':
         db.commandes.update_one(
@@ -106,14 +253,20 @@ def ecouteur_commandes_pretes():
                     "commande_id": commande_id,
                     "restaurant_adresse": adresse_resto,
                     "client_adresse": commande_doc.get('adresse_client', 'N/A'),
+                    "position_restaurant": geocoder(adresse_resto),
+                    "position_client": geocoder(commande_doc.get('adresse_client')),
                     "retribution": "8€" # Exemple
                 }
-                # Mettre à jour la commande avec l'offre (ce que le livreur écoutera)
+                # La commande porte l'offre ; les livreurs la reçoivent par la collection 'offres'
                 db.commandes.update_one(
                     {"commande_id": commande_id},
                     {"$set": {"statut": "offre_disponible", "offre_livraison": offre}}
                 )
-                demarrer_timer_livraison(commande_id)
+                if collecte_par_lots() and offre["position_restaurant"] is not None:
+                    with verrou_lot:
+                        lot_commandes.append((commande_id, offre, time.time())) # Attribuée au prochain lot
+                else:
+                    demarrer_timer_livraison(commande_id, offre)
     except Exception as e:
         print(f"[Écouteur PRÊT] Erreur : {e}")
 
@@ -171,11 +324,9 @@ def afficher_historique():
         print("Aucune commande dans l'historique.")
     print("="*50)
 
-if __name__ == "__main__":
-    print("🤖 Manager en ligne. Surveillance des commandes en cours...")
-    print("Tapez 'historique' pour voir les commandes passées, 'quitter' pour arrêter.")
-    
-    # Démarrer les TROIS écouteurs dans des threads
+def demarrer_manager():
+    """Démarre les TROIS écouteurs du manager dans des threads."""
+    mongo_geo.preparer_dispatch(db) # Index 2dsphere des livreurs (recherche des plus proches)
     t_nouveau = threading.Thread(target=ecouteur_nouvelles_commandes, daemon=True)
     t_pretes = threading.Thread(target=ecouteur_commandes_pretes, daemon=True)
     t_livrees = threading.Thread(target=ecouteur_commandes_livrees, daemon=True) # Nouveau thread
@@ -183,6 +334,14 @@ if __name__ == "__main__":
     t_nouveau.start()
     t_pretes.start()
     t_livrees.start()
+    if collecte_par_lots():
+        threading.Thread(target=dispatcher_lots, daemon=True).start()
+
+if __name__ == "__main__":
+    print("🤖 Manager en ligne. Surveillance des commandes en cours...")
+    print("Tapez 'historique' pour voir les commandes passées, 'quitter' pour arrêter.")
+    
+    demarrer_manager()
     
     try:
         while True:
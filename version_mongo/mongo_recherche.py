@@ -0,0 +1,75 @@
+import os
+import sys
+
+from pymongo import ASCENDING, UpdateOne
+
+# normalisation.py (à la racine) est partagé avec la version Redis et les scripts d'import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from normalisation import normaliser_nom  # noqa: E402
+
+# --- Recherche de restaurants par nom ---
+# Un $regex avec l'option "i" ne peut pas utiliser l'index sur 'nom' : chaque recherche
+# parcourait toute la collection. Chaque restaurant porte donc un champ 'nom_normalise'
+# (minuscules, sans accents, écrit par json_to_mongo.py et synchro_catalogue.py) indexé :
+# le nom exact est une égalité et un préfixe un intervalle [prefixe, borne) parcourus
+# dans l'index (IXSCAN), avec une limite. La saisie n'est plus interprétée comme une regex.
+CHAMP_NORMALISE = "nom_normalise"
+LIMITE_RESULTATS = 10
+TAILLE_LOT = 1000  # Documents mis à jour par bulk_write lors du remplissage du champ
+
+
+def filtre_prefixe(prefixe):
+    """
+    Intervalle des noms normalisés commençant par 'prefixe'. MongoDB compare les chaînes
+    octet par octet (UTF-8, donc dans l'ordre des points de code) : la borne haute est le
+    préfixe dont le dernier caractère est incrémenté ("piz" -> "pi{").
+    """
+    normalise = normaliser_nom(prefixe)
+    if not normalise:
+        return {}
+    normalise += " " if prefixe[-1:].isspace() else ""  # "pizza " ne doit pas trouver "pizzeria"
+    return {CHAMP_NORMALISE: {"$gte": normalise, "$lt": normalise[:-1] + chr(ord(normalise[-1]) + 1)}}
+
+
+def rechercher_nom_exact(db, nom):
+    """Premier restaurant dont le nom normalisé est celui de 'nom', ou None."""
+    return db.restaurants.find_one({CHAMP_NORMALISE: normaliser_nom(nom)}, {"menu": 0})
+
+
+def curseur_prefixe(db, prefixe, limite=LIMITE_RESULTATS):
+    return (db.restaurants.find(filtre_prefixe(prefixe), {"nom": 1, "id_restaurant": 1, "_id": 0})
+            .sort(CHAMP_NORMALISE, ASCENDING).limit(limite))
+
+
+def rechercher_par_prefixe(db, prefixe, limite=LIMITE_RESULTATS):
+    """Au plus 'limite' restaurants dont le nom normalisé commence par 'prefixe', dans l'ordre des noms."""
+    return list(curseur_prefixe(db, prefixe, limite))
+
+
+def etapes_plan(curseur):
+    """Étapes du plan gagnant d'une requête (explain), de la racine à la feuille : ['LIMIT', 'FETCH', 'IXSCAN']."""
+    etapes = []
+    plan = curseur.explain()["queryPlanner"]["winningPlan"]
+    while plan:
+        plan = plan.get("queryPlan", plan)  # Moteur SBE (MongoDB 7+) : plan classique dans 'queryPlan'
+        etapes.append(plan["stage"])
+        plan = plan.get("inputStage")
+    return etapes
+
+
+def preparer_recherche(db):
+    """
+    Crée l'index sur 'nom_normalise' et remplit le champ des restaurants qui ne l'ont pas
+    encore (base importée avant son introduction). Renvoie le nombre de restaurants complétés.
+    """
+    db.restaurants.create_index([(CHAMP_NORMALISE, ASCENDING)])
+    operations, total = [], 0
+    for resto in db.restaurants.find({CHAMP_NORMALISE: {"$exists": False}}, {"nom": 1}):
+        operations.append(UpdateOne({"_id": resto["_id"]},
+                                    {"$set": {CHAMP_NORMALISE: normaliser_nom(resto.get("nom", ""))}}))
+        if len(operations) >= TAILLE_LOT:
+            total += db.restaurants.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        total += db.restaurants.bulk_write(operations, ordered=False).modified_count
+    return total
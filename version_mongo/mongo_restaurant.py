@@ -13,14 +13,19 @@ except Exception:
 
 RESTAURANT_ID = None
 
-def ecouteur_restaurant():
+def duree_preparation():
+    """Temps de préparation simulé en secondes (remplaçable, ex: par le simulateur)."""
+    return random.randint(5, 12)
+
+def ecouteur_restaurant(restaurant_id=None):
     """Surveille les commandes assignées à CE restaurant."""
+    restaurant_id = restaurant_id or RESTAURANT_ID
     
     pipeline = [{
         '$match': {
             'operationType': 'update',
             'updateDescription.updatedFields.statut': 'accepted_en_preparation',
-            'fullDocument.restaurant_id': RESTAURANT_ID
+            'fullDocument.restaurant_id': restaurant_id
         }
     }]
     
@@ -36,7 +41,7 @@ def ecouteur_restaurant():
                 for item in commande.get('plats_details', []):
                     print(f"    - {item.get('quantite')}x {item.get('nom')}")
 
-                temps_preparation = random.randint(5, 12)
+                temps_preparation = duree_preparation()
                 print(f"[RESTAURANT] Préparation en cours... ({temps_preparation} secondes)")
                 time.sleep(temps_preparation)
                 
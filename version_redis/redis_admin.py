@@ -1,6 +1,9 @@
 import redis
 import json
 
+from redis_index import (INDEX_RESTAURANTS, VERSION_CATALOGUE, AUTOCOMPLETION_RESTAURANTS,
+                         indexer_nom_restaurant, retirer_nom_restaurant, membre_autocompletion)
+
 # Connexion à la base de données Redis
 try:
     r = redis.Redis(decode_responses=True)
@@ -69,7 +72,7 @@ def creer_restaurant():
     print("\n--- Création d'un nouveau restaurant ---")
     rest_id = input("Nouvel ID (ex: rest_99): ")
     key = f"restaurant:{rest_id}"
-    key_index = "restaurants:ids" # Clé de l'index
+    key_index = INDEX_RESTAURANTS # Clé de l'index
     
     if r.exists(key):
         print(f"❌ ERREUR: L'ID '{rest_id}' existe déjà.")
@@ -82,12 +85,17 @@ def creer_restaurant():
     pipe = r.pipeline()
     pipe.hset(key, mapping={"nom": nom, "adresse": adresse})
     pipe.sadd(key_index, rest_id) # Ajouter au Set d'index
+    indexer_nom_restaurant(pipe, rest_id, nom) # Visible tout de suite dans l'autocomplétion des clients
+    pipe.incr(VERSION_CATALOGUE) # Invalide le snapshot du catalogue des clients
     pipe.execute()
     
     print(f"✅ Restaurant '{nom}' créé avec succès !")
     print(f"Commandes Redis utilisées (dans un pipeline) :")
     print(f"1. HSET {key} nom \"{nom}\" adresse \"{adresse}\"")
     print(f"2. SADD {key_index} {rest_id}")
+    print(f"3. EVALSHA : ZADD {AUTOCOMPLETION_RESTAURANTS} 0 {membre_autocompletion(nom, rest_id)!r} "
+          f"et classement dans les suggestions de ses préfixes")
+    print(f"4. INCR {VERSION_CATALOGUE}")
 
 
 def ajouter_plat():
@@ -130,16 +138,24 @@ def ajouter_plat():
 def incrementer_popularite():
     rest_id = input("Entrez l'ID du restaurant à populariser (ex: rest_01): ")
     key = f"restaurant:{rest_id}:popularite"
+    nom = r.hget(f"restaurant:{rest_id}", "nom")
     
-    nouvelle_valeur = r.incr(key)
+    pipe = r.pipeline()
+    pipe.incr(key)
+    if nom is not None:
+        indexer_nom_restaurant(pipe, rest_id, nom) # Reclassé dans les suggestions (lues dans Redis par les clients)
+    nouvelle_valeur = pipe.execute()[0]
     print(f"✅ Le compteur de popularité pour {rest_id} est maintenant de {nouvelle_valeur}.")
-    print(f"Commande Redis utilisée : INCR {key}")
+    print(f"Commandes Redis utilisées (dans un pipeline) :")
+    print(f"1. INCR {key}")
+    if nom is not None:
+        print(f"2. EVALSHA : classement de {membre_autocompletion(nom, rest_id)!r} dans les suggestions de ses préfixes")
 
 def supprimer_restaurant():
     rest_id = input("Entrez l'ID du restaurant à SUPPRIMER (ex: rest_01): ")
     key_resto = f"restaurant:{rest_id}"
     key_menu = f"restaurant:{rest_id}:plats"
-    key_index = "restaurants:ids"
+    key_index = INDEX_RESTAURANTS
     
     if not r.exists(key_resto):
         print(f"❌ ERREUR: Le restaurant '{rest_id}' n'existe pas.")
@@ -147,14 +163,18 @@ def supprimer_restaurant():
 
     confirmation = input(f"Êtes-vous sûr de vouloir supprimer DÉFINITIVEMENT le restaurant {rest_id} et tout son menu ? (oui/non): ").lower()
     if confirmation == 'oui':
-        # Récupérer les plats AVANT de supprimer le menu
+        # Récupérer les plats et le nom AVANT de supprimer le menu
         plat_ids = r.smembers(key_menu)
+        nom = r.hget(key_resto, "nom")
         
         # Utiliser un pipeline pour tout supprimer
         pipe = r.pipeline()
         pipe.delete(key_resto)  # Supprimer le Hash du restaurant
         pipe.delete(key_menu)   # Supprimer le Set du menu
         pipe.srem(key_index, rest_id) # Retirer de l'index global
+        if nom is not None:
+            retirer_nom_restaurant(pipe, rest_id, nom) # Et de l'autocomplétion (et des suggestions)
+        pipe.incr(VERSION_CATALOGUE) # Invalide le snapshot du catalogue des clients
         
         # Supprimer aussi les Hash de chaque plat associé
         for plat_id in plat_ids:
@@ -163,7 +183,7 @@ def supprimer_restaurant():
         pipe.execute()
         
         print(f"✅ Restaurant {rest_id} et ses {len(plat_ids)} plats associés ont été supprimés.")
-        print(f"Commandes Redis utilisées : SMEMBERS, DEL, SREM (dans un pipeline)")
+        print(f"Commandes Redis utilisées : SMEMBERS, HGET, DEL, SREM, EVALSHA (retrait de l'autocomplétion) (dans un pipeline)")
     else:
         print("Suppression annulée.")
 
@@ -0,0 +1,65 @@
+import os
+import json
+
+# --- Routage des messages Pub/Sub ---
+# Par défaut, chaque acteur n'écoute que ses propres canaux :
+#   - commandes_restaurants:{rest_id}   -> commandes validées pour un restaurant
+#   - notifications:{commande_id}       -> suivi d'une commande (client, livreurs candidats)
+#   - notifications:livreur:{id}        -> missions confirmées pour un livreur
+#   - notifications:manager             -> livraisons terminées (archivage par le manager)
+# UBEREATS_CANAUX_GLOBAUX=1 rétablit les anciens canaux globaux, où chaque
+# acteur reçoit tout et filtre lui-même (compatibilité avec les anciens scripts).
+CANAUX_GLOBAUX = os.environ.get("UBEREATS_CANAUX_GLOBAUX", "0") == "1"
+
+CANAL_RESTAURANTS = "commandes_restaurants"
+CANAL_NOTIFICATIONS = "notifications"
+CANAL_NOTIFICATIONS_MANAGER = "notifications:manager"
+
+
+def canal_restaurant(rest_id):
+    """Canal sur lequel un restaurant reçoit les commandes validées."""
+    return CANAL_RESTAURANTS if CANAUX_GLOBAUX else f"{CANAL_RESTAURANTS}:{rest_id}"
+
+
+def canal_commande(commande_id):
+    """Canal des notifications d'une commande (écouté par le client)."""
+    return CANAL_NOTIFICATIONS if CANAUX_GLOBAUX else f"{CANAL_NOTIFICATIONS}:{commande_id}"
+
+
+def canal_livreur(livreur_id):
+    """Canal personnel d'un livreur (confirmation de ses missions)."""
+    return CANAL_NOTIFICATIONS if CANAUX_GLOBAUX else f"{CANAL_NOTIFICATIONS}:livreur:{livreur_id}"
+
+
+def canal_suivi_manager():
+    """Canal sur lequel le manager attend les livraisons terminées."""
+    return CANAL_NOTIFICATIONS if CANAUX_GLOBAUX else CANAL_NOTIFICATIONS_MANAGER
+
+
+def canaux_notification(notification):
+    """
+    Canaux des entités concernées par une notification : la commande, le livreur
+    assigné éventuel et, pour une livraison, le manager.
+    """
+    if CANAUX_GLOBAUX:
+        return [CANAL_NOTIFICATIONS]
+    canaux = [canal_commande(notification["commande_id"])]
+    if notification.get("type") == "LIVREUR_ASSIGNE":
+        canaux.append(canal_livreur(notification["livreur_id"]))
+    elif notification.get("type") == "COMMANDE_LIVREE":
+        canaux.append(CANAL_NOTIFICATIONS_MANAGER)
+    return canaux
+
+
+def publier_notification(r, notification):
+    """Publie une notification sur les canaux des entités concernées (voir canaux_notification)."""
+    message = json.dumps(notification)
+    canaux = canaux_notification(notification)
+    if len(canaux) == 1:
+        r.publish(canaux[0], message)
+        return
+
+    pipe = r.pipeline(transaction=False)
+    for canal in canaux:
+        pipe.publish(canal, message)
+    pipe.execute()
@@ -0,0 +1,141 @@
+import struct
+import marshal
+
+import redis
+
+from redis_index import INDEX_RESTAURANTS, VERSION_CATALOGUE, lister_ids
+from structures_recherche import RestaurantsFiges
+
+# --- Snapshot du catalogue ---
+# Au démarrage, un client lit les restaurants (un HGETALL par restaurant). Le
+# résultat est mis en cache dans Redis sous la forme d'un blob
+# binaire (catalogue:snapshot) : les restaurants rangés en colonnes, sérialisés avec
+# marshal (sans compression : la décompression coûte autant que le transfert
+# économisé). Le client le charge tel quel (structures_recherche.RestaurantsFiges),
+# sans reconstruire d'objets. Le snapshot ne contient volontairement aucun index de
+# recherche précalculé (ni arbre, ni trie) : les recherches par nom interrogent
+# l'index d'autocomplétion et les suggestions classées par popularité, partagés dans
+# Redis (voir redis_index.py), toujours à jour des ajouts et de la popularité, alors
+# qu'un index figé dans le snapshot serait périmé jusqu'à sa prochaine reconstruction.
+# Le blob porte le numéro de version du catalogue (catalogue:version, incrémenté
+# par chaque écriture sur les restaurants) : un client ne l'utilise que si la version
+# correspond, sinon il reconstruit et le remplace.
+# Le blob est découpé en parties d'au plus TAILLE_PARTIE octets (une grosse valeur
+# bloque le serveur pendant son envoi), rangées sous catalogue:snapshot:<version>:<n>.
+# La clé catalogue:snapshot ne contient que l'en-tête : on la lit avec la version en
+# un aller-retour, puis toutes les parties en un second.
+SNAPSHOT_CATALOGUE = "catalogue:snapshot"
+MAGIE = b"UECAT"
+FORMAT_SNAPSHOT = 4  # À incrémenter si le contenu du snapshot change
+ENTETE = struct.Struct(">5sHQI")  # magie, format, version du catalogue, nombre de parties
+TAILLE_PARTIE = 1024 * 1024
+TAILLE_LOT = 10_000  # Commandes par pipeline lors de la reconstruction
+DUREE_ANCIENNES_PARTIES = 60  # s : laisse finir les clients qui lisent encore l'ancien snapshot
+
+
+def cle_partie(version, numero):
+    return f"{SNAPSHOT_CATALOGUE}:{version}:{numero}"
+
+
+def lire_entete(entete):
+    """Renvoie (version, nb_parties), ou None si l'en-tête est absent ou d'un autre format."""
+    if not entete or len(entete) != ENTETE.size:
+        return None
+    magie, format_snapshot, version, nb_parties = ENTETE.unpack(entete)
+    if magie != MAGIE or format_snapshot != FORMAT_SNAPSHOT:
+        return None
+    return version, nb_parties
+
+
+def encoder_snapshot(version, restaurants):
+    """Sérialise {id: données} (restaurants valides). Renvoie (en-tête, parties)."""
+    ids = sorted(rest_id for rest_id, data in restaurants.items() if data)
+    champs = sorted({champ for rest_id in ids for champ in restaurants[rest_id]} - {"id_restaurant"})
+    colonnes = {champ: [restaurants[rest_id].get(champ) for rest_id in ids] for champ in champs}
+    blob = marshal.dumps({"ids": ids, "colonnes": colonnes})
+    parties = [blob[i:i + TAILLE_PARTIE] for i in range(0, len(blob), TAILLE_PARTIE)]
+    return ENTETE.pack(MAGIE, FORMAT_SNAPSHOT, version, len(parties)), parties
+
+
+def decoder_snapshot(parties):
+    """Renvoie les restaurants (RestaurantsFiges), ou None s'il manque une partie."""
+    if any(partie is None for partie in parties):
+        return None
+    contenu = marshal.loads(b"".join(parties))
+    return RestaurantsFiges(contenu["ids"], contenu["colonnes"])
+
+
+def ecrire_snapshot(r_binaire, version, restaurants, ancien_entete=None):
+    """Écrit les parties puis l'en-tête ; les parties d'une ancienne version expirent."""
+    entete, parties = encoder_snapshot(version, restaurants)
+    pipe = r_binaire.pipeline(transaction=False)
+    for numero, partie in enumerate(parties):
+        pipe.set(cle_partie(version, numero), partie)
+    pipe.set(SNAPSHOT_CATALOGUE, entete)
+    if ancien_entete and ancien_entete[0] != version:
+        for numero in range(ancien_entete[1]):
+            pipe.expire(cle_partie(ancien_entete[0], numero), DUREE_ANCIENNES_PARTIES)
+    pipe.execute()
+
+
+def construire_catalogue(r):
+    """Chemin sans snapshot : lit tous les restaurants."""
+    # Les IDs viennent de l'index 'restaurants:ids' (et non de KEYS, qui bloque le serveur)
+    # Triés pour un affichage ordonné
+    rest_ids = sorted(lister_ids(r, INDEX_RESTAURANTS, "restaurant"))
+    restaurants_data = {}
+
+    # Les HGETALL partent par pipelines de TAILLE_LOT commandes
+    pipe = r.pipeline(transaction=False)
+    reponses = []
+    for rest_id in rest_ids:
+        pipe.hgetall(f"restaurant:{rest_id}")
+        if len(pipe) >= TAILLE_LOT:
+            reponses.extend(pipe.execute())
+    reponses.extend(pipe.execute())
+
+    for rest_id, data in zip(rest_ids, reponses):
+        # Vérifier si data n'est pas vide et contient 'nom' avant d'insérer
+        if data and 'nom' in data:
+            # On ajoute l'ID au dictionnaire AVANT de le stocker
+            data['id_restaurant'] = rest_id
+            restaurants_data[rest_id] = data
+        else:
+            restaurants_data[rest_id] = None  # Signalé à l'affichage
+    return restaurants_data
+
+
+def connexion_binaire(r):
+    """Même serveur et même base que 'r', mais sans décodage des réponses (le snapshot est binaire)."""
+    parametres = dict(r.connection_pool.connection_kwargs, decode_responses=False)
+    return redis.Redis(connection_pool=redis.ConnectionPool(connection_class=r.connection_pool.connection_class,
+                                                            **parametres))
+
+
+def charger_catalogue(r, r_binaire=None):
+    """
+    Renvoie (restaurants, depuis_snapshot). Lit la version et l'en-tête du snapshot,
+    puis ses parties ; s'il est à jour, aucun restaurant n'est relu. Sinon le catalogue
+    est reconstruit et le snapshot remplacé pour les clients suivants.
+    """
+    r_binaire = r_binaire or connexion_binaire(r)
+    pipe = r_binaire.pipeline(transaction=False)
+    pipe.get(VERSION_CATALOGUE)
+    pipe.get(SNAPSHOT_CATALOGUE)
+    version, entete = pipe.execute()
+    version = int(version or 0)
+
+    entete = lire_entete(entete)
+    if entete and entete[0] == version:
+        pipe = r_binaire.pipeline(transaction=False)
+        for numero in range(entete[1]):
+            pipe.get(cle_partie(version, numero))
+        restaurants = decoder_snapshot(pipe.execute())
+        if restaurants is not None:
+            return restaurants, True
+
+    restaurants = construire_catalogue(r)
+    # Si le catalogue a changé pendant la construction, la version ne correspondra
+    # plus et le client suivant reconstruira le snapshot
+    ecrire_snapshot(r_binaire, version, restaurants, entete)
+    return restaurants, False
@@ -1,118 +1,28 @@
+import os
+import sys
 import redis
 import time
 import json
 import threading
 import uuid
 
-# --- Implémentation de l'Arbre Binaire de Recherche (ABR) ---
-
-class Node:
-    """Nœud de l'arbre contenant un restaurant."""
-    def __init__(self, key, data):
-        self.key = key  # La clé de tri (le nom du restaurant)
-        self.data = data  # Les données complètes du restaurant
-        self.left = None
-        self.right = None
-
-class BinarySearchTree:
-    """Structure de données de l'Arbre Binaire de Recherche."""
-    def __init__(self):
-        self.root = None
-
-    def insert(self, key, data):
-        """Méthode publique pour insérer un nouveau restaurant."""
-        if not self.root:
-            self.root = Node(key, data)
-        else:
-            self._insert_recursive(self.root, key, data)
-
-    def _insert_recursive(self, current_node, key, data):
-        """Algorithme d'insertion récursif."""
-        if key < current_node.key:
-            if current_node.left is None:
-                current_node.left = Node(key, data)
-            else:
-                self._insert_recursive(current_node.left, key, data)
-        elif key > current_node.key: # Utiliser elif pour éviter d'insérer si la clé existe déjà
-            if current_node.right is None:
-                current_node.right = Node(key, data)
-            else:
-                self._insert_recursive(current_node.right, key, data)
-        # else: La clé existe déjà, on ne fait rien (ou on pourrait mettre à jour data)
-    
-    def search(self, key):
-        """Méthode publique pour rechercher un restaurant par son nom."""
-        return self._search_recursive(self.root, key)
-
-    def _search_recursive(self, current_node, key):
-        """Algorithme de recherche récursif."""
-        if current_node is None or current_node.key == key:
-            return current_node.data if current_node else None
-        
-        if key < current_node.key:
-            return self._search_recursive(current_node.left, key)
-        else:
-            return self._search_recursive(current_node.right, key)
-
-# --- Fin de l'implémentation de l'ABR ---
-
-# --- Implémentation du Trie (Arbre Préfixe) ---
-
-class TrieNode:
-    """Nœud de l'arbre préfixe."""
-    def __init__(self):
-        self.children = {}  # Dictionnaire pour les nœuds enfants
-        self.is_end_of_word = False
-        self.data = None  # Stocker les données du restaurant à la fin du mot
-
-class Trie:
-    """Structure de données Trie pour la recherche par préfixe (autocomplétion)."""
-    def __init__(self):
-        self.root = TrieNode()
-
-    def insert(self, word, data):
-        """Insère un mot (nom du restaurant) et ses données associées dans le Trie."""
-        node = self.root
-        for char in word:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
-        node.is_end_of_word = True
-        node.data = data # Stocker l'objet restaurant complet
-
-    def find_by_prefix(self, prefix):
-        """Trouve tous les mots et données commençant par un préfixe donné."""
-        node = self.root
-        # 1. Naviguer jusqu'au nœud du préfixe
-        for char in prefix:
-            if char not in node.children:
-                return []  # Aucun mot avec ce préfixe
-            node = node.children[char]
-        
-        # 2. Le préfixe existe, collecter tous les mots descendants
-        results = []
-        self._collect_all_data(node, results)
-        return results
-
-    def _collect_all_data(self, node, results):
-        """Fonction récursive pour collecter toutes les données à partir d'un nœud."""
-        if node.is_end_of_word:
-            results.append(node.data) # Ajouter les données du restaurant
-        
-        for char, child_node in node.children.items():
-            self._collect_all_data(child_node, results)
-
-# --- Fin de l'implémentation du Trie ---
-
+# recherche_floue.py (à la racine) est partagé avec le client MongoDB
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from recherche_floue import charger_index  # noqa: E402
+from redis_canaux import canal_commande
+from redis_transport import publier
+from redis_catalogue import charger_catalogue
+from redis_index import rechercher_nom, suggerer_restaurants
 
 # Connexion à Redis
 r = redis.Redis(decode_responses=True)
+NB_SUGGESTIONS = 10  # Suggestions affichées par la recherche par préfixe
 processus_termine = threading.Event()
 
 def ecouteur_client(commande_id):
     """Écoute les notifications concernant sa commande."""
     pubsub = r.pubsub()
-    pubsub.subscribe('notifications')
+    pubsub.subscribe(canal_commande(commande_id))
     
     for message in pubsub.listen():
         if processus_termine.is_set():
@@ -126,45 +36,26 @@ def ecouteur_client(commande_id):
                     processus_termine.set()
 
 def charger_et_afficher_restaurants():
-    """Récupère les restaurants, les charge dans l'ABR et le Trie, et les affiche."""
+    """Récupère les restaurants (depuis le snapshot s'il est à jour) et les affiche."""
     print("="*30)
     print("🍽️ RESTAURANTS DISPONIBLES 🍽️")
     print("="*30)
-    
-    # Utilisation de KEYS comme dans votre code original
-    restaurant_keys = r.keys("restaurant:*") 
-    restaurants_data = {}
-    abr_restaurants = BinarySearchTree()
-    trie_restaurants = Trie() # NOUVELLE initialisation du Trie
-    
-    # Filtrer pour ne garder que les clés de restaurants (pas les :plats)
-    # Et trier pour un affichage ordonné
-    valid_restaurant_keys = sorted([k for k in restaurant_keys if ":plats" not in k])
-
-    for rest_key in valid_restaurant_keys:
-        rest_id = rest_key.split(":")[1]
-        data = r.hgetall(rest_key)
-        # Vérifier si data n'est pas vide et contient 'nom' avant d'insérer
-        if data and 'nom' in data:
 
-            # On ajoute l'ID au dictionnaire AVANT de le stocker
-            data['id_restaurant'] = rest_id
+    # Les recherches par nom interrogent l'index d'autocomplétion partagé dans Redis :
+    # le client ne garde aucun index local
+    restaurants_data, depuis_snapshot = charger_catalogue(r)
 
-            restaurants_data[rest_id] = data
-            nom_lower = data['nom'].lower() # Pour recherche insensible à la casse
-            
-            # Insérer dans les DEUX structures de recherche
-            abr_restaurants.insert(nom_lower, data) # Pour la recherche exacte
-            trie_restaurants.insert(nom_lower, data) # NOUVEAU: Pour la recherche par préfixe
-            
+    for rest_id, data in list(restaurants_data.items()):
+        if data:
             print(f"- {data['nom']} ({rest_id})")
         else:
-             print(f"- Restaurant ID {rest_id} trouvé mais données invalides ou nom manquant.")
-
+            print(f"- Restaurant ID {rest_id} trouvé mais données invalides ou nom manquant.")
+            del restaurants_data[rest_id]
 
     print("="*50)
-    # Retourner les deux arbres
-    return restaurants_data, abr_restaurants, trie_restaurants
+    if depuis_snapshot:
+        print("(Catalogue chargé depuis le snapshot)")
+    return restaurants_data
 
 def afficher_menu_restaurant(rest_id, rest_data):
     """Affiche le menu détaillé d'un restaurant."""
@@ -199,14 +90,37 @@ def afficher_menu_restaurant(rest_id, rest_data):
         else:
              print(f"  - [{plat_id}] Détails introuvables.")
 
+def calculer_total(plats_commande):
+    """Affiche le récapitulatif du panier et renvoie son total en euros."""
+    total_commande = 0.0
+    print("\n--- Récapitulatif de votre commande ---")
+    for item in plats_commande:
+        plat_id = item['id_plat']
+        quantite = item['quantite']
+        plat_data = r.hgetall(f"plat:{plat_id}")
+        nom_plat = plat_data.get('nom', plat_id)
+        prix_str = plat_data.get('prix', '0')
+        try:
+            prix_unitaire = float(prix_str)
+            total_item = prix_unitaire * quantite
+            total_commande += total_item
+            print(f"  - {quantite}x {nom_plat} ({prix_unitaire:.2f}€/unité) = {total_item:.2f}€")
+        except (ValueError, TypeError):
+            print(f"  - {quantite}x {nom_plat} (Prix '{prix_str}' invalide, non compté)")
+            
+    print("-" * 40)
+    print(f"💰 TOTAL DE LA COMMANDE : {total_commande:.2f} €")
+    print("-" * 40)
+    return total_commande
+
 if __name__ == "__main__":
     CLIENT_ID = f"client_{uuid.uuid4().hex[:4]}"
     COMMANDE_ID = f"cmd_{uuid.uuid4().hex[:6]}"
     
     print(f"👤 Bienvenue Client {CLIENT_ID}")
     
-    # Récupérer les 3 objets (data, abr, trie)
-    restaurants, abr_restaurants, trie_restaurants = charger_et_afficher_restaurants()
+    restaurants = charger_et_afficher_restaurants()
+    index_floue = charger_index()
     
     thread_ecoute = threading.Thread(target=ecouteur_client, args=(COMMANDE_ID,), daemon=True)
     thread_ecoute.start()
@@ -214,37 +128,53 @@ if __name__ == "__main__":
     main_loop_active = True
     try:
         while main_loop_active:
-            action = input("\nQue souhaitez-vous faire ? ('commander', 'rechercher' [nom exact], 'prefixe' [recherche avancée], 'quitter'): ").lower()
+            action = input("\nQue souhaitez-vous faire ? ('commander', 'rechercher' [nom exact], 'prefixe' [recherche avancée], 'floue' [fautes et accents tolérés], 'quitter'): ").lower()
 
             if action == 'rechercher':
-                nom_recherche = input("Entrez le nom EXACT du restaurant : ").lower()
-                resultat = abr_restaurants.search(nom_recherche)
-                if resultat:
+                nom_recherche = input("Entrez le nom EXACT du restaurant : ")
+                resultats = rechercher_nom(r, nom_recherche, limite=1)  # Casse et accents ignorés
+                if resultats:
+                    resultat = resultats[0]
+                    adresse = r.hget(f"restaurant:{resultat['id_restaurant']}", "adresse")
                     print("\n✅ Restaurant trouvé (recherche exacte) !")
-                    print(f"   Nom: {resultat.get('nom', 'N/A')}")
-                    print(f"   Adresse: {resultat.get('adresse', 'N/A')}")
+                    print(f"   Nom: {resultat['nom']}")
+                    print(f"   Adresse: {adresse or 'N/A'}")
                 else:
                     print("\n❌ Restaurant non trouvé.")
                 continue
             
             #  Recherhe par préfixe
             elif action == 'prefixe':
-                prefixe = input("Entrez le DÉBUT du nom du restaurant : ").lower()
+                prefixe = input("Entrez le DÉBUT du nom du restaurant : ")
                 if not prefixe:
                     print("Veuillez entrer au moins un caractère.")
                     continue
                 
-                resultats = trie_restaurants.find_by_prefix(prefixe)
+                # Classement calculé par Redis sur tout le préfixe : à jour des ajouts et de la popularité
+                resultats = suggerer_restaurants(r, prefixe, limite=NB_SUGGESTIONS)
                 
                 if not resultats:
                     print(f"\n❌ Aucun restaurant trouvé commençant par '{prefixe}'.")
                 else:
-                    print(f"\n✅ Restaurants trouvés pour '{prefixe}' :")
-                    # Trier les résultats par nom pour un affichage propre
-                    for resto_data in sorted(resultats, key=lambda x: x.get('nom', '')):
-                        print(f"   - {resto_data.get('nom')} (ID: {resto_data.get('id_restaurant', '?')})")
+                    print(f"\n✅ Restaurants trouvés pour '{prefixe}' (les plus populaires, {NB_SUGGESTIONS} au plus) :")
+                    for resto_data in resultats:
+                        print(f"   - {resto_data['nom']} (ID: {resto_data['id_restaurant']})")
+                continue
+
+            # Recherche floue : index de trigrammes construit depuis le catalogue
+            elif action == 'floue':
+                saisie = input("Entrez tout ou partie du nom (les fautes sont tolérées) : ")
+                if index_floue is None or not saisie.strip():
+                    continue
+                # L'index date de sa construction : on écarte les restaurants supprimés depuis
+                resultats = [res for res in index_floue.rechercher(saisie) if res['id_restaurant'] in restaurants]
+                if not resultats:
+                    print(f"\n❌ Aucun restaurant ne ressemble à '{saisie}'.")
+                else:
+                    print(f"\n✅ Restaurants les plus proches de '{saisie}' :")
+                    for resto_data in resultats:
+                        print(f"   - {resto_data['nom']} (ID: {resto_data['id_restaurant']})")
                 continue
-            
 
             elif action == 'quitter':
                 main_loop_active = False
@@ -287,25 +217,7 @@ if __name__ == "__main__":
                         print("❌ Erreur: ID de plat invalide pour ce restaurant.")
 
                 # Calcul du total
-                total_commande = 0.0
-                print("\n--- Récapitulatif de votre commande ---")
-                for item in plats_commande:
-                    plat_id = item['id_plat']
-                    quantite = item['quantite']
-                    plat_data = r.hgetall(f"plat:{plat_id}")
-                    nom_plat = plat_data.get('nom', plat_id)
-                    prix_str = plat_data.get('prix', '0')
-                    try:
-                        prix_unitaire = float(prix_str)
-                        total_item = prix_unitaire * quantite
-                        total_commande += total_item
-                        print(f"  - {quantite}x {nom_plat} ({prix_unitaire:.2f}€/unité) = {total_item:.2f}€")
-                    except (ValueError, TypeError):
-                        print(f"  - {quantite}x {nom_plat} (Prix '{prix_str}' invalide, non compté)")
-                        
-                print("-" * 40)
-                print(f"💰 TOTAL DE LA COMMANDE : {total_commande:.2f} €")
-                print("-" * 40)
+                total_commande = calculer_total(plats_commande)
 
                 adresse_livraison = input("Votre adresse de livraison ? : ")
                 
@@ -316,7 +228,7 @@ if __name__ == "__main__":
                     "total_euros": f"{total_commande:.2f}"
                 }
                 
-                r.publish('commandes_clients', json.dumps(commande))
+                publier(r, 'commandes_clients', commande)
                 print(f"\n🚀 Commande {COMMANDE_ID} (Total: {total_commande:.2f}€) envoyée. En attente de la suite...")
                 
                 while not processus_termine.is_set():
@@ -0,0 +1,213 @@
+import json
+import time
+import threading
+
+from redis.commands.core import Script
+
+from redis_canaux import canaux_notification
+from redis_transport import CONSOMMATEUR, commande_publication
+from redis_planificateur import CLE_ECHEANCES
+from redis_geo import cle_sollicites
+
+# --- Cycle de vie des commandes : machine à états dans Redis ---
+# L'état de chaque commande en cours est un hash 'commande:<id>:etat' (statut, manager,
+# livreur, tour du dispatch, et les données de la commande en JSON dans 'donnees' :
+# n'importe quel manager peut la reprendre). Chaque transition est un seul appel à un script Lua :
+# il vérifie le statut de départ de toutes les commandes concernées, les fait passer
+# au nouveau statut, puis applique ses effets (notifications, envoi au restaurant,
+# échéance du planificateur) dans le même aller-retour. Une transition refusée n'a
+# aucun effet : deux livreurs qui acceptent la même offre, un timeout qui tombe
+# pendant qu'un livreur accepte, ou deux managers qui reçoivent la même commande ne
+# peuvent plus se marcher dessus.
+#
+#   nouvelle -> a_moderer -> validee -> prete -> offerte -> assignee -> livree
+#                         -> rejetee_manager     (prete, offerte) -> annulee_timeout
+#
+# Une commande de tournée (voir tournees.py) reste 'prete' : l'offre est portée par la
+# première commande, et toute la tournée est assignée ou annulée d'un bloc.
+A_MODERER, VALIDEE, REJETEE = "a_moderer", "validee", "rejetee_manager"
+PRETE, OFFERTE, ASSIGNEE = "prete", "offerte", "assignee"
+LIVREE, ANNULEE = "livree", "annulee_timeout"
+DUREE_ETAT = 24 * 3600       # Conservation (s) de l'état d'une commande en cours
+DUREE_ETAT_FINAL = 3600      # Conservation (s) de l'état d'une commande terminée (archivée par le manager)
+DUREE_CACHE_S = 5            # Durée de vie d'une commande dans le cache local d'un manager
+
+
+def cle_etat(commande_id):
+    """Hash de l'état courant d'une commande."""
+    return f"commande:{commande_id}:etat"
+
+
+# KEYS : hash d'état des commandes concernées
+# ARGV : statuts de départ acceptés (séparés par des virgules, 'nouvelle' : hash absent),
+#        nouveau statut, horodatage, champs attendus (JSON), champs écrits (JSON),
+#        durée de conservation (s, 0 : inchangée), effets (JSON : commandes Redis)
+# Renvoie 1 si la transition a eu lieu, sinon le statut qui l'a bloquée.
+SCRIPT_TRANSITION = """
+local depart = {}
+for statut in string.gmatch(ARGV[1], '[^,]+') do depart[statut] = true end
+local attendus = cjson.decode(ARGV[4])
+for _, cle in ipairs(KEYS) do
+    local statut = redis.call('HGET', cle, 'statut') or 'nouvelle'
+    if not depart[statut] then return statut end
+    for champ, valeur in pairs(attendus) do
+        if redis.call('HGET', cle, champ) ~= valeur then return statut end
+    end
+end
+for _, cle in ipairs(KEYS) do
+    redis.call('HSET', cle, 'statut', ARGV[2], 'maj', ARGV[3])
+    for champ, valeur in pairs(cjson.decode(ARGV[5])) do
+        redis.call('HSET', cle, champ, valeur)
+    end
+    if tonumber(ARGV[6]) > 0 then redis.call('EXPIRE', cle, ARGV[6]) end
+end
+for _, effet in ipairs(cjson.decode(ARGV[7])) do
+    redis.call(unpack(effet))
+end
+return 1
+"""
+# Objet Script créé une fois (SHA1 calculé au chargement) : chaque transition n'est qu'un
+# EVALSHA sur le client passé à l'appel (SCRIPT LOAD la première fois sur un serveur)
+_script_transition = Script(None, SCRIPT_TRANSITION.encode())
+
+
+def transition(r, commande_ids, depart, statut, attendus=None, champs=None, duree=0, effets=()):
+    """
+    Fait passer les commandes 'commande_ids' du statut 'depart' (un ou plusieurs) au
+    statut 'statut', puis applique les effets, en un aller-retour. Renvoie True si la
+    transition a eu lieu, False si une commande n'était pas dans un état de départ.
+    """
+    depart = [depart] if isinstance(depart, str) else depart
+    resultat = _script_transition(
+        keys=[cle_etat(cid) for cid in commande_ids],
+        args=[",".join(depart), statut, time.time(), json.dumps(attendus or {}),
+              json.dumps({champ: str(valeur) for champ, valeur in (champs or {}).items()}),
+              duree, json.dumps(list(effets))], client=r)
+    return resultat == 1
+
+
+def effets_notification(notification):
+    """Publications d'une notification sur les canaux des entités concernées (pour un effet de transition)."""
+    message = json.dumps(notification)
+    return [["PUBLISH", canal, message] for canal in canaux_notification(notification)]
+
+
+def statut_commande(r, commande_id):
+    return r.hget(cle_etat(commande_id), "statut")
+
+
+def lire_donnees(r, commande_id):
+    """Données de la commande enregistrées avec son état, ou None si elle est inconnue ou expirée."""
+    brut = r.hget(cle_etat(commande_id), "donnees")
+    return json.loads(brut) if brut else None
+
+
+class CacheCommandes:
+    """
+    Cache local des données des commandes en cours d'un manager, relu dans Redis
+    (read-through) quand une entrée est absente ou plus vieille que 'duree'. Redis fait
+    foi : les données y sont écrites par les transitions, le cache évite de les relire
+    à chaque message. Chaque lecture renvoie une copie, que l'appelant peut modifier
+    sans verrou avant de la passer à une transition.
+    """
+
+    def __init__(self, duree=DUREE_CACHE_S):
+        self.duree = duree
+        self.entrees = {}  # commande_id -> (instant, données)
+        self.verrou = threading.Lock()
+
+    def lire(self, r, commande_id):
+        with self.verrou:
+            entree = self.entrees.get(commande_id)
+        if entree is not None and time.monotonic() - entree[0] < self.duree:
+            return dict(entree[1])
+        donnees = lire_donnees(r, commande_id)
+        if donnees is None:
+            self.oublier(commande_id)
+            return None
+        self.ecrire(commande_id, donnees)
+        return dict(donnees)
+
+    def ecrire(self, commande_id, donnees):
+        with self.verrou:
+            self.entrees[commande_id] = (time.monotonic(), dict(donnees))
+
+    def oublier(self, commande_id):
+        with self.verrou:
+            self.entrees.pop(commande_id, None)
+
+
+# --- Transitions ---
+
+def recevoir(r, commande_id, commande):
+    """Un manager prend en charge une nouvelle commande. Renvoie False si un autre l'a déjà prise."""
+    return transition(r, [commande_id], "nouvelle", A_MODERER, duree=DUREE_ETAT,
+                      champs={"manager": CONSOMMATEUR, "donnees": json.dumps(commande)})
+
+
+def moderer(r, commande_id, validee, commande, canal_restaurant):
+    """
+    Décision du manager : la commande validée est envoyée au restaurant, la commande
+    rejetée est notifiée au client.
+    """
+    if validee:
+        return transition(r, [commande_id], A_MODERER, VALIDEE,
+                          effets=[commande_publication(canal_restaurant, commande)])
+    notification = {"type": "COMMANDE_REJETEE", "commande_id": commande_id,
+                    "message": "Votre commande a été rejetée par le manager."}
+    return transition(r, [commande_id], A_MODERER, REJETEE, duree=DUREE_ETAT_FINAL,
+                      effets=effets_notification(notification))
+
+
+def marquer_prete(r, commande_id, commande):
+    """Le restaurant a préparé la commande (données complétées de son offre). Renvoie False pour un doublon."""
+    return transition(r, [commande_id], VALIDEE, PRETE, champs={"donnees": json.dumps(commande)})
+
+
+def offrir(r, commande_id, tour, delai, commande, publication=None):
+    """
+    Propose la commande (tour 'tour' du dispatch) et programme son échéance dans 'delai'
+    secondes ; 'publication' est l'envoi éventuel de l'offre. Les données de la commande
+    (son offre, celle de sa tournée...) sont enregistrées avec l'état : le manager qui
+    traitera l'échéance n'est pas forcément celui-ci. Renvoie False si la commande a
+    déjà été prise ou annulée.
+    """
+    effets = [["ZADD", CLE_ECHEANCES, str(time.time() + delai), commande_id]]
+    if publication is not None:
+        effets.append(publication)
+    return transition(r, [commande_id], [PRETE, OFFERTE], OFFERTE, effets=effets,
+                      champs={"tour": tour, "donnees": json.dumps(commande)})
+
+
+def reclamer(r, commande_ids, livreur_id):
+    """
+    Un livreur prend une offre : toutes ses commandes (une tournée) lui sont assignées,
+    l'échéance et les sollicitations de l'offre sont supprimées et les clients notifiés.
+    Renvoie False si l'offre a déjà été prise ou annulée.
+    """
+    premiere = commande_ids[0]
+    effets = [["ZREM", CLE_ECHEANCES, premiere], ["DEL", cle_sollicites(premiere)]]
+    for cid in commande_ids:
+        effets += effets_notification({"type": "LIVREUR_ASSIGNE", "commande_id": cid, "livreur_id": livreur_id,
+                                       "message": f"Livreur {livreur_id} assigné."})
+    return transition(r, commande_ids, [PRETE, OFFERTE], ASSIGNEE, champs={"livreur": livreur_id}, effets=effets)
+
+
+def livrer(r, commande_id, livreur_id):
+    """Le livreur assigné a livré la commande : le client et le manager sont notifiés."""
+    notification = {"type": "COMMANDE_LIVREE", "commande_id": commande_id, "livreur_id": livreur_id,
+                    "message": f"Votre commande {commande_id} a été livrée. Bon appétit !"}
+    return transition(r, [commande_id], ASSIGNEE, LIVREE, attendus={"livreur": livreur_id},
+                      duree=DUREE_ETAT_FINAL, effets=effets_notification(notification))
+
+
+def expirer(r, commande_ids):
+    """
+    Personne n'a pris l'offre à temps : toutes ses commandes sont annulées et leurs
+    clients notifiés. Renvoie False si un livreur l'a prise entre-temps.
+    """
+    effets = [["DEL", cle_sollicites(commande_ids[0])]]
+    for cid in commande_ids:
+        effets += effets_notification({"type": "AUCUN_LIVREUR", "commande_id": cid,
+                                       "message": "Désolé, aucun livreur n'est disponible. Commande annulée."})
+    return transition(r, commande_ids, [PRETE, OFFERTE], ANNULEE, duree=DUREE_ETAT_FINAL, effets=effets)
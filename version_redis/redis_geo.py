@@ -0,0 +1,113 @@
+import os
+import json
+
+from redis.commands.core import Script
+
+from redis_canaux import CANAUX_GLOBAUX, canal_livreur
+
+# --- Dispatch géographique des offres de livraison ---
+# Au lieu de diffuser chaque offre à tous les livreurs (canal 'offres_livraisons'), le
+# manager la propose aux NB_LIVREURS_CIBLES livreurs disponibles les plus proches du
+# restaurant, sur leur canal personnel. Les livreurs disponibles sont les membres d'un
+# index géographique (GEOADD) : un livreur s'y ajoute à sa prise de service et après
+# chaque livraison (à la position du client), et s'en retire quand il prend une course.
+# Sans preneur, le rayon est élargi à chaque tour (RAYONS_KM) ; si aucun livreur n'est
+# trouvé même dans le dernier rayon, l'offre est diffusée à tous comme avant.
+# UBEREATS_DISPATCH=diffusion rétablit la diffusion systématique, UBEREATS_DISPATCH=lots
+# affecte d'abord les commandes prêtes par lots (voir affectation.py). Avec les canaux
+# globaux, tous les livreurs reçoivent tout : la diffusion est alors toujours utilisée.
+DISPATCH = os.environ.get("UBEREATS_DISPATCH", "geo")
+DISPATCH_GEO = DISPATCH in ("geo", "lots") and not CANAUX_GLOBAUX
+DISPATCH_LOTS = DISPATCH == "lots" and DISPATCH_GEO
+
+CLE_LIVREURS_DISPONIBLES = "livreurs:disponibles"  # GEO : livreurs sans course, par position
+RAYONS_KM = [2, 5, 10, 25]   # Rayon de recherche de chaque tour du dispatch
+NB_LIVREURS_CIBLES = 5       # Nouveaux livreurs sollicités par tour
+TYPE_OFFRE = "OFFRE_LIVRAISON"
+DUREE_SOLLICITES = 3600      # Conservation (s) de la liste des livreurs déjà sollicités
+
+
+def cle_sollicites(commande_id):
+    """SET des livreurs à qui l'offre d'une commande a déjà été proposée."""
+    return f"dispatch:{commande_id}:sollicites"
+
+
+# Un seul aller-retour par tour : GEOSEARCH des livreurs les plus proches, en sautant ceux
+# déjà sollicités (SADD renvoie 0), puis PUBLISH de l'offre sur le canal de chacun.
+# KEYS : index géographique, livreurs déjà sollicités
+# ARGV : longitude, latitude, rayon (km), nombre, offre (JSON), préfixe des canaux, durée
+# Renvoie [nombre total de sollicités, id1, distance1, id2, distance2, ...]
+SCRIPT_SOLLICITER = """
+local deja = redis.call('SCARD', KEYS[2])
+local candidats = redis.call('GEOSEARCH', KEYS[1], 'FROMLONLAT', ARGV[1], ARGV[2],
+                             'BYRADIUS', ARGV[3], 'km', 'ASC', 'COUNT', tonumber(ARGV[4]) + deja, 'WITHDIST')
+local cibles = {0}
+for _, candidat in ipairs(candidats) do
+    if #cibles > 2 * tonumber(ARGV[4]) then break end
+    if redis.call('SADD', KEYS[2], candidat[1]) == 1 then
+        redis.call('PUBLISH', ARGV[6] .. candidat[1], ARGV[5])
+        cibles[#cibles + 1] = candidat[1]
+        cibles[#cibles + 1] = candidat[2]
+    end
+end
+cibles[1] = redis.call('SCARD', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[7])
+return cibles
+"""
+_script_solliciter = Script(None, SCRIPT_SOLLICITER.encode())  # Créé une fois (voir redis_etats.py)
+
+
+def positionner_livreur(r, livreur_id, position):
+    """Ajoute (ou déplace) un livreur disponible dans l'index géographique."""
+    if DISPATCH_GEO and position is not None:
+        r.geoadd(CLE_LIVREURS_DISPONIBLES, [position[0], position[1], livreur_id])
+
+
+def retirer_livreur(r, livreur_id):
+    """Retire un livreur de l'index (course acceptée, fin de service)."""
+    if DISPATCH_GEO:
+        r.zrem(CLE_LIVREURS_DISPONIBLES, livreur_id)
+
+
+def solliciter_livreurs(r, commande_id, offre, position, rayon_km, nombre=NB_LIVREURS_CIBLES):
+    """
+    Propose l'offre aux 'nombre' livreurs disponibles les plus proches de 'position' dans
+    'rayon_km', hors ceux déjà sollicités pour cette commande. Renvoie la liste des
+    [(livreur_id, distance_km)] sollicités à ce tour et le nombre total de sollicités.
+    """
+    message = json.dumps(dict(offre, type=TYPE_OFFRE))
+    reponse = _script_solliciter(
+        keys=[CLE_LIVREURS_DISPONIBLES, cle_sollicites(commande_id)],
+        args=[position[0], position[1], rayon_km, nombre, message, canal_livreur(""), DUREE_SOLLICITES], client=r)
+    total, *plats = reponse
+    return [(plats[i], float(plats[i + 1])) for i in range(0, len(plats), 2)], int(total)
+
+
+def oublier_sollicites(r, commande_id):
+    r.delete(cle_sollicites(commande_id))
+
+
+def livreurs_candidats(r, positions, rayon_km, nombre):
+    """
+    Les 'nombre' livreurs disponibles les plus proches de chaque position (dans
+    'rayon_km'), en un aller-retour : {livreur_id: (longitude, latitude)}.
+    """
+    pipe = r.pipeline(transaction=False)
+    for longitude, latitude in positions:
+        pipe.geosearch(CLE_LIVREURS_DISPONIBLES, longitude=longitude, latitude=latitude,
+                       radius=rayon_km, unit="km", sort="ASC", count=nombre, withcoord=True)
+    return {livreur_id: tuple(position) for proches in pipe.execute() for livreur_id, position in proches}
+
+
+def proposer_affectations(r, affectations):
+    """
+    Envoie à chaque livreur la commande qui lui a été attribuée (dispatch par lots),
+    en un aller-retour. 'affectations' : [(commande_id, offre, livreur_id)]. Le livreur
+    compte parmi les sollicités de la commande, comme après solliciter_livreurs.
+    """
+    pipe = r.pipeline(transaction=False)
+    for commande_id, offre, livreur_id in affectations:
+        pipe.sadd(cle_sollicites(commande_id), livreur_id)
+        pipe.expire(cle_sollicites(commande_id), DUREE_SOLLICITES)
+        pipe.publish(canal_livreur(livreur_id), json.dumps(dict(offre, type=TYPE_OFFRE)))
+    pipe.execute()
@@ -0,0 +1,393 @@
+import os
+import sys
+import uuid
+from datetime import datetime
+
+from redis.commands.core import Script
+
+# normalisation.py (à la racine) est partagé avec la version MongoDB et les scripts d'import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from normalisation import normaliser_nom  # noqa: E402
+
+# --- Index des entités ---
+# Les listes d'entités sont lues dans des Sets d'index maintenus à l'écriture,
+# plutôt qu'avec KEYS, qui bloque le serveur le temps de parcourir toutes les clés :
+#   - restaurants:ids  -> écrit par json_to_redis.py et redis_admin.py
+#   - commandes:ids    -> écrit par le manager à l'archivage d'une commande
+INDEX_RESTAURANTS = "restaurants:ids"
+INDEX_COMMANDES = "commandes:ids"
+TAILLE_SCAN = 1000  # Clés examinées par appel SCAN
+
+# Incrémenté à chaque ajout, modification ou suppression de restaurant
+# (json_to_redis.py, synchro_catalogue.py, redis_admin.py) ; voir redis_catalogue.py
+VERSION_CATALOGUE = "catalogue:version"
+
+
+def lister_ids(r, cle_index, prefixe):
+    """
+    Renvoie les IDs d'un type d'entité ('restaurant', 'commande'...) depuis son index.
+    Si l'index est vide (base remplie avant son introduction), les clés sont
+    retrouvées avec SCAN, par petits lots sans bloquer le serveur, et l'index
+    est reconstruit pour les appels suivants.
+    """
+    ids = r.smembers(cle_index)
+    if ids:
+        return ids
+
+    # "restaurant:rest_01" oui, "restaurant:rest_01:plats" non
+    ids = {cle.split(":")[1] for cle in r.scan_iter(f"{prefixe}:*", count=TAILLE_SCAN) if cle.count(":") == 1}
+    if ids:
+        r.sadd(cle_index, *ids)
+    return ids
+
+
+# --- Autocomplétion des noms de restaurants ---
+# ZSET partagé par tous les clients, tous les membres au score 0 : Redis les trie alors
+# par ordre lexicographique et ZRANGEBYLEX renvoie ceux d'un préfixe en O(log n + k).
+# Membre : "<nom normalisé>\x00<id_restaurant>" ("\x00" classe le nom exact en premier).
+# Écrit par json_to_redis.py, synchro_catalogue.py, redis_admin.py et simulate.py ;
+# les entrées d'un restaurant renommé ou supprimé par synchronisation sont retirées
+# à la lecture. Les suggestions classées par popularité sont décrites plus bas.
+AUTOCOMPLETION_RESTAURANTS = "restaurants:autocompletion"
+SEPARATEUR_AUTOCOMPLETION = "\x00"
+
+
+def membre_autocompletion(nom, rest_id):
+    return f"{normaliser_nom(nom)}{SEPARATEUR_AUTOCOMPLETION}{rest_id}"
+
+
+def indexer_nom_restaurant(pipe, rest_id, nom):
+    """
+    Ajoute (dans le pipeline 'pipe') un restaurant à l'index d'autocomplétion et le classe
+    dans les suggestions de ses préfixes (à rappeler quand sa popularité augmente).
+    """
+    _script_indexer_nom(keys=[AUTOCOMPLETION_RESTAURANTS], client=pipe,
+                        args=[membre_autocompletion(nom, rest_id), *_arguments_suggestions()])
+
+
+def retirer_nom_restaurant(pipe, rest_id, nom):
+    """Retire (dans le pipeline 'pipe') un restaurant de l'autocomplétion et des suggestions."""
+    _script_retirer_nom(keys=[AUTOCOMPLETION_RESTAURANTS], client=pipe,
+                        args=[membre_autocompletion(nom, rest_id), *_arguments_suggestions()])
+
+
+def reconstruire_autocompletion(r):
+    """Remplit l'index d'autocomplétion depuis 'restaurants:ids' (base remplie avant son introduction)."""
+    rest_ids = list(lister_ids(r, INDEX_RESTAURANTS, "restaurant"))
+    pipe = r.pipeline(transaction=False)
+    for rest_id in rest_ids:
+        pipe.hget(f"restaurant:{rest_id}", "nom")
+    noms = pipe.execute()
+    pipe = r.pipeline(transaction=False)
+    for rest_id, nom in zip(rest_ids, noms):
+        if nom:
+            indexer_nom_restaurant(pipe, rest_id, nom)
+    pipe.execute()
+
+
+# Une page de l'index et le nom actuel de chaque restaurant, en un seul aller-retour.
+# (Les Hash 'restaurant:<id>' ne sont pas dans KEYS : valable sur un serveur seul, pas en cluster.)
+SCRIPT_AUTOCOMPLETION = """
+local membres = redis.call('ZRANGEBYLEX', KEYS[1], ARGV[1], ARGV[2], 'LIMIT', ARGV[3], ARGV[4])
+local resultat = {}
+for i, membre in ipairs(membres) do
+    local rest_id = string.sub(membre, string.find(membre, ARGV[5], 1, true) + 1)
+    resultat[2 * i - 1] = membre
+    resultat[2 * i] = redis.call('HGET', 'restaurant:' .. rest_id, 'nom') or false
+end
+return resultat
+"""
+_script_autocompletion = Script(None, SCRIPT_AUTOCOMPLETION.encode())  # Créé une fois (voir redis_etats.py)
+
+
+def lire_autocompletion(r, minimum, maximum, limite):
+    """
+    Renvoie au plus 'limite' restaurants [{id_restaurant, nom}] dont le membre est entre
+    'minimum' et 'maximum' (bornes ZRANGEBYLEX), dans l'ordre des noms normalisés.
+    Chaque page est vérifiée avec le nom actuel du restaurant (lu par le script) ; les
+    entrées périmées sont supprimées et la page suivante complète le résultat.
+    """
+    def lire_page(debut, nombre):
+        reponse = _script_autocompletion(keys=[AUTOCOMPLETION_RESTAURANTS],
+                                         args=[minimum, maximum, debut, nombre, SEPARATEUR_AUTOCOMPLETION], client=r)
+        return list(zip(reponse[::2], reponse[1::2]))
+
+    resultats, debut = [], 0
+    while len(resultats) < limite:
+        demande = limite - len(resultats)
+        page = lire_page(debut, demande)
+        if not page and debut == 0 and not r.exists(AUTOCOMPLETION_RESTAURANTS):
+            reconstruire_autocompletion(r)
+            page = lire_page(0, demande)
+        perimes = []
+        for membre, nom in page:
+            rest_id = membre.rpartition(SEPARATEUR_AUTOCOMPLETION)[2]
+            if nom is not None and membre_autocompletion(nom, rest_id) == membre:
+                resultats.append({"id_restaurant": rest_id, "nom": nom})
+            else:
+                perimes.append(membre)
+        if perimes:
+            pipe = r.pipeline(transaction=False)
+            for membre in perimes:  # Retirés aussi des suggestions
+                _script_retirer_nom(keys=[AUTOCOMPLETION_RESTAURANTS], client=pipe,
+                                    args=[membre, *_arguments_suggestions()])
+            pipe.execute()
+        if len(page) < demande:
+            break
+        debut += len(page) - len(perimes)  # Les membres supprimés ne décalent plus la page suivante
+    return resultats
+
+
+def autocompleter(r, prefixe, limite=10):
+    """Restaurants dont le nom normalisé commence par 'prefixe' (au plus 'limite')."""
+    normalise = normaliser_nom(prefixe) + (" " if prefixe[-1:].isspace() else "")
+    # Bornes en octets : "\xff" n'apparaît dans aucun nom encodé en UTF-8
+    return lire_autocompletion(r, b"[" + normalise.encode(), b"[" + normalise.encode() + b"\xff", limite)
+
+
+def rechercher_nom(r, nom, limite=10):
+    """Restaurants dont le nom normalisé est exactement celui de 'nom'."""
+    membre = (normaliser_nom(nom) + SEPARATEUR_AUTOCOMPLETION).encode()
+    return lire_autocompletion(r, b"[" + membre, b"[" + membre + b"\xff", limite)
+
+
+# --- Suggestions par préfixe, classées par popularité ---
+# Les restaurants les plus populaires (compteur restaurant:<id>:popularite, puis ordre des
+# noms) parmi TOUS ceux d'un préfixe, calculés par Redis. Un préfixe d'au plus
+# SEUIL_SUGGESTIONS noms est classé à la lecture (intervalle ZRANGEBYLEX, un GET par nom).
+# Un préfixe plus fréquent ("p", "le "...) a son classement tenu à jour dans un ZSET
+# 'restaurants:suggestions:<préfixe>' : ses TOP_K_SUGGESTIONS premiers membres
+# d'autocomplétion, au score -popularité (ZRANGE les renvoie du plus populaire au moins
+# populaire, puis par nom). Il y a au plus n / SEUIL_SUGGESTIONS préfixes fréquents par
+# longueur : quelques milliers de petits ZSET pour 1M noms.
+# indexer_nom_restaurant y classe chaque nom ajouté ou dont la popularité augmente (elle ne
+# fait que croître) ; un classement dont un membre est retiré est supprimé, puis recalculé
+# sur tout l'intervalle à la lecture suivante (ou quand un nom y est ajouté).
+# (Les préfixes sont découpés en octets ; les clés sont construites par les scripts : valable
+# sur un serveur seul, comme SCRIPT_AUTOCOMPLETION.)
+SUGGESTIONS_RESTAURANTS = "restaurants:suggestions:"
+SEUIL_SUGGESTIONS = 200   # Noms au-delà desquels le classement d'un préfixe est gardé dans Redis
+TOP_K_SUGGESTIONS = 50    # Restaurants gardés par classement (et nombre max de suggestions)
+
+
+def _arguments_suggestions():
+    return [SEPARATEUR_AUTOCOMPLETION, SUGGESTIONS_RESTAURANTS, TOP_K_SUGGESTIONS, SEUIL_SUGGESTIONS]
+
+
+# Fonctions communes aux scripts des suggestions. ARGV : membre ou préfixe, séparateur,
+# préfixe des clés de classement, taille des classements, seuil.
+FONCTIONS_SUGGESTIONS = """
+local sep, prefixe_cles, k, seuil = ARGV[2], ARGV[3], tonumber(ARGV[4]), tonumber(ARGV[5])
+
+local function nombre_noms(p)
+    return redis.call('ZLEXCOUNT', KEYS[1], '[' .. p, '[' .. p .. '\\255')
+end
+
+-- Membres de l'intervalle du préfixe 'p' triés par popularité décroissante, puis par nom
+local function classer(p)
+    local classes = {}
+    for i, membre in ipairs(redis.call('ZRANGEBYLEX', KEYS[1], '[' .. p, '[' .. p .. '\\255')) do
+        local rest_id = string.sub(membre, string.find(membre, sep, 1, true) + 1)
+        classes[i] = {-(tonumber(redis.call('GET', 'restaurant:' .. rest_id .. ':popularite')) or 0), membre}
+    end
+    table.sort(classes, function(a, b) return a[1] < b[1] or (a[1] == b[1] and a[2] < b[2]) end)
+    return classes
+end
+
+local function construire(p)
+    local cle, classes = prefixe_cles .. p, classer(p)
+    redis.call('DEL', cle)
+    for i = 1, math.min(k, #classes) do redis.call('ZADD', cle, classes[i][1], classes[i][2]) end
+end
+"""
+
+# KEYS : autocomplétion ; ARGV[1] : membre ajouté (ou dont la popularité a augmenté)
+SCRIPT_INDEXER_NOM = FONCTIONS_SUGGESTIONS + """
+local membre = ARGV[1]
+local nom = string.sub(membre, 1, string.find(membre, sep, 1, true) - 1)
+local rest_id = string.sub(membre, #nom + 2)
+local score = -(tonumber(redis.call('GET', 'restaurant:' .. rest_id .. ':popularite')) or 0)
+redis.call('ZADD', KEYS[1], 0, membre)
+for l = 0, #nom do
+    local p = string.sub(nom, 1, l)
+    local n = nombre_noms(p)
+    if n <= seuil then break end  -- Les préfixes plus longs ont encore moins de noms
+    local cle = prefixe_cles .. p
+    if n == seuil + 1 or redis.call('EXISTS', cle) == 0 then
+        construire(p)  -- Préfixe devenu fréquent (un classement plus ancien peut être périmé)
+    else
+        redis.call('ZADD', cle, score, membre)
+        redis.call('ZREMRANGEBYRANK', cle, k, -1)
+    end
+end
+return 1
+"""
+_script_indexer_nom = Script(None, SCRIPT_INDEXER_NOM.encode())  # Créé une fois (voir redis_etats.py)
+
+# KEYS : autocomplétion ; ARGV[1] : membre retiré
+SCRIPT_RETIRER_NOM = FONCTIONS_SUGGESTIONS + """
+local membre = ARGV[1]
+local nom = string.sub(membre, 1, string.find(membre, sep, 1, true) - 1)
+redis.call('ZREM', KEYS[1], membre)
+for l = 0, #nom do
+    local cle = prefixe_cles .. string.sub(nom, 1, l)
+    if redis.call('ZREM', cle, membre) == 1 then redis.call('DEL', cle) end
+end
+return 1
+"""
+_script_retirer_nom = Script(None, SCRIPT_RETIRER_NOM.encode())  # Créé une fois (voir redis_etats.py)
+
+# KEYS : autocomplétion ; ARGV[1] : préfixe normalisé, ARGV[6] : nombre de suggestions.
+# Renvoie [membre1, nom1, membre2, nom2, ...] (nom actuel du restaurant, comme SCRIPT_AUTOCOMPLETION)
+SCRIPT_SUGGESTIONS = FONCTIONS_SUGGESTIONS + """
+local p, limite = ARGV[1], tonumber(ARGV[6])
+local membres = {}
+if nombre_noms(p) <= seuil then
+    local classes = classer(p)
+    for i = 1, math.min(limite, #classes) do membres[i] = classes[i][2] end
+else
+    if redis.call('EXISTS', prefixe_cles .. p) == 0 then construire(p) end
+    membres = redis.call('ZRANGE', prefixe_cles .. p, 0, limite - 1)
+end
+local resultat = {}
+for i, membre in ipairs(membres) do
+    local rest_id = string.sub(membre, string.find(membre, sep, 1, true) + 1)
+    resultat[2 * i - 1] = membre
+    resultat[2 * i] = redis.call('HGET', 'restaurant:' .. rest_id, 'nom') or false
+end
+return resultat
+"""
+_script_suggestions = Script(None, SCRIPT_SUGGESTIONS.encode())  # Créé une fois (voir redis_etats.py)
+
+
+def suggerer_restaurants(r, prefixe, limite=10):
+    """
+    Les 'limite' (au plus TOP_K_SUGGESTIONS) restaurants les plus populaires parmi tous ceux
+    dont le nom normalisé commence par 'prefixe' [{id_restaurant, nom}]. Les entrées
+    périmées (restaurant renommé ou supprimé) sont retirées, puis la lecture recommence.
+    """
+    normalise = normaliser_nom(prefixe) + (" " if prefixe[-1:].isspace() else "")
+    limite = min(limite, TOP_K_SUGGESTIONS)
+    while True:
+        reponse = _script_suggestions(keys=[AUTOCOMPLETION_RESTAURANTS], client=r,
+                                      args=[normalise, *_arguments_suggestions(), limite])
+        resultats, pipe = [], r.pipeline(transaction=False)
+        for membre, nom in zip(reponse[::2], reponse[1::2]):
+            rest_id = membre.rpartition(SEPARATEUR_AUTOCOMPLETION)[2]
+            if nom is not None and membre_autocompletion(nom, rest_id) == membre:
+                resultats.append({"id_restaurant": rest_id, "nom": nom})
+            else:
+                _script_retirer_nom(keys=[AUTOCOMPLETION_RESTAURANTS], client=pipe,
+                                    args=[membre, *_arguments_suggestions()])
+        if not len(pipe):
+            return resultats
+        pipe.execute()
+
+
+# --- Historique des commandes ---
+# Chaque commande archivée est ajoutée à des ZSET scorés par l'heure de fin
+# (timestamp) : l'historique complet et un ZSET par statut, restaurant et livreur.
+# Une page de l'historique se lit alors en deux allers-retours quelle que soit
+# la taille de l'historique : ZREVRANGEBYSCORE, puis les HGETALL en pipeline.
+# Le curseur d'une page est (score, id) de sa dernière commande : plusieurs commandes
+# peuvent avoir le même score (ex: horodatage 0 des dates illisibles), l'id les départage.
+HISTORIQUE_COMMANDES = "commandes:historique"
+FILTRES_HISTORIQUE = {"statut": "statut_final", "restaurant": "id_restaurant", "livreur": "id_livreur"}
+
+
+def cle_historique(filtre=None, valeur=None):
+    """ZSET de l'historique complet, ou de ses commandes ayant 'filtre' = 'valeur'."""
+    return HISTORIQUE_COMMANDES if filtre is None else f"{HISTORIQUE_COMMANDES}:{filtre}:{valeur}"
+
+
+def indexer_commande(pipe, commande_id, commande, horodatage):
+    """Ajoute (dans le pipeline 'pipe') une commande archivée aux index de l'historique."""
+    pipe.sadd(INDEX_COMMANDES, commande_id)
+    pipe.zadd(HISTORIQUE_COMMANDES, {commande_id: horodatage})
+    for filtre, champ in FILTRES_HISTORIQUE.items():
+        valeur = commande.get(champ)
+        if valeur and valeur != "N/A":
+            pipe.zadd(cle_historique(filtre, valeur), {commande_id: horodatage})
+
+
+# Page suivant le curseur (score, id), borne de score incluse : à score égal, ZREVRANGEBYSCORE
+# classe les ids par ordre décroissant, on saute donc les ex aequo déjà lus (id >= dernier).
+# KEYS : ZSET de l'historique ; ARGV : score et id de la dernière commande lue ('+inf' et ''
+# pour la première page), nombre de commandes. Renvoie [id1, score1, id2, score2, ...]
+SCRIPT_PAGE_HISTORIQUE = """
+local maximum, dernier = ARGV[1], ARGV[2]
+local debut = 0
+if dernier ~= '' then
+    local score = redis.call('ZSCORE', KEYS[1], dernier)
+    if score and tonumber(score) == tonumber(maximum) then
+        debut = redis.call('ZREVRANK', KEYS[1], dernier) - redis.call('ZCOUNT', KEYS[1], '(' .. maximum, '+inf') + 1
+    else
+        -- Dernière commande lue supprimée entre-temps : on compte les ex aequo d'id supérieur
+        local ex_aequo = redis.call('ZREVRANGEBYSCORE', KEYS[1], maximum, maximum)
+        while debut < #ex_aequo and ex_aequo[debut + 1] > dernier do debut = debut + 1 end
+    end
+end
+return redis.call('ZREVRANGEBYSCORE', KEYS[1], maximum, '-inf', 'WITHSCORES', 'LIMIT', debut, ARGV[3])
+"""
+_script_page_historique = Script(None, SCRIPT_PAGE_HISTORIQUE.encode())  # Créé une fois (voir redis_etats.py)
+
+
+def historique_commandes(r, limit=50, before=None, statut=None, restaurant=None, livreur=None):
+    """
+    Renvoie une page de l'historique, de la plus récente à la plus ancienne commande :
+    (liste des hash des commandes avec leur 'id', curseur de la page suivante ou None).
+    'before' est le curseur (score, id) renvoyé par l'appel précédent ; les filtres se combinent.
+    """
+    filtres = {"statut": statut, "restaurant": restaurant, "livreur": livreur}
+    cles = [cle_historique(filtre, valeur) for filtre, valeur in filtres.items() if valeur]
+    score, dernier = before if before is not None else ("+inf", "")
+
+    if len(cles) > 1:
+        # Intersection des filtres dans une clé temporaire, lue et supprimée dans la même transaction
+        cle_temporaire = f"{HISTORIQUE_COMMANDES}:tmp:{uuid.uuid4().hex}"
+        pipe = r.pipeline()
+        pipe.zinterstore(cle_temporaire, cles, aggregate="MAX")
+        _script_page_historique(keys=[cle_temporaire], args=[score, dernier, limit], client=pipe)
+        pipe.delete(cle_temporaire)
+        reponse = pipe.execute()[1]
+    else:
+        reponse = _script_page_historique(keys=[cles[0] if cles else HISTORIQUE_COMMANDES],
+                                          args=[score, dernier, limit], client=r)
+    page = [(commande_id, float(score)) for commande_id, score in zip(reponse[::2], reponse[1::2])]
+
+    pipe = r.pipeline(transaction=False)
+    for commande_id, _ in page:
+        pipe.hgetall(f"commande:{commande_id}")
+    commandes = []
+    for (commande_id, _), details in zip(page, pipe.execute()):
+        if details:  # Commande supprimée entre-temps
+            details["id"] = commande_id
+            commandes.append(details)
+
+    curseur = (page[-1][1], page[-1][0]) if len(page) == limit else None
+    return commandes, curseur
+
+
+def reconstruire_historique(r):
+    """
+    Remplit les ZSET de l'historique à partir de 'commandes:ids' s'ils n'existent pas
+    encore (commandes archivées avant leur introduction). Renvoie le nombre de commandes indexées.
+    """
+    if r.exists(HISTORIQUE_COMMANDES):
+        return 0
+    commandes_ids = list(lister_ids(r, INDEX_COMMANDES, "commande"))
+    pipe = r.pipeline(transaction=False)
+    for commande_id in commandes_ids:
+        pipe.hgetall(f"commande:{commande_id}")
+    commandes = pipe.execute()
+
+    pipe = r.pipeline(transaction=False)
+    for commande_id, commande in zip(commandes_ids, commandes):
+        if commande:
+            try:
+                horodatage = datetime.fromisoformat(commande.get("date", "")).timestamp()
+            except ValueError:
+                horodatage = 0.0
+            indexer_commande(pipe, commande_id, commande, horodatage)
+    pipe.execute()
+    return len(commandes_ids)
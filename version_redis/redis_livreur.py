@@ -1,121 +1,171 @@
+import os
+import sys
 import redis
 import time
 import json
 import threading
 import random
 
+# geocodage.py (à la racine) est partagé avec la version MongoDB
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geocodage import distance_km, geocoder  # noqa: E402
+import tournees  # noqa: E402
+from redis_canaux import canal_livreur
+from redis_transport import Ecoute
+from redis_geo import TYPE_OFFRE, positionner_livreur, retirer_livreur
+from redis_etats import reclamer, livrer
+
 # Connexion à Redis
 r = redis.Redis(decode_responses=True)
 LIVREUR_ID = None
-mission_en_cours = False
-# NOUVELLE VARIABLE : pour suivre l'offre sur laquelle on a misé
-bid_en_attente = None 
+SECONDES_PAR_KM = None # Durée simulée d'un km de trajet (None : durées fixes ci-dessous)
+DUREE_OFFRE_IGNOREE = 60 # Délai (s) pendant lequel une offre ignorée faute de place est reprise
+
+def accepter_offre(offre):
+    """Demande au livreur s'il accepte l'offre (remplaçable, ex: par le simulateur)."""
+    return input("Accepter cette mission ? (oui/non): ").lower() == 'oui'
+
+def duree_recuperation():
+    """Temps simulé (s) pour récupérer la commande au restaurant."""
+    return random.randint(3, 6)
 
-def ecouteur_livreur():
+def duree_trajet():
+    """Temps simulé (s) du trajet jusqu'au client."""
+    return random.randint(8, 15)
+
+def position_initiale(livreur_id):
     """
-    Écoute les offres de livraison générales et les notifications
-    concernant ses missions assignées.
+    Position de prise de service : champs 'longitude'/'latitude' du livreur s'ils
+    existent, sinon un point de Paris propre à chaque livreur (géocodage hors ligne).
     """
-    global mission_en_cours, bid_en_attente
-    pubsub = r.pubsub()
-    pubsub.subscribe(['offres_livraisons', 'notifications'])
-    
-    nom_livreur = r.hget(f"livreur:{LIVREUR_ID}", "nom")
-    print(f"🚲 Livreur {nom_livreur} ({LIVREUR_ID}) est en service et attend des missions.")
-
-    for message in pubsub.listen():
-        if message['type'] == 'message':
-            data = json.loads(message['data'])
-            channel = message['channel']
-            
-            # --- Logique de réception d'une offre ---
-            # On ne peut recevoir une offre que si on est ni en mission, ni en attente d'une réponse
-            if (channel == 'offres_livraisons' 
-                and not mission_en_cours 
-                and not bid_en_attente):
-                
-                # Vérifier si la commande n'est pas déjà prise (double sécurité)
-                if r.exists(f"commande_verrou:{data['commande_id']}"):
-                    print(f"\n[LIVREUR] Offre pour {data['commande_id']} reçue, mais déjà verrouillée. On ignore.")
-                    continue
-
-                print("\n" + "="*30)
-                print(f"[LIVREUR] Nouvelle offre de livraison !")
-                print(f"  ID Commande: {data['commande_id']}")
-                print(f"  De: {data['restaurant_adresse']}")
-                print(f"  À: {data['client_adresse']}")
-                print(f"  Rétribution: {data['retribution']}")
-                
-                reponse = input("Accepter cette mission ? (oui/non): ").lower()
-                if reponse == 'oui':
-                    # --- CORRECTION LOGIQUE ---
-                    # 1. Tenter de "verrouiller" atomiquement l'offre
-                    # SETNX = SET if Not eXists. Renvoie 1 (True) si la clé a été créée, 0 (False) si elle existait déjà.
-                    # On met une expiration (EX 60) au cas où le manager plante.
-                    a_reussi_le_lock = r.set(f"commande_verrou:{data['commande_id']}", LIVREUR_ID, nx=True, ex=60)
-
-                    if a_reussi_le_lock:
-                        # 2. On a le "lock" ! On est le premier (ou le seul) à avoir répondu.
-                        # On se met en attente de la confirmation finale du manager.
-                        bid_en_attente = data['commande_id'] 
-                        print("[LIVREUR] Offre acceptée. Envoi de la réponse au manager...")
-                        r.publish('reponses_livreurs', json.dumps({
-                            "commande_id": data['commande_id'],
-                            "livreur_id": LIVREUR_ID
-                        }))
-                    else:
-                        # 3. On n'a pas eu le lock, un autre livreur a été plus rapide.
-                        print("[LIVREUR] Trop tard ! Un autre livreur a déjà répondu.")
-                        # On ne fait rien, on reste disponible pour la prochaine offre.
-
-            # --- Logique de réception des notifications ---
-            elif channel == 'notifications':
-                type_notif = data.get('type')
-                cmd_id_notif = data.get('commande_id')
-
-                # CAS 1: C'EST POUR MOI ! J'ai gagné l'offre.
-                if (type_notif == "LIVREUR_ASSIGNE" 
-                    and data.get('livreur_id') == LIVREUR_ID):
-                    
-                    mission_en_cours = True # Je suis officiellement en mission
-                    bid_en_attente = None # Je ne suis plus en attente
-                    
-                    print(f"\n[LIVREUR] Mission confirmée pour la commande {cmd_id_notif} !")
-                    
-                    # Simuler la livraison
-                    print("[LIVREUR] Récupération de la commande...")
-                    time.sleep(random.randint(3, 6))
-                    print("[LIVREUR] En route vers l'adresse du client...")
-                    time.sleep(random.randint(8, 15))
-                    print(f"✅ [LIVREUR] Commande {cmd_id_notif} livrée !")
-                    
-                    notification_livraison = {
-                        "type": "COMMANDE_LIVREE",
-                        "commande_id": cmd_id_notif,
-                        "message": f"Votre commande {cmd_id_notif} a été livrée. Bon appétit !"
-                    }
-                    r.publish('notifications', json.dumps(notification_livraison))
-                    
-                    mission_en_cours = False # Je suis de nouveau disponible
-                    r.delete(f"commande_verrou:{cmd_id_notif}") # Nettoyer le verrou
+    longitude, latitude = r.hmget(f"livreur:{livreur_id}", ["longitude", "latitude"])
+    if longitude and latitude:
+        return float(longitude), float(latitude)
+    return geocoder(f"{livreur_id}, Paris")
+
+def duree_arret(arret, depuis):
+    """
+    Temps simulé (s) pour rejoindre un arrêt de la tournée depuis la position 'depuis'.
+    Sans SECONDES_PAR_KM (ou sans positions), une récupération prend duree_recuperation()
+    et une livraison duree_trajet() ; sinon le trajet dépend de la distance, et une
+    récupération y ajoute duree_recuperation() (passage au comptoir).
+    """
+    if SECONDES_PAR_KM is None or depuis is None or arret.get("position") is None:
+        return duree_recuperation() if arret["type"] == "recuperation" else duree_trajet()
+    deplacement = distance_km(depuis, arret["position"]) * SECONDES_PAR_KM
+    return deplacement + (duree_recuperation() if arret["type"] == "recuperation" else 0)
+
+def ecouteur_livreur(livreur_id=None):
+    """
+    Écoute les offres de livraison (diffusées à tous ou, avec le dispatch géographique,
+    envoyées sur son canal personnel). Une offre acceptée est prise par la transition
+    'reclamer' (voir redis_etats.py) : le livreur sait aussitôt s'il l'a obtenue. Tant
+    qu'il lui reste de la place (voir tournees.py), il figure dans l'index géographique
+    et accepte de nouvelles offres ; un second thread parcourt sa file d'arrêts.
+    """
+    livreur_id = livreur_id or LIVREUR_ID
+    # État propre à chaque livreur (plusieurs livreurs peuvent tourner dans un même processus),
+    # partagé avec le thread de sa tournée
+    capacite = int(r.hget(f"livreur:{livreur_id}", "capacite") or tournees.CAPACITE_LIVREUR)
+    etat = {"arrets": [], "charge": 0, "position": position_initiale(livreur_id)} # charge : commandes prises, non livrées
+    condition = threading.Condition()
+    offres_ignorees = {} # commande_id -> (instant, offre) reçues sans place libre
+    mon_canal = canal_livreur(livreur_id)
+    # Pas de groupe pour les offres : chaque livreur doit toutes les voir
+    ecoute = Ecoute(r, ['offres_livraisons'], canaux_pubsub=[mon_canal])
+
+    def mettre_a_jour_disponibilite():
+        """Dans l'index géographique tant qu'il reste de la place."""
+        with condition:
+            if etat["charge"] < capacite:
+                positionner_livreur(r, livreur_id, etat["position"])
+            else:
+                retirer_livreur(r, livreur_id)
+
+    def reprendre_offres_ignorees():
+        """Une place s'est libérée : les offres récentes ignorées faute de place sont relues (sur son canal)."""
+        with condition:
+            offres = [offre for instant, offre in offres_ignorees.values()
+                      if time.time() - instant < DUREE_OFFRE_IGNOREE]
+            offres_ignorees.clear()
+        for offre in offres:
+            r.publish(mon_canal, json.dumps(dict(offre, type=TYPE_OFFRE)))
+
+    def effectuer_tournee():
+        """Parcourt la file d'arrêts dans l'ordre : récupérations au restaurant, livraisons aux clients."""
+        precedent = None
+        while True:
+            with condition:
+                while not etat["arrets"]:
+                    condition.wait()
+                arret = etat["arrets"].pop(0)
+            commande_id = arret["commande_id"]
+            if arret["type"] == "recuperation":
+                print(f"[LIVREUR] Récupération de la commande {commande_id}...")
+                # Commandes du même restaurant : récupérées ensemble
+                meme_restaurant = (precedent is not None and precedent["type"] == "recuperation"
+                                   and arret.get("position") is not None
+                                   and precedent.get("position") == arret.get("position"))
+                if not meme_restaurant:
+                    time.sleep(duree_arret(arret, etat["position"]))
+            else:
+                print(f"[LIVREUR] En route vers le client de {commande_id}...")
+                time.sleep(duree_arret(arret, etat["position"]))
+                print(f"✅ [LIVREUR] Commande {commande_id} livrée !")
+                livrer(r, commande_id, livreur_id) # Notifie le client et le manager
+            precedent = arret
+            with condition:
+                etat["position"] = arret.get("position") or etat["position"] # Au restaurant ou chez le client
+                if arret["type"] == "livraison":
+                    etat["charge"] -= 1
+            if arret["type"] == "livraison":
+                mettre_a_jour_disponibilite() # Une place de plus : de nouveau sollicité ici
+                reprendre_offres_ignorees()
+                if not etat["charge"]:
                     print(f"\n🚲 Livreur {nom_livreur} de nouveau disponible.")
 
-                # CAS 2: J'AI PERDU L'OFFRE (ou une offre à laquelle je n'ai pas participé a été prise)
-                # Si la notif concerne la commande que j'attendais, mais qu'elle est pour qqn d'autre
-                elif (type_notif == "LIVREUR_ASSIGNE" 
-                      and cmd_id_notif == bid_en_attente 
-                      and data.get('livreur_id') != LIVREUR_ID):
-                    
-                    print(f"\n[LIVREUR] La mission {cmd_id_notif} a été assignée à {data.get('livreur_id')}.")
-                    bid_en_attente = None # Je redevient disponible pour d'autres offres
-
-                # CAS 3: L'OFFRE A EXPIRÉ ou A ÉTÉ REJETÉE
-                elif (type_notif in ["AUCUN_LIVREUR", "COMMANDE_REJETEE"] 
-                      and cmd_id_notif == bid_en_attente):
-                      
-                    print(f"\n[LIVREUR] La mission {cmd_id_notif} a été annulée/rejetée.")
-                    bid_en_attente = None # Je redeviens disponible
-                    r.delete(f"commande_verrou:{cmd_id_notif}") # Nettoyer le verrou
+    nom_livreur = r.hget(f"livreur:{livreur_id}", "nom")
+    positionner_livreur(r, livreur_id, etat["position"])
+    threading.Thread(target=effectuer_tournee, daemon=True).start()
+    print(f"🚲 Livreur {nom_livreur} ({livreur_id}) est en service et attend des missions (capacité : {capacite}).")
+
+    for channel, data in ecoute:
+        est_offre = channel == 'offres_livraisons' or (channel == mon_canal and data.get('type') == TYPE_OFFRE)
+        if not est_offre:
+            continue # Notifications des canaux globaux : la prise d'une offre se sait tout de suite
+        
+        # --- Logique de réception d'une offre ---
+        # On ne peut recevoir une offre que s'il reste assez de place
+        commandes = tournees.commandes_offre(data)
+        if etat["charge"] + len(commandes) > capacite:
+            with condition: # Plus assez de place : l'offre sera relue à la prochaine place libre
+                offres_ignorees[data['commande_id']] = (time.time(), data)
+            continue
+
+        print("\n" + "="*30)
+        print(f"[LIVREUR] Nouvelle offre de livraison !")
+        print(f"  ID Commande: {data['commande_id']}")
+        if len(commandes) > 1:
+            print(f"  Tournée: {len(commandes)} commandes ({', '.join(commandes)})")
+        print(f"  De: {data['restaurant_adresse']}")
+        print(f"  À: {data['client_adresse']}")
+        print(f"  Rétribution: {data['retribution']}")
+        
+        if accepter_offre(data):
+            # Prise atomique de l'offre (toutes les commandes d'une tournée) : un seul livreur
+            # l'obtient, et les clients sont notifiés dans le même aller-retour
+            if reclamer(r, commandes, livreur_id):
+                print(f"\n[LIVREUR] Mission confirmée pour la commande {data['commande_id']} !")
+                # Les arrêts de l'offre rejoignent la file de la tournée en cours
+                with condition:
+                    etat["arrets"] = tournees.ajouter_arrets(etat["arrets"], tournees.arrets_offre(data),
+                                                             etat["position"])
+                    etat["charge"] += len(commandes)
+                    condition.notify()
+                mettre_a_jour_disponibilite()
+            else:
+                # Un autre livreur a été plus rapide, ou l'offre a expiré
+                print("[LIVREUR] Trop tard ! L'offre n'est plus disponible.")
 
 if __name__ == "__main__":
     # Demander au livreur de s'identifier
@@ -136,4 +186,5 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        retirer_livreur(r, LIVREUR_ID) # Plus d'offres pour un livreur hors service
         print(f"\n👋 Fin de service pour le livreur {LIVREUR_ID}.")
\ No newline at end of file
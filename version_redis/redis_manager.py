@@ -1,23 +1,63 @@
+import os
+import sys
 import redis
 import time
 import json
 import threading
 from datetime import datetime
 
+# geocodage.py (à la racine) est partagé avec la version MongoDB
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geocodage import geocoder  # noqa: E402
+import tournees  # noqa: E402
+from redis_planificateur import demarrer_planificateur
+from redis_canaux import canal_restaurant, canal_suivi_manager
+from redis_transport import TRANSPORT, CONSOMMATEUR, Ecoute, commande_publication
+from redis_index import historique_commandes, indexer_commande, reconstruire_historique
+from redis_geo import (DISPATCH_GEO, DISPATCH_LOTS, RAYONS_KM, solliciter_livreurs,
+                       livreurs_candidats, proposer_affectations)
+from redis_etats import (OFFERTE, CacheCommandes, recevoir, moderer, marquer_prete, offrir, expirer,
+                         statut_commande)
+from redis_partition import INTERVALLE_BATTEMENT, Anneau, battre, quitter
+if DISPATCH_LOTS: # NumPy n'est requis que pour le dispatch par lots
+    from affectation import FENETRE_LOT_S, NB_CANDIDATS_LOT, affecter_lot  # noqa: E402
+
 # Connexion à Redis
 r = redis.Redis(decode_responses=True)
-commandes_en_attente = {} # Dictionnaire pour le suivi des commandes actives
+# Commandes actives : leur état et leurs données sont dans Redis (redis_etats.py), ce cache
+# local évite de les relire à chaque message ; l'anneau répartit les commandes entre managers
+commandes_en_attente = CacheCommandes()
+anneau = Anneau()
+DELAI_TIMEOUT_LIVREUR = 60 # Délai (s) laissé aux livreurs pour accepter une offre (réparti entre les tours du dispatch)
+stats_notifications = {"decodages": 0, "livraisons_archivees": 0} # Compteurs du suivi des livraisons
+TAILLE_PAGE_HISTORIQUE = 50 # Commandes affichées par page d'historique
+lot_commandes = [] # (commande_id, commande) prêtes en attente du prochain lot (dispatch par lots, tournées groupées)
+verrou_lot = threading.Lock()
 
 # --- Fonctions (enregistrer, timer, modérer) ---
 
-def enregistrer_commande_finale(commande_id, statut_final):
-    """Enregistre l'état final d'une commande dans la base de données Redis."""
-    if commande_id in commandes_en_attente:
-        commande_data = commandes_en_attente[commande_id]
+def enregistrer_commande_finale(commande_id, statut_final, commande_data=None):
+    """
+    Enregistre l'état final d'une commande dans la base de données Redis.
+    Sans 'commande_data', les données sont lues dans le cache (ou dans son état Redis,
+    ex: commande reçue par un autre manager, ou avant un redémarrage).
+    """
+    if commande_data is None:
+        commande_data = commandes_en_attente.lire(r, commande_id)
+    if commande_data is not None:
         
-        # Pré-calculer le nom du restaurant pour le stockage
+        # Pré-calculer le nom du restaurant et des plats pour le stockage (un seul aller-retour) :
+        # l'historique s'affiche ensuite sans relire les plats
         id_resto_sauvegarde = commande_data.get('restaurant_id', 'N/A')
-        nom_resto_sauvegarde = r.hget(f"restaurant:{id_resto_sauvegarde}", "nom") or "Restaurant inconnu"
+        plats = [dict(item) for item in commande_data.get("plats_details", [])]
+        pipe = r.pipeline(transaction=False)
+        pipe.hget(f"restaurant:{id_resto_sauvegarde}", "nom")
+        for item in plats:
+            pipe.hget(f"plat:{item.get('id_plat')}", "nom")
+        nom_resto_sauvegarde, *noms_plats = pipe.execute()
+        nom_resto_sauvegarde = nom_resto_sauvegarde or "Restaurant inconnu"
+        for item, nom_plat in zip(plats, noms_plats):
+            item.setdefault("nom", nom_plat or item.get('id_plat', '?'))
         
         commande_a_sauvegarder = {
             "date": datetime.now().isoformat(),
@@ -26,26 +66,175 @@ def enregistrer_commande_finale(commande_id, statut_final):
             "nom_restaurant": nom_resto_sauvegarde,
             "statut_final": statut_final,
             "adresse_livraison": commande_data.get("adresse_client", "N/A"),
-            "plats_details": json.dumps(commande_data.get("plats_details", [])), 
+            "plats_details": json.dumps(plats), 
             "id_livreur": commande_data.get("livreur_assigne", "N/A"),
             "total_euros": commande_data.get("total_euros", "0.00") 
         }
         
-        r.hset(f"commande:{commande_id}", mapping=commande_a_sauvegarder)
+        # Le hash et les index de l'historique (scorés par l'heure de fin) sont écrits ensemble
+        pipe = r.pipeline()
+        pipe.hset(f"commande:{commande_id}", mapping=commande_a_sauvegarder)
+        indexer_commande(pipe, commande_id, commande_a_sauvegarder, time.time())
+        pipe.execute()
         print(f"\n[MANAGER-BDD] Commande {commande_id} enregistrée: '{statut_final}'.")
         
-        del commandes_en_attente[commande_id]
-
-def demarrer_timer_livraison(commande_id):
-    """Démarre un minuteur de 60s pour trouver un livreur."""
-    def verifier_timeout():
-        time.sleep(60) # Délai d'attente
-        if commande_id in commandes_en_attente and "livreur_assigne" not in commandes_en_attente[commande_id]:
-            print(f"\n[MANAGER] TIMEOUT: Aucun livreur n'a accepté {commande_id} à temps.")
-            notification_echec = {"type": "AUCUN_LIVREUR", "commande_id": commande_id, "message": "Désolé, aucun livreur n'est disponible. Commande annulée."}
-            r.publish('notifications', json.dumps(notification_echec))
-            enregistrer_commande_finale(commande_id, "annulee_timeout")
-    threading.Thread(target=verifier_timeout, daemon=True).start()
+        commandes_en_attente.oublier(commande_id)
+
+def proposer_offre(commande_id, commande, tour=0):
+    """
+    Propose l'offre de livraison d'une commande (voir redis_geo.py) : aux livreurs
+    disponibles les plus proches du restaurant, dans le rayon du tour 'tour' (élargi
+    tout de suite tant que personne n'a reçu l'offre), sinon à tous les livreurs.
+    L'échéance suivante relance le tour d'après, ou annule la commande au dernier.
+    La transition 'offrir' (voir redis_etats.py) programme cette échéance, sauf si un
+    livreur a déjà pris la commande.
+    """
+    offre = commande["offre_livraison"]
+    position = offre.get("position_restaurant")
+    if DISPATCH_GEO and position is not None:
+        while tour < len(RAYONS_KM):
+            cibles, total = solliciter_livreurs(r, commande_id, offre, position, RAYONS_KM[tour])
+            if cibles:
+                print(f"[MANAGER] {commande_id} proposée à {len(cibles)} livreur(s) à moins de {RAYONS_KM[tour]} km "
+                      f"(le plus proche à {cibles[0][1]:.1f} km).")
+            if total: # Au moins un livreur a l'offre : on lui laisse le temps de répondre
+                commande["tour_dispatch"] = tour
+                if offrir(r, commande_id, tour, DELAI_TIMEOUT_LIVREUR / len(RAYONS_KM), commande):
+                    commandes_en_attente.ecrire(commande_id, commande)
+                return
+            tour += 1 # Personne dans ce rayon : on l'élargit sans attendre
+        print(f"[MANAGER] Aucun livreur disponible à moins de {RAYONS_KM[-1]} km : offre diffusée à tous.")
+    commande["tour_dispatch"] = len(RAYONS_KM) - 1
+    if offrir(r, commande_id, commande["tour_dispatch"], DELAI_TIMEOUT_LIVREUR, commande,
+              publication=commande_publication('offres_livraisons', offre)):
+        commandes_en_attente.ecrire(commande_id, commande)
+
+def affecter_commandes_pretes(lot, traitees):
+    """
+    Dispatch par lots (voir affectation.py) : attribue ensemble les commandes prêtes
+    (couples (commande_id, commande)) aux livreurs disponibles proches de leurs
+    restaurants. Chaque livreur retenu reçoit seul l'offre de sa commande pendant un
+    tour ; les commandes sans livreur attribué passent tout de suite par le dispatch
+    géographique. Les commandes proposées (avec celles de leur tournée) sont ajoutées
+    à 'traitees' au fur et à mesure.
+    """
+    commandes = dict(lot)
+    ids = list(commandes)
+    positions = [commandes[cid]["offre_livraison"]["position_restaurant"] for cid in ids]
+    candidats = livreurs_candidats(r, positions, RAYONS_KM[-1], NB_CANDIDATS_LOT)
+    livreur_ids = list(candidats)
+
+    debut, maintenant = time.perf_counter(), time.time()
+    affectations = affecter_lot([candidats[livreur_id] for livreur_id in livreur_ids], positions,
+                                [maintenant - commandes[cid].get("prete_depuis", maintenant) for cid in ids])
+    duree_ms = (time.perf_counter() - debut) * 1000
+    proposer_affectations(r, [(ids[j], commandes[ids[j]]["offre_livraison"], livreur_ids[i]) for i, j, _ in affectations])
+    print(f"[MANAGER] Lot de {len(ids)} commande(s) et {len(livreur_ids)} livreur(s) : {len(affectations)} affectée(s) "
+          f"en {duree_ms:.1f} ms, {sum(d for _, _, d in affectations):.1f} km au total.")
+
+    affectees = set()
+    for _, j, _ in affectations:
+        affectees.add(ids[j])
+        commandes[ids[j]]["tour_dispatch"] = 0 # Sans réponse, le dispatch géographique reprend au tour suivant
+        if offrir(r, ids[j], 0, DELAI_TIMEOUT_LIVREUR / len(RAYONS_KM), commandes[ids[j]]):
+            commandes_en_attente.ecrire(ids[j], commandes[ids[j]])
+        traitees.update(tournees.commandes_offre(commandes[ids[j]]["offre_livraison"]))
+    for cid in ids:
+        if cid not in affectees:
+            proposer_offre(cid, commandes[cid])
+            traitees.update(tournees.commandes_offre(commandes[cid]["offre_livraison"]))
+
+def regrouper_commandes(lot):
+    """
+    Tournées groupées (voir tournees.py) : regroupe les commandes prêtes (couples
+    (commande_id, commande)). Renvoie les couples à proposer ; la première commande
+    de chaque tournée porte l'offre de toute la tournée (dans une copie : le lot garde
+    les offres de chaque commande).
+    """
+    commandes = dict(lot)
+    a_proposer = []
+    for groupe, arrets in tournees.grouper([commande["offre_livraison"] for commande in commandes.values()]):
+        premiere = groupe[0]["commande_id"]
+        commande = commandes[premiere]
+        if len(groupe) > 1:
+            commande = dict(commande, offre_livraison=tournees.offre_tournee(groupe, arrets))
+            print(f"[MANAGER] Tournée de {len(groupe)} commandes ({tournees.longueur(arrets):.1f} km) : "
+                  f"{', '.join(offre['commande_id'] for offre in groupe)}.")
+        a_proposer.append((premiere, commande))
+    return a_proposer
+
+def collecte_par_lots():
+    """Les commandes prêtes attendent-elles le prochain lot (dispatch par lots ou tournées groupées) ?"""
+    return DISPATCH_LOTS or tournees.CAPACITE_LIVREUR > 1
+
+def traiter_lot(lot):
+    """
+    Regroupe en tournées les commandes prêtes du lot, puis les attribue ensemble ou les
+    propose une à une. Si le lot échoue (solveur, Redis...), chaque commande qui n'a
+    pas encore été proposée (seule ou dans sa tournée) l'est seule ; celles qui
+    échouent encore reviennent dans le lot suivant.
+    """
+    traitees = set()
+    try:
+        a_proposer = regrouper_commandes(lot) if tournees.CAPACITE_LIVREUR > 1 else lot
+        if DISPATCH_LOTS:
+            affecter_commandes_pretes(a_proposer, traitees)
+        else:
+            for commande_id, commande in a_proposer:
+                proposer_offre(commande_id, commande)
+                traitees.update(tournees.commandes_offre(commande["offre_livraison"]))
+        return
+    except Exception as e:
+        print(f"[MANAGER] Erreur du dispatch par lots : {e}. Commandes restantes proposées une à une.")
+    for commande_id, commande in lot:
+        if commande_id in traitees:
+            continue # Déjà proposée avant l'erreur (ou assignée depuis) : pas de seconde offre
+        try:
+            proposer_offre(commande_id, commande)
+        except Exception as e:
+            print(f"[MANAGER] Offre de {commande_id} impossible ({e}) : reportée au lot suivant.")
+            with verrou_lot:
+                lot_commandes.append((commande_id, commande))
+
+def dispatcher_lots():
+    """Thread des lots : à chaque fenêtre, traite les commandes prêtes entre-temps."""
+    while True:
+        time.sleep(FENETRE_LOT_S if DISPATCH_LOTS else tournees.FENETRE_REGROUPEMENT_S)
+        with verrou_lot:
+            lot = lot_commandes[:]
+            lot_commandes.clear()
+        if lot:
+            traiter_lot(lot)
+
+def traiter_timeout_livraison(commande_id):
+    """
+    Appelé par le planificateur quand l'échéance d'une commande est dépassée. Le premier
+    manager qui prend l'échéance la traite, même si la commande a été reçue par un autre.
+    """
+    commande = commandes_en_attente.lire(r, commande_id)
+    if commande is None:
+        return # Commande déjà archivée
+    tour = commande.get("tour_dispatch", len(RAYONS_KM) - 1)
+    if "offre_livraison" in commande and tour < len(RAYONS_KM) - 1:
+        if statut_commande(r, commande_id) != OFFERTE:
+            return # Un livreur a pris l'offre entre l'échéance et ce tour : personne d'autre n'est sollicité
+        print(f"\n[MANAGER] Pas de preneur pour {commande_id} : rayon élargi à {RAYONS_KM[tour + 1]} km.")
+        proposer_offre(commande_id, commande, tour + 1)
+        return
+    # Toutes les commandes de la tournée sont annulées avec la première (et leurs clients notifiés)
+    commande_ids = tournees.commandes_offre(commande.get("offre_livraison", {"commande_id": commande_id}))
+    if not expirer(r, commande_ids):
+        return # Un livreur a pris l'offre entre-temps
+    print(f"\n[MANAGER] TIMEOUT: Aucun livreur n'a accepté {commande_id} à temps.")
+    for cid in commande_ids:
+        enregistrer_commande_finale(cid, "annulee_timeout", commande if cid == commande_id else None)
+
+def demander_decision(commande_id):
+    """Demande au manager s'il accepte la commande (remplaçable, ex: par le simulateur)."""
+    decision = ""
+    while decision not in ["oui", "non"]:
+        decision = input(f"Accepter la commande {commande_id} ? (oui/non): ").lower()
+    return decision
 
 def moderer_commande(data):
     """Affiche la commande au manager et attend sa décision (oui/non)."""
@@ -76,53 +265,41 @@ def moderer_commande(data):
     
     print("="*30)
     
-    decision = ""
-    while decision not in ["oui", "non"]:
-        decision = input(f"Accepter la commande {commande_id} ? (oui/non): ").lower()
+    decision = demander_decision(commande_id)
 
+    # Transition 'moderer' : envoi au restaurant ou notification du rejet, en un aller-retour
     if decision == "oui":
         print(f"[MANAGER] Commande {commande_id} validée -> Restaurant.")
-        r.publish('commandes_restaurants', json.dumps(data))
+        moderer(r, commande_id, True, data, canal_restaurant(id_resto))
     else:
         print(f"[MANAGER] Commande {commande_id} rejetée.")
-        notification_rejet = {"type": "COMMANDE_REJETEE", "commande_id": commande_id, "message": "Votre commande a été rejetée par le manager."}
-        r.publish('notifications', json.dumps(notification_rejet))
-        enregistrer_commande_finale(commande_id, "rejetee_manager")
+        if moderer(r, commande_id, False, data, canal_restaurant(id_resto)):
+            enregistrer_commande_finale(commande_id, "rejetee_manager")
 
 # --- Fonction d'Historique ---
-def afficher_historique():
-    """Récupère, trie par date et affiche l'historique de toutes les commandes terminées."""
+def afficher_historique(before=None, statut=None, restaurant=None, livreur=None):
+    """
+    Affiche une page de l'historique des commandes terminées (de la plus récente
+    à la plus ancienne), éventuellement filtrée. Renvoie le curseur de la page
+    suivante, ou None s'il n'y en a plus.
+    """
     print("\n" + "="*50)
     print("📜 HISTORIQUE DES COMMANDES (du plus récent au plus ancien) 📜")
     print("="*50)
     
-    commandes_keys = r.keys("commande:cmd_*") 
+    commandes, curseur = historique_commandes(r, limit=TAILLE_PAGE_HISTORIQUE, before=before,
+                                              statut=statut, restaurant=restaurant, livreur=livreur)
     
-    if not commandes_keys:
+    if not commandes:
         print("Aucune commande dans l'historique pour le moment.")
-        return
-
-    # 1. Récupérer toutes les commandes dans une liste
-    all_commandes = []
-    for key in commandes_keys:
-        details = r.hgetall(key)
-        details['id'] = key.split(":")[1] # Garder l'ID
-        all_commandes.append(details)
-    
-    # 2. Trier la liste de dictionnaires par la clé 'date', en ordre décroissant (reverse=True)
-    try:
-        sorted_commandes = sorted(all_commandes, key=lambda cmd: cmd.get('date', '1970-01-01T00:00:00'), reverse=True)
-    except Exception as e:
-        print(f"Erreur lors du tri des dates : {e}. Affichage non trié.")
-        sorted_commandes = all_commandes
+        return None
 
-    # 3. Afficher la liste triée avec les détails enrichis
-    for details in sorted_commandes:
+    for details in commandes:
         cmd_id = details.get('id', 'N/A')
         id_resto = details.get('id_restaurant', 'N/A')
         
         # Utiliser le nom du restaurant déjà sauvegardé
-        nom_resto = details.get('nom_restaurant', r.hget(f"restaurant:{id_resto}", "nom") or "Restaurant inconnu")
+        nom_resto = details.get('nom_restaurant', 'Restaurant inconnu')
         
         print(f"\n--- Commande: {cmd_id} ---")
         print(f"  Date: {details.get('date', 'N/A')}")
@@ -139,98 +316,167 @@ def afficher_historique():
             for item in plats:
                 plat_id = item.get('id_plat', '?')
                 quantite = item.get('quantite', '?')
-                # Récupérer le nom du plat
-                nom_plat = r.hget(f"plat:{plat_id}", "nom") or plat_id
+                # Nom du plat enregistré avec la commande (anciennes commandes : l'ID)
+                nom_plat = item.get('nom', plat_id)
                 print(f"    - {quantite}x {nom_plat} ({plat_id})")
         except json.JSONDecodeError:
             print("  Contenu: Erreur de format")
             
     print("="*50)
-    print(f"Commandes Redis utilisées : KEYS, HGETALL, HGET")
+    if curseur is not None:
+        print("Tapez 'suite' pour la page suivante.")
+    print(f"Commandes Redis utilisées : ZREVRANGEBYSCORE, HGETALL (pipeline)")
+    return curseur
+
+def lire_filtres_historique(saisie):
+    """Lit les filtres d'une commande 'historique statut=livree restaurant=rest_01 livreur=livr_01'."""
+    filtres = {}
+    for argument in saisie.split()[1:]:
+        nom, _, valeur = argument.partition("=")
+        if nom in ("statut", "restaurant", "livreur") and valeur:
+            filtres[nom] = valeur
+        else:
+            print(f"Filtre ignoré : '{argument}' (statut=, restaurant= ou livreur=)")
+    return filtres
+
+# --- Répartition entre managers ---
+def est_responsable(commande_id, canal=None):
+    """
+    Ce manager doit-il traiter ce message ? En Pub/Sub, oui si la commande lui revient
+    sur l'anneau (voir redis_partition.py) ; en mode streams, les messages de passage
+    de commande ('canal') sont déjà répartis par le groupe de consommateurs.
+    """
+    if canal is not None and TRANSPORT == "streams":
+        return True
+    responsable = anneau.responsable(commande_id)
+    return responsable is None or responsable == CONSOMMATEUR
+
+def maintenir_anneau():
+    """Thread du battement : annonce ce manager et met à jour l'anneau des managers vivants."""
+    while True:
+        try:
+            anneau.remplacer(battre(r, CONSOMMATEUR))
+        except redis.RedisError as e:
+            print(f"[MANAGER] Erreur du battement : {e}")
+        time.sleep(INTERVALLE_BATTEMENT)
 
 # --- Thread d'Écoute  ---
 def ecouteur_commandes():
-    """Thread qui écoute les messages Pub/Sub."""
-    pubsub = r.pubsub()
-    pubsub.subscribe(['commandes_clients', 'commandes_pretes', 'reponses_livreurs'])
+    """
+    Thread qui écoute les messages des clients et des restaurants (Pub/Sub ou Streams).
+    Les livreurs prennent les offres eux-mêmes (transition 'reclamer' de redis_etats.py).
+    """
+    # En mode streams, les managers du groupe "managers" se partagent les messages ;
+    # en Pub/Sub, chacun ne garde que ceux de ses commandes (anneau), et la transition
+    # 'recevoir' écarte les doublons pendant un changement de l'anneau
+    ecoute = Ecoute(r, ['commandes_clients', 'commandes_pretes'], groupe="managers")
     print("🤖 Manager en ligne. Tapez 'historique' pour voir les commandes passées, 'quitter' pour arrêter.")
+    print("(Filtres possibles : 'historique statut=livree restaurant=rest_01 livreur=livr_01', puis 'suite'.)")
     print("(Note : Lorsqu'une commande arrive, vous serez invité à la modérer en appuyant sur Entrée.)")
 
-    for message in pubsub.listen():
-        if message['type'] == 'message':
-            channel = message['channel']
-            try:
-                data = json.loads(message['data'])
-            except json.JSONDecodeError:
-                print(f"[MANAGER] Erreur: Message non-JSON reçu sur {channel}")
-                continue
+    for channel, data in ecoute:
+        if not est_responsable(data.get('commande_id'), channel):
+            continue # Commande d'un autre manager
 
-            if channel == 'commandes_clients':
-                commandes_en_attente[data['commande_id']] = data
+        if channel == 'commandes_clients':
+            if recevoir(r, data['commande_id'], data):
+                commandes_en_attente.ecrire(data['commande_id'], data)
                 threading.Thread(target=moderer_commande, args=(data,)).start()
 
-            elif channel == 'commandes_pretes':
-                commande_id = data['commande_id']
-                if commande_id in commandes_en_attente:
-                    print(f"\n[MANAGER] {commande_id} prête. Recherche livreur...")
-                    
-                    id_resto = commandes_en_attente[commande_id].get('restaurant_id', 'N/A')
-                    adresse_resto = r.hget(f"restaurant:{id_resto}", "adresse") or "Adresse inconnue"
-                    
-                    offre = {
-                        "commande_id": commande_id,
-                        "restaurant_adresse": adresse_resto,
-                        "client_adresse": commandes_en_attente[commande_id].get('adresse_client', 'N/A'),
-                        "retribution": "8€" # Exemple
-                    }
-                    r.publish('offres_livraisons', json.dumps(offre))
-                    demarrer_timer_livraison(commande_id)
-            
-            elif channel == 'reponses_livreurs':
-                commande_id = data['commande_id']
-                livreur_id = data['livreur_id']
-                if commande_id in commandes_en_attente and "livreur_assigne" not in commandes_en_attente[commande_id]:
-                    print(f"\n[MANAGER] {livreur_id} accepte {commande_id}.")
-                    commandes_en_attente[commande_id]["livreur_assigne"] = livreur_id
-                    
-                    notification = {
-                        "type": "LIVREUR_ASSIGNE", "commande_id": commande_id,
-                        "livreur_id": livreur_id,
-                        "message": f"Livreur {livreur_id} assigné."
-                    }
-                    r.publish('notifications', json.dumps(notification))
-
-                    # Écoute pour sauvegarder après livraison
-                    def attendre_livraison_et_sauvegarder(cmd_id):
-                        r_thread = redis.Redis(decode_responses=True)
-                        ps = r_thread.pubsub(ignore_subscribe_messages=True)
-                        ps.subscribe("notifications")
-                        for msg in ps.listen():
-                            try:
-                                notif_data = json.loads(msg['data'])
-                                if notif_data.get("type") == "COMMANDE_LIVREE" and notif_data.get("commande_id") == cmd_id:
-                                    enregistrer_commande_finale(cmd_id, "livree")
-                                    ps.unsubscribe()
-                                    break
-                            except json.JSONDecodeError:
-                                print(f"[Thread Sauvegarde] Erreur décodage message: {msg.get('data')}")
-                    
-                    threading.Thread(target=attendre_livraison_et_sauvegarder, args=(commande_id,), daemon=True).start()
+        elif channel == 'commandes_pretes':
+            commande_id = data['commande_id']
+            commande = commandes_en_attente.lire(r, commande_id) # Relue dans Redis si besoin
+            if commande is not None:
+                id_resto = commande.get('restaurant_id', 'N/A')
+                adresse_resto = r.hget(f"restaurant:{id_resto}", "adresse") or "Adresse inconnue"
+                
+                offre = {
+                    "commande_id": commande_id,
+                    "restaurant_adresse": adresse_resto,
+                    "client_adresse": commande.get('adresse_client', 'N/A'),
+                    "position_restaurant": geocoder(adresse_resto),
+                    "position_client": geocoder(commande.get('adresse_client')),
+                    "retribution": "8€" # Exemple
+                }
+                commande["offre_livraison"] = offre
+                commande["prete_depuis"] = time.time()
+                if not marquer_prete(r, commande_id, commande):
+                    continue # Doublon, ou commande annulée entre-temps
+                print(f"\n[MANAGER] {commande_id} prête. Recherche livreur...")
+                commandes_en_attente.ecrire(commande_id, commande)
+                if collecte_par_lots() and offre["position_restaurant"] is not None:
+                    with verrou_lot:
+                        lot_commandes.append((commande_id, commande)) # Attribuée au prochain lot
+                else:
+                    proposer_offre(commande_id, commande)
+
+# --- Thread unique de suivi des livraisons ---
+def ecouteur_livraisons():
+    """
+    Unique consommateur des notifications côté manager : chaque message
+    est décodé une seule fois, puis les COMMANDE_LIVREE des commandes de
+    ce manager (anneau) sont archivées, leurs données lues dans le cache.
+    En mode routé, seul le canal 'notifications:manager' est écouté.
+    """
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(canal_suivi_manager())
+    for msg in pubsub.listen():
+        try:
+            notif_data = json.loads(msg['data'])
+        except json.JSONDecodeError:
+            print(f"[Suivi Livraisons] Erreur décodage message: {msg.get('data')}")
+            continue
+        stats_notifications["decodages"] += 1
+
+        if notif_data.get("type") == "COMMANDE_LIVREE":
+            cmd_id = notif_data.get("commande_id")
+            if not est_responsable(cmd_id):
+                continue
+            commande = commandes_en_attente.lire(r, cmd_id)
+            if commande is not None:
+                commande["livreur_assigne"] = notif_data.get("livreur_id", "N/A")
+                stats_notifications["livraisons_archivees"] += 1
+                enregistrer_commande_finale(cmd_id, "livree", commande)
+
+# --- Démarrage des threads du Manager ---
+def demarrer_manager():
+    """
+    Lance les threads du manager : battement (anneau des managers), planificateur,
+    écoute des commandes et suivi des livraisons.
+    """
+    anneau.remplacer(battre(r, CONSOMMATEUR))
+    threading.Thread(target=maintenir_anneau, daemon=True).start()
+    # Un seul thread pour toutes les échéances (reprend celles laissées par un manager précédent)
+    demarrer_planificateur(r, traiter_timeout_livraison)
+    nb_reindexees = reconstruire_historique(r)
+    if nb_reindexees:
+        print(f"[MANAGER-BDD] {nb_reindexees} commandes archivées ajoutées à l'index de l'historique.")
 
-# --- Boucle Principale pour l'Interaction Manager ---
-if __name__ == "__main__":
     thread_ecoute = threading.Thread(target=ecouteur_commandes, daemon=True)
     thread_ecoute.start()
+    thread_livraisons = threading.Thread(target=ecouteur_livraisons, daemon=True)
+    thread_livraisons.start()
+    if collecte_par_lots():
+        threading.Thread(target=dispatcher_lots, daemon=True).start()
+
+# --- Boucle Principale pour l'Interaction Manager ---
+if __name__ == "__main__":
+    demarrer_manager()
     
+    filtres_historique, curseur_historique = {}, None
     try:
         while True:
-            commande_manager = input().strip().lower()
-            if commande_manager == 'historique':
-                afficher_historique()
-            elif commande_manager == 'quitter':
+            commande_manager = input().strip()
+            if commande_manager.lower().startswith('historique'):
+                filtres_historique = lire_filtres_historique(commande_manager)
+                curseur_historique = afficher_historique(**filtres_historique)
+            elif commande_manager.lower() == 'suite' and curseur_historique is not None:
+                curseur_historique = afficher_historique(before=curseur_historique, **filtres_historique)
+            elif commande_manager.lower() == 'quitter':
                 break
             
     except KeyboardInterrupt:
         print("\n👋 Arrêt manuel du Manager.")
     finally:
+        quitter(r, CONSOMMATEUR) # Ses commandes passent tout de suite aux autres managers
         print("Fin du programme Manager.")
\ No newline at end of file
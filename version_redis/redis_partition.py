@@ -0,0 +1,64 @@
+import time
+import bisect
+import hashlib
+
+# --- Répartition des commandes entre plusieurs managers ---
+# Chaque manager s'annonce toutes les INTERVALLE_BATTEMENT secondes dans le ZSET
+# CLE_MANAGERS (score : heure de son dernier battement). Les managers vivants forment
+# un anneau de hachage cohérent (NB_POINTS_VIRTUELS points chacun) : une commande est
+# traitée par le premier manager qui suit son hash sur l'anneau. En Pub/Sub, chaque
+# manager reçoit tous les messages et ignore ceux des commandes des autres ; en mode
+# streams, le groupe de consommateurs "managers" répartit déjà les messages.
+# L'état des commandes est dans Redis (voir redis_etats.py) : quand un manager arrive
+# ou disparaît, seule la part des commandes qui change de manager est relue par son
+# nouveau responsable. Un manager silencieux depuis DELAI_ABSENCE est retiré de l'anneau
+# (en Pub/Sub, les messages de ses commandes publiés entre-temps sont perdus).
+CLE_MANAGERS = "managers:actifs"   # ZSET : manager -> heure du dernier battement
+NB_POINTS_VIRTUELS = 128           # Points de chaque manager sur l'anneau (équilibre des parts)
+INTERVALLE_BATTEMENT = 1.0
+DELAI_ABSENCE = 3.0
+
+
+def position(cle):
+    """Position d'une clé sur l'anneau (64 bits du MD5 : bien répartie, indépendante du processus)."""
+    return int.from_bytes(hashlib.md5(cle.encode()).digest()[:8], "big")
+
+
+class Anneau:
+    """Anneau de hachage cohérent des managers vivants."""
+
+    def __init__(self, managers=()):
+        self.points = ([], [])
+        self.membres = None
+        self.remplacer(managers)
+
+    def remplacer(self, managers):
+        """Reconstruit l'anneau si la liste des managers a changé (remplacement atomique)."""
+        if sorted(managers) == self.membres:
+            return
+        self.membres = sorted(managers)
+        points = sorted((position(f"{manager}#{i}"), manager)
+                        for manager in managers for i in range(NB_POINTS_VIRTUELS))
+        self.points = ([p for p, _ in points], [manager for _, manager in points])
+
+    def responsable(self, commande_id):
+        """Manager chargé d'une commande, ou None si l'anneau est vide."""
+        positions, managers = self.points
+        if not managers:
+            return None
+        return managers[bisect.bisect(positions, position(commande_id)) % len(managers)]
+
+
+def battre(r, manager_id):
+    """Annonce le manager, oublie les managers absents et renvoie les managers vivants (un aller-retour)."""
+    maintenant = time.time()
+    pipe = r.pipeline(transaction=False)
+    pipe.zadd(CLE_MANAGERS, {manager_id: maintenant})
+    pipe.zremrangebyscore(CLE_MANAGERS, "-inf", maintenant - DELAI_ABSENCE)
+    pipe.zrange(CLE_MANAGERS, 0, -1)
+    return pipe.execute()[2]
+
+
+def quitter(r, manager_id):
+    """Retire le manager de l'anneau (arrêt propre) : ses commandes passent aux autres."""
+    r.zrem(CLE_MANAGERS, manager_id)
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import redis
+
+# --- Planificateur d'échéances basé sur un Sorted Set Redis ---
+# Au lieu d'un thread endormi par commande, chaque échéance est un membre
+# du ZSET CLE_ECHEANCES dont le score est le timestamp d'expiration.
+# Un seul thread "draine" les échéances expirées. Comme tout est dans Redis,
+# les échéances survivent à un redémarrage du manager. Elles sont programmées et
+# annulées par les transitions de redis_etats.py, qui enregistrent aussi les données
+# de la commande avec son état. Une erreur Redis passagère ne
+# fait que sauter un tour, et une échéance dont le traitement échoue est reprogrammée.
+
+CLE_ECHEANCES = "echeances:livraison"          # ZSET : commande_id -> timestamp d'expiration
+TAILLE_LOT = 100                               # Nombre max d'échéances traitées par tour
+INTERVALLE_MAX = 0.5                           # Attente max (s) entre deux vérifications
+DELAI_NOUVEL_ESSAI = 5.0                       # Report (s) d'une échéance dont le traitement a échoué
+
+
+def recuperer_echeances_expirees(r, maintenant=None, lot=TAILLE_LOT):
+    """
+    Retire du ZSET les échéances expirées et renvoie les identifiants des commandes
+    prises. Le ZREM sert de "prise" atomique : si deux managers voient la même
+    échéance, un seul obtient 1 et la traite.
+    """
+    if maintenant is None:
+        maintenant = time.time()
+    commande_ids = r.zrangebyscore(CLE_ECHEANCES, "-inf", maintenant, start=0, num=lot)
+    if not commande_ids:
+        return []
+
+    pipe = r.pipeline()
+    for commande_id in commande_ids:
+        pipe.zrem(CLE_ECHEANCES, commande_id)
+    prises = pipe.execute()
+    return [cmd_id for cmd_id, prise in zip(commande_ids, prises) if prise == 1]
+
+
+def traiter_echeances(r, traiter_expiration, intervalle=INTERVALLE_MAX):
+    """
+    Un tour du planificateur : appelle traiter_expiration(commande_id) pour chaque
+    échéance expirée et renvoie l'attente (s) avant le tour suivant.
+    """
+    expirees = recuperer_echeances_expirees(r)
+    for commande_id in expirees:
+        try:
+            traiter_expiration(commande_id)
+        except Exception as e:
+            # L'échéance a déjà été prise (ZREM) : on la remet pour un nouvel essai
+            print(f"[PLANIFICATEUR] Erreur lors du traitement de {commande_id} : {e} (nouvel essai dans "
+                  f"{DELAI_NOUVEL_ESSAI:.0f} s)")
+            r.zadd(CLE_ECHEANCES, {commande_id: time.time() + DELAI_NOUVEL_ESSAI})
+
+    if len(expirees) == TAILLE_LOT:
+        return 0.0  # Il reste probablement des échéances expirées, on enchaîne
+
+    # Dormir jusqu'à la prochaine échéance (sans dépasser 'intervalle')
+    prochaine = r.zrange(CLE_ECHEANCES, 0, 0, withscores=True)
+    if prochaine:
+        return min(intervalle, max(0.0, prochaine[0][1] - time.time()))
+    return intervalle
+
+
+def boucle_planificateur(r, traiter_expiration, arret=None, intervalle=INTERVALLE_MAX):
+    """Boucle unique qui appelle traiter_expiration(commande_id) à chaque échéance."""
+    if arret is None:
+        arret = threading.Event()
+    while not arret.is_set():
+        try:
+            attente = traiter_echeances(r, traiter_expiration, intervalle)
+        except redis.RedisError as e:
+            # Connexion perdue, timeout... : le thread survit, on réessaie au tour suivant
+            print(f"[PLANIFICATEUR] Erreur Redis : {e}")
+            attente = intervalle
+        arret.wait(attente)
+
+
+def demarrer_planificateur(r, traiter_expiration, arret=None, intervalle=INTERVALLE_MAX):
+    """Lance la boucle du planificateur dans un unique thread démon."""
+    thread = threading.Thread(
+        target=boucle_planificateur,
+        args=(r, traiter_expiration, arret, intervalle),
+        daemon=True
+    )
+    thread.start()
+    return thread
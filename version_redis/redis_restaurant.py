@@ -1,51 +1,55 @@
 import redis
 import time
-import json
 import threading
 import random
 
+from redis_canaux import canal_restaurant
+from redis_transport import Ecoute, publier
+
 # Connexion à Redis
 r = redis.Redis(decode_responses=True)
 RESTAURANT_ID = None
 
-def ecouteur_restaurant():
+def duree_preparation():
+    """Temps de préparation simulé en secondes (remplaçable, ex: par le simulateur)."""
+    return random.randint(5, 12)
+
+def ecouteur_restaurant(restaurant_id=None):
     """
     Écoute les commandes envoyées par le manager, simule leur préparation,
     et notifie quand elles sont prêtes.
     """
-    pubsub = r.pubsub()
-    pubsub.subscribe('commandes_restaurants')
+    restaurant_id = restaurant_id or RESTAURANT_ID
+    # En mode streams, plusieurs processus d'un même restaurant se partagent les commandes
+    ecoute = Ecoute(r, [canal_restaurant(restaurant_id)], groupe=f"restaurants:{restaurant_id}")
     
     # Récupérer le nom du restaurant pour un affichage plus convivial
-    nom_restaurant = r.hget(f"restaurant:{RESTAURANT_ID}", "nom")
-    print(f"🍽️  Restaurant '{nom_restaurant}' ({RESTAURANT_ID}) est ouvert et attend les commandes.")
+    nom_restaurant = r.hget(f"restaurant:{restaurant_id}", "nom")
+    print(f"🍽️  Restaurant '{nom_restaurant}' ({restaurant_id}) est ouvert et attend les commandes.")
 
-    for message in pubsub.listen():
-        if message['type'] == 'message':
-            data = json.loads(message['data'])
+    for _canal, data in ecoute:
+        # Le restaurant ne réagit que si la commande est pour lui (utile en mode canaux globaux)
+        if data.get('restaurant_id') == restaurant_id:
+            commande_id = data['commande_id']
+            print(f"\n[RESTAURANT] Nouvelle commande reçue : {commande_id}")
             
-            # Le restaurant ne réagit que si la commande est pour lui
-            if data.get('restaurant_id') == RESTAURANT_ID:
-                commande_id = data['commande_id']
-                print(f"\n[RESTAURANT] Nouvelle commande reçue : {commande_id}")
-                
-                # Afficher le détail des plats commandés
-                print("  - Contenu à préparer :")
-                for item in data['plats_details']:
-                    plat_id = item['id_plat']
-                    quantite = item['quantite']
-                    nom_plat = r.hget(f"plat:{plat_id}", "nom") or "Plat inconnu"
-                    print(f"    - {quantite}x {nom_plat}")
+            # Afficher le détail des plats commandés
+            print("  - Contenu à préparer :")
+            for item in data['plats_details']:
+                plat_id = item['id_plat']
+                quantite = item['quantite']
+                nom_plat = r.hget(f"plat:{plat_id}", "nom") or "Plat inconnu"
+                print(f"    - {quantite}x {nom_plat}")
 
-                # Simuler le temps de préparation
-                temps_preparation = random.randint(5, 12)
-                print(f"[RESTAURANT] Préparation en cours... (environ {temps_preparation} secondes)")
-                time.sleep(temps_preparation)
-                
-                print(f"✅ [RESTAURANT] La commande {commande_id} est prête pour la livraison !")
-                
-                # Notifier le manager que la commande est prête
-                r.publish('commandes_pretes', json.dumps({"commande_id": commande_id}))
+            # Simuler le temps de préparation
+            temps_preparation = duree_preparation()
+            print(f"[RESTAURANT] Préparation en cours... (environ {temps_preparation} secondes)")
+            time.sleep(temps_preparation)
+            
+            print(f"✅ [RESTAURANT] La commande {commande_id} est prête pour la livraison !")
+            
+            # Notifier le manager que la commande est prête
+            publier(r, 'commandes_pretes', {"commande_id": commande_id})
 
 if __name__ == "__main__":
     # Demander au restaurateur de s'identifier
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import socket
+
+import redis
+
+# --- Transport des messages de passage de commande ---
+# Les échanges entre acteurs (commandes_clients, commandes_restaurants, commandes_pretes,
+# offres_livraisons) passent par ce module. Deux modes :
+#   - "pubsub"  (défaut) : PUBLISH/SUBSCRIBE, comme à l'origine. Un message publié
+#                          quand personne n'écoute est perdu.
+#   - "streams"          : XADD dans un flux Redis 'flux:<canal>', lu par XREADGROUP.
+#                          Les messages survivent à l'arrêt d'un acteur, plusieurs
+#                          processus d'un même groupe se partagent le travail, et les
+#                          messages non acquittés d'un processus planté sont repris
+#                          par XAUTOCLAIM.
+# Les notifications (suivi client/livreur) restent en Pub/Sub dans les deux modes.
+TRANSPORT = os.environ.get("UBEREATS_TRANSPORT", "pubsub")
+CONSOMMATEUR = os.environ.get("UBEREATS_CONSOMMATEUR", f"{socket.gethostname()}-{os.getpid()}")
+TAILLE_LOT = int(os.environ.get("UBEREATS_TAILLE_LOT", "10"))  # Messages lus par XREADGROUP
+DELAI_REPRISE_MS = 30_000      # Un message non acquitté depuis ce délai est repris (XAUTOCLAIM)
+INTERVALLE_REPRISE = 5         # Fréquence (s) des vérifications XAUTOCLAIM
+BLOCAGE_MS = 2_000             # Attente max d'un XREADGROUP sans abonnement Pub/Sub
+BLOCAGE_COURT_MS = 100         # Attente max quand des canaux Pub/Sub doivent aussi être lus
+LONGUEUR_MAX_FLUX = 100_000    # Taille approximative conservée par flux (MAXLEN ~)
+
+
+def cle_flux(canal):
+    """Nom de la clé Redis du flux associé à un canal."""
+    return f"flux:{canal}"
+
+
+def publier(r, canal, data):
+    """Envoie un message sur un canal avec le transport configuré."""
+    message = json.dumps(data)
+    if TRANSPORT == "streams":
+        r.xadd(cle_flux(canal), {"data": message}, maxlen=LONGUEUR_MAX_FLUX, approximate=True)
+    else:
+        r.publish(canal, message)
+
+
+def commande_publication(canal, data):
+    """Commande Redis (liste d'arguments) qui envoie un message avec le transport configuré (ex: depuis un script Lua)."""
+    message = json.dumps(data)
+    if TRANSPORT == "streams":
+        return ["XADD", cle_flux(canal), "MAXLEN", "~", str(LONGUEUR_MAX_FLUX), "*", "data", message]
+    return ["PUBLISH", canal, message]
+
+
+def _decoder(canal, brut):
+    try:
+        return json.loads(brut)
+    except (TypeError, json.JSONDecodeError):
+        print(f"[TRANSPORT] Erreur: Message non-JSON reçu sur {canal}")
+        return None
+
+
+class Ecoute:
+    """
+    Itérable produisant des tuples (canal, data) pour les canaux écoutés.
+
+    - 'canaux'        : canaux de passage de commande (Pub/Sub ou flux selon TRANSPORT) ;
+    - 'groupe'        : groupe de consommateurs (mode streams). Chaque message n'est
+                        traité que par un membre du groupe. Sans groupe, chaque écoute
+                        reçoit tous les messages (ex: les offres pour les livreurs) ;
+    - 'canaux_pubsub' : canaux toujours écoutés en Pub/Sub (notifications), modifiables
+                        avec abonner()/desabonner().
+
+    En mode streams, un message est acquitté (XACK) une fois que la boucle appelante
+    a fini de le traiter et demande le suivant : un acteur qui plante en cours de
+    traitement laisse le message en attente, et il sera repris.
+    """
+
+    def __init__(self, r, canaux, groupe=None, canaux_pubsub=()):
+        self.r = r
+        self.canaux = list(canaux)
+        self.groupe = groupe
+        self.pubsub = r.pubsub(ignore_subscribe_messages=True)
+        self.canaux_pubsub = set(canaux_pubsub)
+
+        if TRANSPORT == "streams":
+            self.canal_par_cle = {cle_flux(c): c for c in self.canaux}
+            if groupe:
+                for cle in self.canal_par_cle:
+                    try:
+                        # Id "0" : un groupe créé tardivement traite aussi les messages déjà en attente
+                        r.xgroup_create(cle, groupe, id="0", mkstream=True)
+                    except redis.exceptions.ResponseError as e:
+                        if "BUSYGROUP" not in str(e):
+                            raise
+            else:
+                # Lecture "fan-out" : on part du dernier message existant de chaque flux
+                self.derniers_ids = {}
+                for cle in self.canal_par_cle:
+                    dernier = r.xrevrange(cle, count=1)
+                    self.derniers_ids[cle] = dernier[0][0] if dernier else "0-0"
+        else:
+            self.canaux_pubsub.update(self.canaux)
+
+        if self.canaux_pubsub:
+            self.pubsub.subscribe(*self.canaux_pubsub)
+
+    def abonner(self, canal):
+        """Ajoute un canal Pub/Sub à l'écoute."""
+        if canal not in self.canaux_pubsub:
+            self.canaux_pubsub.add(canal)
+            self.pubsub.subscribe(canal)
+
+    def desabonner(self, canal):
+        """Retire un canal Pub/Sub de l'écoute."""
+        if canal in self.canaux_pubsub:
+            self.canaux_pubsub.discard(canal)
+            self.pubsub.unsubscribe(canal)
+
+    def __iter__(self):
+        if TRANSPORT == "streams":
+            return self._iterer_flux()
+        return self._iterer_pubsub()
+
+    def _iterer_pubsub(self):
+        for message in self.pubsub.listen():
+            if message['type'] != 'message':
+                continue
+            data = _decoder(message['channel'], message['data'])
+            if data is not None:
+                yield message['channel'], data
+
+    def _messages_pubsub_en_attente(self):
+        """Vide (sans bloquer) les messages Pub/Sub déjà reçus."""
+        messages = []
+        if not self.canaux_pubsub:
+            return messages
+        while True:
+            message = self.pubsub.get_message(timeout=0)
+            if message is None:
+                return messages
+            if message['type'] == 'message':
+                data = _decoder(message['channel'], message['data'])
+                if data is not None:
+                    messages.append((message['channel'], data))
+
+    def _reprendre_messages_orphelins(self):
+        """XAUTOCLAIM des messages restés non acquittés trop longtemps dans le groupe."""
+        repris = []
+        for cle in self.canal_par_cle:
+            resultat = self.r.xautoclaim(cle, self.groupe, CONSOMMATEUR,
+                                         min_idle_time=DELAI_REPRISE_MS, start_id="0-0",
+                                         count=TAILLE_LOT)
+            for message_id, champs in resultat[1]:
+                if champs:  # Les entrées supprimées du flux sont renvoyées vides
+                    repris.append((cle, message_id, champs))
+        if repris:
+            print(f"[TRANSPORT] {len(repris)} message(s) repris après l'arrêt d'un autre acteur.")
+        return repris
+
+    def _lire_flux(self, blocage_ms):
+        """Lit un lot de messages sur tous les flux (XREADGROUP ou XREAD)."""
+        if self.groupe:
+            reponse = self.r.xreadgroup(self.groupe, CONSOMMATEUR,
+                                        {cle: ">" for cle in self.canal_par_cle},
+                                        count=TAILLE_LOT, block=blocage_ms)
+        else:
+            reponse = self.r.xread(self.derniers_ids, count=TAILLE_LOT, block=blocage_ms)
+        lot = []
+        for cle, entrees in reponse or []:
+            for message_id, champs in entrees:
+                lot.append((cle, message_id, champs))
+                if not self.groupe:
+                    self.derniers_ids[cle] = message_id
+        return lot
+
+    def _iterer_flux(self):
+        derniere_reprise = 0.0
+        a_acquitter = []
+        while True:
+            if a_acquitter:
+                pipe = self.r.pipeline(transaction=False)
+                for cle, message_id in a_acquitter:
+                    pipe.xack(cle, self.groupe, message_id)
+                pipe.execute()
+                a_acquitter = []
+
+            yield from self._messages_pubsub_en_attente()
+
+            lot = []
+            if self.groupe and time.time() - derniere_reprise >= INTERVALLE_REPRISE:
+                lot = self._reprendre_messages_orphelins()
+                derniere_reprise = time.time()
+            if not lot:
+                blocage = BLOCAGE_COURT_MS if self.canaux_pubsub else BLOCAGE_MS
+                lot = self._lire_flux(blocage)
+
+            for cle, message_id, champs in lot:
+                canal = self.canal_par_cle[cle]
+                data = _decoder(canal, champs.get("data"))
+                if data is not None:
+                    yield canal, data
+                if self.groupe:
+                    a_acquitter.append((cle, message_id))
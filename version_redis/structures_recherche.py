@@ -0,0 +1,39 @@
+# Structure en mémoire du client : le catalogue en lecture seule chargé depuis le
+# snapshot (redis_catalogue.py). Les recherches par nom et par préfixe interrogent
+# l'index d'autocomplétion partagé de redis_index.py.
+
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+# --- Catalogue figé (chargé depuis le snapshot) ---
+
+class RestaurantsFiges(Mapping):
+    """
+    Dictionnaire {id_restaurant: données} en lecture seule stocké en colonnes
+    (une liste par champ, IDs triés) : rien n'est construit au chargement,
+    le dictionnaire d'un restaurant est créé quand on y accède.
+    """
+    def __init__(self, ids, colonnes):
+        self.ids = ids
+        self.colonnes = colonnes  # {champ: [valeur par restaurant]}
+
+    def position(self, rest_id):
+        i = bisect_left(self.ids, rest_id)
+        if i == len(self.ids) or self.ids[i] != rest_id:
+            raise KeyError(rest_id)
+        return i
+
+    def ligne(self, i):
+        data = {champ: valeurs[i] for champ, valeurs in self.colonnes.items() if valeurs[i] is not None}
+        data['id_restaurant'] = self.ids[i]
+        return data
+
+    def __getitem__(self, rest_id):
+        return self.ligne(self.position(rest_id))
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)